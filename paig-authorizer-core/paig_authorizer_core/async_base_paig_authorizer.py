@@ -1,5 +1,6 @@
+import logging
 from abc import abstractmethod, ABC
-from typing import Dict, List
+from typing import Awaitable, Dict, List
 
 from paig_authorizer_core.async_paig_authorizer import AsyncPAIGAuthorizer
 from paig_authorizer_core.constants import VectorDBType, GROUP_PUBLIC
@@ -15,12 +16,15 @@ from paig_authorizer_core.utils.authorizer_response_utils import create_authoriz
 from paig_authorizer_core.utils.authorizer_utils import get_authorization_and_masked_traits, \
     find_first_deny_policy, \
     check_explicit_application_access
+from paig_authorizer_core.utils.fetch_plan import FetchPlan
 from paig_authorizer_core.models.data_models import AIApplicationData
 from paig_authorizer_core.models.data_models import AIApplicationConfigData
 from paig_authorizer_core.models.data_models import AIApplicationPolicyData
 from paig_authorizer_core.models.data_models import VectorDBData
 from paig_authorizer_core.models.data_models import VectorDBPolicyData
 
+logger = logging.getLogger(__name__)
+
 
 class AsyncBasePAIGAuthorizer(AsyncPAIGAuthorizer, ABC):
 
@@ -149,10 +153,59 @@ class AsyncBasePAIGAuthorizer(AsyncPAIGAuthorizer, ABC):
 
         return request
 
+    async def run_fetch(self, fetch: Awaitable):
+        """
+        Runs a lookup started in its own task by the fetch plan of an authorization. The lookups running at the same
+        time share the resources of the authorizer, the subclasses which cannot share them, like a database session,
+        override this method to give the lookup its own.
+
+        Args:
+            fetch (Awaitable): The lookup.
+
+        Returns:
+            The result of the lookup.
+        """
+        return await fetch
+
+    # noinspection PyMethodMayBeStatic
+    def report_fetch_timings(self, operation: str, request: AuthzRequest | VectorDBAuthzRequest,
+                             timings: Dict[str, float]):
+        """
+        Reports the duration of the lookups of an authorization.
+
+        Args:
+            operation (str): The authorization operation.
+            request (AuthzRequest | VectorDBAuthzRequest): The authorization request.
+            timings (Dict[str, float]): The duration of each stage in milliseconds.
+        """
+        logger.debug(f"{operation} of application {request.application_key} fetch timings in ms: {timings}")
+
+    def start_user_lookups(self, authz_request: AuthzRequest | VectorDBAuthzRequest, fetch_plan: FetchPlan):
+        """
+        Starts the enrichment of the request and the lookup of the user groups, which only depend on the user.
+
+        Args:
+            authz_request (AuthzRequest | VectorDBAuthzRequest): The authorization request.
+            fetch_plan (FetchPlan): The fetch plan of the authorization.
+
+        Returns:
+            tuple: The tasks of the enriched request and of the user groups.
+        """
+        request_task = fetch_plan.start("enrich_request", self.enrich_authorization_request(authz_request))
+
+        async def get_user_groups():
+            request = await request_task
+            return await fetch_plan.run("user_groups", self.get_user_groups(request.user_id))
+
+        return request_task, fetch_plan.start("user_lookups", get_user_groups())
+
     async def authorize(self, authz_request: AuthzRequest) -> AuthzResponse:
         """
         Authorizes a request based on user groups, application details, policies, and configurations.
 
+        The user lookups run together with the application lookups, so a request costs the longest of the two chains
+        and the policy lookup, instead of the sum of all the lookups.
+
         Args: authz_request (AuthzRequest): The authorization request object containing user details, application key,
         traits, and request type.
 
@@ -160,11 +213,20 @@ class AsyncBasePAIGAuthorizer(AsyncPAIGAuthorizer, ABC):
             AuthzResponse: The authorization response object indicating whether the request is authorized,
                           masked traits, and audit policy IDs.
         """
-        # Enrich the authorization request
-        request = await self.enrich_authorization_request(authz_request)
+        fetch_plan = FetchPlan(self.run_fetch)
+        try:
+            return await self.authorize_with_fetch_plan(authz_request, fetch_plan)
+        finally:
+            fetch_plan.cancel()
+            self.report_fetch_timings("authorize", authz_request, dict(fetch_plan.timings))
+
+    async def authorize_with_fetch_plan(self, authz_request: AuthzRequest, fetch_plan: FetchPlan) -> AuthzResponse:
+        # Enrich the authorization request and retrieve the user groups while the application is retrieved
+        request_task, user_groups_task = self.start_user_lookups(authz_request, fetch_plan)
 
         # Step 1: Retrieve application details and configuration
-        app_details: AIApplicationData = await self.get_application_details(request.application_key)
+        app_details: AIApplicationData = await fetch_plan.run(
+            "application_details", self.get_application_details(authz_request.application_key))
         application_id = app_details.id
 
         # Initialize variables for response construction
@@ -175,20 +237,24 @@ class AsyncBasePAIGAuthorizer(AsyncPAIGAuthorizer, ABC):
 
         if app_details.status == 0:
             # Application is disabled
+            request = await request_task
             return create_authorize_response(request, application_name, authorized, masked_traits,
                                              list(audit_policy_ids_set), reason="Application is disabled")
 
-        if (not request.traits) or len(request.traits) == 0:
+        if (not authz_request.traits) or len(authz_request.traits) == 0:
             # No traits provided, default to unauthorized
+            request = await request_task
             return create_authorize_response(request, application_name, True, masked_traits,
                                              list(audit_policy_ids_set), reason="No traits provided")
 
         # Retrieve application configuration
-        app_config: AIApplicationConfigData = await self.get_application_config(request.application_key,
-                                                                                application_id=application_id)
+        app_config: AIApplicationConfigData = await fetch_plan.run(
+            "application_config", self.get_application_config(authz_request.application_key,
+                                                              application_id=application_id))
 
         # Step 2: Retrieve user groups including 'public' if not already present
-        user_groups = await self.get_user_groups(request.user_id)
+        request = await request_task
+        user_groups = list(await user_groups_task)
         if GROUP_PUBLIC not in user_groups:
             user_groups.append(GROUP_PUBLIC)
 
@@ -212,10 +278,11 @@ class AsyncBasePAIGAuthorizer(AsyncPAIGAuthorizer, ABC):
                                              list(audit_policy_ids_set), reason="No Access to Application")
 
         # Step 4a: Retrieve application policies matching request traits, user, groups, and request type
-        application_policies = await self.get_application_policies(request.application_key, request.traits,
-                                                                   request.user_id, user_groups,
-                                                                   request.request_type,
-                                                                   application_id=application_id)
+        application_policies = await fetch_plan.run(
+            "application_policies", self.get_application_policies(request.application_key, request.traits,
+                                                                  request.user_id, user_groups,
+                                                                  request.request_type,
+                                                                  application_id=application_id))
         if application_policies:
             # Step 4b: Check if any explicit deny policy is present
             first_deny_policy = find_first_deny_policy(application_policies, request)
@@ -242,17 +309,29 @@ class AsyncBasePAIGAuthorizer(AsyncPAIGAuthorizer, ABC):
         """
         Authorizes a request to access a vector DB based on user groups, application details, and policies.
 
+        The user lookups run together with the application and vector DB lookups.
+
         Args: authz_request (VectorDBAuthzRequest): The authorization request object containing user details and
         application key.
 
         Returns:
             VectorDBAuthzResponse: The authorization response object containing vector DB details and filter expression.
         """
-        # Enrich the authorization request
-        request = await self.enrich_authorization_request(authz_request)
+        fetch_plan = FetchPlan(self.run_fetch)
+        try:
+            return await self.authorize_vector_db_with_fetch_plan(authz_request, fetch_plan)
+        finally:
+            fetch_plan.cancel()
+            self.report_fetch_timings("authorize_vector_db", authz_request, dict(fetch_plan.timings))
+
+    async def authorize_vector_db_with_fetch_plan(self, authz_request: VectorDBAuthzRequest,
+                                                  fetch_plan: FetchPlan) -> VectorDBAuthzResponse:
+        # Enrich the authorization request and retrieve the user groups while the application is retrieved
+        request_task, user_groups_task = self.start_user_lookups(authz_request, fetch_plan)
 
         # Step 1: Retrieve application details and configuration
-        app_details: AIApplicationData = await self.get_application_details(request.application_key)
+        app_details: AIApplicationData = await fetch_plan.run(
+            "application_details", self.get_application_details(authz_request.application_key))
 
         # Initialize variables for response construction
         vector_db = None
@@ -264,41 +343,59 @@ class AsyncBasePAIGAuthorizer(AsyncPAIGAuthorizer, ABC):
         # Check if application is disabled
         if app_details.status == 0:
             # Application is disabled
-            return create_authorize_vector_db_response(request, vector_db, policies, filter_expression,
+            return create_authorize_vector_db_response(await request_task, vector_db, policies, filter_expression,
                                                        reason="Application is disabled")
 
         # Check if vector DB is assigned to application
         vector_db_id = app_details.vector_db_id
         if not vector_db_id:
             # No vector db is assigned to application
-            return create_authorize_vector_db_response(request, vector_db, policies, filter_expression,
+            return create_authorize_vector_db_response(await request_task, vector_db, policies, filter_expression,
                                                        reason="No Vector DB assigned to application")
 
         # Retrieve vector DB details
-        vector_db = await self.get_vector_db_details(vector_db_id)
+        vector_db = await fetch_plan.run("vector_db_details", self.get_vector_db_details(vector_db_id))
+        request = await request_task
         if vector_db.status == 0:
             # Vector DB is disabled
             return create_authorize_vector_db_response(request, vector_db, policies, filter_expression,
                                                        reason="Vector DB is disabled")
 
         # Step 3: Retrieve user groups including 'public' if not already present
-        user_groups = await self.get_user_groups(request.user_id)
+        user_groups = list(await user_groups_task)
         if GROUP_PUBLIC not in user_groups:
             user_groups.append(GROUP_PUBLIC)
 
-        policies = await self.get_vector_db_policies(vector_db_id, request.user_id, user_groups)
+        policies = await fetch_plan.run("vector_db_policies",
+                                        self.get_vector_db_policies(vector_db_id, request.user_id, user_groups))
 
         # Step 4: Create filter expression based on metadata filters
-        filter_criteria_creator: BaseMetadataFilterCriteriaCreator = BaseMetadataFilterCriteriaCreator()
-        metadata_wise_filters: Dict[
-            str, List[MetadataFilterCriteria]] = filter_criteria_creator.create_metadata_filters(policies,
-                                                                                                 request.user_id,
-                                                                                                 user_groups)
-        filter_expression = self.create_vector_db_filter_expression(vector_db, request.user_id, user_groups,
-                                                                    metadata_wise_filters)
+        filter_expression = await self.get_vector_db_filter_expression(vector_db, policies, request.user_id,
+                                                                       user_groups)
 
         return create_authorize_vector_db_response(request, vector_db, policies, filter_expression)
 
+    async def get_vector_db_filter_expression(self, vector_db: VectorDBData, policies: List[VectorDBPolicyData],
+                                              user: str, groups: List[str]) -> str | dict | None:
+        """
+        Compiles the filter expression of a vector DB from the metadata filters of its policies. The subclasses can
+        override this method to reuse the expressions compiled for the same policies, user and groups.
+
+        Args:
+            vector_db (VectorDBData): The vector DB object.
+            policies (List[VectorDBPolicyData]): The policies of the vector DB applying to the user.
+            user (str): The user requesting the filter expression.
+            groups (List[str]): The groups the user belongs to.
+
+        Returns:
+            str | dict | None: The filter expression.
+        """
+        filter_criteria_creator: BaseMetadataFilterCriteriaCreator = BaseMetadataFilterCriteriaCreator()
+        metadata_wise_filters: Dict[
+            str, List[MetadataFilterCriteria]] = filter_criteria_creator.create_metadata_filters(policies, user,
+                                                                                                 groups)
+        return self.create_vector_db_filter_expression(vector_db, user, groups, metadata_wise_filters)
+
     # noinspection PyMethodMayBeStatic
     def create_vector_db_filter_expression(self, vector_db: VectorDBData, user: str, groups: List[str],
                                            metadata_wise_filters: Dict[
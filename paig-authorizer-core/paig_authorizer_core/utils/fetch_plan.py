@@ -0,0 +1,89 @@
+import asyncio
+import inspect
+import time
+from typing import Awaitable, Callable, Dict
+
+
+class FetchPlan:
+    """
+    Runs the lookups of an authorization, starting the independent ones together and timing each stage.
+
+    Args:
+        run_fetch (Callable[[Awaitable], Awaitable]): Runs a lookup started in its own task, to give it the resources
+        it cannot share with the other lookups running at the same time.
+
+    Attributes:
+        timings (Dict[str, float]): The duration of each stage in milliseconds.
+        tasks (list): The tasks started by the plan.
+        fetches (dict): The timed lookup run by each task.
+    """
+
+    def __init__(self, run_fetch: Callable[[Awaitable], Awaitable] = None):
+        self.run_fetch = run_fetch
+        self.timings: Dict[str, float] = {}
+        self.tasks = []
+        self.fetches = {}
+
+    async def run(self, stage: str, fetch: Awaitable):
+        """
+        Run a lookup in the current task and record its duration once it completes.
+
+        Args:
+            stage (str): The name of the stage.
+            fetch (Awaitable): The lookup.
+
+        Returns:
+            The result of the lookup.
+        """
+        start_time = time.perf_counter()
+        result = await fetch
+        self.timings[stage] = round((time.perf_counter() - start_time) * 1000, 3)
+        return result
+
+    def start(self, stage: str, fetch: Awaitable) -> asyncio.Task:
+        """
+        Start a lookup in its own task, to run it together with the next lookups.
+
+        Args:
+            stage (str): The name of the stage.
+            fetch (Awaitable): The lookup.
+
+        Returns:
+            asyncio.Task: The task of the lookup.
+        """
+        timed_fetch = self.run(stage, fetch)
+        task = asyncio.ensure_future(self.run_fetch(timed_fetch) if self.run_fetch else timed_fetch)
+        self.tasks.append(task)
+        self.fetches[task] = timed_fetch
+
+        def close_unstarted_fetches(done_task: asyncio.Task):
+            # A task cancelled before it started never awaits its lookup
+            if done_task.cancelled():
+                for coroutine in (timed_fetch, fetch):
+                    if inspect.iscoroutine(coroutine) and \
+                            inspect.getcoroutinestate(coroutine) == inspect.CORO_CREATED:
+                        coroutine.close()
+
+        task.add_done_callback(close_unstarted_fetches)
+        return task
+
+    def cancel(self):
+        """
+        Cancel the lookups which are not needed anymore, once the authorization is decided.
+
+        Only the lookups which have not started are cancelled. The started ones are left to complete, as their
+        results may be shared with other authorizations through the caches.
+        """
+        for task in self.tasks:
+            if task.done():
+                retrieve_exception(task)
+            elif inspect.getcoroutinestate(self.fetches[task]) == inspect.CORO_CREATED:
+                task.cancel()
+            else:
+                task.add_done_callback(retrieve_exception)
+
+
+def retrieve_exception(task: asyncio.Task):
+    # Mark the error of an unused lookup as retrieved
+    if not task.cancelled():
+        task.exception()
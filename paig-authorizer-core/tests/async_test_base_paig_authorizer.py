@@ -1,3 +1,6 @@
+import asyncio
+import time
+
 import pytest
 import pytest_asyncio
 from unittest.mock import AsyncMock
@@ -227,4 +230,153 @@ async def test_authorize_application_config_no_access(authz_request, authorizer:
     assert response.authorized is False
     assert response.status_code == 403
     assert 1 in response.paig_policy_ids
-    assert response.reason == "No Access to Application"
\ No newline at end of file
+    assert response.reason == "No Access to Application"
+
+class AsyncSlowPAIGAuthorizer(AsyncMockPAIGAuthorizer):
+    """
+    Authorizer whose lookups take the given delay, recording the lookups which were called.
+    """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = []
+        self.timings = {}
+
+    async def lookup(self, name, fetch, *args):
+        self.calls.append(name)
+        await asyncio.sleep(self.delay)
+        return await fetch(*args)
+
+    async def get_user_id_by_email(self, email: str) -> str | None:
+        return await self.lookup("user_id", super().get_user_id_by_email, email)
+
+    async def get_user_groups(self, user: str) -> List[str]:
+        return await self.lookup("user_groups", super().get_user_groups, user)
+
+    async def get_application_details(self, application_key: str, **kwargs) -> AIApplicationData:
+        return await self.lookup("application_details", super().get_application_details, application_key)
+
+    async def get_application_config(self, application_key: str, **kwargs) -> AIApplicationConfigData:
+        return await self.lookup("application_config", super().get_application_config, application_key)
+
+    async def get_application_policies(self, application_key: str, traits: List[str], user: str, groups: List[str],
+                                       request_type: str, **kwargs) -> List[AIApplicationPolicyData]:
+        return await self.lookup("application_policies", super().get_application_policies,
+                                 application_key, traits, user, groups, request_type)
+
+    def report_fetch_timings(self, operation, request, timings):
+        self.timings[operation] = timings
+
+
+@pytest.mark.asyncio
+async def test_authorize_runs_independent_lookups_concurrently(authz_request):
+    authorizer = AsyncSlowPAIGAuthorizer(delay=0.1)
+    authz_request.user_id = "test_user@example.com"
+    authz_request.traits = ["trait1"]
+
+    start_time = time.perf_counter()
+    response = await authorizer.authorize(authz_request)
+    elapsed = time.perf_counter() - start_time
+
+    assert response.authorized is True
+    assert response.user_id == "test_user"
+    assert len(authorizer.calls) == 5
+    # The user lookups run together with the application lookups, then the policies are retrieved
+    assert elapsed < 0.4
+    assert set(authorizer.timings["authorize"]) == {"enrich_request", "user_groups", "user_lookups",
+                                                    "application_details", "application_config",
+                                                    "application_policies"}
+
+
+@pytest.mark.asyncio
+async def test_authorize_app_disabled_skips_remaining_lookups(authz_request):
+    authorizer = AsyncSlowPAIGAuthorizer(delay=0.01)
+    authorizer.get_application_details = AsyncMock(
+        return_value=AIApplicationData(id=1, name="TestApp", status=0, vector_dbs=["TestDB"]))
+
+    response = await authorizer.authorize(authz_request)
+    await asyncio.sleep(0.05)
+
+    assert response.reason == "Application is disabled"
+    assert authorizer.calls == ["user_groups"]
+    assert "user_groups" not in authorizer.timings["authorize"]
+
+
+@pytest.mark.asyncio
+async def test_authorize_explicit_deny_skips_policies(authz_request):
+    authorizer = AsyncSlowPAIGAuthorizer(delay=0.01)
+    authorizer.get_application_config = AsyncMock(
+        return_value=AIApplicationConfigData(id=1, denied_users=["test_user"]))
+
+    response = await authorizer.authorize(authz_request)
+
+    assert response.reason == "Explicit deny access to Application"
+    assert "application_policies" not in authorizer.calls
+
+
+@pytest.mark.asyncio
+async def test_authorize_lookup_error_cancels_other_lookups(authz_request):
+    authorizer = AsyncSlowPAIGAuthorizer(delay=0.05)
+    authorizer.get_application_details = AsyncMock(side_effect=ValueError("Application not found"))
+
+    with pytest.raises(ValueError):
+        await authorizer.authorize(authz_request)
+    await asyncio.sleep(0.1)
+
+    assert "user_groups" not in authorizer.timings["authorize"]
+
+
+class AsyncSharedLookupPAIGAuthorizer(AsyncSlowPAIGAuthorizer):
+    """
+    Authorizer sharing the in-flight user groups lookups between authorizations, like a single-flight cache whose
+    shared lookup is cancelled with the caller which started it.
+    """
+
+    def __init__(self, delay: float):
+        super().__init__(delay)
+        self.in_flight = {}
+
+    async def get_user_groups(self, user: str) -> List[str]:
+        future = self.in_flight.get(user)
+        if future is not None:
+            return await asyncio.shield(future)
+        future = self.in_flight[user] = asyncio.get_running_loop().create_future()
+        try:
+            user_groups = await super().get_user_groups(user)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        future.set_result(user_groups)
+        return user_groups
+
+
+@pytest.mark.asyncio
+async def test_authorize_early_return_keeps_shared_lookups(authz_request):
+    authorizer = AsyncSharedLookupPAIGAuthorizer(delay=0.05)
+    no_traits_request = authz_request.model_copy(update={"traits": []})
+    authz_request.traits = ["trait1"]
+
+    results = await asyncio.gather(authorizer.authorize(no_traits_request), authorizer.authorize(authz_request),
+                                   return_exceptions=True)
+
+    # The first authorization returns before the user groups it started are retrieved, the second one shares them
+    assert results[0].reason == "No traits provided"
+    assert results[1].authorized is True
+    assert authorizer.calls.count("user_groups") == 1
+
+
+@pytest.mark.asyncio
+async def test_authorize_lookups_run_with_run_fetch(authz_request, authorizer: AsyncBasePAIGAuthorizer):
+    started_fetches = []
+
+    async def run_fetch(fetch):
+        started_fetches.append(fetch)
+        return await fetch
+
+    authorizer.run_fetch = run_fetch
+    authz_request.traits = ["trait1"]
+    response = await authorizer.authorize(authz_request)
+
+    assert response.authorized is True
+    # The enrichment and the user groups are started in their own tasks
+    assert len(started_fetches) == 2
@@ -1,6 +1,6 @@
 import logging
 
-from .encryption import DataEncryptor
+from .encryption import DataEncryptor, ENCRYPTION_MODE_CHUNKED
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +25,13 @@ class PluginAccessRequestEncryptor:
         self.shield_server_key_id = encryption_keys_info["shield_server_key_id"]
         self.shield_plugin_key_id = encryption_keys_info["shield_plugin_key_id"]
 
+        # The chunked mode is used until the shield server announces a better encryption mode
+        self.encryption_mode = ENCRYPTION_MODE_CHUNKED
+
+    def set_encryption_mode(self, encryption_mode):
+        self.encryption_mode = encryption_mode
+        self.shield_data_encryptor.encryption_mode = encryption_mode
+
     def encrypt_message(self, message):
         return self.shield_data_encryptor.encrypt(message)
 
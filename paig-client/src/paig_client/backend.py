@@ -6,8 +6,11 @@ import time
 import urllib3
 from urllib3 import Timeout, Retry
 
+from paig_common.async_base_rest_http_client import AsyncBaseRESTHttpClient
+
 from . import util
 from .PluginAccessRequestEncryptor import PluginAccessRequestEncryptor
+from .encryption import ENCRYPTION_MODE_CHUNKED, SUPPORTED_ENCRYPTION_MODES
 from .exception import PAIGException
 from .message import ErrorMessage
 from .model import ConversationType, ResponseMessage
@@ -49,6 +52,7 @@ class ShieldAccessRequest:
         self.conversation_type = kwargs.get('conversation_type', ConversationType.PROMPT)
         self.shield_server_key_id = kwargs.get('shield_server_key_id', None)
         self.shield_plugin_key_id = kwargs.get('shield_plugin_key_id', None)
+        self.encryption_mode = kwargs.get('encryption_mode', ENCRYPTION_MODE_CHUNKED)
         self.enable_audit = kwargs.get('enable_audit', True)
 
     def to_payload_dict(self):
@@ -85,6 +89,7 @@ class ShieldAccessRequest:
 
             "shieldServerKeyId": self.shield_server_key_id,
             "shieldPluginKeyId": self.shield_plugin_key_id,
+            "encryptionMode": self.encryption_mode,
 
             "enableAudit": self.enable_audit
         }
@@ -514,10 +519,7 @@ class ShieldRestHttpClient:
             _logger.debug(f"Access request parameters: {request.to_payload_dict()}")
 
         # Encrypt the request messages and set the encryption key id and plugin public key in request
-        self.plugin_access_request_encryptor.encrypt_request(request)
-
-        request.shield_server_key_id = self.plugin_access_request_encryptor.shield_server_key_id
-        request.shield_plugin_key_id = self.plugin_access_request_encryptor.shield_plugin_key_id
+        encrypt_access_request(self.plugin_access_request_encryptor, request)
 
         if _logger.isEnabledFor(logging.DEBUG):
             _logger.debug(f"Access request parameters (encrypted): {request.to_payload_dict()}")
@@ -532,19 +534,52 @@ class ShieldRestHttpClient:
             _logger.debug(f"Access response status (encrypted): {response.status}, body: {response.data}")
 
         if response.status == 200:
-            access_result = ShieldAccessResult.from_json(**response.json())
-            if access_result.isAllowed:
-                # Decrypt the response messages
-                self.plugin_access_request_encryptor.decrypt_response(access_result)
-                if _logger.isEnabledFor(logging.DEBUG):
-                    _logger.debug(
-                        f"Access response status: {response.status}, access_result: {json.dumps(access_result.__dict__)}")
-            return access_result
+            return to_access_result(self.plugin_access_request_encryptor, response.json())
         else:
             error_message = f"Request failed with status code {response.status}: {response.data}"
             _logger.error(error_message)
             raise Exception(error_message)
 
+    def authorize_batch(self, requests: list) -> list:
+        """
+        Check access for a batch of independent requests in a single round trip to the shield server.
+
+        Args:
+            requests (list[ShieldAccessRequest]): The access requests to be checked.
+
+        Returns:
+            list: The result of each request, in request order. Each result is either a ShieldAccessResult or the
+            Exception raised by the shield server while authorizing that request.
+
+        Raises:
+            Exception: If the batch request itself fails.
+        """
+        if not requests:
+            return []
+
+        payload_requests = [encrypt_access_request(self.plugin_access_request_encryptor, request).to_payload_dict()
+                            for request in requests]
+
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(f"Batch access request parameters (encrypted): {payload_requests}")
+
+        response = HttpTransport.get_http().request(method="POST",
+                                                    url=self.base_url + "/shield/authorize/batch",
+                                                    headers=self.get_default_headers(),
+                                                    json={"requests": payload_requests},
+                                                    **self.request_kwargs)
+
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(f"Batch access response status (encrypted): {response.status}, body: {response.data}")
+
+        if response.status != 200:
+            error_message = f"Batch request failed with status code {response.status}: {response.data}"
+            _logger.error(error_message)
+            raise Exception(error_message)
+
+        return to_batch_access_results(self.plugin_access_request_encryptor, response.data.decode("utf-8"),
+                                       len(requests))
+
     def init_shield_server(self, application_key) -> None:
         """
         Initialize shield server for the tenant id.
@@ -553,9 +588,7 @@ class ShieldRestHttpClient:
         if _logger.isEnabledFor(logging.DEBUG):
             _logger.debug(f"Initializing shield server for tenant: tenant_id={self.tenant_id}")
 
-        request = {"shieldServerKeyId": self.plugin_access_request_encryptor.shield_server_key_id,
-                   "shieldPluginKeyId": self.plugin_access_request_encryptor.shield_plugin_key_id,
-                   "applicationKey": application_key}
+        request = create_init_shield_server_request(self.plugin_access_request_encryptor, application_key)
 
         error_message = ""
         init_success = False
@@ -576,33 +609,11 @@ class ShieldRestHttpClient:
             if response_status == 200:
                 init_success = True
                 _logger.info(f"Shield server initialized for tenant: tenant_id={self.tenant_id}")
+                set_negotiated_encryption_mode(self.plugin_access_request_encryptor, response.data)
             else:
-                if response_status == 400 or response_status == 404:
-                    error_message = str(response.data)
-                    error_message += (
-                        "\n\nThe request sent to the shield server for initialization is invalid or malformed.\n\n"
-                        "To resolve this issue, please verify the configuration file for the plugin.\n"
-                        "Try re-downloading the configuration file from the PAIG Portal and restarting your application to ensure that the configuration is correct.\n\n"
-                        "For detailed instructions, please follow the guidance provided in the integration documentation at https://na.privacera.ai/docs/integration/.\n"
-                        "If the issue persists after performing the above steps, please contact Privacera Support for further assistance."
-                    )
-                elif response_status == 500:
-                    error_message = str(response.data)
-                    error_message += (
-                        "\n\nThe server encountered an unexpected condition that prevented it from fulfilling the request.\n\n"
-                        "Please contact Privacera Support for further assistance."
-                    )
+                error_message = get_init_shield_server_error_message(response_status, response.data)
         except Exception as e:
-            error_message = (
-                "\n\nThe Privacera Shield Plugin is unable to establish a connection with the Privacera Shield Server.\n"
-                "Please ensure that the Shield Server is up and running and is reachable from the current environment where this application is being executed."
-            )
-
-            if not self.is_self_hosted_shield_server:
-                error_message += (
-                    "\n\nFor privacera.ai hosted shield server, verify https://status.privacera.com for any reported downtime.\n"
-                    "If the issue persists after performing the above steps, please contact Privacera Support for further assistance."
-                )
+            error_message = get_shield_server_connection_error_message(self.is_self_hosted_shield_server)
 
         if not init_success:
             message = ErrorMessage.SHIELD_SERVER_INITIALIZATION_FAILED.format(response_status=response_status,
@@ -611,21 +622,39 @@ class ShieldRestHttpClient:
             raise PAIGException(message)
 
     def get_filter_expression(self, request: VectorDBAccessRequest) -> VectorDBAccessResult:
+        return self.get_filter_expression_if_modified(request)[0]
+
+    def get_filter_expression_if_modified(self, request: VectorDBAccessRequest, etag: str = None) -> tuple:
+        """
+        Get the vector DB filter expression, unless it is unchanged since the result with the given ETag.
+
+        Args:
+            request (VectorDBAccessRequest): The vector DB access request.
+            etag (str): The ETag of the result held by the caller, None to always get the result.
+
+        Returns:
+            tuple: The VectorDBAccessResult, or None if it is unchanged, and its ETag.
+        """
 
         if _logger.isEnabledFor(logging.DEBUG):
             _logger.debug(f"Vector DB Access request parameters: {request.to_payload_dict()}")
 
+        headers = self.get_default_headers()
+        if etag:
+            headers["If-None-Match"] = etag
         response = HttpTransport.get_http().request(method="POST",
                                      url=self.base_url + "/shield/authorize/vectordb",
-                                     headers=self.get_default_headers(),
+                                     headers=headers,
                                      json=request.to_payload_dict(),
                                      **self.request_kwargs)
 
         if _logger.isEnabledFor(logging.DEBUG):
             _logger.debug(f"Response status: {response.status}, body: {response.data}")
 
-        if response.status == 200:
-            return VectorDBAccessResult.from_json(**response.json())
+        if response.status == 304 and etag:
+            return None, etag
+        elif response.status == 200:
+            return VectorDBAccessResult.from_json(**response.json()), response.headers.get("ETag")
         else:
             error_message = f"Request failed with status code {response.status}: {response.data}"
             _logger.error(error_message)
@@ -661,4 +690,297 @@ class ShieldRestHttpClient:
         else:
             error_message = f"Stream access audit request failed with status code {response.status}: {response.data}"
             _logger.error(error_message)
-            raise Exception(error_message)
\ No newline at end of file
+            raise Exception(error_message)
+
+
+class AsyncShieldRestHttpClient(AsyncBaseRESTHttpClient):
+    """
+    AsyncShieldRestHttpClient is the asyncio variant of ShieldRestHttpClient. The requests to the Privacera Shield
+    server are made on the httpx client shared through AsyncHttpTransport, so they do not block a thread.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(kwargs['base_url'])
+        self.tenant_id = kwargs['tenant_id'] if 'tenant_id' in kwargs else None
+        self.base_url = kwargs['base_url']
+        self.api_key = kwargs['api_key']
+        self.is_self_hosted_shield_server = kwargs.get('is_self_hosted_shield_server', False)
+
+        self.plugin_access_request_encryptor = PluginAccessRequestEncryptor(self.tenant_id,
+                                                                            kwargs["encryption_keys_info"])
+
+    def get_plugin_access_request_encryptor(self):
+        return self.plugin_access_request_encryptor
+
+    def get_default_headers(self):
+        headers = super().get_default_headers()
+        if self.tenant_id:
+            headers["x-tenant-id"] = self.tenant_id
+        if self.api_key:
+            headers["x-paig-api-key"] = self.api_key
+        return headers
+
+    async def is_access_allowed(self, request: ShieldAccessRequest) -> ShieldAccessResult:
+        """
+        Check if access is allowed and return the result.
+
+        Args:
+            request (ShieldAccessRequest): The access request to be checked.
+
+        Returns:
+            ShieldAccessResult: The result of the access check.
+        """
+
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(f"Access request parameters: {request.to_payload_dict()}")
+
+        # Encrypt the request messages and set the encryption key id and plugin public key in request
+        encrypt_access_request(self.plugin_access_request_encryptor, request)
+
+        response = await self.post(url="/shield/authorize", json=request.to_payload_dict())
+
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(f"Access response (encrypted): {response}")
+
+        if response is not None and response.status_code == 200:
+            return to_access_result(self.plugin_access_request_encryptor, response.json())
+        else:
+            error_message = f"Request failed with {response}"
+            _logger.error(error_message)
+            raise Exception(error_message)
+
+    async def authorize_batch(self, requests: list) -> list:
+        """
+        Check access for a batch of independent requests in a single round trip to the shield server.
+
+        Args:
+            requests (list[ShieldAccessRequest]): The access requests to be checked.
+
+        Returns:
+            list: The result of each request, in request order. Each result is either a ShieldAccessResult or the
+            Exception raised by the shield server while authorizing that request.
+
+        Raises:
+            Exception: If the batch request itself fails.
+        """
+        if not requests:
+            return []
+
+        payload_requests = [encrypt_access_request(self.plugin_access_request_encryptor, request).to_payload_dict()
+                            for request in requests]
+
+        response = await self.post(url="/shield/authorize/batch", json={"requests": payload_requests})
+
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(f"Batch access response (encrypted): {response}")
+
+        if response is None or response.status_code != 200:
+            error_message = f"Batch request failed with {response}"
+            _logger.error(error_message)
+            raise Exception(error_message)
+
+        return to_batch_access_results(self.plugin_access_request_encryptor, response.text, len(requests))
+
+    async def init_shield_server(self, application_key) -> None:
+        """
+        Initialize shield server for the tenant id.
+        """
+
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(f"Initializing shield server for tenant: tenant_id={self.tenant_id}")
+
+        request = create_init_shield_server_request(self.plugin_access_request_encryptor, application_key)
+
+        error_message = ""
+        init_success = False
+        response_status = 0
+
+        try:
+            response = await self.post(url="/shield/init", json=request)
+
+            if _logger.isEnabledFor(logging.DEBUG):
+                _logger.debug(f"Shield server initialization response: {response}")
+
+            if response is not None:
+                response_status = response.status_code
+                if response_status == 200:
+                    init_success = True
+                    _logger.info(f"Shield server initialized for tenant: tenant_id={self.tenant_id}")
+                    set_negotiated_encryption_mode(self.plugin_access_request_encryptor, response.text)
+                else:
+                    error_message = get_init_shield_server_error_message(response_status, response.text)
+        except Exception as e:
+            error_message = get_shield_server_connection_error_message(self.is_self_hosted_shield_server)
+
+        if not init_success:
+            message = ErrorMessage.SHIELD_SERVER_INITIALIZATION_FAILED.format(response_status=response_status,
+                                                                              response_data=error_message)
+            _logger.error(message)
+            raise PAIGException(message)
+
+    async def get_filter_expression(self, request: VectorDBAccessRequest) -> VectorDBAccessResult:
+        return (await self.get_filter_expression_if_modified(request))[0]
+
+    async def get_filter_expression_if_modified(self, request: VectorDBAccessRequest, etag: str = None) -> tuple:
+        """
+        Get the vector DB filter expression, unless it is unchanged since the result with the given ETag.
+
+        Args:
+            request (VectorDBAccessRequest): The vector DB access request.
+            etag (str): The ETag of the result held by the caller, None to always get the result.
+
+        Returns:
+            tuple: The VectorDBAccessResult, or None if it is unchanged, and its ETag.
+        """
+
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(f"Vector DB Access request parameters: {request.to_payload_dict()}")
+
+        headers = {"If-None-Match": etag} if etag else {}
+        response = await self.post(url="/shield/authorize/vectordb", json=request.to_payload_dict(), headers=headers)
+
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(f"Response: {response}")
+
+        if response is not None and response.status_code == 304 and etag:
+            return None, etag
+        elif response is not None and response.status_code == 200:
+            return VectorDBAccessResult.from_json(**response.json()), response.headers.get("ETag")
+        else:
+            error_message = f"Request failed with {response}"
+            _logger.error(error_message)
+            raise Exception(error_message)
+
+    async def log_stream_access_audit(self, request: StreamAccessAuditRequest):
+        """
+        Logs a stream access audit request.
+
+        Args:
+            request (StreamAccessAuditRequest): The StreamAccessAuditRequest object containing the audit details.
+
+        Returns:
+            None
+        """
+
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(f"Stream access audit request parameters: {request.to_payload_dict()}")
+
+        response = await self.post(url="/shield/audit", json=request.to_payload_dict())
+
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(f"Stream access audit response: {response}")
+
+        if response is None or response.status_code != 200:
+            error_message = f"Stream access audit request failed with {response}"
+            _logger.error(error_message)
+            raise Exception(error_message)
+
+
+def encrypt_access_request(plugin_access_request_encryptor: PluginAccessRequestEncryptor,
+                           request: ShieldAccessRequest) -> ShieldAccessRequest:
+    """
+    Encrypt the request messages and set the encryption key id and plugin public key in the request.
+    """
+    plugin_access_request_encryptor.encrypt_request(request)
+    request.shield_server_key_id = plugin_access_request_encryptor.shield_server_key_id
+    request.shield_plugin_key_id = plugin_access_request_encryptor.shield_plugin_key_id
+    request.encryption_mode = plugin_access_request_encryptor.encryption_mode
+    return request
+
+
+def create_init_shield_server_request(plugin_access_request_encryptor: PluginAccessRequestEncryptor,
+                                      application_key) -> dict:
+    """
+    Create the shield server initialization request, offering the supported encryption modes.
+    """
+    return {"shieldServerKeyId": plugin_access_request_encryptor.shield_server_key_id,
+            "shieldPluginKeyId": plugin_access_request_encryptor.shield_plugin_key_id,
+            "applicationKey": application_key,
+            "encryptionModes": SUPPORTED_ENCRYPTION_MODES}
+
+
+def set_negotiated_encryption_mode(plugin_access_request_encryptor: PluginAccessRequestEncryptor, response_text):
+    """
+    Use the encryption mode announced in the shield server initialization response. Older shield servers reply with
+    plain text, in which case the chunked mode is kept.
+    """
+    try:
+        encryption_mode = json.loads(response_text).get("encryptionMode", ENCRYPTION_MODE_CHUNKED)
+    except (ValueError, AttributeError, TypeError):
+        encryption_mode = ENCRYPTION_MODE_CHUNKED
+    if encryption_mode not in SUPPORTED_ENCRYPTION_MODES:
+        encryption_mode = ENCRYPTION_MODE_CHUNKED
+    plugin_access_request_encryptor.set_encryption_mode(encryption_mode)
+    _logger.info(f"Using {encryption_mode} encryption mode for shield server requests")
+
+
+def to_access_result(plugin_access_request_encryptor: PluginAccessRequestEncryptor,
+                     response_dict: dict) -> ShieldAccessResult:
+    """
+    Create the ShieldAccessResult of an authorize response, decrypting the response messages if access is allowed.
+    """
+    access_result = ShieldAccessResult.from_json(**response_dict)
+    if access_result.isAllowed:
+        # Decrypt the response messages
+        plugin_access_request_encryptor.decrypt_response(access_result)
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(f"Access result: {json.dumps(access_result.__dict__)}")
+    return access_result
+
+
+def to_batch_access_results(plugin_access_request_encryptor: PluginAccessRequestEncryptor, response_text: str,
+                            request_count: int) -> list:
+    """
+    Create the results of a batch authorize response. The server streams one JSON line per request, in order of
+    completion, holding the index of the request and either its response or its error.
+    """
+    results = [None] * request_count
+    for line in response_text.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        if "response" in item:
+            results[item["index"]] = to_access_result(plugin_access_request_encryptor, item["response"])
+        else:
+            error_message = f"Request failed with status code {item.get('error_code')}: {item.get('message')}"
+            _logger.error(error_message)
+            results[item["index"]] = Exception(error_message)
+
+    for index, result in enumerate(results):
+        if result is None:
+            results[index] = Exception(f"No response received for request at index {index} of the batch")
+    return results
+
+
+def get_init_shield_server_error_message(response_status, response_data) -> str:
+    error_message = str(response_data)
+    if response_status == 400 or response_status == 404:
+        error_message += (
+            "\n\nThe request sent to the shield server for initialization is invalid or malformed.\n\n"
+            "To resolve this issue, please verify the configuration file for the plugin.\n"
+            "Try re-downloading the configuration file from the PAIG Portal and restarting your application to ensure that the configuration is correct.\n\n"
+            "For detailed instructions, please follow the guidance provided in the integration documentation at https://na.privacera.ai/docs/integration/.\n"
+            "If the issue persists after performing the above steps, please contact Privacera Support for further assistance."
+        )
+    elif response_status == 500:
+        error_message += (
+            "\n\nThe server encountered an unexpected condition that prevented it from fulfilling the request.\n\n"
+            "Please contact Privacera Support for further assistance."
+        )
+    else:
+        error_message = ""
+    return error_message
+
+
+def get_shield_server_connection_error_message(is_self_hosted_shield_server) -> str:
+    error_message = (
+        "\n\nThe Privacera Shield Plugin is unable to establish a connection with the Privacera Shield Server.\n"
+        "Please ensure that the Shield Server is up and running and is reachable from the current environment where this application is being executed."
+    )
+
+    if not is_self_hosted_shield_server:
+        error_message += (
+            "\n\nFor privacera.ai hosted shield server, verify https://status.privacera.com for any reported downtime.\n"
+            "If the issue persists after performing the above steps, please contact Privacera Support for further assistance."
+        )
+    return error_message
@@ -153,3 +153,38 @@ def setup_app(**kwargs):
         An object that you should pass in the context manager
     """
     return core.setup_app(**kwargs)
+
+
+async def async_setup_app(**kwargs):
+    """
+    Creates an instance of the asyncio variant of the AI application based on the application config file, and
+    initializes the shield server for it. The requests of the returned application do not block the event loop.
+    Args:
+        kwargs: The same options as setup_app.
+
+    Returns:
+        An AsyncPAIGApplication object that you should pass in the context manager
+    """
+    return await core.async_setup_app(**kwargs)
+
+
+async def acheck_access(**kwargs):
+    """
+    Check access for the given text without blocking the event loop.
+    Args:
+        kwargs: The same options as check_access.
+    Returns:
+        A list of ResponseText objects.
+    """
+    return await core.acheck_access(**kwargs)
+
+
+async def aget_vector_db_filter_expression(**kwargs):
+    """
+    Check vector db filter expression for current user without blocking the event loop.
+    Args:
+        kwargs: The name-value pairs to be set in the context.
+    Returns:
+        A filter expression
+    """
+    return await core.aget_vector_db_filter_expression(**kwargs)
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import os
@@ -5,17 +6,22 @@ import threading
 import time
 import uuid
 import base64
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from queue import Queue
 import contextvars
 
 from . import interceptor_setup, util
+from .util import run_in_executor
 from paig_common.audit_spooler import AuditLogger
 from .backend import ShieldRestHttpClient, ShieldAccessRequest, HttpTransport, VectorDBAccessRequest, \
-    ShieldAccessResult, StreamAccessAuditRequest
+    ShieldAccessResult, StreamAccessAuditRequest, AsyncShieldRestHttpClient
 from .exception import PAIGException, AccessControlException
 from .message import ErrorMessage, InfoMessage, WarningMessage
 from .model import ConversationType
 from .posthog_events.posthog import capture_setup_event
+from .stream_chunker import StreamChunker, SentenceStreamChunker, create_stream_chunker
+from .vector_db_filter_cache import create_vector_db_filter_cache, FRESH, REFRESH_AHEAD
 
 _logger = logging.getLogger(__name__)
 
@@ -30,8 +36,7 @@ class PAIGPlugin:
     Attributes:
         enable_privacera_shield (bool): Whether to enable Privacera Shield.
         frameworks (list): The list of frameworks to intercept methods from.
-        user_context: An instance of contextvars.ContextVar() for managing thread-chain data.
-        thread_local_rlock: An instance of threading.RLock() for thread-local data locking.
+        user_context: An instance of contextvars.ContextVar() for managing thread-chain and asyncio task data.
         interceptor_installer_list: A list of interceptor installers for the PAIG plugin.
     """
 
@@ -62,6 +67,20 @@ class PAIGPlugin:
                 connection_timeout (float): The connection timeout for the access request.
 
                 read_timeout (float): The read timeout for the access request.
+
+                stream_chunking_policy (str): The chunking of the streamed replies for access checks, one of
+                sentence (default), characters or time.
+
+                stream_chunk_size (int): The number of characters of the chunks, for the characters policy.
+
+                stream_chunk_time_budget_ms (int): The maximum time the streamed text waits for the end of a
+                sentence, for the time policy.
+
+                stream_max_in_flight_checks (int): The maximum number of concurrent access checks of a streamed reply.
+                The default of 1 checks each chunk before releasing it, larger values pipeline the checks.
+
+                vector_db_filter_cache_ttl_sec (float): The time a vector DB filter is served from the cache of the
+                default application, 0 disables the cache. See PAIGApplication for the other cache options.
         """
 
         try:
@@ -96,8 +115,14 @@ class PAIGPlugin:
 
         HttpTransport.setup(**kwargs)
 
+        # Chunking of the streamed replies, validated upfront by creating a chunker
+        self.stream_chunking_policy = kwargs.get("stream_chunking_policy", "sentence")
+        self.stream_chunk_size = kwargs.get("stream_chunk_size", 200)
+        self.stream_chunk_time_budget_ms = kwargs.get("stream_chunk_time_budget_ms", 1000)
+        self.stream_max_in_flight_checks = kwargs.get("stream_max_in_flight_checks", 1)
+        self.create_stream_chunker()
+
         self.user_context = contextvars.ContextVar(PAIGPlugin.USER_CONTEXT)
-        self.thread_local_rlock = threading.RLock()
 
         if _logger.isEnabledFor(logging.DEBUG):
             _logger.debug(f"PAIGPlugin initialized with {self.__dict__}")
@@ -192,9 +217,14 @@ class PAIGPlugin:
         Returns:
             LLMStreamAccessChecker: A new instance of the LLMStreamAccessChecker.
         """
-        llm_stream_access_checker = LLMStreamAccessChecker(self)
+        llm_stream_access_checker = LLMStreamAccessChecker(self, self.create_stream_chunker(),
+                                                           self.stream_max_in_flight_checks)
         self.set_current(llm_stream_access_checker=llm_stream_access_checker)
 
+    def create_stream_chunker(self):
+        return create_stream_chunker(self.stream_chunking_policy, self.stream_chunk_size,
+                                     self.stream_chunk_time_budget_ms)
+
     def get_or_create_llm_stream_audit_logger(self):
         """
         Gets or creates an instance of StreamAuditLogger.
@@ -275,34 +305,32 @@ class PAIGPlugin:
 
     def set_current(self, **kwargs):
         """
-        Set any name-value into current thread-local context for the PAIG plugin.
+        Set any name-value into the current context for the PAIG plugin.
+
+        The values are kept in the context dict of the current thread or asyncio task, which is shared by the calls
+        made within the same shield context. Use create_shield_context to start an isolated context.
         :param kwargs: name=value pairs to be set in the context
         :return: nothing
         """
-        with self.thread_local_rlock:
-            user_context = self.get_user_context()
+        user_context = self.user_context.get(None)
+        if user_context is None:
+            self.set_user_context(dict(kwargs))
+        else:
             user_context.update(kwargs)
-            self.set_user_context(user_context)
 
     def get_current(self, key, default_value=None):
         """
-        Get the value of the given key from the current thread-local context for the PAIG plugin.
+        Get the value of the given key from the current context for the PAIG plugin.
         :param key:
         :param default_value: returned if the key does not exist
         :return:
         """
-        with self.thread_local_rlock:
-            user_context = self.get_user_context()
-            if key in user_context:
-                return user_context[key]
-            else:
-                return default_value
+        return self.get_user_context().get(key, default_value)
 
     def clear(self):
         if _logger.isEnabledFor(logging.DEBUG):
-            _logger.debug("Clearing thread-local context for PAIG plugin")
-        with self.thread_local_rlock:
-            self.set_user_context(None)
+            _logger.debug("Clearing context for PAIG plugin")
+        self.set_user_context(None)
 
     def check_access(self, **kwargs):
         return self.get_current_application().check_access(**kwargs)
@@ -310,10 +338,45 @@ class PAIGPlugin:
     def get_vector_db_filter_expression(self, **kwargs):
         return self.get_current_application().get_vector_db_filter_expression(**kwargs)
 
+    async def acheck_access(self, **kwargs):
+        """
+        Check access without blocking the event loop. Applications which are not an AsyncPAIGApplication are called
+        on the default executor.
+        """
+        application = self.get_current_application()
+        if isinstance(application, AsyncPAIGApplication):
+            return await application.check_access(**kwargs)
+        return await run_in_executor(application.check_access, **kwargs)
+
+    async def aget_vector_db_filter_expression(self, **kwargs):
+        """
+        Get the vector DB filter expression without blocking the event loop. Applications which are not an
+        AsyncPAIGApplication are called on the default executor.
+        """
+        application = self.get_current_application()
+        if isinstance(application, AsyncPAIGApplication):
+            return await application.get_vector_db_filter_expression(**kwargs)
+        return await run_in_executor(application.get_vector_db_filter_expression, **kwargs)
+
+    def get_vector_db_filter_cache_metrics(self):
+        """
+        Get the counters of the vector DB filter cache of the current application.
+
+        Returns:
+            dict: The size, hits, misses, hit rate, background refreshes, revalidations and evictions of the cache,
+            empty if the cache is disabled.
+        """
+        cache = self.get_current_application().vector_db_filter_cache
+        return cache.get_metrics() if cache else {}
+
 
 class PAIGPluginContext:
     """
-    This class provides a context manager for the PAIG plugin.
+    This class provides a context manager for the PAIG plugin, usable with both `with` and `async with`.
+
+    Entering the context sets a new context dict holding the outer values and the given name-value pairs, so
+    concurrent threads or asyncio tasks entering their own context do not see each other's values. Exiting the context
+    restores the outer context.
     """
 
     def __init__(self, **kwargs):
@@ -325,8 +388,10 @@ class PAIGPluginContext:
 
         Attributes:
             kwargs: The name-value pairs to be set in the context.
+            token: The token to restore the outer context on exit.
         """
         self.kwargs = kwargs
+        self.token = None
 
     def __enter__(self):
         """
@@ -336,12 +401,14 @@ class PAIGPluginContext:
             PAIGPluginContext: The current instance of the PAIGPluginContext class.
         """
         global _paig_plugin
-        _paig_plugin.set_current(**self.kwargs)
+        user_context = dict(_paig_plugin.get_user_context())
+        user_context.update(self.kwargs)
+        self.token = _paig_plugin.user_context.set(user_context)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """
-        Clear the context.
+        Restore the outer context.
 
         Args:
             exc_type: The type of the exception.
@@ -349,12 +416,27 @@ class PAIGPluginContext:
             exc_tb: The exception traceback.
         """
         global _paig_plugin
-        _paig_plugin.clear()
+        _paig_plugin.user_context.reset(self.token)
+        self.token = None
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.__exit__(exc_type, exc_val, exc_tb)
 
 
 # Global variable to store the PAIGPlugin instance
 _paig_plugin: PAIGPlugin = None
 
+# Executor of the pipelined access checks of the streamed replies, created on first use
+_stream_access_check_executor: ThreadPoolExecutor = None
+_stream_access_check_executor_lock = threading.Lock()
+
+# Executor of the background refreshes of the vector DB filters, created on first use
+_vector_db_filter_refresh_executor: ThreadPoolExecutor = None
+_vector_db_filter_refresh_executor_lock = threading.Lock()
+
 
 def setup(**options):
     """
@@ -425,6 +507,40 @@ def get_vector_db_filter_expression(**kwargs):
     return _paig_plugin.get_vector_db_filter_expression(**kwargs)
 
 
+async def acheck_access(**kwargs):
+    global _paig_plugin
+    return await _paig_plugin.acheck_access(**kwargs)
+
+
+async def aget_vector_db_filter_expression(**kwargs):
+    global _paig_plugin
+    return await _paig_plugin.aget_vector_db_filter_expression(**kwargs)
+
+
+def get_vector_db_filter_cache_metrics():
+    global _paig_plugin
+    return _paig_plugin.get_vector_db_filter_cache_metrics()
+
+
+def get_stream_access_check_executor():
+    global _stream_access_check_executor
+    if _stream_access_check_executor is None:
+        with _stream_access_check_executor_lock:
+            if _stream_access_check_executor is None:
+                _stream_access_check_executor = ThreadPoolExecutor(thread_name_prefix="paig-stream-access-check")
+    return _stream_access_check_executor
+
+
+def get_vector_db_filter_refresh_executor():
+    global _vector_db_filter_refresh_executor
+    if _vector_db_filter_refresh_executor is None:
+        with _vector_db_filter_refresh_executor_lock:
+            if _vector_db_filter_refresh_executor is None:
+                _vector_db_filter_refresh_executor = ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix="paig-vector-db-filter-refresh")
+    return _vector_db_filter_refresh_executor
+
+
 def dummy_access_denied():
     raise AccessControlException("Access Denied")
 
@@ -452,6 +568,25 @@ def setup_app(**kwargs):
         raise PAIGException(ErrorMessage.PARAMETERS_FOR_APP_CONFIG_NOT_PROVIDED)
 
 
+async def async_setup_app(**kwargs):
+    """
+    This function creates an instance of AsyncPAIGApplication from the application config file and initializes the
+    shield server for it. It takes the same options as setup_app.
+    Returns:
+        Instance of AsyncPAIGApplication
+    """
+    if "application_config_file" in kwargs or "application_config" in kwargs or "application_config_api_key" in kwargs:
+        # The application config is read from a file or fetched with a blocking request
+        app = await run_in_executor(AsyncPAIGApplication, **kwargs)
+        if app.is_configured():
+            await app.async_init_shield_server()
+            return app
+        else:
+            raise PAIGException(ErrorMessage.APPLICATION_NOT_CONFIGURED)
+    else:
+        raise PAIGException(ErrorMessage.PARAMETERS_FOR_APP_CONFIG_NOT_PROVIDED)
+
+
 class PAIGApplication:
     """
      Base plugin for Privacera AI Governance (PAIG).
@@ -484,6 +619,12 @@ class PAIGApplication:
                 application_config (dict): The application config dictionary or string contents of the file
                 request_kwargs (dict): The keyword arguments to be passed to the ShieldRestHttpClient class.
                 application_config_api_key (str): The API key to fetch the application config from the PAIG Server
+                vector_db_filter_cache_ttl_sec (float): The time a vector DB filter is served from the cache, 30
+                seconds by default, 0 disables the cache.
+                vector_db_filter_cache_max_size (int): The maximum number of users whose vector DB filters are
+                cached, 1000 by default.
+                vector_db_filter_cache_refresh_ahead_ratio (float): The part of the ttl after which a cached vector DB
+                filter is refreshed in the background, 0.8 by default.
 
                 You can also pass in any of the keys from the application config file as keyword arguments in case
                 you want to override the values that are in the application config file.
@@ -524,18 +665,26 @@ class PAIGApplication:
             "shield_plugin_private_key": self.shield_plugin_private_key
         }
 
-        self.shield_client = ShieldRestHttpClient(base_url=self.shield_base_url, tenant_id=self.tenant_id,
-                                                  api_key=self.api_key, encryption_keys_info=encryption_keys_info,
-                                                  request_kwargs=kwargs.get("request_kwargs", {}),
-                                                  is_self_hosted_shield_server=is_self_hosted_shield_server)
+        self.shield_client = self.create_shield_client(encryption_keys_info=encryption_keys_info,
+                                                       request_kwargs=kwargs.get("request_kwargs", {}),
+                                                       is_self_hosted_shield_server=is_self_hosted_shield_server)
 
-        self.shield_client.init_shield_server(self.application_key)
+        self.init_shield_server()
 
         self.llm_stream_audit_logger = None
 
+        self.vector_db_filter_cache = create_vector_db_filter_cache(**kwargs)
+
         if _logger.isEnabledFor(logging.DEBUG):
             _logger.debug(f"PAIGPlugin initialized with {self.__dict__}")
 
+    def create_shield_client(self, **kwargs):
+        return ShieldRestHttpClient(base_url=self.shield_base_url, tenant_id=self.tenant_id, api_key=self.api_key,
+                                    **kwargs)
+
+    def init_shield_server(self):
+        self.shield_client.init_shield_server(self.application_key)
+
     @classmethod
     def get_plugin_app_config(self, kwargs):
         """
@@ -694,6 +843,26 @@ class PAIGApplication:
         return self.client_application_key
 
     def authorize(self, **kwargs) -> ShieldAccessResult:
+        access_request = self.create_access_request(**kwargs)
+        return self.get_shield_client().is_access_allowed(request=access_request)
+
+    def authorize_batch(self, requests: list) -> list:
+        """
+        Authorize a batch of independent requests in a single call to the shield server.
+
+        Args:
+            requests (list): The requests to authorize. Each request is either a dict with the same keyword
+                arguments as the authorize method, or a ShieldAccessRequest.
+
+        Returns:
+            list: The result of each request, in request order. Each result is either a ShieldAccessResult or the
+            Exception raised while authorizing that request.
+        """
+        access_requests = [request if isinstance(request, ShieldAccessRequest)
+                           else self.create_access_request(**request) for request in requests]
+        return self.get_shield_client().authorize_batch(requests=access_requests)
+
+    def create_access_request(self, **kwargs) -> ShieldAccessRequest:
         access_request = kwargs.get("access_request")
         if access_request is None:
             if "text" not in kwargs:
@@ -717,7 +886,7 @@ class PAIGApplication:
                 conversation_type=conversation_type,
                 enable_audit=kwargs.get("enable_audit", True),
             )
-        return self.get_shield_client().is_access_allowed(request=access_request)
+        return access_request
 
     def check_access(self, **kwargs):
         access_result = self.authorize(**kwargs)
@@ -727,6 +896,58 @@ class PAIGApplication:
             return access_result.get_response_messages()
 
     def get_vector_db_filter_expression(self, **kwargs):
+        access_request = self.create_vector_db_access_request(**kwargs)
+        access_result = self.get_vector_db_access_result(access_request)
+        return self.process_vector_db_access_result(access_result)
+
+    def get_vector_db_access_result(self, access_request: VectorDBAccessRequest):
+        """
+        Get the vector DB access result of the user of the request, from the vector DB filter cache if it is enabled.
+        A result close to its expiry is returned and refreshed in the background, an expired result is revalidated
+        with the shield server.
+
+        Args:
+            access_request (VectorDBAccessRequest): The vector DB access request.
+
+        Returns:
+            VectorDBAccessResult: The vector DB access result.
+        """
+        cache = self.vector_db_filter_cache
+        if cache is None:
+            return self.get_shield_client().get_filter_expression(request=access_request)
+
+        key = access_request.user_name
+        entry, state = cache.lookup(key)
+        if state == FRESH:
+            return entry.access_result
+        if state == REFRESH_AHEAD:
+            if cache.begin_refresh(key):
+                get_vector_db_filter_refresh_executor().submit(self.refresh_vector_db_access_result, access_request,
+                                                               entry.etag)
+            return entry.access_result
+        return self.load_vector_db_access_result(access_request, entry.etag if entry else None)
+
+    def load_vector_db_access_result(self, access_request: VectorDBAccessRequest, etag: str = None):
+        key = access_request.user_name
+        access_result, etag = self.get_shield_client().get_filter_expression_if_modified(request=access_request,
+                                                                                          etag=etag)
+        access_result = self.vector_db_filter_cache.update(key, access_result, etag)
+        if access_result is None:
+            # The revalidated result was evicted meanwhile
+            access_result, etag = self.get_shield_client().get_filter_expression_if_modified(request=access_request)
+            access_result = self.vector_db_filter_cache.update(key, access_result, etag)
+        return access_result
+
+    def refresh_vector_db_access_result(self, access_request: VectorDBAccessRequest, etag: str):
+        try:
+            self.load_vector_db_access_result(access_request, etag)
+        except Exception as e:
+            # The cached result is served until it expires
+            _logger.warning(f"Failed to refresh the vector DB filter of user {access_request.user_name}: {e}")
+        finally:
+            self.vector_db_filter_cache.end_refresh(access_request.user_name)
+
+    def create_vector_db_access_request(self, **kwargs) -> VectorDBAccessRequest:
         access_request = kwargs.get("access_request")
         if access_request is None:
             global _paig_plugin
@@ -738,14 +959,16 @@ class PAIGApplication:
                 request_id=_paig_plugin.generate_request_id(),
                 user_name=_paig_plugin.get_current_user()
             )
+        return access_request
 
-        access_result = self.get_shield_client().get_filter_expression(request=access_request)
+    def process_vector_db_access_result(self, access_result) -> str:
         # In case if there is no policy to be evaluated for current user then we will get blank filter
         shield_filter_expr = access_result.get_filter_expression()
         # Setting the received shield_filter_expr inside context, so we can pass it for auditing when sending next
         # request for prompt authorization
         if shield_filter_expr != "":
-            _paig_plugin.set_current(vectorDBInfo=access_result.__dict__)
+            # A copy, as the result may be shared through the vector DB filter cache
+            _paig_plugin.set_current(vectorDBInfo=dict(access_result.__dict__))
 
         return shield_filter_expr
 
@@ -777,6 +1000,12 @@ class PAIGApplication:
 
         """
 
+        self.encrypt_stream_access_audit_request(audit_log_request)
+
+        llm_stream_audit_logger = self.get_or_create_llm_stream_audit_logger()
+        llm_stream_audit_logger.log(audit_log_request)
+
+    def encrypt_stream_access_audit_request(self, audit_log_request: StreamAccessAuditRequest):
         plugin_access_request_encryptor = self.shield_client.get_plugin_access_request_encryptor()
 
         if _logger.isEnabledFor(logging.DEBUG):
@@ -799,8 +1028,103 @@ class PAIGApplication:
         if _logger.isEnabledFor(logging.DEBUG):
             _logger.debug(f"Stream access audit request parameters (encrypted): {audit_log_request.to_payload_dict()}")
 
-        llm_stream_audit_logger = self.get_or_create_llm_stream_audit_logger()
-        llm_stream_audit_logger.log(audit_log_request)
+
+class AsyncPAIGApplication(PAIGApplication):
+    """
+    The asyncio variant of PAIGApplication.
+
+    The requests to the Shield service are made with an AsyncShieldRestHttpClient, so authorize, check_access,
+    get_vector_db_filter_expression and log_stream_access_audit are coroutines which do not block the event loop.
+    Use async_setup_app to create an instance, it also initializes the shield server.
+    """
+
+    def create_shield_client(self, **kwargs):
+        # The timeouts are set on the httpx client shared through AsyncHttpTransport, the urllib3 request kwargs
+        # do not apply
+        kwargs.pop("request_kwargs", None)
+        return AsyncShieldRestHttpClient(base_url=self.shield_base_url, tenant_id=self.tenant_id, api_key=self.api_key,
+                                         **kwargs)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # The background refreshes of the vector DB filters, referenced until they are done
+        self.vector_db_filter_refresh_tasks = set()
+
+    def init_shield_server(self):
+        # The shield server is initialized by async_init_shield_server, once the application is created
+        pass
+
+    async def async_init_shield_server(self):
+        await self.shield_client.init_shield_server(self.application_key)
+
+    async def authorize(self, **kwargs) -> ShieldAccessResult:
+        access_request = self.create_access_request(**kwargs)
+        return await self.get_shield_client().is_access_allowed(request=access_request)
+
+    async def authorize_batch(self, requests: list) -> list:
+        access_requests = [request if isinstance(request, ShieldAccessRequest)
+                           else self.create_access_request(**request) for request in requests]
+        return await self.get_shield_client().authorize_batch(requests=access_requests)
+
+    async def check_access(self, **kwargs):
+        access_result = await self.authorize(**kwargs)
+        if not access_result.get_is_allowed():
+            raise AccessControlException(access_result.get_response_messages()[0].get_response_text())
+        else:
+            return access_result.get_response_messages()
+
+    async def get_vector_db_filter_expression(self, **kwargs):
+        access_request = self.create_vector_db_access_request(**kwargs)
+        access_result = await self.get_vector_db_access_result(access_request)
+        return self.process_vector_db_access_result(access_result)
+
+    async def get_vector_db_access_result(self, access_request: VectorDBAccessRequest):
+        cache = self.vector_db_filter_cache
+        if cache is None:
+            return await self.get_shield_client().get_filter_expression(request=access_request)
+
+        key = access_request.user_name
+        entry, state = cache.lookup(key)
+        if state == FRESH:
+            return entry.access_result
+        if state == REFRESH_AHEAD:
+            if cache.begin_refresh(key):
+                refresh_task = asyncio.ensure_future(self.refresh_vector_db_access_result(access_request, entry.etag))
+                self.vector_db_filter_refresh_tasks.add(refresh_task)
+                refresh_task.add_done_callback(self.vector_db_filter_refresh_tasks.discard)
+            return entry.access_result
+        return await self.load_vector_db_access_result(access_request, entry.etag if entry else None)
+
+    async def load_vector_db_access_result(self, access_request: VectorDBAccessRequest, etag: str = None):
+        key = access_request.user_name
+        access_result, etag = await self.get_shield_client().get_filter_expression_if_modified(
+            request=access_request, etag=etag)
+        access_result = self.vector_db_filter_cache.update(key, access_result, etag)
+        if access_result is None:
+            # The revalidated result was evicted meanwhile
+            access_result, etag = await self.get_shield_client().get_filter_expression_if_modified(
+                request=access_request)
+            access_result = self.vector_db_filter_cache.update(key, access_result, etag)
+        return access_result
+
+    async def refresh_vector_db_access_result(self, access_request: VectorDBAccessRequest, etag: str):
+        try:
+            await self.load_vector_db_access_result(access_request, etag)
+        except Exception as e:
+            # The cached result is served until it expires
+            _logger.warning(f"Failed to refresh the vector DB filter of user {access_request.user_name}: {e}")
+        finally:
+            self.vector_db_filter_cache.end_refresh(access_request.user_name)
+
+    async def log_stream_access_audit(self, audit_log_request: StreamAccessAuditRequest):
+        """
+        Sends a stream access audit to the Shield service.
+
+        Args:
+            audit_log_request (StreamAccessAuditRequest): The StreamAccessAuditRequest object containing the audit log details.
+        """
+        self.encrypt_stream_access_audit_request(audit_log_request)
+        await self.get_shield_client().log_stream_access_audit(audit_log_request)
 
 
 class LLMStreamAccessChecker:
@@ -810,19 +1134,39 @@ class LLMStreamAccessChecker:
     This class is responsible for processing LLM reply tokens and checking access
     based on the generated text. It interacts with the PAIG plugin to perform access
     checks and retrieve authorized responses.
+
+    The reply tokens are accumulated into chunks by the stream chunker. With a single in-flight check, each chunk is
+    authorized before its tokens are released. With a larger window, the checks of the chunks are submitted
+    concurrently and the authorized chunks are released in order as their checks complete, so the time to the first
+    released token does not grow with the number of chunks waiting for the shield server.
     """
 
-    def __init__(self, paig_plugin):
+    def __init__(self, paig_plugin, stream_chunker: StreamChunker = None, max_in_flight_checks=1):
         """
         Initialize the LLMStreamAccessChecker.
 
         Args:
             paig_plugin: The PAIG plugin instance for performing access checks.
+            stream_chunker (StreamChunker): The chunking policy of the reply, by sentence if not given.
+            max_in_flight_checks (int): The maximum number of chunk checks in flight at the same time.
         """
         self.paig_plugin = paig_plugin
         self.stream_id = str(uuid.uuid4())  # Unique stream id to combine chunks for auditing
 
         self.llm_reply_text = ""  # Accumulates LLM reply tokens
+        self.llm_reply_text_start_time = None  # Time the first accumulated token was received
+
+        self.stream_chunker = stream_chunker or SentenceStreamChunker()
+        self.max_in_flight_checks = max(1, max_in_flight_checks)
+
+        # The (chunk, future) of the checks in flight, in chunk order
+        self.in_flight_checks = deque()
+
+        # The event loop the checker was created on, to run the checks of an async shield client from other threads
+        try:
+            self.loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.loop = None
 
         # To keep a track first token received
         self.is_first_reply_token_received = False
@@ -865,10 +1209,69 @@ class LLMStreamAccessChecker:
                                                                                  "thread_id"),
                                                                              stream_id=self.stream_id,
                                                                              enable_audit=False)
+        if asyncio.iscoroutine(access_result):
+            access_result = self.run_on_loop(access_result).result()
 
         # Setting the current text length, so it can be used in next sentence authorize request
         self.processed_sentence_length = self.processed_sentence_length + len(text)
 
+        return self.process_access_result(text, access_result)
+
+    def submit_check_access(self, text):
+        """
+        Submit the access check of the given chunk without waiting for its result.
+
+        The access request is created in the calling thread, in chunk order, so it holds the offset of the chunk in
+        the reply and the request context of the stream.
+
+        Args:
+            text (str): The chunk for which access needs to be checked.
+        """
+        self.paig_plugin.set_current(stream_sentence_length=self.processed_sentence_length)
+
+        application = self.paig_plugin.get_current_application()
+        access_request = application.create_access_request(text=text,
+                                                           conversation_type=ConversationType.REPLY,
+                                                           thread_id=self.paig_plugin.get_current("thread_id"),
+                                                           stream_id=self.stream_id,
+                                                           enable_audit=False)
+        self.processed_sentence_length = self.processed_sentence_length + len(text)
+
+        shield_client = application.get_shield_client()
+        if isinstance(shield_client, AsyncShieldRestHttpClient):
+            future = self.run_on_loop(shield_client.is_access_allowed(access_request))
+        else:
+            future = get_stream_access_check_executor().submit(contextvars.copy_context().run,
+                                                               shield_client.is_access_allowed, access_request)
+        self.in_flight_checks.append((text, future))
+
+    def release_completed_checks(self, wait_count=0):
+        """
+        Release the authorized text of the checks in flight which are completed, in chunk order.
+
+        Args:
+            wait_count (int): The number of the oldest checks to wait for, even if they are not completed yet.
+
+        Returns:
+            str: The authorized text released.
+        """
+        authorized_text = ""
+        while self.in_flight_checks and (wait_count > 0 or self.in_flight_checks[0][1].done()):
+            text, future = self.in_flight_checks.popleft()
+            wait_count -= 1
+            try:
+                authorized_text += self.process_access_result(text, future.result())
+            except BaseException:
+                self.cancel_in_flight_checks()
+                raise
+        return authorized_text
+
+    def cancel_in_flight_checks(self):
+        while self.in_flight_checks:
+            _, future = self.in_flight_checks.popleft()
+            future.cancel()
+
+    def process_access_result(self, text, access_result):
         # Add access responses to list
         self.shield_access_response_list.append(access_result)
 
@@ -888,17 +1291,30 @@ class LLMStreamAccessChecker:
 
         return shield_response_text
 
+    def run_on_loop(self, coroutine):
+        if self.loop is None:
+            coroutine.close()
+            raise RuntimeError("LLMStreamAccessChecker of an async application should be created on an event loop.")
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
     def check_access_for_incomplete_sentence(self):
-        if self.llm_reply_text != "":
-            self.check_access_for_sentence(self.llm_reply_text)
+        authorized_llm_reply_text = ""
+        if self.max_in_flight_checks > 1:
+            if self.llm_reply_text != "":
+                self.submit_check_access(self.llm_reply_text)
+            authorized_llm_reply_text = self.release_completed_checks(wait_count=len(self.in_flight_checks))
+        elif self.llm_reply_text != "":
+            authorized_llm_reply_text = self.check_access_for_sentence(self.llm_reply_text)
         self.llm_reply_text = ""
+        self.llm_reply_text_start_time = None
+        return authorized_llm_reply_text
 
     def check_access(self, llm_reply_token):
         """
         Check access based on the LLM reply token.
 
-        This method accumulates LLM reply tokens until a complete sentence is formed,
-        then checks access for that sentence and retrieves the authorized response.
+        This method accumulates LLM reply tokens until a chunk is complete according to the chunking policy,
+        then checks access for that chunk and returns the authorized text released so far.
 
         Args:
             llm_reply_token (str): The LLM reply token to process.
@@ -906,31 +1322,33 @@ class LLMStreamAccessChecker:
         if _logger.isEnabledFor(logging.DEBUG):
             _logger.debug(f"LLMStreamAccessChecker::check_access llm_reply_token={llm_reply_token}")
 
-        # Accumulate LLM reply tokens to form complete sentences
+        # Accumulate LLM reply tokens to form complete chunks
+        if self.llm_reply_text_start_time is None:
+            self.llm_reply_text_start_time = time.monotonic()
         self.llm_reply_text = self.llm_reply_text + llm_reply_token
 
+        chunks, self.llm_reply_text = self.stream_chunker.split(
+            self.llm_reply_text, llm_reply_token, time.monotonic() - self.llm_reply_text_start_time)
+        if not self.llm_reply_text:
+            self.llm_reply_text_start_time = None
+
         # Initialize variable to store authorized LLM reply text
         authorized_llm_reply_text = ""
 
-        if self.llm_reply_text.endswith(".") or llm_reply_token == "":
-            # Full sentence formed; check access for complete sentence
-            authorized_llm_reply_text = self.check_access_for_sentence(self.llm_reply_text)
-
-            # Reset LLM reply text as sentence is complete
-            self.llm_reply_text = ""
-        else:
-            if ". " in self.llm_reply_text:
-                # Incomplete sentence; split and process
-                sentences = self.llm_reply_text.split(". ")
-
-                # Take first sentence
-                sentence = sentences[0] + ". "
+        if self.max_in_flight_checks == 1:
+            for chunk in chunks:
+                authorized_llm_reply_text += self.check_access_for_sentence(chunk)
+            return authorized_llm_reply_text
 
-                # Check access for incomplete sentence
-                authorized_llm_reply_text = self.check_access_for_sentence(sentence)
+        for chunk in chunks:
+            # Wait for the oldest check when the window is full
+            wait_count = len(self.in_flight_checks) - self.max_in_flight_checks + 1
+            authorized_llm_reply_text += self.release_completed_checks(wait_count=wait_count)
+            self.submit_check_access(chunk)
 
-                # Remove processed sentence from accumulated text
-                self.llm_reply_text = self.llm_reply_text.replace(sentence, "", 1)
+        # Release everything at the end of the stream
+        wait_count = len(self.in_flight_checks) if llm_reply_token == "" else 0
+        authorized_llm_reply_text += self.release_completed_checks(wait_count=wait_count)
 
         return authorized_llm_reply_text
 
@@ -1045,6 +1463,8 @@ class LLMStreamAccessChecker:
         Returns:
             None
         """
+        # Any check still in flight, e.g. when the stream failed, is not part of the released reply
+        self.cancel_in_flight_checks()
         if len(self.shield_access_response_list) > 0:
             stream_access_audit_request = self.create_stream_access_audit_request()
             self.paig_plugin.log_stream_access_audit(stream_access_audit_request)
@@ -1,12 +1,27 @@
 import base64
 import logging
+import os
+import threading
+from collections import OrderedDict
 
 from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
 _logger = logging.getLogger(__name__)
 
+# Each message is encrypted with RSA in chunks of 100 bytes
+ENCRYPTION_MODE_CHUNKED = "chunked"
+# RSA wraps an AES-256-GCM data key once, and each message is sealed with the data key
+ENCRYPTION_MODE_ENVELOPE = "envelope"
+# Supported encryption modes, by order of preference
+SUPPORTED_ENCRYPTION_MODES = [ENCRYPTION_MODE_ENVELOPE, ENCRYPTION_MODE_CHUNKED]
+
+# The prefix is not part of the base64 alphabet, so envelope messages are told apart from chunked messages
+ENVELOPE_PREFIX = "PAIGENV1:"
+ENVELOPE_NONCE_SIZE = 12
+
 
 class RSAKeyUtil:
     KEY_ALGO_NAME = "RSA"
@@ -82,10 +97,30 @@ class RSAKeyInfo:
 
 
 class DataEncryptor:
+    """
+    Encrypts messages with the public key and decrypts them with the private key.
+
+    In the chunked mode, each message is encrypted with RSA in chunks of 100 bytes. In the envelope mode, a session
+    AES-256-GCM data key is wrapped once with RSA, and each message is sealed with the data key as
+    PAIGENV1:<wrapped data key>:<nonce and ciphertext>. The data key is replaced after data_key_max_messages messages.
+    Both formats are decrypted, whatever the encryption mode.
+    """
 
-    def __init__(self, public_key: str, private_key: str):
+    DATA_KEY_MAX_MESSAGES = 1000000
+    UNWRAPPED_DATA_KEY_CACHE_SIZE = 256
+
+    def __init__(self, public_key: str, private_key: str, encryption_mode: str = ENCRYPTION_MODE_CHUNKED,
+                 data_key_max_messages: int = DATA_KEY_MAX_MESSAGES):
         _logger.debug("==> DataEncryptor()")
 
+        self.encryption_mode = encryption_mode
+        self.data_key_max_messages = data_key_max_messages
+        self.data_key_lock = threading.Lock()
+        self.data_key_cipher = None
+        self.wrapped_data_key = None
+        self.data_key_message_count = 0
+        self.unwrapped_data_keys = OrderedDict()
+
         # Load public key
         self.public_key = None
         if public_key is not None:
@@ -143,17 +178,78 @@ class DataEncryptor:
         )
         return decrypted_data_bytes
 
-    def encrypt(self, data):
+    def encrypt_envelope(self, data):
+        """Seals the data with the session data key and returns the envelope message."""
+        wrapped_data_key, data_key_cipher = self.get_session_data_key()
+        nonce = os.urandom(ENVELOPE_NONCE_SIZE)
+        sealed_data = data_key_cipher.encrypt(nonce, data.encode("utf-8"), None)
+        return f"{ENVELOPE_PREFIX}{wrapped_data_key}:{base64.b64encode(nonce + sealed_data).decode('utf-8')}"
+
+    def decrypt_envelope(self, data):
+        """Opens the envelope message with its unwrapped data key and returns the data."""
+        wrapped_data_key, sealed_data = data[len(ENVELOPE_PREFIX):].split(":", 1)
+        sealed_data_bytes = base64.b64decode(sealed_data)
+        data_key_cipher = self.get_unwrapped_data_key(wrapped_data_key)
+        return data_key_cipher.decrypt(sealed_data_bytes[:ENVELOPE_NONCE_SIZE],
+                                       sealed_data_bytes[ENVELOPE_NONCE_SIZE:], None).decode("utf-8")
+
+    def get_session_data_key(self):
+        with self.data_key_lock:
+            if self.data_key_cipher is None or self.data_key_message_count >= self.data_key_max_messages:
+                data_key = AESGCM.generate_key(bit_length=256)
+                self.wrapped_data_key = base64.b64encode(self.public_key.encrypt(data_key, _oaep_padding())).decode(
+                    "utf-8")
+                self.data_key_cipher = AESGCM(data_key)
+                self.data_key_message_count = 0
+            self.data_key_message_count += 1
+            return self.wrapped_data_key, self.data_key_cipher
+
+    def get_unwrapped_data_key(self, wrapped_data_key):
+        # The data keys are unwrapped once per session, the messages of a session share the same wrapped data key
+        with self.data_key_lock:
+            data_key_cipher = self.unwrapped_data_keys.get(wrapped_data_key)
+            if data_key_cipher is not None:
+                self.unwrapped_data_keys.move_to_end(wrapped_data_key)
+                return data_key_cipher
+
+        data_key = self.private_key.decrypt(base64.b64decode(wrapped_data_key), _oaep_padding())
+        data_key_cipher = AESGCM(data_key)
+        with self.data_key_lock:
+            self.unwrapped_data_keys[wrapped_data_key] = data_key_cipher
+            if len(self.unwrapped_data_keys) > self.UNWRAPPED_DATA_KEY_CACHE_SIZE:
+                self.unwrapped_data_keys.popitem(last=False)
+        return data_key_cipher
+
+    def encrypt(self, data, encryption_mode=None):
         if self.public_key is None:
             raise ValueError("public key is not set")
+        if (encryption_mode or self.encryption_mode) == ENCRYPTION_MODE_ENVELOPE:
+            return self.encrypt_envelope(data)
         return self.encrypt_data(data)
 
     def decrypt(self, data):
         if self.private_key is None:
             raise ValueError("private key is not set")
+        if data.startswith(ENVELOPE_PREFIX):
+            return self.decrypt_envelope(data)
         return self.decrypt_data(data)
 
 
+def _oaep_padding():
+    return padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None)
+
+
+def negotiate_encryption_mode(requested_encryption_modes, supported_encryption_modes=None):
+    """
+    Returns the first of the requested encryption modes which is supported, or the chunked mode.
+    """
+    supported_encryption_modes = supported_encryption_modes or SUPPORTED_ENCRYPTION_MODES
+    for encryption_mode in requested_encryption_modes or []:
+        if encryption_mode in supported_encryption_modes:
+            return encryption_mode
+    return ENCRYPTION_MODE_CHUNKED
+
+
 class EncryptionKeyInfo:
     def __init__(self, response_dict):
         self.response_dict = response_dict
@@ -2,6 +2,8 @@ import inspect
 import logging
 from abc import abstractmethod
 
+from .util import run_in_executor
+
 _logger = logging.getLogger(__name__)
 
 
@@ -36,6 +38,18 @@ def intercept_methods(paig_plugin, cls, method_names, callback):
 
 def wrap_method(paig_plugin, cls, method_name, method, callback):
     def __wrap__(my_callback):
+        if inspect.iscoroutinefunction(my_callback.method):
+            async def async_wrapper(self, *args, **kwargs):
+                # The callbacks make blocking requests to the shield server, run them off the event loop
+                updated_args, updated_kwargs = await run_in_executor(my_callback.callback_input, *args, **kwargs)
+
+                # Await the actual method
+                output = await my_callback.method(self, *updated_args, **updated_kwargs)
+
+                return await run_in_executor(my_callback.callback_output, output)
+
+            return async_wrapper
+
         def wrapper(self, *args, **kwargs):
             # Call inputs processor
             updated_args, updated_kwargs = my_callback.callback_input(*args, **kwargs)
@@ -5,15 +5,21 @@ from uuid import UUID
 
 from langchain.callbacks.tracers.base import BaseTracer
 from langchain.schema import LLMResult
-from langchain_core.callbacks import CallbackManager
+from langchain_core.callbacks import CallbackManager, AsyncCallbackManager
 from langchain_core.outputs import GenerationChunk, ChatGenerationChunk
 from langchain_core.tracers import Run
 
+try:
+    from langchain_core.tracers.base import AsyncBaseTracer
+except ImportError:
+    # Older langchain_core versions have no async tracer, the sync callback is run on the executor instead
+    AsyncBaseTracer = None
+
 from .langchain_method_interceptor import LangChainMethodInterceptor
 from .langchain_streaming_interceptor import LangChainStreamingInterceptor
 from .message import InfoMessage
 from .model import ConversationType
-from .util import process_nested_input
+from .util import process_nested_input, run_in_executor
 
 _logger = logging.getLogger(__name__)
 TRACE_LEVEL = 5
@@ -57,38 +63,10 @@ def setup_langchain_interceptors(interceptor_list, paig_plugin):
     interceptor_list.append(langchain_interceptor)
 
 
-class PrivaceraShieldCallback(BaseTracer):
-    """Callback for Privacera Shield.
-    This is based on the BaseTracer which captures events coming from Langchain library and creates a Run
-    object which captures the input and output associated with each event. The Run object is then passed to
-    forward. Run object also has tags and meta-data that it can pass from one event to another. The Runs are
-    nested so there is a parent_run_id that can be used to trace the lineage of the Run objects.
-
-    One typical RAG application flow results in following events,
-
-    on_chain_start
-        on_retriever_start
-        on_retriever_end
-        on_llm_start
-        on_llm_end
-    on_chain_end
-
-    Or
-
-    on_chain_start
-        on_llm_start - convert question to standalone question
-        on_llm_end
-        on_retriever_start
-        on_retriever_end
-        on_llm_start
-        on_llm_end
-    on_chain_end
+class PrivaceraShieldCallbackMixin:
+    """
+    The run processing shared by the sync and async callbacks for Privacera Shield.
     """
-    def __init__(self, **kwargs):
-        super().__init__()
-        self.raise_error = True
-        self.paig_plugin = kwargs.get("paig_plugin")
-        self.is_streaming_enabled = False
 
     def print_run(self, event, run: Run, details=True):
         if _logger.isEnabledFor(logging.DEBUG):
@@ -137,6 +115,70 @@ class PrivaceraShieldCallback(BaseTracer):
         # Cleanup llm stream access checker
         self.paig_plugin.cleanup_llm_stream_access_checker()
 
+    def get_reply_texts(self, response: LLMResult):
+        output_list = []
+        for generations in response.generations:
+            for generation in generations:
+                output_list.append(generation.text)
+        return output_list
+
+    def update_reply_texts(self, response: LLMResult, shield_response):
+        i = 0
+        for generations in response.generations:
+            for generation in generations:
+                shield_response_text = shield_response[i].get_response_text()
+                self.update_ai_message_content_if_present(generation, shield_response_text)
+                generation.text = shield_response_text
+                i += 1
+
+    def get_chain_input_texts(self, run: Run):
+        text = []
+        process_nested_input(run.inputs, text)
+        return text
+
+    def update_chain_input_texts(self, run: Run, response_messages):
+        process_nested_input(run.inputs,
+                             [response_message.get_response_text() for response_message in response_messages],
+                             False)
+
+    def update_retrieved_documents(self, run: Run, response_messages):
+        for document, response_message in zip(run.outputs["documents"], response_messages):
+            document.page_content = response_message.get_response_text()
+
+
+class PrivaceraShieldCallback(PrivaceraShieldCallbackMixin, BaseTracer):
+    """Callback for Privacera Shield.
+    This is based on the BaseTracer which captures events coming from Langchain library and creates a Run
+    object which captures the input and output associated with each event. The Run object is then passed to
+    forward. Run object also has tags and meta-data that it can pass from one event to another. The Runs are
+    nested so there is a parent_run_id that can be used to trace the lineage of the Run objects.
+
+    One typical RAG application flow results in following events,
+
+    on_chain_start
+        on_retriever_start
+        on_retriever_end
+        on_llm_start
+        on_llm_end
+    on_chain_end
+
+    Or
+
+    on_chain_start
+        on_llm_start - convert question to standalone question
+        on_llm_end
+        on_retriever_start
+        on_retriever_end
+        on_llm_start
+        on_llm_end
+    on_chain_end
+    """
+    def __init__(self, **kwargs):
+        super().__init__()
+        self.raise_error = True
+        self.paig_plugin = kwargs.get("paig_plugin")
+        self.is_streaming_enabled = False
+
     def _persist_run(self, run: Run) -> None:
         """Persist a run."""
         # self.print_run("_persist_run", run)
@@ -184,21 +226,10 @@ class PrivaceraShieldCallback(BaseTracer):
         if self.is_streaming_enabled:
             self.handle_streaming_llm_end(response)
         else:
-            output_list = []
-            for generations in response.generations:
-                for generation in generations:
-                    output_list.append(generation.text)
-
-            shield_response = self.paig_plugin.check_access(text=output_list,
+            shield_response = self.paig_plugin.check_access(text=self.get_reply_texts(response),
                                                             conversation_type=ConversationType.REPLY,
                                                             thread_id=self.paig_plugin.get_current("thread_id"))
-            i = 0
-            for generations in response.generations:
-                for generation in generations:
-                    shield_response_text = shield_response[i].get_response_text()
-                    self.update_ai_message_content_if_present(generation, shield_response_text)
-                    generation.text = shield_response_text
-                    i += 1
+            self.update_reply_texts(response, shield_response)
 
         llm_run = super().on_llm_end(response, run_id=run_id, **kwargs)
 
@@ -242,17 +273,14 @@ class PrivaceraShieldCallback(BaseTracer):
             self.create_payload("on_chain_start", run)
             # text = extract_text_from_input(input)
             # text = run.inputs.get("question", run.inputs.get("input"))
-            text = []
-            process_nested_input(run.inputs, text)
+            text = self.get_chain_input_texts(run)
             response_messages = self.paig_plugin.check_access(text=text,
                                                               conversation_type=ConversationType.PROMPT,
                                                               thread_id=self.paig_plugin.get_current("thread_id"))
             # response = shield.process(payload)
             # copy response to run.__dict__["inputs"]
             # run.inputs["question"] = response_messages[0].get_response_text()
-            process_nested_input(run.inputs,
-                                 [response_message.get_response_text() for response_message in response_messages],
-                                 False)
+            self.update_chain_input_texts(run, response_messages)
             # print(f"redacted question={run.inputs['question']}")
 
     def _on_chain_end(self, run: Run) -> None:
@@ -291,27 +319,113 @@ class PrivaceraShieldCallback(BaseTracer):
             text=[document.page_content for document in run.outputs["documents"]],
             conversation_type=ConversationType.RAG,  # RETRIEVAL)
             thread_id=self.paig_plugin.get_current("thread_id"))
-        for document, response_message in zip(run.outputs["documents"], response):
-            document.page_content = response_message.get_response_text()
+        self.update_retrieved_documents(run, response)
 
     def _on_retriever_error(self, run: Run) -> None:
         """Process the Retriever Run upon error."""
         self.print_run("_on_retriever_error", run)
 
 
+if AsyncBaseTracer is not None:
+    class AsyncPrivaceraShieldCallback(PrivaceraShieldCallbackMixin, AsyncBaseTracer):
+        """Async callback for Privacera Shield.
+        This is the variant of PrivaceraShieldCallback added to the AsyncCallbackManager of the async LangChain calls
+        such as ainvoke and agenerate. The access checks are awaited on the event loop, the streaming access checks
+        which are blocking are run on the executor.
+        """
+        def __init__(self, **kwargs):
+            super().__init__()
+            self.raise_error = True
+            # Run inline in the calling task, so the values set in the PAIG context are seen by the next events
+            self.run_inline = True
+            self.paig_plugin = kwargs.get("paig_plugin")
+            self.is_streaming_enabled = False
+
+        async def _persist_run(self, run: Run) -> None:
+            """Persist a run."""
+            pass
+
+        async def _on_llm_start(self, run: Run) -> None:
+            """Process the LLM Run upon start."""
+            self.print_run("_on_llm_start", run)
+
+            # Initialize llm stream access checker
+            self.paig_plugin.create_llm_stream_access_checker()
+
+            response = await self.paig_plugin.acheck_access(text=run.inputs["prompts"],
+                                                            conversation_type=ConversationType.ENRICHED_PROMPT,
+                                                            thread_id=self.paig_plugin.get_current("thread_id"))
+            run.inputs["prompts"] = [response_message.get_response_text() for response_message in response]
+
+        async def _on_llm_new_token(
+                self,
+                run: Run,
+                token: str,
+                chunk: Optional[Union[GenerationChunk, ChatGenerationChunk]],
+        ) -> None:
+            """Process new LLM token."""
+            if not self.is_streaming_enabled:
+                self.is_streaming_enabled = True
+
+        async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+            if self.is_streaming_enabled:
+                await run_in_executor(self.handle_streaming_llm_end, response)
+            else:
+                shield_response = await self.paig_plugin.acheck_access(
+                    text=self.get_reply_texts(response),
+                    conversation_type=ConversationType.REPLY,
+                    thread_id=self.paig_plugin.get_current("thread_id"))
+                self.update_reply_texts(response, shield_response)
+
+            await super().on_llm_end(response, run_id=run_id, **kwargs)
+
+            # Cleanup llm stream access checker
+            self.paig_plugin.cleanup_llm_stream_access_checker()
+
+        async def _on_llm_error(self, run: Run) -> None:
+            """Process the LLM Run upon error."""
+            self.print_run("_on_llm_error", run)
+
+            if self.is_streaming_enabled:
+                await run_in_executor(self.handle_streaming_llm_end, None)
+
+        async def _on_chain_start(self, run: Run) -> None:
+            """Process the Chain Run upon start."""
+            self.print_run("_on_chain_start", run)
+
+            if not run.parent_run_id:
+                response_messages = await self.paig_plugin.acheck_access(
+                    text=self.get_chain_input_texts(run),
+                    conversation_type=ConversationType.PROMPT,
+                    thread_id=self.paig_plugin.get_current("thread_id"))
+                self.update_chain_input_texts(run, response_messages)
+
+        async def _on_retriever_end(self, run: Run) -> None:
+            """Process the Retriever Run."""
+            self.print_run("_on_retriever_end", run)
+            response = await self.paig_plugin.acheck_access(
+                text=[document.page_content for document in run.outputs["documents"]],
+                conversation_type=ConversationType.RAG,
+                thread_id=self.paig_plugin.get_current("thread_id"))
+            self.update_retrieved_documents(run, response)
+else:
+    AsyncPrivaceraShieldCallback = PrivaceraShieldCallback
+
+
 class Interceptor:
     def __init__(self, method_name, original_func, *args, **kwargs):
         self.method_name = method_name
         self.original_func = original_func
         self.paig_plugin = kwargs.get("paig_plugin")
-        pass
+        self.callback_manager_cls = kwargs.get("callback_manager_cls", CallbackManager)
+        self.callback_cls = kwargs.get("callback_cls", PrivaceraShieldCallback)
 
     def __call__(self, *args, **kwargs):
         _logger.debug(f"before calling {self.method_name}, args={args}, kwargs={kwargs}")
         ret = self.original_func(*args, **kwargs)
-        if isinstance(ret, CallbackManager):
-            if not any(isinstance(handler, PrivaceraShieldCallback) for handler in ret.inheritable_handlers):
-                ret.add_handler(PrivaceraShieldCallback(paig_plugin=self.paig_plugin))
+        if isinstance(ret, self.callback_manager_cls):
+            if not any(isinstance(handler, self.callback_cls) for handler in ret.inheritable_handlers):
+                ret.add_handler(self.callback_cls(paig_plugin=self.paig_plugin))
                 self.paig_plugin.set_current(thread_id=self.paig_plugin.generate_conversation_thread_id())
                 _logger.debug("added PrivaceraShieldCallback to CallbackManager")
             else:
@@ -339,10 +453,18 @@ class LangChainCallbackManagerSetup:
     def __init__(self):
         self.method_list = ['configure']
         self.interceptor_list = []
+        self.async_interceptor_list = []
 
     def setup(self, paig_plugin):
         self.interceptor_list = monkey_patch(CallbackManager, self.method_list, Interceptor, paig_plugin=paig_plugin)
+        # The async calls such as ainvoke and agenerate configure an AsyncCallbackManager
+        self.async_interceptor_list = monkey_patch(AsyncCallbackManager, self.method_list, Interceptor,
+                                                   paig_plugin=paig_plugin,
+                                                   callback_manager_cls=AsyncCallbackManager,
+                                                   callback_cls=AsyncPrivaceraShieldCallback)
 
     def undo_setup_interceptors(self):
         for method, interceptor in zip(self.method_list, self.interceptor_list):
             setattr(CallbackManager, method, interceptor.get_original_func())
+        for method, interceptor in zip(self.method_list, self.async_interceptor_list):
+            setattr(AsyncCallbackManager, method, interceptor.get_original_func())
@@ -73,8 +73,14 @@ class LangChainStreamingInterceptor:
 
             return CallbackManagerForLLMRun
 
+        def get_async_callback_manager_for_llm_run_import():
+            from langchain_core.callbacks.manager import AsyncCallbackManagerForLLMRun
+
+            return AsyncCallbackManagerForLLMRun
+
         type_to_cls_dict = {
-            "CallbackManagerForLLMRun": get_callback_manager_for_llm_run_import()
+            "CallbackManagerForLLMRun": get_callback_manager_for_llm_run_import(),
+            "AsyncCallbackManagerForLLMRun": get_async_callback_manager_for_llm_run_import()
         }
 
         return type_to_cls_dict
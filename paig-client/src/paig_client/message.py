@@ -63,6 +63,10 @@ class ErrorMessage(BaseMessage):
     PARAMETERS_FOR_APP_CONFIG_NOT_PROVIDED = 400018, "Parameters for application config are not provided - you need " \
                                                      "to pass application_config_file or application_config"
     MULTIPLE_APP_CONFIG_FILES_FOUND = 400019, "Multiple application config files found at {file_path}"
+    INVALID_STREAM_CHUNKING_POLICY = 400020, "Invalid stream chunking policy {policy}, it should be one of " \
+                                             "sentence, characters or time"
+    INVALID_STREAM_CHUNKING_OPTION = 400021, "Invalid stream chunking option {option}={value}, it should be " \
+                                             "greater than 0"
 
     def format(self, **kwargs):
         return super().format(logging.ERROR, **kwargs)
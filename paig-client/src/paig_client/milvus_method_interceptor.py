@@ -1,4 +1,3 @@
-import copy
 import inspect
 import logging
 import time
@@ -150,7 +149,8 @@ class MilvusFilterCallback(MethodIOCallback):
         # In case if there is no policy to be evaluated for current user then we will get blank filter
         shield_filter_expr = self.paig_plugin.get_vector_db_filter_expression()
 
-        updated_kwargs = copy.deepcopy(kwargs)
+        # Only the filter argument is replaced, so the other arguments, like the search vectors, are not copied
+        updated_kwargs = dict(kwargs)
 
         # Setting the received shield_filter_expr inside context, so we can pass it for auditing when sending next
         # request for prompt authorization
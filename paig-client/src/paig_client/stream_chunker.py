@@ -0,0 +1,118 @@
+from .exception import PAIGException
+from .message import ErrorMessage
+
+
+class StreamChunker:
+    """
+    Base class of the chunking policies of the streamed LLM replies.
+
+    A chunking policy decides which part of the accumulated reply tokens is complete enough to be sent to the shield
+    server for authorization, while the rest is kept until more tokens are received.
+    """
+
+    def split(self, text, llm_reply_token, elapsed_sec):
+        """
+        Split the accumulated reply text into the chunks to authorize and the remaining text.
+
+        Args:
+            text (str): The accumulated reply text, including the last token.
+            llm_reply_token (str): The last reply token. An empty token marks the end of the stream.
+            elapsed_sec (float): The time since the first token of the accumulated text was received.
+
+        Returns:
+            tuple: The list of chunks to authorize, in order, and the remaining text.
+        """
+        if llm_reply_token == "":
+            return _non_empty([text]), ""
+        return self.split_text(text, elapsed_sec)
+
+    def split_text(self, text, elapsed_sec):
+        raise NotImplementedError
+
+
+class SentenceStreamChunker(StreamChunker):
+    """
+    Chunks the reply by sentence, a sentence ends with a dot at the end of the text or followed by a space.
+    """
+
+    def split_text(self, text, elapsed_sec):
+        if text.endswith("."):
+            return [text], ""
+
+        chunks = []
+        while ". " in text:
+            sentence = text.split(". ", 1)[0] + ". "
+            chunks.append(sentence)
+            text = text[len(sentence):]
+        return chunks, text
+
+
+class CharacterStreamChunker(StreamChunker):
+    """
+    Chunks the reply every chunk_size characters. The chunks are cut after the last whitespace when there is one, so
+    words are not split across two chunks.
+    """
+
+    def __init__(self, chunk_size):
+        if chunk_size <= 0:
+            raise PAIGException(ErrorMessage.INVALID_STREAM_CHUNKING_OPTION, option="chunk_size", value=chunk_size)
+        self.chunk_size = chunk_size
+
+    def split_text(self, text, elapsed_sec):
+        chunks = []
+        while len(text) >= self.chunk_size:
+            chunk = _cut_at_whitespace(text[:self.chunk_size])
+            chunks.append(chunk)
+            text = text[len(chunk):]
+        return chunks, text
+
+
+class TimeBudgetStreamChunker(SentenceStreamChunker):
+    """
+    Chunks the reply by sentence, and also releases the accumulated text once it has waited for the time budget
+    without completing a sentence. The text is cut after the last whitespace when there is one.
+    """
+
+    def __init__(self, time_budget_ms):
+        if time_budget_ms <= 0:
+            raise PAIGException(ErrorMessage.INVALID_STREAM_CHUNKING_OPTION, option="time_budget_ms",
+                                value=time_budget_ms)
+        self.time_budget_sec = time_budget_ms / 1000
+
+    def split_text(self, text, elapsed_sec):
+        chunks, text = super().split_text(text, elapsed_sec)
+        if text and elapsed_sec >= self.time_budget_sec:
+            chunk = _cut_at_whitespace(text)
+            chunks.append(chunk)
+            text = text[len(chunk):]
+        return chunks, text
+
+
+def create_stream_chunker(policy="sentence", chunk_size=200, time_budget_ms=1000) -> StreamChunker:
+    """
+    Create the stream chunker of the given chunking policy.
+
+    Args:
+        policy (str): The chunking policy, one of sentence, characters or time.
+        chunk_size (int): The number of characters of the chunks, for the characters policy.
+        time_budget_ms (int): The maximum time the text waits for the end of a sentence, for the time policy.
+
+    Returns:
+        StreamChunker: The stream chunker.
+    """
+    if policy == "sentence":
+        return SentenceStreamChunker()
+    if policy == "characters":
+        return CharacterStreamChunker(chunk_size)
+    if policy == "time":
+        return TimeBudgetStreamChunker(time_budget_ms)
+    raise PAIGException(ErrorMessage.INVALID_STREAM_CHUNKING_POLICY, policy=policy)
+
+
+def _cut_at_whitespace(text):
+    index = max(text.rfind(" "), text.rfind("\n"))
+    return text[:index + 1] if index > 0 else text
+
+
+def _non_empty(chunks):
+    return [chunk for chunk in chunks if chunk]
@@ -1,3 +1,6 @@
+import asyncio
+import contextvars
+import functools
 import logging
 import socket
 import threading
@@ -58,6 +61,15 @@ class AtomicCounter:
             return self.value
 
 
+async def run_in_executor(func, *args, **kwargs):
+    """
+    Run the blocking function on the default executor of the running loop, in a copy of the current context.
+    """
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(context.run, func, *args,
+                                                                                    **kwargs))
+
+
 def process_nested_input(input, output_list, extract=True):
     """
     Extracts all the text from the input and stores it in the output_list. If extract is False, then it replaces the
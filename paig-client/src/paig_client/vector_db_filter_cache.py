@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import OrderedDict
+
+FRESH = "fresh"
+REFRESH_AHEAD = "refresh_ahead"
+EXPIRED = "expired"
+
+
+class VectorDBFilterCacheEntry:
+    """
+    A vector DB access result held by the VectorDBFilterCache.
+
+    Attributes:
+        access_result (VectorDBAccessResult): The result of the vector DB access request.
+        etag (str): The ETag of the result, sent back to the shield server to revalidate the result.
+        loaded_time (float): The monotonic time the result was loaded or last revalidated.
+        refreshing (bool): Whether a refresh of the result is in progress.
+    """
+
+    def __init__(self, access_result, etag):
+        self.access_result = access_result
+        self.etag = etag
+        self.loaded_time = time.monotonic()
+        self.refreshing = False
+
+
+class VectorDBFilterCache:
+    """
+    A bounded cache of the vector DB access results of an application, by user, in least recently used order.
+
+    A result is served from the cache for ttl_sec after it is loaded. Once refresh_ahead_ratio of the ttl has passed,
+    it is still served but refreshed in the background, so the users searching regularly never wait for the shield
+    server. An expired result is revalidated with its ETag, the shield server answers without body while it is
+    unchanged.
+
+    Args:
+        max_size (int): The maximum number of results in the cache.
+        ttl_sec (float): The time a result is served from the cache after it is loaded.
+        refresh_ahead_ratio (float): The part of the ttl after which a result is refreshed in the background.
+
+    Attributes:
+        entries (OrderedDict): The cache entries by key.
+        hits (int): The number of lookups served from the cache.
+        misses (int): The number of lookups which had to wait for the shield server.
+        refreshes (int): The number of background refreshes started.
+        revalidations (int): The number of results the shield server confirmed as unchanged.
+        evictions (int): The number of results evicted to stay within max_size.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl_sec: float = 30, refresh_ahead_ratio: float = 0.8):
+        self.max_size = max_size
+        self.ttl_sec = ttl_sec
+        self.refresh_ahead_sec = ttl_sec * min(max(refresh_ahead_ratio, 0.0), 1.0)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    def lookup(self, key):
+        """
+        Look up the result of the key.
+
+        Args:
+            key: The cache key.
+
+        Returns:
+            tuple: The entry of the key or None, and its state: FRESH, REFRESH_AHEAD or EXPIRED. The state of a
+            missing entry is EXPIRED.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, EXPIRED
+            self.entries.move_to_end(key)
+            age = time.monotonic() - entry.loaded_time
+            if age >= self.ttl_sec:
+                self.misses += 1
+                return entry, EXPIRED
+            self.hits += 1
+            return entry, FRESH if age < self.refresh_ahead_sec else REFRESH_AHEAD
+
+    def begin_refresh(self, key) -> bool:
+        """
+        Mark the entry of the key as being refreshed in the background.
+
+        Returns:
+            bool: True if the caller should refresh the entry, False if a refresh is already in progress.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry.refreshing:
+                return False
+            entry.refreshing = True
+            self.refreshes += 1
+            return True
+
+    def update(self, key, access_result, etag):
+        """
+        Store the result loaded for the key, or mark the cached result as revalidated if the shield server answered
+        that it is unchanged.
+
+        Args:
+            key: The cache key.
+            access_result (VectorDBAccessResult): The loaded result, None if the cached result is unchanged.
+            etag (str): The ETag of the result.
+
+        Returns:
+            VectorDBAccessResult: The current result of the key, None if the result is unchanged but was evicted
+            meanwhile.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if access_result is None:
+                if entry is None or entry.etag != etag:
+                    return None
+                self.revalidations += 1
+                entry.loaded_time = time.monotonic()
+                entry.refreshing = False
+                return entry.access_result
+
+            if self.max_size <= 0:
+                return access_result
+            if entry is None and len(self.entries) >= self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            self.entries[key] = VectorDBFilterCacheEntry(access_result, etag)
+            self.entries.move_to_end(key)
+            return access_result
+
+    def end_refresh(self, key):
+        """
+        Clear the refresh mark of the entry of the key, once its refresh is done or failed.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry.refreshing = False
+
+    def invalidate(self, key=None):
+        """
+        Remove the result of the key, or all the results if no key is given.
+        """
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+
+    def get_metrics(self) -> dict:
+        """
+        Get the counters of the cache.
+
+        Returns:
+            dict: The size, hits, misses, hit rate, background refreshes, revalidations and evictions of the cache.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "refreshes": self.refreshes,
+                "revalidations": self.revalidations,
+                "evictions": self.evictions
+            }
+
+
+def create_vector_db_filter_cache(**kwargs):
+    """
+    Create the vector DB filter cache of an application from its options.
+
+    Args:
+        kwargs: The following are the supported options.
+            vector_db_filter_cache_ttl_sec (float): The time a filter is served from the cache, 0 disables the cache.
+            vector_db_filter_cache_max_size (int): The maximum number of users whose filters are cached.
+            vector_db_filter_cache_refresh_ahead_ratio (float): The part of the ttl after which a filter is refreshed
+            in the background.
+
+    Returns:
+        VectorDBFilterCache: The cache, or None if the cache is disabled.
+    """
+    ttl_sec = kwargs.get("vector_db_filter_cache_ttl_sec", 30)
+    if not ttl_sec or ttl_sec <= 0:
+        return None
+    return VectorDBFilterCache(max_size=kwargs.get("vector_db_filter_cache_max_size", 1000), ttl_sec=ttl_sec,
+                               refresh_ahead_ratio=kwargs.get("vector_db_filter_cache_refresh_ahead_ratio", 0.8))
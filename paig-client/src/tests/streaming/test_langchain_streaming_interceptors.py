@@ -22,8 +22,8 @@ def test_langchain_streaming_get_all_methods_to_intercept():
     # Find all methods to intercept
     langchain_streaming_setup.find_all_methods_to_intercept()
 
-    # Assert that only one method is listed for interception
-    assert len(langchain_streaming_setup.list_of_methods_to_intercept) == 1
+    # Assert that on_llm_new_token of the sync and async run managers is listed for interception
+    assert len(langchain_streaming_setup.list_of_methods_to_intercept) == 2
 
     # Setup Interceptors
     langchain_streaming_setup.setup_interceptors(None)
@@ -1,4 +1,5 @@
 import logging
+import time
 from unittest.mock import Mock, patch
 import pytest
 
@@ -6,6 +7,7 @@ from paig_client.backend import StreamAccessAuditRequest
 from paig_client.core import LLMStreamAccessChecker, ConversationType, PAIGPlugin
 from paig_client.exception import AccessControlException, PAIGException
 from paig_client.message import ErrorMessage
+from paig_client.stream_chunker import SentenceStreamChunker, CharacterStreamChunker
 
 # Mock the logger
 _logger = logging.getLogger(__name__)
@@ -301,3 +303,77 @@ def test_flush_audits_without_logs():
 
     # Execute the method
     llm_stream_access_checker.flush_audits()
+
+
+def create_pipelined_checker(delays, max_in_flight_checks=3, denied_text=None):
+    """
+    Create a LLMStreamAccessChecker whose checks take the given delay by chunk, and return the chunk in upper case.
+    """
+    mock_paig_plugin = Mock()
+    mock_paig_application = Mock()
+    mock_paig_application.create_access_request.side_effect = lambda **kwargs: kwargs["text"]
+
+    def is_access_allowed(text):
+        time.sleep(delays.get(text, 0))
+        return Mock(get_is_allowed=Mock(return_value=text != denied_text),
+                    get_response_messages=Mock(return_value=[Mock(get_response_text=Mock(return_value=text.upper()))]))
+
+    mock_paig_application.get_shield_client.return_value.is_access_allowed.side_effect = is_access_allowed
+    mock_paig_plugin.get_current_application.return_value = mock_paig_application
+    return LLMStreamAccessChecker(mock_paig_plugin, SentenceStreamChunker(), max_in_flight_checks)
+
+
+def test_check_access_pipelined_releases_in_order():
+    llm_stream_access_checker = create_pipelined_checker({"One. ": 0.2, "Two. ": 0.0, "Three. ": 0.1})
+
+    released = llm_stream_access_checker.check_access("One. Two. Three. ")
+    # The slow first check holds back the later ones
+    assert released == ""
+    assert len(llm_stream_access_checker.in_flight_checks) == 3
+
+    released += llm_stream_access_checker.check_access("Four")
+    released += llm_stream_access_checker.check_access("")
+
+    assert released == "ONE. TWO. THREE. FOUR"
+    assert llm_stream_access_checker.llm_original_full_reply == "One. Two. Three. Four"
+    assert llm_stream_access_checker.llm_masked_full_reply == "ONE. TWO. THREE. FOUR"
+    assert len(llm_stream_access_checker.shield_access_response_list) == 4
+    assert not llm_stream_access_checker.in_flight_checks
+
+
+def test_check_access_pipelined_window_is_bounded():
+    llm_stream_access_checker = create_pipelined_checker({"Two. ": 0.2, "Three. ": 0.2}, max_in_flight_checks=2)
+
+    released = llm_stream_access_checker.check_access("One. Two. Three. ")
+
+    # The oldest check is waited for before submitting the third one
+    assert released == "ONE. "
+    assert len(llm_stream_access_checker.in_flight_checks) == 2
+
+    released += llm_stream_access_checker.check_access_for_incomplete_sentence()
+    assert released == "ONE. TWO. THREE. "
+
+
+def test_check_access_pipelined_denied():
+    llm_stream_access_checker = create_pipelined_checker({"Three. ": 0.2}, denied_text="Two. ")
+
+    with pytest.raises(AccessControlException):
+        llm_stream_access_checker.check_access("One. Two. Three. ")
+        llm_stream_access_checker.check_access_for_incomplete_sentence()
+
+    assert llm_stream_access_checker.llm_masked_full_reply == "ONE. "
+    assert not llm_stream_access_checker.in_flight_checks
+
+
+def test_check_access_with_character_chunking():
+    mock_paig_plugin = Mock()
+    mock_paig_application = Mock()
+    mock_paig_application.authorize.side_effect = lambda **kwargs: Mock(
+        get_response_messages=Mock(return_value=[Mock(get_response_text=Mock(return_value=kwargs["text"]))]))
+    mock_paig_plugin.get_current_application.return_value = mock_paig_application
+
+    llm_stream_access_checker = LLMStreamAccessChecker(mock_paig_plugin, CharacterStreamChunker(10))
+
+    assert llm_stream_access_checker.check_access("Hello ") == ""
+    assert llm_stream_access_checker.check_access("big world") == "Hello big "
+    assert llm_stream_access_checker.llm_reply_text == "world"
@@ -1,9 +1,11 @@
 import json
 import threading
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from paig_client.backend import ShieldRestHttpClient, ShieldAccessRequest
+from paig_client.backend import ShieldRestHttpClient, ShieldAccessRequest, ShieldAccessResult, \
+    AsyncShieldRestHttpClient, VectorDBAccessRequest
 from paig_client.model import ConversationType
 
 SHIELD_SERVER_URL = "http://localhost:8000"
@@ -56,3 +58,130 @@ def test_post3(setup_paig_plugin_with_app_config_file_name):
         thread.start()
     for thread in thread_list:
         thread.join()
+
+
+def test_authorize_batch(setup_paig_plugin_with_app_config_file_name):
+    app_config_file, encryption_keys_info = load_app_config_file(setup_paig_plugin_with_app_config_file_name)
+    client = ShieldRestHttpClient(base_url=SHIELD_SERVER_URL, tenant_id=app_config_file['tenantId'],
+                                  api_key=app_config_file['apiKey'],
+                                  encryption_keys_info=encryption_keys_info)
+    requests = [ShieldAccessRequest(application_key="application_key", request_id=f"request_id_{i}",
+                                    user_name="user1", request_text=[f"request_text_{i}"],
+                                    conversation_type=ConversationType.PROMPT) for i in range(3)]
+
+    lines = [{"index": 2, "response": {"requestId": "request_id_2", "isAllowed": False,
+                                       "responseMessages": [{"responseText": "denied"}]}},
+             {"index": 0, "error_code": 400, "success": False, "message": "Invalid request"}]
+    http_response = MagicMock(status=200, data="\n".join(json.dumps(line) for line in lines).encode("utf-8"))
+
+    with patch("paig_client.backend.HttpTransport.get_http") as mock_get_http:
+        mock_get_http.return_value.request.return_value = http_response
+        results = client.authorize_batch(requests)
+
+    call_kwargs = mock_get_http.return_value.request.call_args.kwargs
+    assert call_kwargs["url"] == SHIELD_SERVER_URL + "/shield/authorize/batch"
+    assert [req["requestId"] for req in call_kwargs["json"]["requests"]] == ["request_id_0", "request_id_1",
+                                                                             "request_id_2"]
+    assert all(req["messages"] != [f"request_text_{i}"] for i, req in enumerate(call_kwargs["json"]["requests"]))
+
+    assert isinstance(results[0], Exception)
+    assert "Invalid request" in str(results[0])
+    assert isinstance(results[1], Exception)
+    assert isinstance(results[2], ShieldAccessResult)
+    assert results[2].get_is_allowed() is False
+    assert results[2].get_response_messages()[0].get_response_text() == "denied"
+
+
+@pytest.mark.parametrize("response_data, expected_encryption_mode", [
+    (b'{"message": "Initialization completed", "encryptionMode": "envelope"}', "envelope"),
+    (b'Initialization completed successfully for tenant', "chunked"),
+])
+def test_init_shield_server_negotiates_encryption_mode(setup_paig_plugin_with_app_config_file_name, response_data,
+                                                       expected_encryption_mode):
+    app_config_file, encryption_keys_info = load_app_config_file(setup_paig_plugin_with_app_config_file_name)
+    client = ShieldRestHttpClient(base_url=SHIELD_SERVER_URL, tenant_id=app_config_file['tenantId'],
+                                  api_key=app_config_file['apiKey'],
+                                  encryption_keys_info=encryption_keys_info)
+
+    with patch("paig_client.backend.HttpTransport.get_http") as mock_get_http:
+        mock_get_http.return_value.request.return_value = MagicMock(status=200, data=response_data)
+        client.init_shield_server("application_key")
+
+    init_request = json.loads(mock_get_http.return_value.request.call_args.kwargs["json"])
+    assert init_request["encryptionModes"] == ["envelope", "chunked"]
+
+    encryptor = client.get_plugin_access_request_encryptor()
+    assert encryptor.encryption_mode == expected_encryption_mode
+
+    request = ShieldAccessRequest(application_key="application_key", request_id="request_id", user_name="user1",
+                                  request_text=["request_text"], conversation_type=ConversationType.PROMPT)
+    with patch("paig_client.backend.HttpTransport.get_http") as mock_get_http:
+        mock_get_http.return_value.request.return_value = MagicMock(status=200, json=MagicMock(
+            return_value={"isAllowed": False, "responseMessages": []}))
+        client.is_access_allowed(request)
+
+    payload = mock_get_http.return_value.request.call_args.kwargs["json"]
+    assert payload["encryptionMode"] == expected_encryption_mode
+    assert payload["messages"][0].startswith("PAIGENV1:") == (expected_encryption_mode == "envelope")
+
+
+@pytest.mark.asyncio
+async def test_async_is_access_allowed(setup_paig_plugin_with_app_config_file_name):
+    app_config_file, encryption_keys_info = load_app_config_file(setup_paig_plugin_with_app_config_file_name)
+    client = AsyncShieldRestHttpClient(base_url=SHIELD_SERVER_URL, tenant_id=app_config_file['tenantId'],
+                                       api_key=app_config_file['apiKey'],
+                                       encryption_keys_info=encryption_keys_info)
+    request = ShieldAccessRequest(application_key="application_key", request_id="request_id", user_name="user1",
+                                  request_text=["request_text"], conversation_type=ConversationType.PROMPT)
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"requestId": "request_id", "isAllowed": False,
+                                  "responseMessages": [{"responseText": "denied"}]}
+
+    with patch.object(AsyncShieldRestHttpClient, "post", new_callable=AsyncMock, return_value=response) as mock_post:
+        result = await client.is_access_allowed(request)
+
+    assert mock_post.call_args.kwargs["url"] == "/shield/authorize"
+    assert mock_post.call_args.kwargs["json"]["messages"] != ["request_text"]
+    assert client.get_default_headers()["x-tenant-id"] == app_config_file['tenantId']
+    assert result.get_is_allowed() is False
+    assert result.get_response_messages()[0].get_response_text() == "denied"
+
+
+@pytest.mark.asyncio
+async def test_async_is_access_allowed_failure(setup_paig_plugin_with_app_config_file_name):
+    app_config_file, encryption_keys_info = load_app_config_file(setup_paig_plugin_with_app_config_file_name)
+    client = AsyncShieldRestHttpClient(base_url=SHIELD_SERVER_URL, tenant_id=app_config_file['tenantId'],
+                                       api_key=app_config_file['apiKey'],
+                                       encryption_keys_info=encryption_keys_info)
+    request = ShieldAccessRequest(application_key="application_key", request_id="request_id", user_name="user1",
+                                  request_text=["request_text"], conversation_type=ConversationType.PROMPT)
+
+    with patch.object(AsyncShieldRestHttpClient, "post", new_callable=AsyncMock,
+                      return_value=MagicMock(status_code=500)):
+        with pytest.raises(Exception) as e:
+            await client.is_access_allowed(request)
+
+    assert "Request failed" in str(e.value)
+
+
+def test_get_filter_expression_if_modified(setup_paig_plugin_with_app_config_file_name):
+    app_config_file, encryption_keys_info = load_app_config_file(setup_paig_plugin_with_app_config_file_name)
+    client = ShieldRestHttpClient(base_url=SHIELD_SERVER_URL, tenant_id=app_config_file['tenantId'],
+                                  api_key=app_config_file['apiKey'],
+                                  encryption_keys_info=encryption_keys_info)
+    request = VectorDBAccessRequest(application_key="application_key", user_name="user1")
+
+    with patch("paig_client.backend.HttpTransport.get_http") as mock_get_http:
+        mock_get_http.return_value.request.return_value = MagicMock(status=304)
+        assert client.get_filter_expression_if_modified(request, etag='"v1"') == (None, '"v1"')
+
+    call_kwargs = mock_get_http.return_value.request.call_args.kwargs
+    assert call_kwargs["url"] == SHIELD_SERVER_URL + "/shield/authorize/vectordb"
+    assert call_kwargs["headers"]["If-None-Match"] == '"v1"'
+
+    with patch("paig_client.backend.HttpTransport.get_http") as mock_get_http:
+        mock_get_http.return_value.request.return_value = MagicMock(
+            status=200, headers={"ETag": '"v2"'}, json=MagicMock(return_value={"filterExpression": "users == 'user1'"}))
+        result, etag = client.get_filter_expression_if_modified(request, etag='"v1"')
+
+    assert (result.get_filter_expression(), etag) == ("users == 'user1'", '"v2"')
@@ -1,3 +1,4 @@
+import asyncio
 import os
 
 import pytest
@@ -9,7 +10,7 @@ import paig_client.message
 import paig_client.model
 import paig_client.encryption
 from paig_client.backend import ShieldAccessResult
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
 
 def test_setup(setup_paig_plugin_with_app_config_file_name):
@@ -95,3 +96,47 @@ def test_app_config_as_env_var_does_not_exist(setup_paig_plugin_with_app_config_
 def test_access_exception():
     with pytest.raises(paig_client.exception.AccessControlException):
         paig_client.client.dummy_access_denied()
+
+
+@pytest.mark.asyncio
+async def test_async_setup_app_and_check_access(setup_paig_plugin_with_app_config_file_name):
+    with patch("paig_client.backend.ShieldRestHttpClient.init_shield_server", return_value=None), \
+            patch("paig_client.backend.AsyncShieldRestHttpClient.init_shield_server",
+                  new_callable=AsyncMock) as mock_init:
+        paig_client.client.setup(application_config_file=setup_paig_plugin_with_app_config_file_name, frameworks=[])
+        app = await paig_client.client.async_setup_app(
+            application_config_file=setup_paig_plugin_with_app_config_file_name)
+
+    assert isinstance(app, paig_client.core.AsyncPAIGApplication)
+    mock_init.assert_awaited_once_with(app.application_key)
+
+    access_result = ShieldAccessResult(**{"isAllowed": True, "responseMessages": [{"responseText": "hello world"}]})
+    with patch("paig_client.backend.AsyncShieldRestHttpClient.is_access_allowed", new_callable=AsyncMock,
+               return_value=access_result) as mock_is_access_allowed:
+        async with paig_client.client.create_shield_context(application=app, username="user1"):
+            response_text = await paig_client.client.acheck_access(
+                text="hello world", conversation_type=paig_client.model.ConversationType.PROMPT)
+
+    assert response_text[0].get_response_text() == "hello world"
+    assert mock_is_access_allowed.call_args.kwargs["request"].user_name == "user1"
+
+
+@pytest.mark.asyncio
+async def test_shield_context_is_isolated_per_task(setup_paig_plugin_with_app_config_file_name):
+    with patch("paig_client.backend.ShieldRestHttpClient.init_shield_server", return_value=None):
+        paig_client.client.setup(application_config_file=setup_paig_plugin_with_app_config_file_name, frameworks=[])
+
+    async def run_as_user(user):
+        async with paig_client.client.create_shield_context(username=user):
+            await asyncio.sleep(0.01)
+            paig_client.client.set_current(request_user=user)
+            await asyncio.sleep(0.01)
+            return paig_client.client.get_current_user(), paig_client.client.get_current("request_user")
+
+    with paig_client.client.create_shield_context(username="outer_user"):
+        results = await asyncio.gather(*[run_as_user(f"user{i}") for i in range(5)])
+        assert paig_client.client.get_current_user() == "outer_user"
+        assert paig_client.client.get_current("request_user") is None
+
+    assert results == [(f"user{i}", f"user{i}") for i in range(5)]
+    assert paig_client.client.get_current_user() is None
@@ -43,3 +43,25 @@ def test_data_encryptor_non_ascii(setup_curr_dir):
     decrypted_data = data_encryptor.decrypt(encrypted_data)
 
     assert decrypted_data == original_data
+
+
+def test_data_encryptor_envelope_mode(setup_curr_dir):
+    curr_dir = setup_curr_dir
+    with open(curr_dir + "/data/prompt-with-non-ascii-chars.txt", "r") as f:
+        original_data = f.read()
+
+    rsa_key_info = paig_client.encryption.RSAKeyUtil().generate_key_pair()
+    data_encryptor = paig_client.encryption.DataEncryptor(
+        public_key=rsa_key_info.public_key_encoded_str,
+        private_key=rsa_key_info.private_key_encoded_str,
+        encryption_mode=paig_client.encryption.ENCRYPTION_MODE_ENVELOPE
+    )
+
+    encrypted_data = data_encryptor.encrypt(original_data)
+    assert encrypted_data.startswith(paig_client.encryption.ENVELOPE_PREFIX)
+    assert data_encryptor.decrypt(encrypted_data) == original_data
+
+    # Chunked messages are decrypted in the envelope mode too
+    chunked_data = data_encryptor.encrypt(original_data, encryption_mode=paig_client.encryption.ENCRYPTION_MODE_CHUNKED)
+    assert not chunked_data.startswith(paig_client.encryption.ENVELOPE_PREFIX)
+    assert data_encryptor.decrypt(chunked_data) == original_data
@@ -0,0 +1,42 @@
+import pytest
+
+from paig_client.exception import PAIGException
+from paig_client.stream_chunker import create_stream_chunker, SentenceStreamChunker, CharacterStreamChunker, \
+    TimeBudgetStreamChunker
+
+
+def test_sentence_chunker():
+    chunker = SentenceStreamChunker()
+
+    assert chunker.split("First sentence", "sentence", 0) == ([], "First sentence")
+    assert chunker.split("First. Second. Thi", "Thi", 0) == (["First. ", "Second. "], "Thi")
+    assert chunker.split("First. Second.", ".", 0) == (["First. Second."], "")
+    assert chunker.split("Last words", "", 0) == (["Last words"], "")
+    assert chunker.split("", "", 0) == ([], "")
+
+
+def test_character_chunker():
+    chunker = CharacterStreamChunker(10)
+
+    assert chunker.split("Hello", "Hello", 0) == ([], "Hello")
+    assert chunker.split("Hello big world", " world", 0) == (["Hello big "], "world")
+    assert chunker.split("abcdefghijklmnopqrstuvwxyz", "z", 0) == (["abcdefghij", "klmnopqrst"], "uvwxyz")
+
+
+def test_time_budget_chunker():
+    chunker = TimeBudgetStreamChunker(500)
+
+    assert chunker.split("Waiting for the end", " end", 0.1) == ([], "Waiting for the end")
+    assert chunker.split("Waiting for the end", " end", 0.5) == (["Waiting for the "], "end")
+    assert chunker.split("Done. Waiting", " Waiting", 0.1) == (["Done. "], "Waiting")
+
+
+def test_create_stream_chunker():
+    assert isinstance(create_stream_chunker(), SentenceStreamChunker)
+    assert create_stream_chunker("characters", chunk_size=50).chunk_size == 50
+    assert create_stream_chunker("time", time_budget_ms=250).time_budget_sec == 0.25
+
+    with pytest.raises(PAIGException):
+        create_stream_chunker("paragraph")
+    with pytest.raises(PAIGException):
+        create_stream_chunker("characters", chunk_size=0)
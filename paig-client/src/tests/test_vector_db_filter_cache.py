@@ -0,0 +1,129 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+import paig_client.client
+import paig_client.core
+from paig_client.backend import ShieldRestHttpClient, AsyncShieldRestHttpClient, VectorDBAccessResult
+from paig_client.vector_db_filter_cache import VectorDBFilterCache, FRESH, REFRESH_AHEAD, EXPIRED
+
+
+def access_result(filter_expression):
+    return VectorDBAccessResult(vectorDBId=1, vectorDBName="TestDB", vectorDBType="MILVUS",
+                                filterExpression=filter_expression)
+
+
+def test_cache_states_and_metrics():
+    cache = VectorDBFilterCache(max_size=10, ttl_sec=10, refresh_ahead_ratio=0.5)
+    result = access_result("users == 'user1'")
+
+    assert cache.lookup("user1") == (None, EXPIRED)
+    assert cache.update("user1", result, '"v1"') is result
+
+    entry, state = cache.lookup("user1")
+    assert (entry.access_result, state) == (result, FRESH)
+
+    entry.loaded_time -= 6
+    assert cache.lookup("user1")[1] == REFRESH_AHEAD
+    assert cache.begin_refresh("user1") is True
+    # Only one refresh at a time
+    assert cache.begin_refresh("user1") is False
+
+    entry.loaded_time -= 5
+    assert cache.lookup("user1")[1] == EXPIRED
+    # The shield server confirmed the result is unchanged
+    assert cache.update("user1", None, '"v1"') is result
+    assert cache.lookup("user1")[1] == FRESH
+
+    assert cache.get_metrics() == {"size": 1, "hits": 3, "misses": 2, "hit_rate": 0.6, "refreshes": 1,
+                                   "revalidations": 1, "evictions": 0}
+
+
+def test_cache_bounded_by_size():
+    cache = VectorDBFilterCache(max_size=2, ttl_sec=10)
+    for user in ("user1", "user2", "user3"):
+        cache.update(user, access_result(f"users == '{user}'"), None)
+
+    assert list(cache.entries) == ["user2", "user3"]
+    assert cache.get_metrics()["evictions"] == 1
+    # A revalidation of an evicted result is reported to load it again
+    assert cache.update("user1", None, '"v1"') is None
+
+
+@pytest.fixture
+def application(setup_paig_plugin_with_app_config_file_name):
+    with patch("paig_client.backend.ShieldRestHttpClient.init_shield_server", return_value=None):
+        paig_client.client.setup(application_config_file=setup_paig_plugin_with_app_config_file_name, frameworks=[],
+                                 vector_db_filter_cache_ttl_sec=10)
+    return paig_client.core._paig_plugin.default_application
+
+
+def test_filter_expression_served_from_cache(application):
+    with patch.object(ShieldRestHttpClient, "get_filter_expression_if_modified",
+                      return_value=(access_result("users == 'user1'"), '"v1"')) as mock_get_filter:
+        with paig_client.client.create_shield_context(username="user1"):
+            filter_expressions = [paig_client.client.get_vector_db_filter_expression() for _ in range(3)]
+
+    assert filter_expressions == ["users == 'user1'"] * 3
+    assert mock_get_filter.call_count == 1
+    metrics = paig_client.core.get_vector_db_filter_cache_metrics()
+    assert (metrics["hits"], metrics["misses"]) == (2, 1)
+
+
+def test_filter_expression_refreshed_ahead_and_revalidated(application):
+    with patch.object(ShieldRestHttpClient, "get_filter_expression_if_modified",
+                      return_value=(access_result("users == 'user1'"), '"v1"')):
+        with paig_client.client.create_shield_context(username="user1"):
+            paig_client.client.get_vector_db_filter_expression()
+
+    entry = application.vector_db_filter_cache.entries["user1"]
+    entry.loaded_time -= 9
+    with patch.object(ShieldRestHttpClient, "get_filter_expression_if_modified",
+                      return_value=(None, '"v1"')) as mock_get_filter:
+        with paig_client.client.create_shield_context(username="user1"):
+            # The result close to its expiry is served while it is refreshed in the background
+            assert paig_client.client.get_vector_db_filter_expression() == "users == 'user1'"
+            for _ in range(100):
+                if not entry.refreshing:
+                    break
+                time.sleep(0.01)
+
+        assert mock_get_filter.call_args.kwargs["etag"] == '"v1"'
+    assert application.vector_db_filter_cache.lookup("user1")[1] == FRESH
+    assert application.vector_db_filter_cache.get_metrics()["revalidations"] == 1
+
+
+def test_filter_expression_of_each_user_cached(application):
+    def get_filter(request, etag=None):
+        return access_result(f"users == '{request.user_name}'"), None
+
+    with patch.object(ShieldRestHttpClient, "get_filter_expression_if_modified", side_effect=get_filter):
+        for user in ("user1", "user2"):
+            with paig_client.client.create_shield_context(username=user):
+                assert paig_client.client.get_vector_db_filter_expression() == f"users == '{user}'"
+
+    assert set(application.vector_db_filter_cache.entries) == {"user1", "user2"}
+
+
+@pytest.mark.asyncio
+async def test_async_filter_expression_refreshed_ahead(setup_paig_plugin_with_app_config_file_name):
+    with patch("paig_client.backend.ShieldRestHttpClient.init_shield_server", return_value=None), \
+            patch("paig_client.backend.AsyncShieldRestHttpClient.init_shield_server", new_callable=AsyncMock):
+        paig_client.client.setup(application_config_file=setup_paig_plugin_with_app_config_file_name, frameworks=[])
+        app = await paig_client.client.async_setup_app(
+            application_config_file=setup_paig_plugin_with_app_config_file_name)
+
+    with patch.object(AsyncShieldRestHttpClient, "get_filter_expression_if_modified", new_callable=AsyncMock,
+                      side_effect=[(access_result("users == 'user1'"), '"v1"'),
+                                   (access_result("users == 'user2'"), '"v2"')]) as mock_get_filter:
+        async with paig_client.client.create_shield_context(application=app, username="user1"):
+            assert await paig_client.client.aget_vector_db_filter_expression() == "users == 'user1'"
+            app.vector_db_filter_cache.entries["user1"].loaded_time -= 25
+            assert await paig_client.client.aget_vector_db_filter_expression() == "users == 'user1'"
+            await asyncio.gather(*app.vector_db_filter_refresh_tasks)
+            assert await paig_client.client.aget_vector_db_filter_expression() == "users == 'user2'"
+
+    assert mock_get_filter.await_count == 2
+    assert app.vector_db_filter_cache.get_metrics()["refreshes"] == 1
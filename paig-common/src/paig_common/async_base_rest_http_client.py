@@ -132,6 +132,7 @@ class AsyncBaseRESTHttpClient:
 class AsyncReturnValue:
     def __init__(self, response: httpx.Response):
         self.status_code = response.status_code
+        self.headers = response.headers
         self.text = response.text
 
     def json(self):
@@ -6,7 +6,7 @@ import queue
 import threading
 import time
 from abc import ABC, abstractmethod
-from datetime import datetime, date
+from collections import deque
 from queue import Queue
 from typing import List, TypeVar
 
@@ -16,6 +16,8 @@ from .paig_exception import AuditEventQueueFullException, DiskFullException
 _logger = logging.getLogger(__name__)
 T = TypeVar('T')
 
+DEFAULT_SEGMENT_SIZE_BYTES = 4 * 1024 * 1024
+
 
 class AuditEvent(ABC):
 
@@ -56,60 +58,143 @@ class AuditEvent(ABC):
 
 class AuditSpooler:
     """
-    Class to manage spooled audit events.
+    Class to manage spooled audit events, in a segmented append-only write-ahead log.
+
+    Each audit event is appended as a JSON line to the active segment file, and gets a monotonically increasing
+    offset. The segment files are named after the offset of their first event, and a new segment is started once the
+    active one reaches the segment size. Pushed audit events are acknowledged by offset, the checkpoint file keeps the
+    offset of the oldest audit event not acknowledged yet, and the segments whose audit events are all acknowledged
+    are deleted as a whole.
+
+    Audit events acknowledged out of order after the checkpoint are spooled again at startup, so the audit events are
+    delivered at least once.
 
     Args:
         audit_spool_dir (str): The directory path where spooled audit events are stored.
+        audit_event_cls (cls): The class of the audit events.
+        segment_size_bytes (int): The size of the segment files, after which a new segment is started.
     """
 
-    def __init__(self, audit_spool_dir: str, audit_event_cls):
+    SEGMENT_FILE_PREFIX = "audit_spool_segment_"
+    SEGMENT_FILE_SUFFIX = ".log"
+    CHECKPOINT_FILE_NAME = "audit_spool_checkpoint.json"
+    LEGACY_FILE_PREFIX = "audit_spool_"
+    LEGACY_FILE_SUFFIX = ".json"
+
+    def __init__(self, audit_spool_dir: str, audit_event_cls, segment_size_bytes: int = DEFAULT_SEGMENT_SIZE_BYTES):
         """
-        Initializes an AuditSpooler object.
+        Initializes an AuditSpooler object, and recovers the segments and the checkpoint of the spool directory.
 
         Args:
             audit_spool_dir (str): The directory path where spooled audit events are stored.
+            audit_event_cls (cls): The class of the audit events.
+            segment_size_bytes (int): The size of the segment files, after which a new segment is started.
         """
         self.audit_spool_dir = audit_spool_dir
         self.audit_event_cls = audit_event_cls
+        self.segment_size_bytes = segment_size_bytes
 
         if not os.path.exists(self.audit_spool_dir):
             os.makedirs(self.audit_spool_dir)
 
         self.lock = threading.Lock()
 
-    def get_spooled_audit_events(self):
-        """
-        Retrieves spooled audit events from the spool directory.
+        # Base offsets of the segments, in order. The last one is the active segment.
+        self.segments = deque()
+        self.active_segment_file = None
+        self.active_segment_size = 0
+        self.next_offset = 0
+        # Offset of the oldest audit event not acknowledged yet, and the offsets acknowledged after it
+        self.checkpoint_offset = 0
+        self.acked_offsets = set()
 
-        Returns:
-            List[AuditEvent]: A list of AuditEvent objects representing spooled audit events.
-        """
-        spooled_audit_events = []
+        self.recover()
+        self.migrate_legacy_spool_files()
+        self.recovered_offset = self.next_offset
 
-        file_paths = FileUtils.get_file_paths_in_directory(self.audit_spool_dir)
-        for file_path in file_paths:
-            with self.lock:
-                spooled_events = FileUtils.load_json_from_file(file_path)
-                for event_dict_str in spooled_events:
-                    event_dict = json.loads(event_dict_str)
-                    access_audit_event = self.audit_event_cls.from_payload_dict(event_dict)
-                    spooled_audit_events.append(access_audit_event)
+    def recover(self):
+        """
+        Loads the segments and the checkpoint of the spool directory, and truncates the last segment after its last
+        complete audit event.
+        """
+        for file_name in sorted(os.listdir(self.audit_spool_dir)):
+            if file_name.startswith(self.SEGMENT_FILE_PREFIX) and file_name.endswith(self.SEGMENT_FILE_SUFFIX):
+                self.segments.append(int(file_name[len(self.SEGMENT_FILE_PREFIX):-len(self.SEGMENT_FILE_SUFFIX)]))
+
+        checkpoint = FileUtils.read_json_file(self.get_checkpoint_file_path())
+        self.checkpoint_offset = checkpoint.get("offset", 0) if checkpoint else 0
+
+        if self.segments:
+            segment_path = self.get_segment_file_path(self.segments[-1])
+            event_count, valid_size = 0, 0
+            with open(segment_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    event_count += 1
+                    valid_size += len(line)
+            if valid_size < os.path.getsize(segment_path):
+                _logger.warning(f"Truncating incomplete audit event at the end of spool segment {segment_path}")
+                os.truncate(segment_path, valid_size)
+            self.next_offset = self.segments[-1] + event_count
+            self.active_segment_size = valid_size
+
+        self.checkpoint_offset = min(max(self.checkpoint_offset, self.segments[0] if self.segments else 0),
+                                     self.next_offset)
+        self.delete_acked_segments()
+
+    def migrate_legacy_spool_files(self):
+        """
+        Appends the audit events of the daily spool files written by previous versions to the write-ahead log, and
+        deletes the daily spool files.
+        """
+        for file_name in sorted(os.listdir(self.audit_spool_dir)):
+            if (not file_name.startswith(self.LEGACY_FILE_PREFIX) or not file_name.endswith(self.LEGACY_FILE_SUFFIX)
+                    or file_name == self.CHECKPOINT_FILE_NAME):
+                continue
+            file_path = os.path.join(self.audit_spool_dir, file_name)
+            for line in FileUtils.load_json_from_file(file_path):
+                if line.strip():
+                    self.append_line(line.rstrip('\n'))
+            os.remove(file_path)
+
+    def iter_spooled_audit_events(self):
+        """
+        Streams the spooled audit events not acknowledged at startup, from the checkpoint.
 
-        return spooled_audit_events
+        The segment files are read one line at a time, so the spooled audit events are not all loaded in memory.
 
-    def add_audit_event(self, access_audit_event: T):
+        Yields:
+            tuple: The offset and the AuditEvent object of each spooled audit event, in offset order.
+        """
+        with self.lock:
+            segments = list(self.segments)
+            offset = self.checkpoint_offset
+
+        for index, base_offset in enumerate(segments):
+            end_offset = segments[index + 1] if index + 1 < len(segments) else self.recovered_offset
+            if end_offset <= offset:
+                continue
+            with open(self.get_segment_file_path(base_offset), 'r') as f:
+                for line_offset, line in enumerate(f, start=base_offset):
+                    if line_offset >= end_offset:
+                        break
+                    if line_offset >= offset:
+                        yield line_offset, self.audit_event_cls.from_payload_dict(json.loads(line))
+
+    def add_audit_event(self, access_audit_event: T) -> int:
         """
-        Adds an audit event to the spool directory.
+        Appends an audit event to the write-ahead log.
 
         Args:
             access_audit_event (AuditEvent): The audit event to add.
+
+        Returns:
+            int: The offset of the audit event, used to acknowledge it.
         """
-        event_time = self.get_event_time(access_audit_event)
-        file_path = self.get_file_path_for_event_time(event_time)
         access_audit_event_dict = access_audit_event.to_payload_dict()
         try:
-            with self.lock:
-                FileUtils.append_json_to_file(file_path, access_audit_event_dict)
+            return self.append_line(json.dumps(access_audit_event_dict))
         except OSError as e:
             if e.errno == 28:
                 _logger.error("No space left on device. Disk is full.Please increase the disk size or free "
@@ -120,74 +205,135 @@ class AuditSpooler:
                 _logger.error(f"Error writing audit event to file: {e}")
                 raise Exception(f"Error writing audit event to file: {e}")
 
-    def get_event_time(self, access_audit_event):
-        event_time = None
-        if hasattr(access_audit_event, 'event_time'):
-            event_time = access_audit_event.event_time
-        elif hasattr(access_audit_event, 'eventTime'):
-            event_time = access_audit_event.eventTime
-        return event_time
-
-    def remove_audit_event(self, access_audit_event: T):
+    def append_line(self, line: str) -> int:
+        data = (line + '\n').encode('utf-8')
+        with self.lock:
+            if self.active_segment_file is None or self.active_segment_size >= self.segment_size_bytes:
+                self.open_active_segment()
+            self.active_segment_file.write(data)
+            self.active_segment_file.flush()
+            self.active_segment_size += len(data)
+            offset = self.next_offset
+            self.next_offset += 1
+            return offset
+
+    def open_active_segment(self):
+        if self.active_segment_file is not None:
+            self.active_segment_file.close()
+        if not self.segments or self.active_segment_size >= self.segment_size_bytes:
+            self.segments.append(self.next_offset)
+            self.active_segment_size = 0
+        self.active_segment_file = open(self.get_segment_file_path(self.segments[-1]), 'ab')
+
+    def remove_audit_event(self, offset: int):
         """
-        Removes an audit event from the spool directory.
+        Acknowledges a pushed audit event, advances the checkpoint over the acknowledged audit events and deletes the
+        segments which are fully acknowledged.
 
         Args:
-            access_audit_event (AuditEvent): The audit event to remove.
+            offset (int): The offset of the audit event returned by add_audit_event.
         """
-        event_time = self.get_event_time(access_audit_event)
-        file_path = self.get_file_path_for_event_time(event_time)
-        access_audit_event_dict = access_audit_event.to_payload_dict()
-        with self.lock:
-            FileUtils.remove_line_from_file(file_path, access_audit_event_dict)
-
-        today = date.today()
-        today_file_name = today.strftime("audit_spool_%Y-%m-%d.json")
+        self.remove_audit_events([offset])
 
-        # Call remove_empty_files method with today's file name in the exclude list
-        exclude_files = [today_file_name]
-        FileUtils.remove_empty_files(self.audit_spool_dir, exclude_files)
-
-    def get_file_path_for_event_time(self, event_time_millis) -> str:
+    def remove_audit_events(self, offsets: List[int]):
         """
-        Generates the file path for the given event time.
+        Acknowledges a batch of pushed audit events, with a single checkpoint update.
 
         Args:
-            event_time_millis (int): The event time in milliseconds.
-
-        Returns:
-            str: The file path for the given event time.
+            offsets (List[int]): The offsets of the audit events returned by add_audit_event.
         """
-        event_date = datetime.fromtimestamp(event_time_millis / 1000)  # Convert milliseconds to seconds
-        return os.path.join(self.audit_spool_dir, f"audit_spool_{event_date.strftime('%Y-%m-%d')}.json")
+        with self.lock:
+            self.acked_offsets.update(offset for offset in offsets if offset >= self.checkpoint_offset)
+            if self.checkpoint_offset not in self.acked_offsets:
+                return
+            while self.checkpoint_offset in self.acked_offsets:
+                self.acked_offsets.remove(self.checkpoint_offset)
+                self.checkpoint_offset += 1
+            self.write_checkpoint()
+            self.delete_acked_segments()
+
+    def write_checkpoint(self):
+        checkpoint_file_path = self.get_checkpoint_file_path()
+        temp_file_path = checkpoint_file_path + '.temp'
+        with open(temp_file_path, 'w') as f:
+            json.dump({"offset": self.checkpoint_offset}, f)
+        os.replace(temp_file_path, checkpoint_file_path)
+
+    def delete_acked_segments(self):
+        # The active segment is kept, it is replaced once full
+        while len(self.segments) > 1 and self.segments[1] <= self.checkpoint_offset:
+            os.remove(self.get_segment_file_path(self.segments.popleft()))
+
+    def get_pending_audit_event_count(self) -> int:
+        """
+        Returns the number of spooled audit events not acknowledged yet.
+        """
+        with self.lock:
+            return self.next_offset - self.checkpoint_offset - len(self.acked_offsets)
+
+    def get_segment_file_path(self, base_offset: int) -> str:
+        return os.path.join(self.audit_spool_dir,
+                            f"{self.SEGMENT_FILE_PREFIX}{base_offset:020d}{self.SEGMENT_FILE_SUFFIX}")
+
+    def get_checkpoint_file_path(self) -> str:
+        return os.path.join(self.audit_spool_dir, self.CHECKPOINT_FILE_NAME)
 
 
 class AuditLogger(threading.Thread, metaclass=abc.ABCMeta):
     """
     A class to log audit data and push it to a server.
 
+    The audit events are drained from the queue in micro-batches, of up to max_batch_size audit events or collected
+    for at most batch_linger_ms, and pushed by sender_workers concurrent threads with push_audit_events_to_server.
+
     Attributes:
         audit_spool_dir (str): A directory to store spooled audit files.
     """
 
-    def __init__(self, audit_spool_dir: str, audit_event_cls, max_queue_size=10000, audit_event_queue_timeout=5):
+    def __init__(self, audit_spool_dir: str, audit_event_cls, max_queue_size=10000, audit_event_queue_timeout=5,
+                 audit_spool_segment_size_bytes=DEFAULT_SEGMENT_SIZE_BYTES, max_batch_size=1, batch_linger_ms=0,
+                 sender_workers=1, max_replay_size=1000):
         """
         Initializes the AuditLogger.
 
         Args:
             audit_spool_dir (str): Audit spool directory
             audit_event_cls (cls): Class of audit event
+            audit_spool_segment_size_bytes (int): Size of the audit spool segment files
+            max_batch_size (int): Maximum number of audit events pushed together
+            batch_linger_ms (int): Maximum time to wait for more audit events to fill a batch
+            sender_workers (int): Number of threads pushing the batches concurrently
+            max_replay_size (int): Maximum number of spooled audit events replayed and not pushed yet, whatever the
+            size of the queue
         """
         super().__init__()
 
         self.audit_event_queue_timeout = audit_event_queue_timeout
-        self.audit_spooler = AuditSpooler(audit_spool_dir, audit_event_cls)
+        self.max_batch_size = max(max_batch_size, 1)
+        self.batch_linger_sec = max(batch_linger_ms, 0) / 1000
+        self.sender_workers = max(sender_workers, 1)
+        self.audit_spooler = AuditSpooler(audit_spool_dir, audit_event_cls, audit_spool_segment_size_bytes)
 
+        # The queues hold (offset, audit_event) tuples, the offset is used to acknowledge the spooled audit event
         self.audit_event_queue = Queue(maxsize=max_queue_size)
         self.failed_audit_event_queue = Queue(maxsize=max_queue_size)
 
-        # Load spooled audits
-        self.load_spooled_audit_events()
+        # A slot is taken for each replayed audit event and released once it is pushed, so the replay is bounded
+        # even if the queue is not
+        self.replay_slots = threading.Semaphore(max(max_replay_size, 1))
+        self.replayed_audit_event_count = 0
+
+        # Metrics
+        self.metrics_lock = threading.Lock()
+        self.pushed_audit_event_count = 0
+        self.pushed_batch_count = 0
+        self.failed_batch_count = 0
+        self.queue_full_count = 0
+
+        # Load spooled audits in the background, the replay slots bound the number of replayed audits in memory
+        self.load_spooled_audit_thread = threading.Thread(target=self.load_spooled_audit_events)
+        self.load_spooled_audit_thread.daemon = True
+        self.load_spooled_audit_thread.start()
 
         self.retry_failed_audit_thread = threading.Thread(target=self.retry_failed_audit_events)
         self.retry_failed_audit_thread.daemon = True  # Daemonize the thread
@@ -222,12 +368,22 @@ class AuditLogger(threading.Thread, metaclass=abc.ABCMeta):
         """
         Loads spooled audit events from the AuditSpooler and puts them into the audit event queue.
 
-        This method retrieves spooled audit events from the AuditSpooler and puts them into the audit event queue for processing.
+        This method streams the spooled audit events from the checkpoint of the AuditSpooler, and waits for the
+        replayed audit events to be pushed before reading more of them once max_replay_size are in memory.
 
         """
-        spooled_audit_events = self.audit_spooler.get_spooled_audit_events()
-        for audit_event in spooled_audit_events:
-            self.audit_event_queue.put(audit_event, timeout=self.audit_event_queue_timeout)
+        try:
+            count = 0
+            for offset, audit_event in self.audit_spooler.iter_spooled_audit_events():
+                self.replay_slots.acquire()
+                self.audit_event_queue.put((offset, audit_event))
+                count += 1
+                with self.metrics_lock:
+                    self.replayed_audit_event_count += 1
+            if count:
+                _logger.info(f"Loaded {count} spooled audit events.")
+        except Exception as e:
+            _logger.error("Failed to load spooled audit events: %s", e)
 
     def log(self, audit_event: T):
         """
@@ -237,10 +393,12 @@ class AuditLogger(threading.Thread, metaclass=abc.ABCMeta):
             audit_event (object): The audit event to be logged.
         """
         # Add event to spool file
-        self.audit_spooler.add_audit_event(audit_event)
+        offset = self.audit_spooler.add_audit_event(audit_event)
         try:
-            self.audit_event_queue.put(audit_event, timeout=self.audit_event_queue_timeout)
+            self.audit_event_queue.put((offset, audit_event), timeout=self.audit_event_queue_timeout)
         except queue.Full:
+            with self.metrics_lock:
+                self.queue_full_count += 1
             _logger.error("Audit event queue is full.The push rate is too high for the audit spooler to process.")
             raise AuditEventQueueFullException("Audit event queue is full.The push rate is too high for the audit "
                                                "spooler to process.")
@@ -249,29 +407,111 @@ class AuditLogger(threading.Thread, metaclass=abc.ABCMeta):
         """
         Runs the AuditLogger thread.
 
-        Continuously checks for new events in the audit_event_queue and pushes them to the server.
+        Starts the additional sender workers, and continuously pushes the batches of new events in the
+        audit_event_queue to the server.
+        """
+        for index in range(1, self.sender_workers):
+            sender_thread = threading.Thread(target=self.send_audit_events, name=f"{self.name}-sender-{index}")
+            sender_thread.daemon = True
+            sender_thread.start()
+        self.send_audit_events()
+
+    def send_audit_events(self):
+        """
+        Pushes the batches of audit events to the server, acknowledges them in the spool once pushed, and adds them
+        back to the failed audit event queue for retries otherwise.
         """
         try:
             while True:
-                # Check for new logs in the audit_event_queue
-                # This is a blocking queue, it will implicitly wait till record available in queue
-                audit_event = self.audit_event_queue.get()
+                batch = self.get_audit_event_batch()
+                audit_events = [audit_event for _, audit_event in batch]
                 try:
-                    # Push audit to server
-                    self.push_audit_event_to_server(audit_event)
+                    # Push audits to server
+                    self.push_audit_events_to_server(audit_events)
                     if _logger.isEnabledFor(logging.DEBUG):
-                        _logger.debug("Audit event data pushed to server: %s", audit_event)
-
-                    # After successfully pushing audits to server, removing it from spool directory
-                    self.audit_spooler.remove_audit_event(audit_event)
+                        _logger.debug("Audit event data pushed to server: %s", audit_events)
+
+                    # After successfully pushing audits to server, removing them from spool directory
+                    self.audit_spooler.remove_audit_events([offset for offset, _ in batch])
+                    self.release_replay_slots(batch)
+                    with self.metrics_lock:
+                        self.pushed_audit_event_count += len(batch)
+                        self.pushed_batch_count += 1
                 except Exception as e:
-                    _logger.warning("Failed to push audit event data %s to server: %s. Retrying request. Will add it "
-                                    "back in the audit-queue.", audit_event, e)
+                    _logger.warning("Failed to push %d audit events to server: %s. Retrying request. Will add them "
+                                    "back in the audit-queue.", len(batch), e)
+                    with self.metrics_lock:
+                        self.failed_batch_count += 1
                     # Adding failed audits for retries
-                    self.failed_audit_event_queue.put(audit_event, timeout=self.audit_event_queue_timeout)
+                    for item in batch:
+                        self.failed_audit_event_queue.put(item, timeout=self.audit_event_queue_timeout)
         except Exception as e:
             _logger.error("An error occurred in AuditLogger: %s", e)
 
+    def release_replay_slots(self, batch):
+        """
+        Releases the replay slots of the replayed audit events of a pushed batch, the audit events spooled before the
+        start are the replayed ones.
+        """
+        for offset, _ in batch:
+            if offset < self.audit_spooler.recovered_offset:
+                self.replay_slots.release()
+
+    def get_audit_event_batch(self):
+        """
+        Waits for the next audit event, then collects the audit events available until the batch is full or the
+        linger time has elapsed.
+
+        Returns:
+            list: The (offset, audit_event) tuples of the batch.
+        """
+        # This is a blocking queue, it will implicitly wait till record available in queue
+        batch = [self.audit_event_queue.get()]
+        deadline = time.monotonic() + self.batch_linger_sec
+        while len(batch) < self.max_batch_size:
+            try:
+                remaining_sec = deadline - time.monotonic()
+                if remaining_sec > 0:
+                    batch.append(self.audit_event_queue.get(timeout=remaining_sec))
+                else:
+                    batch.append(self.audit_event_queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def get_metrics(self):
+        """
+        Returns the backpressure metrics of the audit pipeline.
+
+        Returns:
+            dict: The queued, failed, spooled and replayed audit event counts, and the pushed and failed batch counts.
+        """
+        with self.metrics_lock:
+            return {
+                "queue_size": self.audit_event_queue.qsize(),
+                "failed_queue_size": self.failed_audit_event_queue.qsize(),
+                "spooled_audit_event_count": self.audit_spooler.get_pending_audit_event_count(),
+                "queue_full_count": self.queue_full_count,
+                "replayed_audit_event_count": self.replayed_audit_event_count,
+                "pushed_audit_event_count": self.pushed_audit_event_count,
+                "pushed_batch_count": self.pushed_batch_count,
+                "failed_batch_count": self.failed_batch_count
+            }
+
+    def push_audit_events_to_server(self, audit_events: List[T]):
+        """
+        Pushes a batch of audit events to the server.
+
+        Subclasses can override this method to push the batch with a single bulk request, by default the audit events
+        are pushed one at a time with push_audit_event_to_server. The whole batch is retried if an exception is
+        raised, so the audit events are delivered at least once.
+
+        Args:
+            audit_events (List[T]): The audit events to be pushed to the server.
+        """
+        for audit_event in audit_events:
+            self.push_audit_event_to_server(audit_event)
+
     @abstractmethod
     def push_audit_event_to_server(self, audit_event: T):
         """
@@ -1,10 +1,11 @@
 import os
 import random
+import time
 from unittest.mock import patch
 
 import pytest
 
-from paig_common.audit_spooler import AuditSpooler, AuditEvent
+from paig_common.audit_spooler import AuditSpooler, AuditEvent, AuditLogger
 from paig_common.file_utils import FileUtils
 from paig_common.paig_exception import DiskFullException
 
@@ -34,88 +35,87 @@ def temp_directory(tmpdir_factory):
     return tmpdir_factory.mktemp("test_data")
 
 
-def test_get_spooled_audit_events(temp_directory):
-    # Create a temporary directory for spooling
-    audit_spool_dir = str(temp_directory.join("spool"))
+def create_spooler(temp_directory, name, segment_size_bytes=1024):
+    audit_spool_dir = str(temp_directory.join(name + "_" + str(random.randint(0, 100000))))
+    return AuditSpooler(audit_spool_dir=audit_spool_dir, audit_event_cls=TestAuditEvent,
+                        segment_size_bytes=segment_size_bytes)
 
-    # Create an instance of AuditSpooler
-    spooler = AuditSpooler(audit_spool_dir=audit_spool_dir, audit_event_cls=TestAuditEvent)
 
-    # Create some temporary audit event files
-    file1 = audit_spool_dir + "/audit_spool_2022-01-01.json"
-    FileUtils.append_json_to_file(file1, {"eventTime": 1640995200000})
+def test_add_audit_event(temp_directory):
+    spooler = create_spooler(temp_directory, "spool_test_add_audit_event")
 
-    file1 = audit_spool_dir + "/audit_spool_2022-01-02.json"
-    FileUtils.append_json_to_file(file1, {"eventTime": 1641081600000})
+    # January 1 and 2, 2022
+    assert spooler.add_audit_event(TestAuditEvent(event_time=1640995200000)) == 0
+    assert spooler.add_audit_event(TestAuditEvent(event_time=1641081600000)) == 1
 
-    # Call the method being tested
-    audit_events = spooler.get_spooled_audit_events()
+    # The spooled audit events are replayed by a new spooler, in offset order
+    data = list(AuditSpooler(spooler.audit_spool_dir, TestAuditEvent).iter_spooled_audit_events())
+    assert [offset for offset, _ in data] == [0, 1]
+    assert [audit_event.event_time for _, audit_event in data] == [1640995200000, 1641081600000]
 
-    # Check the result
-    assert len(audit_events) == 2
 
+def test_remove_audit_event(temp_directory):
+    spooler = create_spooler(temp_directory, "spool_test_remove_audit_event")
 
-def test_add_audit_event(temp_directory):
-    # Create a temporary directory for spooling
-    audit_spool_dir = str(temp_directory.join("spool" + str(random.randint(0, 1000))))
+    offsets = [spooler.add_audit_event(TestAuditEvent(event_time=i)) for i in range(3)]
 
-    # Create an instance of AuditSpooler
-    spooler = AuditSpooler(audit_spool_dir=audit_spool_dir, audit_event_cls=TestAuditEvent)
+    # Out of order acknowledgements do not move the checkpoint
+    spooler.remove_audit_event(offsets[1])
+    assert spooler.checkpoint_offset == 0
+    assert spooler.get_pending_audit_event_count() == 2
 
-    # Create a mock audit event
-    event_time = 1640995200000  # January 1, 2022
-    test_event = TestAuditEvent.from_payload_dict({"eventTime": event_time})
+    spooler.remove_audit_event(offsets[0])
+    assert spooler.checkpoint_offset == 2
+    assert spooler.get_pending_audit_event_count() == 1
 
-    # Call the method being tested
-    spooler.add_audit_event(test_event)
+    # Replay starts from the checkpoint
+    data = list(AuditSpooler(spooler.audit_spool_dir, TestAuditEvent).iter_spooled_audit_events())
+    assert [(offset, audit_event.event_time) for offset, audit_event in data] == [(2, 2)]
 
-    # Check if the audit event file is created
-    expected_file_path = os.path.join(audit_spool_dir, "audit_spool_2022-01-01.json")
 
-    # Read the content of the audit event file and check if the event is present
-    data = spooler.get_spooled_audit_events()
-    assert len(data) == 1
-    assert data[0].event_time == 1640995200000
+def test_acked_segments_are_deleted(temp_directory):
+    spooler = create_spooler(temp_directory, "spool_test_acked_segments", segment_size_bytes=30)
 
+    # Each event is 17 bytes, so a new segment is started every 2 events
+    offsets = [spooler.add_audit_event(TestAuditEvent(event_time=i)) for i in range(5)]
+    assert list(spooler.segments) == [0, 2, 4]
 
-def test_remove_audit_event(temp_directory):
-    # Create a temporary directory for spooling
-    audit_spool_dir = str(temp_directory.join("spool_test_remove_audit_event_" + str(random.randint(0, 1000))))
+    for offset in offsets[:3]:
+        spooler.remove_audit_event(offset)
 
-    # Create an instance of AuditSpooler
-    spooler = AuditSpooler(audit_spool_dir=audit_spool_dir, audit_event_cls=TestAuditEvent)
+    assert list(spooler.segments) == [2, 4]
+    segment_files = [os.path.basename(p) for p in FileUtils.get_file_paths_in_directory(spooler.audit_spool_dir)
+                     if p.endswith(AuditSpooler.SEGMENT_FILE_SUFFIX)]
+    assert sorted(segment_files) == [f"audit_spool_segment_{2:020d}.log", f"audit_spool_segment_{4:020d}.log"]
 
-    # Create a mock audit event
-    event_time = 1640995200000  # January 1, 2022
-    test_event = TestAuditEvent.from_payload_dict({"eventTime": event_time})
+    # New offsets continue after a restart
+    restarted_spooler = AuditSpooler(spooler.audit_spool_dir, TestAuditEvent, segment_size_bytes=30)
+    assert [offset for offset, _ in restarted_spooler.iter_spooled_audit_events()] == [3, 4]
+    assert restarted_spooler.add_audit_event(TestAuditEvent(event_time=5)) == 5
 
-    # Add the mock event to the spooler
-    spooler.add_audit_event(test_event)
 
-    # Call the method being tested
-    spooler.remove_audit_event(test_event)
+def test_incomplete_audit_event_is_truncated(temp_directory):
+    spooler = create_spooler(temp_directory, "spool_test_truncate")
+    spooler.add_audit_event(TestAuditEvent(event_time=1))
+    with open(spooler.get_segment_file_path(0), 'a') as f:
+        f.write('{"eventTime": 2')
 
-    # Check if the audit event file is removed
-    files_present = FileUtils.get_file_paths_in_directory(audit_spool_dir)
-    assert len(files_present) == 0
+    restarted_spooler = AuditSpooler(spooler.audit_spool_dir, TestAuditEvent)
+    assert [offset for offset, _ in restarted_spooler.iter_spooled_audit_events()] == [0]
+    assert restarted_spooler.add_audit_event(TestAuditEvent(event_time=3)) == 1
 
 
-def test_get_file_path_for_event_time(temp_directory):
-    # Create a temporary directory for spooling
-    audit_spool_dir = str(temp_directory.join("spool"))
+def test_legacy_spool_files_are_migrated(temp_directory):
+    audit_spool_dir = str(temp_directory.join("spool_test_legacy"))
+    os.makedirs(audit_spool_dir)
+    FileUtils.append_json_to_file(audit_spool_dir + "/audit_spool_2022-01-01.json", {"eventTime": 1640995200000})
+    FileUtils.append_json_to_file(audit_spool_dir + "/audit_spool_2022-01-02.json", {"eventTime": 1641081600000})
 
-    # Create an instance of AuditSpooler
     spooler = AuditSpooler(audit_spool_dir=audit_spool_dir, audit_event_cls=TestAuditEvent)
 
-    # Define an event time in milliseconds
-    event_time_millis = 1640995200000  # January 1, 2022
-
-    # Call the method being tested
-    file_path = spooler.get_file_path_for_event_time(event_time_millis)
-
-    # Check if the file path is generated correctly
-    expected_file_path = os.path.join(audit_spool_dir, "audit_spool_2022-01-01.json")
-    assert file_path == expected_file_path
+    audit_events = list(spooler.iter_spooled_audit_events())
+    assert [audit_event.event_time for _, audit_event in audit_events] == [1640995200000, 1641081600000]
+    assert not os.path.exists(audit_spool_dir + "/audit_spool_2022-01-01.json")
 
 
 class MockAuditEvent(AuditEvent):
@@ -127,13 +127,11 @@ class MockAuditEvent(AuditEvent):
         return cls()
 
 
-@patch('paig_common.audit_spooler.FileUtils.append_json_to_file')
-@patch('paig_common.audit_spooler.AuditSpooler.get_file_path_for_event_time')
-def test_add_audit_event_exception(mock_get_file_path_for_event_time, mock_append_json_to_file, temp_directory):
+@patch('paig_common.audit_spooler.AuditSpooler.append_line')
+def test_add_audit_event_exception(mock_append_line, temp_directory):
     # Create a temporary directory for spooling
     audit_spool_dir = str(temp_directory.join("spool"))
-    mock_get_file_path_for_event_time.return_value = audit_spool_dir
-    mock_append_json_to_file.side_effect = OSError(28, "No space left on device. Disk is full. Please increase the "
+    mock_append_line.side_effect = OSError(28, "No space left on device. Disk is full. Please increase the "
                                                        "disk size or free"
                                                        "up some space to push audits successfully.")
     spooler = AuditSpooler(audit_spool_dir, MockAuditEvent)
@@ -142,3 +140,59 @@ def test_add_audit_event_exception(mock_get_file_path_for_event_time, mock_appen
         spooler.add_audit_event(MockAuditEvent())
     assert str(e.value) == ("No space left on device. Disk is full. Please increase the disk size or free up some "
                             "space to push audits successfully.")
+
+
+class BatchAuditLogger(AuditLogger):
+    def __init__(self, audit_spool_dir, **kwargs):
+        super().__init__(audit_spool_dir, TestAuditEvent, **kwargs)
+        self.batches = []
+
+    def push_audit_event_to_server(self, audit_event):
+        pass
+
+    def push_audit_events_to_server(self, audit_events):
+        self.batches.append([audit_event.event_time for audit_event in audit_events])
+
+
+def test_audit_logger_pushes_batches(temp_directory):
+    audit_spool_dir = str(temp_directory.join("spool_test_audit_logger_batches"))
+    audit_logger = BatchAuditLogger(audit_spool_dir, max_batch_size=3, batch_linger_ms=50)
+    audit_logger.daemon = True
+
+    for i in range(5):
+        audit_logger.log(TestAuditEvent(event_time=i))
+    audit_logger.start()
+
+    for _ in range(100):
+        if audit_logger.get_metrics()["pushed_audit_event_count"] == 5:
+            break
+        time.sleep(0.05)
+
+    assert audit_logger.batches == [[0, 1, 2], [3, 4]]
+    metrics = audit_logger.get_metrics()
+    assert metrics["pushed_batch_count"] == 2
+    assert metrics["spooled_audit_event_count"] == 0
+    assert metrics["queue_size"] == 0
+
+
+def test_replay_is_bounded_with_unbounded_queue(temp_directory):
+    spooler = create_spooler(temp_directory, "spool_test_replay_bound")
+    for i in range(10):
+        spooler.add_audit_event(TestAuditEvent(event_time=i))
+
+    audit_logger = BatchAuditLogger(spooler.audit_spool_dir, max_queue_size=0, max_replay_size=3, max_batch_size=2)
+    audit_logger.daemon = True
+    time.sleep(0.2)
+
+    # Only max_replay_size spooled audit events are loaded until they are pushed
+    assert audit_logger.get_metrics()["queue_size"] == 3
+    assert audit_logger.get_metrics()["replayed_audit_event_count"] == 3
+
+    audit_logger.start()
+    for _ in range(100):
+        if audit_logger.get_metrics()["pushed_audit_event_count"] == 10:
+            break
+        time.sleep(0.05)
+
+    assert [event_time for batch in audit_logger.batches for event_time in batch] == list(range(10))
+    assert audit_logger.get_metrics()["spooled_audit_event_count"] == 0
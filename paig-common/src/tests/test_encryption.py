@@ -3,7 +3,8 @@ import pytest
 
 from cryptography.hazmat.primitives.asymmetric import padding
 
-from paig_common.encryption import DataEncryptor, RSAKeyUtil
+from paig_common.encryption import DataEncryptor, RSAKeyUtil, ENCRYPTION_MODE_CHUNKED, ENCRYPTION_MODE_ENVELOPE, \
+    ENVELOPE_PREFIX, negotiate_encryption_mode
 
 rsa_key_info = RSAKeyUtil().generate_key_pair()
 data_encryptor = DataEncryptor(public_key=rsa_key_info.public_key_encoded_str,
@@ -67,3 +68,49 @@ def test_rsa_util_error_keys():
 
     assert public_key_err is None
     assert private_key_err is None
+
+
+def test_envelope_encrypt_decrypt():
+    envelope_encryptor = DataEncryptor(public_key=rsa_key_info.public_key_encoded_str,
+                                       private_key=rsa_key_info.private_key_encoded_str,
+                                       encryption_mode=ENCRYPTION_MODE_ENVELOPE)
+    large_data = "“Envelope” encryption " * 1000
+
+    encrypted_data = envelope_encryptor.encrypt(large_data)
+    assert encrypted_data.startswith(ENVELOPE_PREFIX)
+    assert envelope_encryptor.decrypt(encrypted_data) == large_data
+
+    # The session data key is wrapped once, and unwrapped once by the decrypting side
+    assert envelope_encryptor.encrypt(msg_data).split(":")[1] == encrypted_data.split(":")[1]
+    assert data_encryptor.decrypt(envelope_encryptor.encrypt(msg_data)) == msg_data
+    assert len(data_encryptor.unwrapped_data_keys) == 1
+
+    # Chunked messages are still decrypted
+    assert envelope_encryptor.decrypt(data_encryptor.encrypt(msg_data)) == msg_data
+    assert data_encryptor.encrypt(msg_data, encryption_mode=ENCRYPTION_MODE_ENVELOPE).startswith(ENVELOPE_PREFIX)
+
+
+def test_envelope_data_key_rotation():
+    envelope_encryptor = DataEncryptor(public_key=rsa_key_info.public_key_encoded_str,
+                                       private_key=rsa_key_info.private_key_encoded_str,
+                                       encryption_mode=ENCRYPTION_MODE_ENVELOPE, data_key_max_messages=2)
+    wrapped_data_keys = [envelope_encryptor.encrypt(msg_data).split(":")[1] for _ in range(3)]
+    assert wrapped_data_keys[0] == wrapped_data_keys[1] != wrapped_data_keys[2]
+
+
+def test_envelope_tampered_message():
+    envelope_encryptor = DataEncryptor(public_key=rsa_key_info.public_key_encoded_str,
+                                       private_key=rsa_key_info.private_key_encoded_str,
+                                       encryption_mode=ENCRYPTION_MODE_ENVELOPE)
+    prefix, wrapped_data_key, sealed_data = envelope_encryptor.encrypt(msg_data).split(":")
+    sealed_data_bytes = bytearray(base64.b64decode(sealed_data))
+    sealed_data_bytes[-1] ^= 1
+    with pytest.raises(Exception):
+        envelope_encryptor.decrypt(f"{prefix}:{wrapped_data_key}:{base64.b64encode(sealed_data_bytes).decode()}")
+
+
+def test_negotiate_encryption_mode():
+    assert negotiate_encryption_mode(["envelope", "chunked"]) == ENCRYPTION_MODE_ENVELOPE
+    assert negotiate_encryption_mode(["envelope", "chunked"], ["chunked"]) == ENCRYPTION_MODE_CHUNKED
+    assert negotiate_encryption_mode(["unknown"]) == ENCRYPTION_MODE_CHUNKED
+    assert negotiate_encryption_mode(None) == ENCRYPTION_MODE_CHUNKED
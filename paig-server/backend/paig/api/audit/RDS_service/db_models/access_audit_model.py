@@ -1,9 +1,17 @@
-from sqlalchemy import Column, Integer, String, JSON, Double
+from sqlalchemy import Column, Integer, BigInteger, Boolean, String, JSON, Double, ForeignKey, Index
 from core.db_session import Base
 
+# MySQL limits the index keys to 3072 bytes, the dimensions of the rollup keys are indexed by prefix there
+ROLLUP_KEY_MYSQL_LENGTH = {dimension: 150 for dimension in ('app_name', 'user_id', 'result', 'request_type', 'trait')}
+
 
 class AccessAuditModel(Base):
     __tablename__ = 'access_audits'
+    __table_args__ = (
+        # The keyset pagination of the audits by event time, overall and per application
+        Index('ix_access_audits_event_time_id', 'event_time', 'id'),
+        Index('ix_access_audits_app_name_event_time', 'app_name', 'event_time'),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     app_key = Column(String(255), nullable=True)
     app_name = Column(String(255), nullable=True, index=True)
@@ -34,3 +42,70 @@ class AccessAuditModel(Base):
         for key in attributes:
             setattr(self, key, attributes[key])
 
+
+
+class AccessAuditTraitModel(Base):
+    """
+    The traits of the access audits, one row per audit and trait, so the audits can be filtered and counted by trait
+    with the indexes instead of reading the traits JSON of every audit.
+    """
+    __tablename__ = 'access_audit_trait'
+    __table_args__ = (
+        Index('ix_access_audit_trait_trait_event_time', 'trait', 'event_time'),
+    )
+    audit_id = Column(Integer, ForeignKey('access_audits.id', ondelete='CASCADE'), primary_key=True)
+    trait = Column(String(255), primary_key=True)
+    masked = Column(Boolean, nullable=False, default=False)
+    event_time = Column(Double, nullable=True)
+
+
+class AccessAuditPolicyModel(Base):
+    """
+    The PAIG policy IDs of the access audits, one row per audit and policy.
+    """
+    __tablename__ = 'access_audit_policy'
+    __table_args__ = (
+        Index('ix_access_audit_policy_policy_id_audit_id', 'policy_id', 'audit_id'),
+    )
+    audit_id = Column(Integer, ForeignKey('access_audits.id', ondelete='CASCADE'), primary_key=True)
+    policy_id = Column(Integer, primary_key=True)
+
+
+class AccessAuditRollupModel(Base):
+    """
+    The access audit counts per hour or day bucket, application, user, result and request type, maintained as the
+    access audits are inserted, so the dashboards don't scan the access_audits table.
+    """
+    __tablename__ = 'access_audit_rollups'
+    __table_args__ = (
+        Index('uq_access_audit_rollups', 'granularity', 'bucket_time', 'app_name', 'user_id', 'result',
+              'request_type', unique=True, mysql_length=ROLLUP_KEY_MYSQL_LENGTH),
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    granularity = Column(String(8), nullable=False)
+    bucket_time = Column(BigInteger, nullable=False, index=True)
+    app_name = Column(String(255), nullable=True)
+    user_id = Column(String(255), nullable=True)
+    result = Column(String(255), nullable=True)
+    request_type = Column(String(255), nullable=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class AccessAuditTraitRollupModel(Base):
+    """
+    The access audit counts per trait, besides the dimensions of the access_audit_rollups table.
+    """
+    __tablename__ = 'access_audit_trait_rollups'
+    __table_args__ = (
+        Index('uq_access_audit_trait_rollups', 'granularity', 'bucket_time', 'app_name', 'user_id', 'result',
+              'request_type', 'trait', unique=True, mysql_length=ROLLUP_KEY_MYSQL_LENGTH),
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    granularity = Column(String(8), nullable=False)
+    bucket_time = Column(BigInteger, nullable=False, index=True)
+    app_name = Column(String(255), nullable=True)
+    user_id = Column(String(255), nullable=True)
+    result = Column(String(255), nullable=True)
+    request_type = Column(String(255), nullable=True)
+    trait = Column(String(255), nullable=True)
+    count = Column(Integer, nullable=False, default=0)
@@ -1,14 +1,22 @@
 from datetime import datetime, timezone
-from api.audit.RDS_service.db_models.access_audit_model import AccessAuditModel
+from api.audit.RDS_service.db_models.access_audit_model import AccessAuditModel, AccessAuditTraitModel
+from api.audit.RDS_service.db_operations.access_audit_side_tables import get_side_table_statements
+from api.audit.RDS_service.db_operations.access_audit_rollup_repository import AccessAuditRollupRepository, \
+    ROLLUP_DIMENSIONS, get_rollup_ranges, get_rollup_statements, in_range
+from core.config import load_config_file
+from core.controllers.paginated_response import COUNT_MODE_EXACT, COUNT_MODE_CAPPED, COUNT_MODE_NONE, \
+    encode_cursor, decode_cursor
+from core.exceptions import BadRequestException
 from core.factory.database_initiator import BaseOperations
 from core.db_session.transactional import Transactional, Propagation
-from sqlalchemy import func, and_, cast, String
+from sqlalchemy import func, and_, or_, not_, case, cast, literal, union_all, String
 from core.db_session import session
+from core.db_session.standalone_session import get_engine, insert_rows
 from api.audit.api_schemas.access_audit_schema import BaseAccessAuditView
 from core.utils import get_field_name_by_alias, format_time_for_datetime_series
-from sqlalchemy.sql import true, select
-
+from sqlalchemy.sql import select
 
+config = load_config_file()
 
 
 class AccessAuditRepository(BaseOperations[AccessAuditModel]):
@@ -21,6 +29,10 @@ class AccessAuditRepository(BaseOperations[AccessAuditModel]):
             db_session (Session): The database session to use for operations.
         """
         super().__init__(AccessAuditModel)
+        self.rollup_repository = AccessAuditRollupRepository()
+        # The rollup tables are always maintained, the flag only controls whether the dashboards read them
+        self.rollups_enabled = config.get("access_audit_rollups_enabled", True)
+        self.count_cap = config.get("access_audit_count_cap", 10000)
 
     @Transactional(propagation=Propagation.REQUIRED)
     async def create_access_audit(self, access_audit_params: BaseAccessAuditView):
@@ -29,10 +41,112 @@ class AccessAuditRepository(BaseOperations[AccessAuditModel]):
         model = self.model_class()
         model.set_attribute(access_audit_params)
         session.add(model)
+        # The ID of the audit is needed for the rows of the side tables
+        await session.flush()
+        for statement, rows in get_side_table_statements([access_audit_params], [model.id]):
+            await session.execute(statement, rows)
+        await self.rollup_repository.add_access_audits([access_audit_params])
         return model
 
-    async def _build_datetime_series(self, min_value, max_value, interval):
-        formatted_date = func.datetime(AccessAuditModel.event_time/1000, 'unixepoch')
+    async def create_access_audits(self, access_audit_params_list):
+        """
+        Insert the access audits with multi-row inserts, in a standalone session as the audits are written outside
+        of the requests. The side tables of the traits and the policy IDs and the rollup tables are updated in the
+        same transaction.
+
+        Args:
+            access_audit_params_list (List[BaseAccessAuditView]): The access audits to insert.
+
+        Returns:
+            int: The number of inserted access audits.
+        """
+        table = self.model_class.__table__
+        records = []
+        for access_audit_params in access_audit_params_list:
+            if not isinstance(access_audit_params, dict):
+                access_audit_params = access_audit_params.model_dump()
+            records.append({key: value for key, value in access_audit_params.items() if key in table.columns})
+        rollup_statements = get_rollup_statements(records, get_engine().dialect.name)
+        return await insert_rows(table, records, statements=rollup_statements,
+                                 child_statements=lambda audit_ids: get_side_table_statements(records, audit_ids))
+
+    def process_filters(self, filters, field, value, apply_in_list_filter):
+        if field == 'traits' and value is not None:
+            return self._get_trait_filter(filters, value)
+        return super().process_filters(filters, field, value, apply_in_list_filter)
+
+    def _get_trait_filter(self, filters, value):
+        """
+        Filter the access audits by trait with the access_audit_trait side table, instead of the traits JSON.
+        """
+        values = value.split(",") if "," in value and not filters.get('value_with_comma') else [value]
+        if filters.get('exact_match') or filters.get('exclude_match'):
+            trait_conditions = [AccessAuditTraitModel.trait == trait for trait in values]
+        else:
+            trait_conditions = [AccessAuditTraitModel.trait.like('%' + trait + '%') for trait in values]
+        has_trait = select(AccessAuditTraitModel.audit_id).where(
+            AccessAuditTraitModel.audit_id == AccessAuditModel.id, or_(*trait_conditions)).exists()
+        return ~has_trait if self._is_col_excluded(filters, 'traits') else has_trait
+
+    def can_use_rollups(self, filters: dict) -> bool:
+        """
+        Check whether the counts with the given filters can be read from the rollup tables, which only have the
+        rollup dimensions of the access audits.
+        """
+        if not self.rollups_enabled or filters.get('or_column_list') or filters.get('lookup_columns'):
+            return False
+        columns = self.model_class.__table__.columns
+        return all(value is None or field in ROLLUP_DIMENSIONS or field not in columns
+                   for field, value in filters.items())
+
+    def _build_counts_source(self, filters, min_value, max_value, with_traits=False, use_day_buckets=True):
+        """
+        Build the access audit counts the dashboard queries are run against, one count per access audit or per
+        rollup bucket. The whole hours and days of the time range are read from the rollup tables when the filters
+        allow it, the rest of the time range from the access audits.
+
+        Args:
+            filters (dict): The filters of the access audits.
+            min_value (float): The start of the time range, None for no start.
+            max_value (float): The end of the time range, None for no end.
+            with_traits (bool): Whether to count the access audits per trait.
+            use_day_buckets (bool): Whether the day buckets can be used, False when the counts are needed per hour.
+
+        Returns:
+            Subquery: The event time, the rollup dimensions, the trait if requested, and the count.
+        """
+        filters = filters if isinstance(filters, dict) else filters.model_dump()
+        columns = [AccessAuditModel.event_time.label("event_time")]
+        columns.extend(getattr(AccessAuditModel, dimension).label(dimension) for dimension in ROLLUP_DIMENSIONS)
+        if with_traits:
+            columns.append(AccessAuditTraitModel.trait.label('trait'))
+        columns.append(literal(1).label("count"))
+        query = select(*columns).select_from(AccessAuditModel)
+        if with_traits:
+            query = query.join(AccessAuditTraitModel, AccessAuditTraitModel.audit_id == AccessAuditModel.id)
+        query = self.create_filter(query, filters)
+        if min_value is not None:
+            query = query.filter(AccessAuditModel.event_time >= min_value)
+        if max_value is not None:
+            query = query.filter(AccessAuditModel.event_time <= max_value)
+
+        covered_range, day_range = None, None
+        if self.can_use_rollups(filters):
+            covered_range, day_range = get_rollup_ranges(min_value, max_value, use_day_buckets)
+        if covered_range is None:
+            return query.subquery("audit_counts")
+        query = query.filter(or_(AccessAuditModel.event_time.is_(None),
+                                 not_(in_range(AccessAuditModel.event_time, covered_range))))
+        rollup_query = self.rollup_repository.select_counts(filters, covered_range, day_range, with_traits)
+        return union_all(query, rollup_query).subquery("audit_counts")
+
+    @staticmethod
+    def _count_of(source, column):
+        # The rollup counts of the non-null values of the column, like count(column) on the access audits
+        return func.sum(case((column.is_not(None), source.c.count), else_=0))
+
+    async def _build_datetime_series(self, min_value, max_value, interval, event_time_column=AccessAuditModel.event_time):
+        formatted_date = func.datetime(event_time_column/1000, 'unixepoch')
         formatted_start_time = datetime.fromtimestamp(min_value/1000, timezone.utc)
         formatted_end_time = datetime.fromtimestamp(max_value/1000, timezone.utc)
         (
@@ -50,9 +164,34 @@ class AccessAuditRepository(BaseOperations[AccessAuditModel]):
         cte = await self.generate_datetime_series(formatted_start_time, formatted_end_time, offset_interval)
         return cte, formatted_ms
 
-    async def get_access_audits_with_filters(self, include_filters, exclude_filters, page, size, sort, min_value, max_value):
+    def _get_keyset_sort_type(self, sort):
+        """
+        Get the sort type of the keyset ordering by event time and id, which is used when the audits are sorted by
+        event time first. None if the audits are sorted by another column.
+        """
+        if not sort:
+            return None
+        sort_option = sort[0] if isinstance(sort, list) else sort
+        column_name, sort_type = self.parse_sort_option(sort_option)
+        first_alias = column_name.split(",")[0]
+        if get_field_name_by_alias(model=BaseAccessAuditView, alias=first_alias) != "event_time":
+            return None
+        return sort_type
+
+    async def get_access_audits_with_filters(self, include_filters, exclude_filters, page, size, sort, min_value,
+                                             max_value, cursor=None, count_mode=COUNT_MODE_EXACT):
+        """
+        Get a page of the access audits, by page number or after the cursor of the previous page.
+
+        The audits sorted by event time first are ordered by event time and id, so the pages can be fetched with a
+        cursor of the last event time and id, which reads the page from the (event_time, id) index instead of
+        skipping the audits of the previous pages.
+
+        Returns:
+            tuple: The audits of the page, their count (None with the count mode none), whether there are more
+            audits, and the cursor of the next page.
+        """
         all_filters = list()
-        skip = 0 if page is None else (page * size)
         query = select(AccessAuditModel)
         if exclude_filters:
             exclude_list = ''
@@ -70,7 +209,12 @@ class AccessAuditRepository(BaseOperations[AccessAuditModel]):
             all_filters.append(AccessAuditModel.event_time <= max_value)
         if all_filters:
             query = query.filter(and_(*all_filters))
-        if sort:
+        count_query = query
+
+        keyset_sort_type = self._get_keyset_sort_type(sort)
+        if keyset_sort_type:
+            query = self.order_by(query, "event_time,id", keyset_sort_type)
+        elif sort:
             if not isinstance(sort, list):
                 sort = [sort]
             for sort_option in sort:
@@ -81,69 +225,79 @@ class AccessAuditRepository(BaseOperations[AccessAuditModel]):
                     field_names.append(get_field_name_by_alias(model=BaseAccessAuditView, alias=alias_name))
                 sort_column_name = ",".join(field_names)
                 query = self.order_by(query, sort_column_name, sort_type)
-        query = query.limit(size).offset(skip)
-        results = (await session.execute(query)).scalars().all()
-        count = (await self.get_count_with_filter(include_filters.model_dump()))
-        return results, count
 
-    async def get_access_audits_counts_group_by_result(self, filters, min_value, max_value):
-        query = select(
-            AccessAuditModel.result.label("result"), func.count(AccessAuditModel.result).label("count")
-        )
+        if cursor:
+            if not keyset_sort_type:
+                raise BadRequestException("Cursor pagination requires the access audits to be sorted by event time")
+            cursor_values = decode_cursor(cursor)
+            if len(cursor_values) != 2:
+                raise BadRequestException("Invalid cursor")
+            event_time, audit_id = cursor_values
+            if keyset_sort_type == "asc":
+                query = query.filter(or_(AccessAuditModel.event_time > event_time,
+                                         and_(AccessAuditModel.event_time == event_time, AccessAuditModel.id > audit_id)))
+            else:
+                query = query.filter(or_(AccessAuditModel.event_time < event_time,
+                                         and_(AccessAuditModel.event_time == event_time, AccessAuditModel.id < audit_id)))
+            skip = 0
+        else:
+            skip = 0 if page is None else (page * size)
+
+        # One more audit than the page size tells whether this is the last page
+        query = query.limit(size + 1).offset(skip)
+        results = (await session.execute(query)).scalars().all()
+        has_more = len(results) > size
+        results = results[:size]
+        next_cursor = None
+        if has_more and keyset_sort_type:
+            next_cursor = encode_cursor([results[-1].event_time, results[-1].id])
 
-        query = query.group_by(AccessAuditModel.result)
+        if count_mode == COUNT_MODE_NONE:
+            count = None
+        elif count_mode == COUNT_MODE_CAPPED:
+            count = await self._get_count(count_query, self.count_cap + 1)
+        else:
+            count = await self._get_count(count_query)
+        return results, count, has_more, next_cursor
 
-        filters = self._get_filter(filters.model_dump())
+    @staticmethod
+    async def _get_count(query, limit=None):
+        query = query.with_only_columns(AccessAuditModel.id).order_by(None)
+        if limit is not None:
+            query = query.limit(limit)
+        return await session.scalar(select(func.count()).select_from(query.subquery()))
 
-        query = query.filter(
-            and_(
-                *filters,
-                AccessAuditModel.event_time >= min_value,
-                AccessAuditModel.event_time <= max_value
-            )
+    async def get_access_audits_counts_group_by_result(self, filters, min_value, max_value):
+        source = self._build_counts_source(filters, min_value, max_value)
+        query = select(
+            source.c.result.label("result"), self._count_of(source, source.c.result).label("count")
         )
+        query = query.group_by(source.c.result)
         results = (await session.execute(query)).all()
         return results
 
     async def get_access_audits_counts_group_by_traits_and_application(self, filters, min_value, max_value):
-        json_each = func.json_each(AccessAuditModel.traits).table_valued('value')
+        source = self._build_counts_source(filters, min_value, max_value, with_traits=True)
         query = (
             select(
-                json_each.c.value.label('trait'),
-                AccessAuditModel.app_name.label("app_name"),
-                func.count().label('count')
-            )
-            .select_from(AccessAuditModel)
-            .join(json_each, true())
-            .group_by(*[json_each.c.value, AccessAuditModel.app_name])
-        )
-
-        query = self.create_filter(query, filters)
-        query = query.filter(
-            and_(
-                AccessAuditModel.event_time >= min_value,
-                AccessAuditModel.event_time <= max_value
+                source.c.trait.label('trait'),
+                source.c.app_name.label("app_name"),
+                func.sum(source.c.count).label('count')
             )
+            .group_by(*[source.c.trait, source.c.app_name])
         )
         results = (await session.execute(query)).all()
         return results
 
     async def get_access_audits_counts_group_by_result_interval(self, filters, min_value, max_value, interval):
-        cte, formatted_ms = await self._build_datetime_series(min_value, max_value, interval)
+        source = self._build_counts_source(filters, min_value, max_value, use_day_buckets=interval != 'hour')
+        cte, formatted_ms = await self._build_datetime_series(min_value, max_value, interval, source.c.event_time)
         query = select(
-            AccessAuditModel.result.label("result"),
-            func.count(AccessAuditModel.result).label("count"),
-            formatted_ms.label("interval"),
-            AccessAuditModel.event_time.label("event_time")
-        )
-        query = query.group_by(*[AccessAuditModel.result, formatted_ms])
-        query = self.create_filter(query, filters)
-        query = query.filter(
-            and_(
-                AccessAuditModel.event_time >= min_value,
-                AccessAuditModel.event_time <= max_value
-            )
+            source.c.result.label("result"),
+            self._count_of(source, source.c.result).label("count"),
+            formatted_ms.label("interval")
         )
+        query = query.group_by(*[source.c.result, formatted_ms])
         subquery = (
             query.subquery()
         )
@@ -153,116 +307,84 @@ class AccessAuditRepository(BaseOperations[AccessAuditModel]):
         query = main_query.outerjoin(subquery, subquery.c.interval == func.strftime('%s', cte.c.date))
         results = (await session.execute(query)).all()
         return results
-        
+
     async def get_access_audits_counts_group_by_user_id(self, size):
+        source = self._build_counts_source({}, None, None)
         query = select(
-            AccessAuditModel.user_id.label("user_id"),
-            func.count().label('count')
+            source.c.user_id.label("user_id"),
+            func.sum(source.c.count).label('count')
         )
-        query = query.group_by(AccessAuditModel.user_id)
-        query = query.order_by(func.count().desc())
+        query = query.group_by(source.c.user_id)
+        query = query.order_by(func.sum(source.c.count).desc())
         query = query.limit(size)
         results = (await session.execute(query)).all()
         return results
 
     async def get_access_audits_counts_group_by_app_name(self, size):
+        source = self._build_counts_source({}, None, None)
         query = select(
-            AccessAuditModel.app_name.label("app_name"),
-            func.count().label('count')
+            source.c.app_name.label("app_name"),
+            func.sum(source.c.count).label('count')
         )
-        query = query.group_by(AccessAuditModel.app_name)
-        query = query.order_by(func.count().desc())
+        query = query.group_by(source.c.app_name)
+        query = query.order_by(func.sum(source.c.count).desc())
         query = query.limit(size)
         results = (await session.execute(query)).all()
         return results
 
     async def get_access_audits_counts_group_by_app_name_and_user_id(self, filters, min_value, max_value):
+        source = self._build_counts_source(filters, min_value, max_value)
         query = select(
-            AccessAuditModel.app_name.label("app_name"),
-            AccessAuditModel.user_id.label("user_id"),
-            func.count(AccessAuditModel.app_name).label('app_name_count'),
-            func.count(AccessAuditModel.user_id).label('user_id_count')
-        )
-        query = query.group_by(AccessAuditModel.app_name, AccessAuditModel.user_id)
-        query = self.create_filter(query, filters.model_dump())
-        query = query.filter(
-            and_(
-                AccessAuditModel.event_time >= min_value,
-                AccessAuditModel.event_time <= max_value
-            )
+            source.c.app_name.label("app_name"),
+            source.c.user_id.label("user_id"),
+            self._count_of(source, source.c.app_name).label('app_name_count'),
+            self._count_of(source, source.c.user_id).label('user_id_count')
         )
+        query = query.group_by(source.c.app_name, source.c.user_id)
         results = (await session.execute(query)).all()
         return results
 
     async def get_access_audits_top_users_count_group_by_id(self, filters, size, min_time, max_time):
+        source = self._build_counts_source(filters, min_time, max_time)
         query = select(
-            AccessAuditModel.user_id.label("user_id"),
-            func.count().label('count')
-        )
-        query = query.group_by(AccessAuditModel.user_id)
-        query = self.create_filter(query, filters.model_dump())
-        query = query.filter(
-            and_(
-                AccessAuditModel.event_time >= min_time,
-                AccessAuditModel.event_time <= max_time
-            )
+            source.c.user_id.label("user_id"),
+            func.sum(source.c.count).label('count')
         )
-        query = query.order_by(func.count().desc())
+        query = query.group_by(source.c.user_id)
+        query = query.order_by(func.sum(source.c.count).desc())
         query = query.limit(size)
         results = (await session.execute(query)).all()
         return results
 
     async def get_audits_counts_unique_user_id_count(self, filters, min_time, max_time):
+        source = self._build_counts_source(filters, min_time, max_time)
         query = select(
-            func.count(AccessAuditModel.user_id).label('count')
-        )
-        query = query.group_by(AccessAuditModel.user_id)
-        query = self.create_filter(query, filters.model_dump())
-        query = query.filter(
-            and_(
-                AccessAuditModel.event_time >= min_time,
-                AccessAuditModel.event_time <= max_time
-            )
+            self._count_of(source, source.c.user_id).label('count')
         )
+        query = query.group_by(source.c.user_id)
         results = (await session.execute(query)).scalar()
         return results
 
     async def get_audits_counts_unique_trait_count(self, filters, min_time, max_time):
-        json_each = func.json_each(AccessAuditModel.traits).table_valued('value')
+        source = self._build_counts_source(filters, min_time, max_time, with_traits=True)
         query = (
             select(
-                json_each.c.value.label('trait'),
-                func.count().label('count')
-            )
-            .select_from(AccessAuditModel)
-            .join(json_each, true())
-            .group_by(json_each.c.value)
-        )
-        query = self.create_filter(query, filters.model_dump())
-        query = query.filter(
-            and_(
-                AccessAuditModel.event_time >= min_time,
-                AccessAuditModel.event_time <= max_time
+                source.c.trait.label('trait'),
+                func.sum(source.c.count).label('count')
             )
+            .group_by(source.c.trait)
         )
         results = (await session.execute(query)).all()
         return results
 
     async def get_activity_trend_counts(self, filters, min_value, max_value, interval):
-        cte, formatted_ms = await self._build_datetime_series(min_value, max_value, interval)
+        source = self._build_counts_source(filters, min_value, max_value, use_day_buckets=interval != 'hour')
+        cte, formatted_ms = await self._build_datetime_series(min_value, max_value, interval, source.c.event_time)
         query = select(
-            func.count('*').label("count"),
-            formatted_ms.label("interval"),
-            AccessAuditModel.event_time.label("event_time")
+            func.sum(source.c.count).label("count"),
+            formatted_ms.label("interval")
         )
         query = query.group_by(*[formatted_ms])
-        query = self.create_filter(query, filters)
-        query = query.filter(
-            and_(
-                AccessAuditModel.event_time >= min_value,
-                AccessAuditModel.event_time <= max_value
-            )
-        )
         subquery = (
             query.subquery()
         )
@@ -271,4 +393,4 @@ class AccessAuditRepository(BaseOperations[AccessAuditModel]):
         )
         query = main_query.outerjoin(subquery, subquery.c.interval == func.strftime('%s', cte.c.date))
         results = (await session.execute(query)).all()
-        return results
\ No newline at end of file
+        return results
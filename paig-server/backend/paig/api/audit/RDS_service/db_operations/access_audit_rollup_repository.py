@@ -0,0 +1,182 @@
+import math
+from collections import Counter
+
+from sqlalchemy import and_, or_, not_, select, func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.sql import true
+
+from api.audit.RDS_service.db_models.access_audit_model import AccessAuditRollupModel, AccessAuditTraitRollupModel
+from api.audit.RDS_service.db_operations.access_audit_side_tables import get_audit_traits
+from core.db_session import session
+from core.factory.database_initiator import BaseOperations
+
+HOUR_MS = 3600000
+DAY_MS = 86400000
+ROLLUP_GRANULARITIES = {"hour": HOUR_MS, "day": DAY_MS}
+ROLLUP_DIMENSIONS = ("app_name", "user_id", "result", "request_type")
+# The missing dimensions are stored as an empty string, as NULL values never match the unique constraints
+MISSING_DIMENSION = ""
+
+
+def get_rollup_ranges(min_value, max_value, use_day_buckets=True):
+    """
+    Get the parts of the time range [min_value, max_value] of a count query which are covered by whole rollup
+    buckets. An open end of the time range is None.
+
+    Args:
+        min_value (float): The start of the time range in milliseconds, inclusive.
+        max_value (float): The end of the time range in milliseconds, inclusive.
+        use_day_buckets (bool): Whether the day buckets can be used, False when the counts are needed per hour.
+
+    Returns:
+        tuple: The [start, end) range covered by the rollup buckets, and the [start, end) range within it covered by
+        the day buckets. None when the range is not covered by any bucket.
+    """
+    hour_start = None if min_value is None else math.ceil(min_value / HOUR_MS) * HOUR_MS
+    hour_end = None if max_value is None else math.floor((max_value + 1) / HOUR_MS) * HOUR_MS
+    if hour_start is not None and hour_end is not None and hour_start >= hour_end:
+        return None, None
+    day_range = None
+    if use_day_buckets:
+        day_start = None if hour_start is None else math.ceil(hour_start / DAY_MS) * DAY_MS
+        day_end = None if hour_end is None else math.floor(hour_end / DAY_MS) * DAY_MS
+        if day_start is None or day_end is None or day_start < day_end:
+            day_range = (day_start, day_end)
+    return (hour_start, hour_end), day_range
+
+
+def in_range(column, time_range):
+    start, end = time_range
+    conditions = []
+    if start is not None:
+        conditions.append(column >= start)
+    if end is not None:
+        conditions.append(column < end)
+    return and_(true(), *conditions)
+
+
+def get_rollup_counts(access_audits):
+    """
+    Count the access audits per rollup bucket and dimensions.
+
+    Args:
+        access_audits (List[dict]): The access audit records.
+
+    Returns:
+        tuple: The counts by rollup key, and the counts by trait rollup key.
+    """
+    counts = Counter()
+    trait_counts = Counter()
+    for access_audit in access_audits:
+        event_time = access_audit.get("event_time")
+        if event_time is None:
+            # The audits without event time are only counted by the queries without time range, from the audits
+            continue
+        dimensions = tuple(MISSING_DIMENSION if access_audit.get(dimension) is None else access_audit.get(dimension)
+                           for dimension in ROLLUP_DIMENSIONS)
+        for granularity, bucket_size in ROLLUP_GRANULARITIES.items():
+            key = (granularity, int(event_time // bucket_size * bucket_size)) + dimensions
+            counts[key] += 1
+            for trait in get_audit_traits(access_audit):
+                trait_counts[key + (trait,)] += 1
+    return counts, trait_counts
+
+
+def get_upsert_statement(model_class, dialect_name):
+    """
+    Get the statement adding the counts of a rollup table to the existing counts of their buckets. The missing
+    dimensions are written as MISSING_DIMENSION, so the counts of the audits without them are added up too.
+
+    Args:
+        model_class: The model of the rollup table.
+        dialect_name (str): The name of the database dialect the statement is executed on.
+    """
+    table = model_class.__table__
+    if dialect_name in ("mysql", "mariadb"):
+        statement = mysql_insert(table)
+        return statement.on_duplicate_key_update(count=table.c.count + statement.inserted.count)
+    key_columns = [column.name for column in table.columns if column.name not in ("id", "count")]
+    statement = postgresql_insert(table) if dialect_name == "postgresql" else sqlite_insert(table)
+    return statement.on_conflict_do_update(index_elements=key_columns,
+                                           set_={"count": table.c.count + statement.excluded.count})
+
+
+def get_rollup_statements(access_audits, dialect_name):
+    """
+    Get the statements adding the given access audits to the rollup tables.
+
+    Args:
+        access_audits (List[dict]): The access audit records.
+        dialect_name (str): The name of the database dialect the statements are executed on.
+
+    Returns:
+        List[tuple]: The statements and their parameters.
+    """
+    counts, trait_counts = get_rollup_counts(access_audits)
+    statements = []
+    for model_class, model_counts, columns in (
+            (AccessAuditRollupModel, counts, ("granularity", "bucket_time") + ROLLUP_DIMENSIONS),
+            (AccessAuditTraitRollupModel, trait_counts, ("granularity", "bucket_time") + ROLLUP_DIMENSIONS + ("trait",))):
+        if model_counts:
+            rows = [dict(zip(columns, key), count=count) for key, count in model_counts.items()]
+            statements.append((get_upsert_statement(model_class, dialect_name), rows))
+    return statements
+
+
+class AccessAuditRollupRepository(BaseOperations[AccessAuditRollupModel]):
+    """
+    Maintains the access audit counts per hour and per day in the rollup tables, and reads them for the dashboards.
+    """
+
+    def __init__(self):
+        super().__init__(AccessAuditRollupModel)
+        self.trait_rollup_operations = BaseOperations(AccessAuditTraitRollupModel)
+
+    async def add_access_audits(self, access_audits):
+        """
+        Add the given access audits to the rollup tables, in the transaction of the current session.
+
+        Args:
+            access_audits (List[dict]): The access audit records.
+        """
+        for statement, rows in get_rollup_statements(access_audits, session.get_bind().dialect.name):
+            await session.execute(statement, rows)
+
+    def select_counts(self, filters: dict, covered_range, day_range, with_traits=False):
+        """
+        Select the counts of the rollup buckets within the given ranges, with the same columns as the access audits
+        they replace.
+
+        Args:
+            filters (dict): The filters of the access audits, on the rollup dimensions only.
+            covered_range (tuple): The [start, end) range to read from the rollup tables.
+            day_range (tuple): The [start, end) range within it to read from the day buckets, None to only read the
+            hour buckets.
+            with_traits (bool): Whether to count the audits per trait.
+
+        Returns:
+            Select: The query of the bucket time, the dimensions and the count of the buckets.
+        """
+        operations = self.trait_rollup_operations if with_traits else self
+        model_class = operations.model_class
+        columns = [model_class.bucket_time.label("event_time")]
+        columns.extend(func.nullif(getattr(model_class, dimension), MISSING_DIMENSION).label(dimension)
+                       for dimension in ROLLUP_DIMENSIONS)
+        if with_traits:
+            columns.append(model_class.trait.label("trait"))
+        columns.append(model_class.count.label("count"))
+
+        bucket_condition = and_(model_class.granularity == "hour", in_range(model_class.bucket_time, covered_range))
+        if day_range is not None:
+            bucket_condition = or_(
+                and_(bucket_condition, not_(in_range(model_class.bucket_time, day_range))),
+                and_(model_class.granularity == "day", in_range(model_class.bucket_time, day_range))
+            )
+        query = select(*columns).where(bucket_condition)
+        for dimension in ROLLUP_DIMENSIONS:
+            if filters.get(dimension) is not None:
+                # Like a NULL value of the access audits, a missing dimension matches no filter
+                query = query.where(getattr(model_class, dimension) != MISSING_DIMENSION)
+        return operations.create_filter(query, filters)
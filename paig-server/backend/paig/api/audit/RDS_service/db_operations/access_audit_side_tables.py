@@ -0,0 +1,59 @@
+from sqlalchemy import insert
+
+from api.audit.RDS_service.db_models.access_audit_model import AccessAuditTraitModel, AccessAuditPolicyModel
+
+
+def get_audit_traits(access_audit: dict) -> dict:
+    """
+    Get the distinct traits of an access audit, with whether each trait was masked.
+
+    Args:
+        access_audit (dict): The access audit record.
+
+    Returns:
+        dict: Whether the trait was masked, by trait.
+    """
+    masked_traits = access_audit.get("masked_traits") or {}
+    return {trait: trait in masked_traits for trait in access_audit.get("traits") or [] if trait is not None}
+
+
+def get_audit_policy_ids(access_audit: dict) -> list:
+    """
+    Get the distinct PAIG policy IDs of an access audit.
+
+    Args:
+        access_audit (dict): The access audit record.
+
+    Returns:
+        list: The policy IDs, the values which are not IDs are skipped.
+    """
+    policy_ids = dict.fromkeys(int(policy_id) for policy_id in access_audit.get("paig_policy_ids") or []
+                               if str(policy_id).isdigit())
+    return list(policy_ids)
+
+
+def get_side_table_statements(access_audits: list, audit_ids: list) -> list:
+    """
+    Get the statements inserting the traits and the policy IDs of the access audits into their side tables.
+
+    Args:
+        access_audits (List[dict]): The access audit records.
+        audit_ids (list): The IDs of the inserted access audits, in the order of the records.
+
+    Returns:
+        List[tuple]: The statements and their parameters.
+    """
+    trait_rows = []
+    policy_rows = []
+    for audit_id, access_audit in zip(audit_ids, access_audits):
+        for trait, masked in get_audit_traits(access_audit).items():
+            trait_rows.append({"audit_id": audit_id, "trait": trait, "masked": masked,
+                               "event_time": access_audit.get("event_time")})
+        for policy_id in get_audit_policy_ids(access_audit):
+            policy_rows.append({"audit_id": audit_id, "policy_id": policy_id})
+    statements = []
+    if trait_rows:
+        statements.append((insert(AccessAuditTraitModel.__table__), trait_rows))
+    if policy_rows:
+        statements.append((insert(AccessAuditPolicyModel.__table__), policy_rows))
+    return statements
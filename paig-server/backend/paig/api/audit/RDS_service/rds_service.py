@@ -2,7 +2,7 @@ from api.audit.RDS_service.db_operations.access_audit_repository import AccessAu
 from api.audit.RDS_service.db_operations.admin_audit_repository import AdminAuditRepository
 from api.audit.api_schemas.admin_audit_schema import BaseAdminAuditView
 from core.exceptions import NotFoundException, BadRequestException
-from core.controllers.paginated_response import create_pageable_response
+from core.controllers.paginated_response import create_cursor_pageable_response, COUNT_MODE_EXACT, COUNT_MODE_CAPPED
 from api.audit.factory.service_interface import DataServiceInterface
 from api.audit.api_schemas.access_audit_schema import BaseAccessAuditView
 from core.utils import SingletonDepends
@@ -16,10 +16,14 @@ class RdsService(DataServiceInterface):
     async def create_access_audit(self, access_audit_params: BaseAccessAuditView):
         return await self.access_audit_repository.create_access_audit(access_audit_params)
 
+    async def create_access_audits(self, access_audit_params_list):
+        return await self.access_audit_repository.create_access_audits(access_audit_params_list)
+
     async def create_admin_audit(self, admin_audit_params: BaseAdminAuditView):
         return await self.admin_audit_repository.create_admin_audit(admin_audit_params)
 
-    async def get_access_audits(self, include_filters, exclude_filters, page, size, sort, min_time, max_time):
+    async def get_access_audits(self, include_filters, exclude_filters, page, size, sort, min_time, max_time,
+                                cursor=None, count_mode=COUNT_MODE_EXACT):
         if include_filters.user_id:
             include_filters.user_id = include_filters.user_id.strip("*")
         if include_filters.app_name:
@@ -28,11 +32,16 @@ class RdsService(DataServiceInterface):
             exclude_filters.user_id = exclude_filters.user_id.strip("*")
         if exclude_filters.app_name:
             exclude_filters.app_name = exclude_filters.app_name.strip("*")
-        access_audits, total_count = await self.access_audit_repository.get_access_audits_with_filters(include_filters, exclude_filters, page, size, sort, min_time, max_time)
+        access_audits, total_count, has_more, next_cursor = await self.access_audit_repository.get_access_audits_with_filters(
+            include_filters, exclude_filters, page, size, sort, min_time, max_time, cursor, count_mode)
         if access_audits is None:
             raise NotFoundException("No access audits found")
         access_audit_list = [BaseAccessAuditView.model_validate(access_audit) for access_audit in access_audits]
-        return create_pageable_response(access_audit_list, total_count, page, size, sort)
+        total_count_exact = True
+        if count_mode == COUNT_MODE_CAPPED and total_count > self.access_audit_repository.count_cap:
+            total_count, total_count_exact = self.access_audit_repository.count_cap, False
+        return create_cursor_pageable_response(access_audit_list, total_count, page, size, sort, has_more, next_cursor,
+                                               total_count_exact)
 
     async def get_usage_counts(self, filters, min_value, max_value):
         if filters.user_id or filters.app_name:
@@ -14,6 +14,17 @@ class DataServiceInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    async def create_access_audits(self, access_audit_params_list):
+        """
+        Create access audits in bulk
+        Attributes:
+            access_audit_params_list list (BaseAccessAuditView): Access audit params dicts
+        Returns:
+            int: Number of created access audits
+        """
+        pass
+
     @abstractmethod
     async def create_admin_audit(self, admin_audit_params):
         """
@@ -26,7 +37,8 @@ class DataServiceInterface(ABC):
         pass
 
     @abstractmethod
-    async def get_access_audits(self, include_filters, exclude_filters, page, size, sort, min_time, max_time):
+    async def get_access_audits(self, include_filters, exclude_filters, page, size, sort, min_time, max_time,
+                                cursor=None, count_mode="exact"):
         """
         Get access audits with filters
         Attributes:
@@ -37,6 +49,8 @@ class DataServiceInterface(ABC):
             sort (str): Sort options
             min_time (int): from epoch time
             max_time (int): to epoch time
+            cursor (str): The nextCursor of the previous page, to get the page after it instead of the page number
+            count_mode (str): exact, capped to count up to the count cap, or none to skip the count
         Returns:
             List[BaseAccessAuditView]: List of access audits in pageable format
         """
@@ -0,0 +1,184 @@
+import asyncio
+import json
+import logging
+from typing import List
+
+from opensearchpy.exceptions import ConnectionError, TransportError
+
+logger = logging.getLogger(__name__)
+
+# The bulk item statuses worth retrying, the others are failures of the document itself
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+
+class BulkAction:
+    """
+    A document waiting in the bulk indexing buffer.
+
+    Attributes:
+        index_name (str): The index of the document.
+        source (str): The serialized document.
+        future (asyncio.Future): Resolved with the bulk item result once the document is indexed.
+    """
+
+    def __init__(self, index_name: str, document: dict, future: asyncio.Future):
+        self.index_name = index_name
+        self.source = json.dumps(document)
+        self.future = future
+
+    def to_bulk_lines(self) -> str:
+        return json.dumps({"index": {"_index": self.index_name}}) + "\n" + self.source + "\n"
+
+
+class OpenSearchBulkIndexer:
+    """
+    Buffers the audit documents and indexes them with the _bulk API, instead of one index request per document.
+
+    The buffer is flushed once it holds max_actions documents or max_bytes of documents, or linger_ms after the
+    first buffered document. The callers wait for their documents to be indexed, so a failure is reported to the
+    caller of the failed document only. The items rejected with a retryable status are retried up to max_retries
+    times with an exponential backoff.
+
+    The indexer uses an async client, so it must only be used from the event loop the client was created in.
+
+    Attributes:
+        client (AsyncOpenSearch): The async OpenSearch client.
+        refresh (str): The refresh mode of the bulk requests, "false" to rely on the refresh interval of the index,
+        "wait_for" to return once the documents are searchable.
+        buffer (list): The buffered bulk actions.
+        buffer_bytes (int): The size of the buffered documents.
+    """
+
+    def __init__(self, client, max_actions: int = 500, max_bytes: int = 5242880, linger_ms: int = 50,
+                 max_retries: int = 3, retry_backoff_ms: int = 100, refresh: str = "false"):
+        self.client = client
+        self.max_actions = max(max_actions, 1)
+        self.max_bytes = max_bytes
+        self.linger_sec = max(linger_ms, 0) / 1000
+        self.max_retries = max_retries
+        self.retry_backoff_sec = max(retry_backoff_ms, 0) / 1000
+        self.refresh = refresh
+        self.buffer = []
+        self.buffer_bytes = 0
+        self.linger_task = None
+        # The flushes in progress, referenced until they are done
+        self.flush_tasks = set()
+
+        # Metrics
+        self.bulk_request_count = 0
+        self.indexed_count = 0
+        self.retried_count = 0
+        self.failed_count = 0
+
+    async def index(self, index_name: str, document: dict) -> dict:
+        """
+        Index a document, waiting for the bulk request it is part of.
+
+        Args:
+            index_name (str): The index of the document.
+            document (dict): The document.
+
+        Returns:
+            dict: The bulk item result of the document.
+
+        Raises:
+            TransportError: If the document could not be indexed.
+        """
+        return await self.add(index_name, document)
+
+    async def index_many(self, index_name: str, documents: List[dict]) -> int:
+        """
+        Index the documents, waiting for the bulk requests they are part of.
+
+        Args:
+            index_name (str): The index of the documents.
+            documents (List[dict]): The documents.
+
+        Returns:
+            int: The number of indexed documents.
+
+        Raises:
+            TransportError: If any of the documents could not be indexed.
+        """
+        results = await asyncio.gather(*[self.add(index_name, document) for document in documents],
+                                       return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            raise errors[0]
+        return len(documents)
+
+    def add(self, index_name: str, document: dict) -> asyncio.Future:
+        action = BulkAction(index_name, document, asyncio.get_running_loop().create_future())
+        self.buffer.append(action)
+        self.buffer_bytes += len(action.source)
+        if len(self.buffer) >= self.max_actions or self.buffer_bytes >= self.max_bytes:
+            flush_task = asyncio.ensure_future(self.flush())
+            self.flush_tasks.add(flush_task)
+            flush_task.add_done_callback(self.flush_tasks.discard)
+        elif self.linger_task is None:
+            self.linger_task = asyncio.ensure_future(self.flush_after_linger())
+        return action.future
+
+    async def flush_after_linger(self):
+        await asyncio.sleep(self.linger_sec)
+        self.linger_task = None
+        await self.flush()
+
+    async def flush(self):
+        """
+        Index the buffered documents with a bulk request.
+        """
+        actions, self.buffer, self.buffer_bytes = self.buffer, [], 0
+        if self.linger_task is not None and self.linger_task is not asyncio.current_task():
+            self.linger_task.cancel()
+            self.linger_task = None
+        if actions:
+            await self.send(actions)
+
+    async def send(self, actions: List[BulkAction]):
+        attempt = 0
+        while actions:
+            retry_actions = []
+            try:
+                self.bulk_request_count += 1
+                response = await self.client.bulk(body="".join(action.to_bulk_lines() for action in actions),
+                                                  refresh=self.refresh)
+            except Exception as e:
+                logger.error(f"OpenSearch bulk request of {len(actions)} documents failed: {e}")
+                if isinstance(e, ConnectionError) or not isinstance(e, TransportError) \
+                        or e.status_code in RETRYABLE_STATUSES:
+                    retry_actions, error = actions, e
+                else:
+                    self.fail(actions, e)
+            else:
+                error = None
+                items = response.get("items", [])
+                if len(items) < len(actions):
+                    self.fail(actions[len(items):], TransportError(500, "bulk_item_missing", response))
+                for action, item in zip(actions, items):
+                    result = next(iter(item.values()), {})
+                    if not result.get("error"):
+                        self.indexed_count += 1
+                        if not action.future.done():
+                            action.future.set_result(result)
+                    elif result.get("status") in RETRYABLE_STATUSES:
+                        retry_actions.append(action)
+                        error = TransportError(result.get("status"), "bulk_item_rejected", result.get("error"))
+                    else:
+                        self.fail([action], TransportError(result.get("status", 500), "bulk_item_failed",
+                                                           result.get("error")))
+
+            if retry_actions and attempt < self.max_retries:
+                attempt += 1
+                self.retried_count += len(retry_actions)
+                await asyncio.sleep(self.retry_backoff_sec * (2 ** (attempt - 1)))
+            elif retry_actions:
+                self.fail(retry_actions, error)
+                retry_actions = []
+            actions = retry_actions
+
+    def fail(self, actions: List[BulkAction], error: Exception):
+        self.failed_count += len(actions)
+        for action in actions:
+            if not action.future.done():
+                action.future.set_exception(error)
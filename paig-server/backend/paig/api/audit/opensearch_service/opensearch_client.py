@@ -1,9 +1,12 @@
+import asyncio
 import json
 import os
 import logging
 import sys
+import weakref
 
-from opensearchpy import OpenSearch, RequestsHttpConnection, exceptions
+from opensearchpy import AsyncOpenSearch, OpenSearch, RequestsHttpConnection, exceptions
+from api.audit.opensearch_service.opensearch_bulk_indexer import OpenSearchBulkIndexer
 from core import constants
 from core.utils import format_to_root_path
 from core.config import load_config_file
@@ -34,19 +37,50 @@ def get_opensearch_client(host: str, auth: tuple):
     )
 
 
+def get_async_opensearch_client(host: str, auth: tuple):
+    return AsyncOpenSearch(
+        hosts=host,
+        http_auth=auth,
+        http_compress=True,
+        use_ssl=True,
+        verify_certs=False,
+        ssl_assert_hostname=False,
+        ssl_show_warn=False,
+        pool_maxsize=20
+    )
+
+
+def parse_refresh_interval_ms(refresh_interval) -> int:
+    """
+    Parse an index refresh interval like "1s" or "500ms" to milliseconds, -1 when the refresh is disabled.
+    """
+    refresh_interval = str(refresh_interval).strip().lower()
+    if refresh_interval == "-1":
+        return -1
+    for suffix, multiplier in (("ms", 1), ("s", 1000), ("m", 60000), ("h", 3600000)):
+        if refresh_interval.endswith(suffix):
+            return int(float(refresh_interval[:-len(suffix)]) * multiplier)
+    return int(refresh_interval)
+
+
 class OpenSearchClient:
     def __init__(self):
         self.opensearch_conf = Config['opensearch']
         host = self.opensearch_conf.get('endpoint')
         username = self.opensearch_conf.get('username')
         password = self.opensearch_conf.get('secret')
-        auth = (username, password)
-        self.opensearch_client = get_opensearch_client(host, auth)
+        self.auth = (username, password)
+        self.host = host
+        self.opensearch_client = get_opensearch_client(host, self.auth)
+        # The async clients and the bulk indexers are bound to the event loop they are used in
+        self.async_clients = weakref.WeakKeyDictionary()
+        self.bulk_indexers = weakref.WeakKeyDictionary()
         self._initialize()
 
     def _initialize(self):
         self._init_admin_audit_index()
         self._init_access_audit_index()
+        self.refresh_interval_ms = self._get_refresh_interval_ms(self.access_audit_index)
 
     def _init_access_audit_index(self):
         self.access_audit_index = self.opensearch_conf.get('access_audit_index', f"{OPEN_SEARCH_INDEX_PAIG_SHIELD_AUDITS}_{constants.DEFAULT_TENANT_ID}")
@@ -74,6 +108,53 @@ class OpenSearchClient:
     def get_client(self):
         return self.opensearch_client
 
+    def get_async_client(self):
+        """
+        Get the async client of the running event loop, creating it on first use.
+        """
+        loop = asyncio.get_running_loop()
+        client = self.async_clients.get(loop)
+        if client is None:
+            client = self.async_clients[loop] = get_async_opensearch_client(self.host, self.auth)
+        return client
+
+    def get_bulk_indexer(self):
+        """
+        Get the bulk indexer of the running event loop, creating it on first use.
+
+        With bulk_refresh "false" the documents become searchable with the next refresh of the index, so the
+        documents are not buffered longer than the refresh interval of the index. With bulk_refresh "wait_for" the
+        bulk requests return once the documents are searchable.
+        """
+        loop = asyncio.get_running_loop()
+        indexer = self.bulk_indexers.get(loop)
+        if indexer is None:
+            linger_ms = int(self.opensearch_conf.get('bulk_linger_ms', 50))
+            if self.refresh_interval_ms > 0:
+                linger_ms = min(linger_ms, self.refresh_interval_ms)
+            indexer = self.bulk_indexers[loop] = OpenSearchBulkIndexer(
+                self.get_async_client(),
+                max_actions=int(self.opensearch_conf.get('bulk_max_actions', 500)),
+                max_bytes=int(self.opensearch_conf.get('bulk_max_bytes', 5242880)),
+                linger_ms=linger_ms,
+                max_retries=int(self.opensearch_conf.get('bulk_max_retries', 3)),
+                retry_backoff_ms=int(self.opensearch_conf.get('bulk_retry_backoff_ms', 100)),
+                refresh=str(self.opensearch_conf.get('bulk_refresh', 'false')).lower()
+            )
+        return indexer
+
+    def _get_refresh_interval_ms(self, index_name):
+        try:
+            settings = self.opensearch_client.indices.get_settings(index=index_name, name="index.refresh_interval",
+                                                                   include_defaults=True)
+            index_settings = settings[index_name]
+            refresh_interval = index_settings.get('settings', {}).get('index', {}).get('refresh_interval') or \
+                index_settings.get('defaults', {}).get('index', {}).get('refresh_interval', '1s')
+            return parse_refresh_interval_ms(refresh_interval)
+        except Exception as e:
+            logger.warning(f"Could not get the refresh interval of index {index_name}, assuming 1s: {e}")
+            return 1000
+
     def get_index_name(self, is_admin_audits):
         if is_admin_audits:
             return self.admin_audit_index
@@ -4,12 +4,16 @@ import logging
 
 from api.audit.opensearch_service.opensearch_client import OpenSearchClient
 from api.audit.factory.service_interface import DataServiceInterface
-from core.controllers.paginated_response import create_pageable_response
+from core.config import load_config_file
+from core.controllers.paginated_response import create_cursor_pageable_response, encode_cursor, decode_cursor, \
+    COUNT_MODE_EXACT, COUNT_MODE_CAPPED, COUNT_MODE_NONE
+from core.exceptions import BadRequestException
 from api.audit.opensearch_service.opensearch_util import build_query, convert_to_sorted_dict, \
     build_search_request_with_aggregations, extract_search_response_aggregations
 from core.utils import SingletonDepends
 
 logger = logging.getLogger(__name__)
+count_cap = load_config_file().get("access_audit_count_cap", 10000)
 
 
 class OpenSearchService(DataServiceInterface):
@@ -21,6 +25,21 @@ class OpenSearchService(DataServiceInterface):
             access_audit_params = access_audit_params.dict(by_alias=True)
         await self._insert_audit(access_audit_params, is_admin_audits=None)
 
+    async def create_access_audits(self, access_audit_params_list):
+        index_name = self.opensearch_client.get_index_name(None)
+        documents = []
+        for access_audit_params in access_audit_params_list:
+            if not isinstance(access_audit_params, dict):
+                access_audit_params = access_audit_params.dict(by_alias=True)
+            documents.append(access_audit_params)
+        if not documents:
+            return 0
+        try:
+            return await self.opensearch_client.get_bulk_indexer().index_many(index_name, documents)
+        except OpenSearchException as e:
+            logger.error(f'OpenSearch bulk insert failed: {str(e)}')
+            raise HTTPException(status_code=500, detail="OpenSearch bulk insert failed")
+
     async def create_admin_audit(self, admin_audit_params):
         if not isinstance(admin_audit_params, dict):
             admin_audit_params = admin_audit_params.dict(by_alias=True)
@@ -29,7 +48,7 @@ class OpenSearchService(DataServiceInterface):
     async def _insert_audit(self, audit_params, is_admin_audits):
         index_name = self.opensearch_client.get_index_name(is_admin_audits)
         try:
-            response = self.opensearch_client.get_client().index(index=index_name, body=audit_params)
+            await self.opensearch_client.get_bulk_indexer().index(index_name, audit_params)
         except OpenSearchException as e:
             logger.error(f'OpenSearch exception occurred: {str(e)}')
             raise HTTPException(status_code=500, detail="OpenSearch exception occurred")
@@ -37,27 +56,51 @@ class OpenSearchService(DataServiceInterface):
             logger.error(f'Exception occurred: {str(e)}')
             raise HTTPException(status_code=500, detail=str(e))
 
-    async def get_access_audits(self, include_query, exclude_query, page, size, sort, from_time, to_time):
-        return self.get_audits(include_query, exclude_query, page, size, sort, from_time, to_time, None)
+    async def get_access_audits(self, include_query, exclude_query, page, size, sort, from_time, to_time,
+                                cursor=None, count_mode=COUNT_MODE_EXACT):
+        return await self.get_audits(include_query, exclude_query, page, size, sort, from_time, to_time, None,
+                                     cursor, count_mode)
 
-    def get_audits(self, include_query, exclude_query, page, size, sort, from_time, to_time,
-                         is_admin_audits):
+    async def get_audits(self, include_query, exclude_query, page, size, sort, from_time, to_time,
+                         is_admin_audits, cursor=None, count_mode=COUNT_MODE_EXACT):
+        """
+        Get a page of the audits, by page number or with search_after the sort values of the previous page.
 
+        The sort is completed with the event ID, or the log ID of the admin audits, so the sort values of the last audit of a page are the cursor of
+        the next page. One more audit than the page size is fetched to know whether there is a next page.
+        """
         index_name = self.opensearch_client.get_index_name(is_admin_audits)
-        offset = page * size
 
         query_body = {
             "query": build_query(include_query, exclude_query, from_time, to_time, is_admin_audits),
-            "from": offset,
-            "size": size,
+            "size": size + 1,
             "sort": convert_to_sorted_dict(sort)
         }
+        tiebreaker_field = "logId" if is_admin_audits else "eventId"
+        if query_body["sort"] and tiebreaker_field not in [next(iter(sort_field)) for sort_field in query_body["sort"]]:
+            order = next(iter(query_body["sort"][-1].values()))["order"]
+            query_body["sort"].append({tiebreaker_field: {"order": order, "unmapped_type": "keyword"}})
+        if cursor:
+            if not query_body["sort"]:
+                raise HTTPException(status_code=400, detail="Cursor pagination requires the audits to be sorted")
+            try:
+                query_body["search_after"] = decode_cursor(cursor)
+            except BadRequestException:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        else:
+            query_body["from"] = page * size
+        if count_mode == COUNT_MODE_NONE:
+            query_body["track_total_hits"] = False
+        elif count_mode == COUNT_MODE_CAPPED:
+            query_body["track_total_hits"] = count_cap
+        else:
+            query_body["track_total_hits"] = True
 
         try:
-            response = self.opensearch_client.get_client().search(body=query_body, index=index_name)
+            response = await self.opensearch_client.get_async_client().search(body=query_body, index=index_name)
         except NotFoundError:
             logger.error(f'Audit index does not exist: {index_name}')
-            return create_pageable_response([], 0, 0, size, [])
+            return create_cursor_pageable_response([], 0, 0, size, [], False)
         except OpenSearchException as e:
             logger.error(f'OpenSearch exception occurred while getting audits: {str(e)}')
             raise HTTPException(status_code=500, detail="OpenSearch exception occurred")
@@ -66,48 +109,55 @@ class OpenSearchService(DataServiceInterface):
             raise HTTPException(status_code=500, detail=str(e))
 
         hits = response['hits']['hits']
-        total = response['hits']['total']['value']
+        has_more = len(hits) > size
+        hits = hits[:size]
+        total = None
+        total_exact = True
+        if 'total' in response['hits']:
+            total = response['hits']['total']['value']
+            total_exact = response['hits']['total'].get('relation', 'eq') == 'eq'
+        next_cursor = encode_cursor(hits[-1]['sort']) if has_more and 'sort' in hits[-1] else None
         audits = [hit['_source'] for hit in hits]
 
-        return create_pageable_response(audits, total, page, size, [])
+        return create_cursor_pageable_response(audits, total, page, size, sort, has_more, next_cursor, total_exact)
 
     async def get_usage_counts(self, include_query, from_time, to_time):
-        return self.get_counts("result", include_query, from_time, to_time, None, None, None, False)
+        return await self.get_counts("result", include_query, from_time, to_time, None, None, None, False)
 
     async def get_trait_counts_by_application(self, include_query, from_time, to_time):
-        return self.get_counts("traits,applicationName", include_query, from_time, to_time, None, None, None, False)
+        return await self.get_counts("traits,applicationName", include_query, from_time, to_time, None, None, None, False)
 
     async def get_access_data_counts(self, include_query, from_time, to_time, interval):
-        return self.get_counts("result", include_query, from_time, to_time, interval, None, None, False)
+        return await self.get_counts("result", include_query, from_time, to_time, interval, None, None, False)
 
     async def get_user_id_counts(self, size):
-        return self.get_counts("userId", None, None, None, None, size, None, False)
+        return await self.get_counts("userId", None, None, None, None, size, None, False)
 
     async def get_app_name_counts(self, size):
-        return self.get_counts("applicationName", None, None, None, None, size, None, False)
+        return await self.get_counts("applicationName", None, None, None, None, size, None, False)
 
     async def get_app_name_by_user_id(self, include_query, from_time, to_time):
-        return self.get_counts("applicationName,userId", include_query, from_time, to_time, None, None, True, False)
+        return await self.get_counts("applicationName,userId", include_query, from_time, to_time, None, None, True, False)
 
     async def get_top_users_count(self, include_query, size, from_time, to_time):
-        return self.get_counts("userId", include_query, from_time, to_time, None, size, None, False)
+        return await self.get_counts("userId", include_query, from_time, to_time, None, size, None, False)
 
     async def get_unique_user_id_count(self, include_query, from_time, to_time):
-        return self.get_counts("userId", include_query, from_time, to_time, None, None, True, False)
+        return await self.get_counts("userId", include_query, from_time, to_time, None, None, True, False)
 
     async def get_unique_trait_count(self, include_query, from_time, to_time):
-        return self.get_counts("traits", include_query, from_time, to_time, None, None, None, False)
+        return await self.get_counts("traits", include_query, from_time, to_time, None, None, None, False)
 
     async def get_activity_trend_counts(self, include_query, from_time, to_time, interval):
-        return self.get_counts("tenantId", include_query, from_time, to_time, interval, None, None, False)
+        return await self.get_counts("tenantId", include_query, from_time, to_time, interval, None, None, False)
 
     async def get_admin_audits(self, include_query, page, size, sort, from_time, to_time):
-        return self.get_audits(include_query, None, page, size, sort, from_time, to_time, True)
+        return await self.get_audits(include_query, None, page, size, sort, from_time, to_time, True)
 
     async def get_admin_audits_count(self, include_query, size, from_time, to_time, group_by, cardinality, interval):
-        return self.get_counts(group_by, include_query, from_time, to_time, interval, size, cardinality, True)
+        return await self.get_counts(group_by, include_query, from_time, to_time, interval, size, cardinality, True)
 
-    def get_counts(self, group_by, include_query, from_time, to_time, interval, size, cardinality,
+    async def get_counts(self, group_by, include_query, from_time, to_time, interval, size, cardinality,
                    is_admin_audits):
         index_name = self.opensearch_client.get_index_name(is_admin_audits)
 
@@ -120,7 +170,7 @@ class OpenSearchService(DataServiceInterface):
 
         aggregations = {}
         try:
-            response = self.opensearch_client.get_client().search(body=query_body, index=index_name)
+            response = await self.opensearch_client.get_async_client().search(body=query_body, index=index_name)
             aggregations = response.get('aggregations', {})
         except NotFoundError:
             logger.error(f'Index does not exist: {index_name}')
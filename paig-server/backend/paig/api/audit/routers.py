@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Request, Response, Depends, Query
 from api.audit.api_schemas.access_audit_schema import IncludeQueryParams, include_query_params, exclude_query_params, QueryParamsBase
 from core.security.authentication import get_auth_user
-from typing import List, Optional
+from typing import List, Optional, Literal
 from api.audit.controllers.data_store_controller import DataStoreController
 from core.utils import SingletonDepends
 
@@ -21,10 +21,12 @@ async def get_access_audits(
         toTime: Optional[int] = Query(None, description="The to time"),
         includeQuery: IncludeQueryParams = Depends(include_query_params),
         excludeQuery: QueryParamsBase = Depends(exclude_query_params),
+        cursor: Optional[str] = Query(None, description="The nextCursor of the previous page, instead of the page number"),
+        countMode: Literal["exact", "capped", "none"] = Query("exact", description="The count of the total elements"),
         data_store_controller: DataStoreController = data_store_controller_instance
 ):
     return await data_store_controller.get_service().get_access_audits(includeQuery, excludeQuery, page, size, sort,
-                                                                       fromTime, toTime)
+                                                                       fromTime, toTime, cursor, countMode)
 
 
 @data_service_router.get("/api/shield_audits/usage_counts")
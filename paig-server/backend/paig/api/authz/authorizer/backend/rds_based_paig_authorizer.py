@@ -1,8 +1,9 @@
-from typing import List
+from typing import Awaitable, List
+from uuid import uuid4
 
 from paig_authorizer_core.models.data_models import *
 
-from api.authz.utils.config import get_rds_authorizer_cache_expiry_time
+from api.authz.utils.config import get_rds_authorizer_cache_expiry_time, get_rds_authorizer_cache_max_size
 from api.governance.api_schemas.ai_app import AIApplicationView
 from api.governance.api_schemas.ai_app_config import AIApplicationConfigView
 from api.governance.api_schemas.ai_app_policy import AIApplicationPolicyView
@@ -12,7 +13,7 @@ from api.user.api_schemas.user_schema import GetUsersFilterRequest
 from api.user.services.user_service import UserService
 from paig_authorizer_core.async_base_paig_authorizer import AsyncBasePAIGAuthorizer
 from paig_authorizer_core.constants import KEY_APPLICATION_ID
-from api.authz.utils.cache_decorator import cache_with_expiration
+from api.authz.utils.cache_decorator import cache_with_expiration, register_cache, AsyncTTLCache
 from core.controllers.paginated_response import Pageable
 from core.exceptions import NotFoundException
 from api.governance.services.ai_app_config_service import AIAppConfigService
@@ -20,8 +21,32 @@ from api.governance.services.ai_app_policy_service import AIAppPolicyService
 from api.governance.services.ai_app_service import AIAppService
 from api.governance.services.vector_db_policy_service import VectorDBPolicyService
 from api.governance.services.vector_db_service import VectorDBService
+from core.db_session import session, set_session_context, reset_session_context
 from core.utils import SingletonDepends
 
+# The compiled vector DB filter expressions, invalidated with the vector DBs and their policies
+vector_db_filter_expression_cache = register_cache(AsyncTTLCache(
+    "get_vector_db_filter_expression",
+    get_rds_authorizer_cache_max_size("get_vector_db_filter_expression"),
+    get_rds_authorizer_cache_expiry_time("get_vector_db_filter_expression")))
+
+
+def get_vector_db_policy_set_version(vector_db: VectorDBData, policies: List[VectorDBPolicyData]) -> tuple:
+    """
+    Get the version of a vector DB and of its policies applying to a user, which changes whenever any of them is
+    updated.
+
+    Args:
+        vector_db (VectorDBData): The vector DB.
+        policies (List[VectorDBPolicyData]): The policies of the vector DB applying to the user.
+
+    Returns:
+        tuple: The version of the vector DB and its policies.
+    """
+    vector_db_version = (vector_db.id, vector_db.type, vector_db.user_enforcement, vector_db.group_enforcement,
+                         vector_db.update_time)
+    return vector_db_version, tuple((policy.id, policy.update_time) for policy in policies)
+
 
 class AsyncRDSBasedPaigAuthorizer(AsyncBasePAIGAuthorizer):
     """
@@ -49,7 +74,26 @@ class AsyncRDSBasedPaigAuthorizer(AsyncBasePAIGAuthorizer):
         self.vector_db_service = vector_db_service
         self.vector_db_policy_service = vector_db_policy_service
 
-    @cache_with_expiration(get_rds_authorizer_cache_expiry_time("get_user_id_by_email"))
+    async def run_fetch(self, fetch: Awaitable):
+        """
+        Run a lookup started by the fetch plan of an authorization in its own database session, as a session cannot
+        be used by the lookups running at the same time.
+
+        Args:
+            fetch (Awaitable): The lookup.
+
+        Returns:
+            The result of the lookup.
+        """
+        context = set_session_context(session_id=str(uuid4()))
+        try:
+            return await fetch
+        finally:
+            await session.remove()
+            reset_session_context(context=context)
+
+    @cache_with_expiration(get_rds_authorizer_cache_expiry_time("get_user_id_by_email"),
+                           get_rds_authorizer_cache_max_size("get_user_id_by_email"))
     async def get_user_id_by_email(self, email: str) -> str | None:
         """
         Retrieves the user ID by email.
@@ -75,7 +119,8 @@ class AsyncRDSBasedPaigAuthorizer(AsyncBasePAIGAuthorizer):
             # If the user is not found, return None.
             return None
 
-    @cache_with_expiration(get_rds_authorizer_cache_expiry_time("get_user_groups"))
+    @cache_with_expiration(get_rds_authorizer_cache_expiry_time("get_user_groups"),
+                           get_rds_authorizer_cache_max_size("get_user_groups"))
     async def get_user_groups(self, user: str) -> List[str]:
         """
         Get the groups of a user.
@@ -102,7 +147,8 @@ class AsyncRDSBasedPaigAuthorizer(AsyncBasePAIGAuthorizer):
             pass
         return groups
 
-    @cache_with_expiration(get_rds_authorizer_cache_expiry_time("get_application_details"))
+    @cache_with_expiration(get_rds_authorizer_cache_expiry_time("get_application_details"),
+                           get_rds_authorizer_cache_max_size("get_application_details"))
     async def get_application_details(self, application_key: str, **kwargs) -> AIApplicationData:
         """
         Get the details of an AI application.
@@ -123,7 +169,8 @@ class AsyncRDSBasedPaigAuthorizer(AsyncBasePAIGAuthorizer):
             ai_app_view.vector_db_name = vector_db_view.name
         return ai_app_view.to_ai_application_data()
 
-    @cache_with_expiration(get_rds_authorizer_cache_expiry_time("get_application_config"))
+    @cache_with_expiration(get_rds_authorizer_cache_expiry_time("get_application_config"),
+                           get_rds_authorizer_cache_max_size("get_application_config"))
     async def get_application_config(self, application_key: str, **kwargs) -> AIApplicationConfigData:
         """
         Get the configuration of an AI application.
@@ -139,7 +186,6 @@ class AsyncRDSBasedPaigAuthorizer(AsyncBasePAIGAuthorizer):
         ai_app_config_view = AIApplicationConfigView.from_orm(ai_app_config_model)
         return ai_app_config_view.to_ai_application_config_data()
 
-    @cache_with_expiration(get_rds_authorizer_cache_expiry_time("get_application_policies"))
     async def get_application_policies(self, application_key: str, traits: List[str], user: str, groups: List[str],
                                        request_type: str, **kwargs) -> List[AIApplicationPolicyData]:
         """
@@ -166,7 +212,8 @@ class AsyncRDSBasedPaigAuthorizer(AsyncBasePAIGAuthorizer):
 
         return policies
 
-    @cache_with_expiration(get_rds_authorizer_cache_expiry_time("get_vector_db_details"))
+    @cache_with_expiration(get_rds_authorizer_cache_expiry_time("get_vector_db_details"),
+                           get_rds_authorizer_cache_max_size("get_vector_db_details"))
     async def get_vector_db_details(self, vector_db_id: int, **kwargs) -> VectorDBData:
         """
         Get the details of a vector database.
@@ -182,7 +229,8 @@ class AsyncRDSBasedPaigAuthorizer(AsyncBasePAIGAuthorizer):
         vector_db_view = VectorDBView.from_orm(vector_db_model)
         return vector_db_view.to_vector_db_data()
 
-    @cache_with_expiration(get_rds_authorizer_cache_expiry_time("get_vector_db_policies"))
+    @cache_with_expiration(get_rds_authorizer_cache_expiry_time("get_vector_db_policies"),
+                           get_rds_authorizer_cache_max_size("get_vector_db_policies"))
     async def get_vector_db_policies(self, vector_db_id: int, user: str, groups: List[str], **kwargs) \
             -> List[VectorDBPolicyData]:
         """
@@ -205,3 +253,23 @@ class AsyncRDSBasedPaigAuthorizer(AsyncBasePAIGAuthorizer):
             policies.append(vector_db_policy_view.to_vector_db_policy_data())
 
         return policies
+
+    async def get_vector_db_filter_expression(self, vector_db: VectorDBData, policies: List[VectorDBPolicyData],
+                                              user: str, groups: List[str]) -> str | dict | None:
+        """
+        Get the filter expression of a vector DB, compiled once per version of the vector DB policies, user and
+        groups.
+
+        Args:
+            vector_db (VectorDBData): The vector DB.
+            policies (List[VectorDBPolicyData]): The policies of the vector DB applying to the user.
+            user (str): The username of the user.
+            groups (List[str]): The list of groups the user belongs to.
+
+        Returns:
+            str | dict | None: The filter expression.
+        """
+        key = (get_vector_db_policy_set_version(vector_db, policies), user, tuple(sorted(groups)))
+        return await vector_db_filter_expression_cache.get_or_load(
+            key, lambda: super(AsyncRDSBasedPaigAuthorizer, self).get_vector_db_filter_expression(vector_db, policies,
+                                                                                                   user, groups))
@@ -1,10 +1,25 @@
+import asyncio
+import logging
 import time
+from collections import OrderedDict, defaultdict
 from functools import wraps
-from typing import Callable, Any
+from typing import Callable, Any, Awaitable
 
-# Global cache and timestamp dictionaries
-cache = {}
-cache_last_called = {}
+from opentelemetry import metrics
+from opentelemetry.metrics import Observation
+
+meter = metrics.get_meter(__name__)
+
+logger = logging.getLogger(__name__)
+
+# Registry of the caches created by cache_with_expiration, by cached function name
+caches = defaultdict(list)
+
+_MISSING = object()
+
+
+class _LoadCancelled(Exception):
+    """Set on the shared load of a key when the caller loading it is cancelled."""
 
 
 def make_hashable(obj: Any) -> Any:
@@ -18,26 +33,228 @@ def make_hashable(obj: Any) -> Any:
     raise TypeError(f"Unhashable type: {type(obj)}")
 
 
-def cache_with_expiration(expiration: int):
+class AsyncTTLCache:
+    """
+    A bounded async cache with per-entry expiration and least recently used eviction.
+
+    Concurrent misses for the same key are coalesced, only the first caller loads the value and the others wait
+    for its result. If the loading caller is cancelled, a waiting caller loads the value instead, the cancellation
+    is never passed on to the other callers. Loads which were in flight while the cache was invalidated are returned to their callers but
+    not stored, so an invalidation is never undone by a load which started before it.
+
+    Args:
+        cache_name (str): The name of the cache.
+        max_size (int): The maximum number of entries in the cache.
+        expiration (int): The time (in seconds) an entry is served from the cache after it is loaded.
+
+    Attributes:
+        cache (OrderedDict): An ordered dictionary of key to (value, expiry time), in least recently used order.
+        in_flight (dict): The futures of the loads in progress, by key.
+        generation (int): Incremented on every invalidation.
+        hits (int): The number of cache hits.
+        misses (int): The number of cache misses.
+        coalesced (int): The number of misses which waited for a load already in flight.
+        evictions (int): The number of cache evictions.
+    """
+
+    def __init__(self, cache_name: str, max_size: int, expiration: int):
+        self.cache_name = cache_name
+        self.max_size = max_size
+        self.expiration = expiration
+        self.cache = OrderedDict()
+        self.in_flight = {}
+        self.generation = 0
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    async def get_or_load(self, key: Any, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get the value of the key from the cache, loading it with the given loader on a miss.
+
+        Args:
+            key (Any): The hashable cache key.
+            loader (Callable): A coroutine function returning the value to cache.
+
+        Returns:
+            Any: The cached or loaded value.
+        """
+        while True:
+            value = self.get(key)
+            if value is not _MISSING:
+                return value
+
+            future = self.in_flight.get(key)
+            if future is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except _LoadCancelled:
+                # The caller loading the value was cancelled, load it again in this caller
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        generation = self.generation
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            # Only this caller is cancelled, the callers waiting for its load retry it
+            future.set_exception(_LoadCancelled())
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved, the caller re-raises it
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            if generation == self.generation:
+                self.put(key, value)
+            return value
+        finally:
+            if self.in_flight.get(key) is future:
+                del self.in_flight[key]
+
+    def get(self, key: Any) -> Any:
+        """
+        Retrieve a value from the cache by key.
+
+        Args:
+            key (Any): The key to retrieve the value for.
+
+        Returns:
+            Any: The value associated with the key, or _MISSING if the key is not found or has expired.
+        """
+        entry = self.cache.get(key)
+        if entry is not None and entry[1] < time.monotonic():
+            del self.cache[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return _MISSING
+        self.cache.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: Any, value: Any):
+        """
+        Put a key-value pair into the cache, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key (Any): The key of the item to be stored.
+            value (Any): The value to be stored.
+        """
+        if self.max_size <= 0:
+            return
+        if key in self.cache:
+            self.cache.move_to_end(key)
+        elif len(self.cache) >= self.max_size:
+            self.cache.popitem(last=False)
+            self.evictions += 1
+        self.cache[key] = (value, time.monotonic() + self.expiration)
+
+    def invalidate(self, predicate: Callable[[Any], bool] = None) -> int:
+        """
+        Remove the entries matching the given predicate on the key, or all the entries if no predicate is given.
+        Loads in flight for the matching keys are detached, so later callers load the value again.
+
+        Args:
+            predicate (Callable): A function taking the key and returning True if the entry should be removed.
+
+        Returns:
+            int: The number of removed entries.
+        """
+        self.generation += 1
+        keys_to_delete = [key for key in self.cache if predicate is None or predicate(key)]
+        for key in keys_to_delete:
+            del self.cache[key]
+        for key in [key for key in self.in_flight if predicate is None or predicate(key)]:
+            del self.in_flight[key]
+        if keys_to_delete:
+            logger.debug(f"Invalidated {len(keys_to_delete)} entries from cache: {self.cache_name}")
+        return len(keys_to_delete)
+
+    def get_hit_ratio(self) -> float:
+        total_accesses = self.hits + self.misses
+        return self.hits / total_accesses if total_accesses else 0.0
+
+
+def register_cache(func_cache: AsyncTTLCache) -> AsyncTTLCache:
+    """
+    Register a cache under its name, so it is invalidated by invalidate_cache and reported in the cache metrics.
+
+    Args:
+        func_cache (AsyncTTLCache): The cache to register.
+
+    Returns:
+        AsyncTTLCache: The registered cache.
+    """
+    caches[func_cache.cache_name].append(func_cache)
+    return func_cache
+
+
+def cache_with_expiration(expiration: int, max_size: int = 1000):
+    """
+    Cache the results of an async method in a bounded AsyncTTLCache registered under the method name.
+
+    Args:
+        expiration (int): The time (in seconds) a result is served from the cache.
+        max_size (int): The maximum number of results cached for the method.
+    """
     def decorator(func: Callable):
+        function_name = func.__name__
+        func_cache = register_cache(AsyncTTLCache(function_name, max_size, expiration))
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            # Extract the class name and function name
-            class_name = args[0].__class__.__name__
-            function_name = func.__name__
+            # Create a unique key using the argument values, the instance is left out
+            key = (make_hashable(args[1:]), make_hashable(kwargs))
+            return await func_cache.get_or_load(key, lambda: func(*args, **kwargs))
+
+        wrapper.cache = func_cache
+        return wrapper
 
-            # Create a unique key using the FQDN and argument values
-            fqdn = f"{class_name}.{function_name}"
-            key = (fqdn, make_hashable(args[1:]), make_hashable(kwargs))
+    return decorator
 
-            # Check if the result is already cached and if it is not expired
-            if key not in cache or time.time() - cache_last_called.get(key, 0) > expiration:
-                # Call the actual function and store the result in the cache
-                cache[key] = await func(*args, **kwargs)
-                cache_last_called[key] = time.time()
 
-            return cache[key]
+def invalidate_cache(*function_names: str) -> int:
+    """
+    Invalidate the cached results of the given functions, or of all the cached functions if none are given.
 
-        return wrapper
+    Args:
+        *function_names (str): The names of the cached functions.
 
-    return decorator
+    Returns:
+        int: The number of removed entries.
+    """
+    names = function_names or list(caches.keys())
+    return sum(func_cache.invalidate() for name in names for func_cache in caches.get(name, []))
+
+
+def get_caches_size(options):
+    return [Observation(value=len(func_cache.cache), attributes={"cache": name})
+            for name, func_caches in caches.items() for func_cache in func_caches]
+
+
+def get_caches_hit_ratio(options):
+    return [Observation(value=func_cache.get_hit_ratio(), attributes={"cache": name})
+            for name, func_caches in caches.items() for func_cache in func_caches]
+
+
+meter.create_observable_gauge(
+    name="authz_cache_size",
+    callbacks=[get_caches_size],
+    description="The current number of entries in the authz caches"
+)
+
+meter.create_observable_gauge(
+    name="authz_cache_hit_ratio",
+    callbacks=[get_caches_hit_ratio],
+    description="The hit ratio of the authz caches"
+)
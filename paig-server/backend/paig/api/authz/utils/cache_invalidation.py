@@ -0,0 +1,33 @@
+from api.authz.utils.cache_decorator import invalidate_cache
+
+
+def invalidate_application_cache():
+    """Invalidate the cached authorization data of the AI applications, called when an application changes."""
+    invalidate_cache("get_application_details", "get_application_config", "get_application_guardrail_info")
+
+
+def invalidate_application_config_cache():
+    """Invalidate the cached AI application configs, called when an application config changes."""
+    invalidate_cache("get_application_config")
+
+
+def invalidate_vector_db_cache():
+    """Invalidate the cached authorization data of the vector DBs, called when a vector DB changes."""
+    invalidate_cache("get_application_details", "get_vector_db_details", "get_vector_db_policies",
+                     "get_vector_db_filter_expression")
+
+
+def invalidate_vector_db_policy_cache():
+    """Invalidate the cached vector DB policies and their compiled filters, called when a vector DB policy changes."""
+    invalidate_cache("get_vector_db_policies", "get_vector_db_filter_expression")
+
+
+def invalidate_user_cache():
+    """Invalidate the cached users, user-group memberships and authenticated principals, called when a user or group
+    changes."""
+    invalidate_cache("get_user_id_by_email", "get_user_groups", "get_auth_user")
+
+
+def invalidate_guardrail_cache():
+    """Invalidate the cached guardrail info of the AI applications, called when a guardrail or its connection changes."""
+    invalidate_cache("get_application_guardrail_info")
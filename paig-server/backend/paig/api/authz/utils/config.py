@@ -18,3 +18,28 @@ def get_rds_authorizer_cache_expiry_time(cache_name: str) -> int:
         return int(cache_timings_config[cache_name])
     else:
         return 60
+
+
+@lru_cache
+def get_rds_authorizer_cache_size_config() -> dict | None:
+    configs = load_config_file()
+    if "authz" in configs and "rds_authorizer" in configs["authz"]:
+        if "cache_max_size" in configs["authz"]["rds_authorizer"]:
+            return configs["authz"]["rds_authorizer"]["cache_max_size"]
+
+
+@lru_cache
+def get_rds_authorizer_cache_max_size(cache_name: str) -> int:
+    cache_size_config = get_rds_authorizer_cache_size_config()
+    if cache_size_config and cache_name in cache_size_config:
+        return int(cache_size_config[cache_name])
+    else:
+        return 1000
+
+
+@lru_cache
+def get_rds_authorizer_policy_index_refresh_interval() -> int:
+    configs = load_config_file()
+    if "authz" in configs and "rds_authorizer" in configs["authz"]:
+        return int(configs["authz"]["rds_authorizer"].get("policy_index_refresh_interval", 3))
+    return 3
@@ -49,4 +49,23 @@ class AIAppPolicyRepository(BaseOperations[AIApplicationPolicyModel]):
 
         query = query.filter(and_(*query_filters))
 
-        return await self._all(query)
\ No newline at end of file
+        return await self._all(query)
+
+    async def list_enabled_policies(self, application_id: int) -> List[AIApplicationPolicyModel]:
+        """
+        List the enabled policies of an AI application, in policy ID order.
+
+        Args:
+            application_id (int): The ID of the AI application.
+
+        Returns:
+            List[AIApplicationPolicyModel]: The enabled policies of the AI application.
+        """
+        column_application_id = getattr(self.model_class, "application_id")
+        column_status = getattr(self.model_class, "status")
+        column_id = getattr(self.model_class, "id")
+
+        query = await self._query()
+        query = query.filter(and_(column_application_id == application_id, column_status == 1)).order_by(column_id)
+
+        return await self._all(query)
@@ -10,6 +10,8 @@ from api.governance.api_schemas.ai_app_config import AIApplicationConfigView, AI
 from api.governance.database.db_models.ai_app_config_model import AIApplicationConfigModel
 from api.governance.database.db_operations.ai_app_config_repository import AIAppConfigRepository
 from api.governance.database.db_operations.ai_app_repository import AIAppRepository
+from api.authz.utils.cache_invalidation import invalidate_application_config_cache
+from core.db_session import run_after_commit
 
 
 class AIAppConfigRequestValidator:
@@ -139,11 +141,12 @@ class AIAppConfigService(BaseController[AIApplicationConfigModel, AIApplicationC
             updated_data = request.model_dump(exclude_unset=True, exclude={"id", "create_time", "update_time", "application_id"})
             model.set_attribute(updated_data)
             model.update_time = datetime.now()
-            return await self.repository.update_record(model)
+            record = await self.repository.update_record(model)
         else:
             request_data = request.model_dump(exclude_unset=True,
                                               exclude={"id", "create_time", "update_time", "application_id"})
             updated_request = AIApplicationConfigView(**request_data)
             updated_request.application_id = application_id
             record = await self.create_record(updated_request)
-            return record
+        run_after_commit(invalidate_application_config_cache)
+        return record
@@ -1,3 +1,5 @@
+import asyncio
+from collections import defaultdict
 from typing import List
 
 from core.controllers.base_controller import BaseController
@@ -12,6 +14,9 @@ from api.governance.database.db_operations.ai_app_policy_repository import AIApp
 from api.governance.database.db_operations.ai_app_repository import AIAppRepository
 from core.middlewares.usage import background_capture_event
 from core.factory.events import DeleteAIApplicationPolicyEvent
+from core.db_session import run_after_commit
+from api.authz.utils.config import get_rds_authorizer_policy_index_refresh_interval
+from api.governance.utils.ai_app_policy_index import AIAppPolicyIndex
 
 
 class AIAppPolicyRequestValidator:
@@ -236,6 +241,11 @@ class AIAppPolicyService(BaseController[AIApplicationPolicyModel, AIApplicationP
     """
     Service class specifically for handling AI application policies.
 
+    The enabled policies of each AI application are kept in an in-memory AIAppPolicyIndex used for authorization.
+    The index is built on first use, updated once a policy create, update or delete is committed, and rebuilt from
+    the database after the configured refresh interval, which bounds how long the changes made by the other server
+    processes take to apply.
+
     Args:
         ai_app_policy_repository (AIAppPolicyRepository): The repository handling AI application policy database operations.
     """
@@ -243,6 +253,10 @@ class AIAppPolicyService(BaseController[AIApplicationPolicyModel, AIApplicationP
     def __init__(self, ai_app_policy_repository: AIAppPolicyRepository = SingletonDepends(AIAppPolicyRepository), policy_request_validator: AIAppPolicyRequestValidator = SingletonDepends(AIAppPolicyRequestValidator)):
         super().__init__(ai_app_policy_repository, AIApplicationPolicyModel, AIApplicationPolicyView)
         self.policy_request_validator = policy_request_validator
+        self.policy_indexes = {}
+        self.policy_index_versions = defaultdict(int)
+        self.policy_index_locks = defaultdict(asyncio.Lock)
+        self.policy_index_refresh_interval = get_rds_authorizer_policy_index_refresh_interval()
 
     def get_repository(self) -> AIAppPolicyRepository:
         """
@@ -320,7 +334,9 @@ class AIAppPolicyService(BaseController[AIApplicationPolicyModel, AIApplicationP
         """
         request.application_id = app_id
         await self.policy_request_validator.validate_create_request(request)
-        return await self.create_record(request)
+        result = await self.create_record(request)
+        run_after_commit(lambda: self.update_policy_index(app_id, result))
+        return result
 
     async def update_ai_application_policy(self, app_id: int, id: int, request: AIApplicationPolicyView) -> AIApplicationPolicyView:
         """
@@ -339,7 +355,9 @@ class AIAppPolicyService(BaseController[AIApplicationPolicyModel, AIApplicationP
         await self.policy_request_validator.validate_update_request(request)
         # get the policy by id and application id to check if it exists
         await self.get_policy_by_id_and_application_id(app_id, id)
-        return await self.update_record(id, request)
+        result = await self.update_record(id, request)
+        run_after_commit(lambda: self.update_policy_index(app_id, result))
+        return result
 
     async def delete_ai_application_policy(self, app_id: int, id: int):
         """
@@ -353,6 +371,7 @@ class AIAppPolicyService(BaseController[AIApplicationPolicyModel, AIApplicationP
         # get the policy by id and application id to check if it exists
         ai_app_policy = await self.get_policy_by_id_and_application_id(app_id, id)
         await self.delete_record(id)
+        run_after_commit(lambda: self.update_policy_index(app_id, removed_policy_id=id))
         await background_capture_event(event=DeleteAIApplicationPolicyEvent(tags=ai_app_policy.tags, prompt=ai_app_policy.prompt.value, reply=ai_app_policy.reply.value))
 
     async def list_ai_application_authorization_policies(self, app_id: int, traits: List[str], user: str, groups: List[str]) -> List[AIApplicationPolicyView]:
@@ -366,7 +385,63 @@ class AIAppPolicyService(BaseController[AIApplicationPolicyModel, AIApplicationP
             groups (List[str]): The list of groups to filter by.
 
         Returns:
-            List[AIApplicationPolicyModel]: A list of AI application policy models.
+            List[AIApplicationPolicyView]: A list of AI application policy views.
+        """
+        policy_index = await self.get_policy_index(app_id)
+        return policy_index.find_policies(traits, user, groups)
+
+    async def get_policy_index(self, app_id: int) -> AIAppPolicyIndex:
+        """
+        Get the policy index of an AI application, building it from the database if missing or expired.
+
+        Args:
+            app_id (int): The ID of the AI application.
+
+        Returns:
+            AIAppPolicyIndex: The policy index of the AI application.
+        """
+        policy_index = self.policy_indexes.get(app_id)
+        if policy_index is not None and not policy_index.is_expired(self.policy_index_refresh_interval):
+            return policy_index
+
+        async with self.policy_index_locks[app_id]:
+            policy_index = self.policy_indexes.get(app_id)
+            if policy_index is not None and not policy_index.is_expired(self.policy_index_refresh_interval):
+                return policy_index
+
+            version = self.policy_index_versions[app_id]
+            repository = self.get_repository()
+            policies = await repository.list_enabled_policies(app_id)
+            policy_index = AIAppPolicyIndex(app_id, [AIApplicationPolicyView.model_validate(policy) for policy in policies])
+            # Don't store an index built while the policies of the application were changed
+            if version == self.policy_index_versions[app_id]:
+                self.policy_indexes[app_id] = policy_index
+            return policy_index
+
+    def update_policy_index(self, app_id: int, policy: AIApplicationPolicyView = None, removed_policy_id: int = None):
+        """
+        Apply a policy change to the policy index of an AI application, if the index is built.
+
+        Args:
+            app_id (int): The ID of the AI application.
+            policy (AIApplicationPolicyView): The created or updated policy.
+            removed_policy_id (int): The ID of the deleted policy.
+        """
+        self.policy_index_versions[app_id] += 1
+        policy_index = self.policy_indexes.get(app_id)
+        if policy_index is None:
+            return
+        if policy is not None:
+            policy_index.add_policy(policy)
+        if removed_policy_id is not None:
+            policy_index.remove_policy(removed_policy_id)
+
+    def evict_policy_index(self, app_id: int):
+        """
+        Remove the policy index of an AI application, called when the application is deleted.
+
+        Args:
+            app_id (int): The ID of the AI application.
         """
-        repository = self.get_repository()
-        return await repository.list_policies_for_authorization(app_id, traits, user, groups)
\ No newline at end of file
+        self.policy_index_versions[app_id] += 1
+        self.policy_indexes.pop(app_id, None)
\ No newline at end of file
@@ -15,8 +15,11 @@ from api.governance.api_schemas.vector_db import VectorDBFilter
 from api.governance.database.db_models.ai_app_model import AIApplicationModel
 from api.governance.database.db_operations.ai_app_repository import AIAppRepository
 from api.governance.database.db_operations.vector_db_repository import VectorDBRepository
+from api.governance.services.ai_app_policy_service import AIAppPolicyService
 from core.constants import PORT
 from core.config import load_config_file
+from api.authz.utils.cache_invalidation import invalidate_application_cache
+from core.db_session import run_after_commit
 
 config = load_config_file()
 
@@ -195,12 +198,14 @@ class AIAppRequestValidator:
 class AIAppService(BaseController[AIApplicationModel, AIApplicationView]):
 
     def __init__(self, ai_app_repository: AIAppRepository = SingletonDepends(AIAppRepository),
-                 ai_app_request_validator: AIAppRequestValidator = SingletonDepends(AIAppRequestValidator)):
+                 ai_app_request_validator: AIAppRequestValidator = SingletonDepends(AIAppRequestValidator),
+                 ai_app_policy_service: AIAppPolicyService = SingletonDepends(AIAppPolicyService)):
         """
         Initialize the AIAppService.
 
         Args:
             ai_app_repository (AIAppRepository): The repository handling AI application database operations.
+            ai_app_policy_service (AIAppPolicyService): The service handling AI application policy operations.
         """
         super().__init__(
             ai_app_repository,
@@ -208,6 +213,7 @@ class AIAppService(BaseController[AIApplicationModel, AIApplicationView]):
             AIApplicationView
         )
         self.ai_app_request_validator = ai_app_request_validator
+        self.ai_app_policy_service = ai_app_policy_service
 
     def get_repository(self) -> AIAppRepository:
         """
@@ -263,7 +269,9 @@ class AIAppService(BaseController[AIApplicationModel, AIApplicationView]):
         """
         await self.ai_app_request_validator.validate_create_request(request)
         request.application_key = generate_unique_identifier_key()
-        return await self.create_record(request)
+        result = await self.create_record(request)
+        run_after_commit(invalidate_application_cache)
+        return result
 
     async def get_ai_application_by_id(self, id: int) -> AIApplicationView:
         """
@@ -303,7 +311,9 @@ class AIAppService(BaseController[AIApplicationModel, AIApplicationView]):
             AIApplicationView: The updated AI application view object.
         """
         await self.ai_app_request_validator.validate_update_request(id, request)
-        return await self.update_record(id, request)
+        result = await self.update_record(id, request)
+        run_after_commit(invalidate_application_cache)
+        return result
 
     async def delete_ai_application(self, id: int):
         """
@@ -314,6 +324,8 @@ class AIAppService(BaseController[AIApplicationModel, AIApplicationView]):
         """
         self.ai_app_request_validator.validate_delete_request(id)
         await self.delete_record(id)
+        run_after_commit(invalidate_application_cache)
+        self.ai_app_policy_service.evict_policy_index(id)
 
     @staticmethod
     async def get_shield_server_url():
@@ -344,6 +356,7 @@ class AIAppService(BaseController[AIApplicationModel, AIApplicationView]):
         await self.disassociate_guardrail(request)
         associated_apps = await self.associate_guardrail(request)
         result.applications = associated_apps
+        run_after_commit(invalidate_application_cache)
 
         return result
 
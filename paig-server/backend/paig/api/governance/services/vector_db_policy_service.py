@@ -12,6 +12,8 @@ from api.governance.api_schemas.vector_db_policy import VectorDBPolicyFilter, Ve
 from api.governance.database.db_models.vector_db_policy_model import VectorDBPolicyModel
 from api.governance.database.db_operations.vector_db_policy_repository import VectorDBPolicyRepository
 from api.governance.database.db_operations.vector_db_repository import VectorDBRepository
+from api.authz.utils.cache_invalidation import invalidate_vector_db_policy_cache
+from core.db_session import run_after_commit
 
 
 class VectorDBPolicyRequestValidator:
@@ -274,7 +276,9 @@ class VectorDBPolicyService(BaseController[VectorDBPolicyModel, VectorDBPolicyVi
         """
         request.vector_db_id = vector_db_id
         await self.vector_db_policy_request_validator.validate_create_request(request)
-        return await self.create_record(request)
+        result = await self.create_record(request)
+        run_after_commit(invalidate_vector_db_policy_cache)
+        return result
 
     async def get_vector_db_policy_by_id(self, vector_db_id: int, id: int) -> VectorDBPolicyView:
         """
@@ -322,6 +326,7 @@ class VectorDBPolicyService(BaseController[VectorDBPolicyModel, VectorDBPolicyVi
         # get the policy by id and vector db id to check if it exists
         await self.get_vector_db_policy_by_id_and_vector_db_id(vector_db_id, id)
         await self.delete_record(id)
+        run_after_commit(invalidate_vector_db_policy_cache)
 
     async def update_vector_db_policy(self, vector_db_id: int, id: int, request: VectorDBPolicyView) -> VectorDBPolicyView:
         """
@@ -340,7 +345,9 @@ class VectorDBPolicyService(BaseController[VectorDBPolicyModel, VectorDBPolicyVi
         # get the policy by id and Vector DB id to check if it exists
         await self.get_vector_db_policy_by_id_and_vector_db_id(vector_db_id, id)
         await self.vector_db_policy_request_validator.validate_update_request(request)
-        return await self.update_record(id, request)
+        result = await self.update_record(id, request)
+        run_after_commit(invalidate_vector_db_policy_cache)
+        return result
 
     async def list_vector_db_authorization_policies(self, vector_db_id: int, user: str, groups: List[str]) -> List[VectorDBPolicyView]:
         """
@@ -10,6 +10,8 @@ from api.governance.api_schemas.vector_db import VectorDBView, VectorDBFilter
 from api.governance.database.db_models.vector_db_model import VectorDBModel
 from api.governance.database.db_operations.ai_app_repository import AIAppRepository
 from api.governance.database.db_operations.vector_db_repository import VectorDBRepository
+from api.authz.utils.cache_invalidation import invalidate_vector_db_cache
+from core.db_session import run_after_commit
 
 
 class VectorDBRequestValidator:
@@ -220,7 +222,9 @@ class VectorDBService(BaseController[VectorDBModel, VectorDBView]):
         await self.vector_db_request_validator.validate_create_request(request)
         # TODO: see if we can have an alternate way of removing field
         delattr(request, "ai_applications")
-        return await self.create_record(request)
+        result = await self.create_record(request)
+        run_after_commit(invalidate_vector_db_cache)
+        return result
 
     async def get_vector_db_by_id(self, id: int) -> VectorDBView:
         """
@@ -244,6 +248,7 @@ class VectorDBService(BaseController[VectorDBModel, VectorDBView]):
         """
         self.vector_db_request_validator.validate_delete_request(id)
         await self.delete_record(id)
+        run_after_commit(invalidate_vector_db_cache)
 
     async def update_vector_db(self, id: int, request: VectorDBView) -> VectorDBView:
         """
@@ -259,7 +264,9 @@ class VectorDBService(BaseController[VectorDBModel, VectorDBView]):
         await self.vector_db_request_validator.validate_update_request(id, request)
         # TODO: see if we can have an alternate way of removing field
         delattr(request, "ai_applications")
-        return await self.update_record(id, request)
+        result = await self.update_record(id, request)
+        run_after_commit(invalidate_vector_db_cache)
+        return result
 
     async def get_vector_db_by_name(self, name: str) -> VectorDBModel:
         """
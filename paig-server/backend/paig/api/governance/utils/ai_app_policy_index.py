@@ -0,0 +1,106 @@
+import time
+from collections import defaultdict
+from typing import List
+
+from api.governance.api_schemas.ai_app_policy import AIApplicationPolicyView
+
+
+class AIAppPolicyIndex:
+    """
+    In-memory index of the enabled policies of an AI application, used for authorization.
+
+    The policies are indexed by trait, user and group, so the policies matching an authorization request are found
+    with set intersections instead of a database query. Traits and principals are matched exactly, as in the
+    authorizer policy evaluation.
+
+    Args:
+        application_id (int): The ID of the AI application.
+        policies (List[AIApplicationPolicyView]): The policies of the AI application.
+
+    Attributes:
+        policies (dict): The indexed policies, by policy ID.
+        trait_index (defaultdict): The policy IDs, by trait.
+        user_index (defaultdict): The policy IDs, by user.
+        group_index (defaultdict): The policy IDs, by group.
+        build_time (float): The monotonic time the index was built from the database.
+    """
+
+    def __init__(self, application_id: int, policies: List[AIApplicationPolicyView]):
+        self.application_id = application_id
+        self.policies = {}
+        self.trait_index = defaultdict(set)
+        self.user_index = defaultdict(set)
+        self.group_index = defaultdict(set)
+        self.build_time = time.monotonic()
+        for policy in policies:
+            self.add_policy(policy)
+
+    def add_policy(self, policy: AIApplicationPolicyView):
+        """
+        Add or replace a policy in the index. Disabled policies are only removed from the index.
+
+        Args:
+            policy (AIApplicationPolicyView): The policy to index.
+        """
+        self.remove_policy(policy.id)
+        if policy.status != 1:
+            return
+        self.policies[policy.id] = policy
+        for trait in policy.tags or []:
+            self.trait_index[trait].add(policy.id)
+        for user in policy.users or []:
+            self.user_index[user].add(policy.id)
+        for group in policy.groups or []:
+            self.group_index[group].add(policy.id)
+
+    def remove_policy(self, policy_id: int):
+        """
+        Remove a policy from the index.
+
+        Args:
+            policy_id (int): The ID of the policy to remove.
+        """
+        policy = self.policies.pop(policy_id, None)
+        if policy is None:
+            return
+        _remove_from_index(self.trait_index, policy.tags, policy_id)
+        _remove_from_index(self.user_index, policy.users, policy_id)
+        _remove_from_index(self.group_index, policy.groups, policy_id)
+
+    def find_policies(self, traits: List[str], user: str, groups: List[str]) -> List[AIApplicationPolicyView]:
+        """
+        Find the policies matching any of the traits and applying to the user or any of the groups.
+
+        Args:
+            traits (List[str]): The list of traits to match.
+            user (str): The user to match.
+            groups (List[str]): The list of groups to match.
+
+        Returns:
+            List[AIApplicationPolicyView]: The matching policies, in policy ID order.
+        """
+        trait_policy_ids = _union(self.trait_index, traits)
+        if not trait_policy_ids:
+            return []
+        principal_policy_ids = set(self.user_index.get(user, ())) if user else set()
+        principal_policy_ids |= _union(self.group_index, groups)
+        return [self.policies[policy_id] for policy_id in sorted(trait_policy_ids & principal_policy_ids)]
+
+    def is_expired(self, refresh_interval: int) -> bool:
+        return time.monotonic() - self.build_time > refresh_interval
+
+
+def _union(index: dict, keys: List[str]) -> set:
+    policy_ids = set()
+    for key in keys or []:
+        policy_ids |= index.get(key, set())
+    return policy_ids
+
+
+def _remove_from_index(index: dict, keys: List[str], policy_id: int):
+    for key in keys or []:
+        policy_ids = index.get(key)
+        if policy_ids is not None:
+            policy_ids.discard(policy_id)
+            if not policy_ids:
+                del index[key]
@@ -151,9 +151,13 @@ class BedrockGuardrailProvider(GuardrailProvider):
 
         return self._perform_guardrail_action(client.delete_guardrail, payload)
 
-    def create_bedrock_client(self, client_name: str = 'bedrock'):
+    def create_bedrock_client(self, client_name: str = 'bedrock', **client_kwargs):
         """Create a Boto3 client for the Bedrock service based on the provided credentials.
 
+        Args:
+            client_name (str): The name of the Bedrock service client.
+            **client_kwargs: Additional keyword arguments of the Boto3 client, e.g. config or endpoint_url.
+
         Returns:
             boto3.client: A Boto3 client for the Bedrock service.
         """
@@ -163,7 +167,8 @@ class BedrockGuardrailProvider(GuardrailProvider):
                 aws_access_key_id=self.connection_details['access_key'],
                 aws_secret_access_key=self.connection_details['secret_key'],
                 aws_session_token=self.connection_details['session_token'],
-                region_name=self.connection_details['region']
+                region_name=self.connection_details['region'],
+                **client_kwargs
             )
 
         if all(key in self.connection_details for key in self.REQUIRED_ACCESS_KEYS):
@@ -171,7 +176,8 @@ class BedrockGuardrailProvider(GuardrailProvider):
                 client_name,
                 aws_access_key_id=self.connection_details['access_key'],
                 aws_secret_access_key=self.connection_details['secret_key'],
-                region_name=self.connection_details['region']
+                region_name=self.connection_details['region'],
+                **client_kwargs
             )
 
         if all(key in self.connection_details for key in self.REQUIRED_IAM_WEB_IDENTITY_KEYS):
@@ -187,7 +193,8 @@ class BedrockGuardrailProvider(GuardrailProvider):
                 aws_access_key_id=temp_credentials['AccessKeyId'],
                 aws_secret_access_key=temp_credentials['SecretAccessKey'],
                 aws_session_token=temp_credentials['SessionToken'],
-                region_name=self.connection_details['region']
+                region_name=self.connection_details['region'],
+                **client_kwargs
             )
 
         if os.getenv("AWS_ROLE_ARN") and os.getenv("AWS_WEB_IDENTITY_TOKEN_FILE"):
@@ -203,7 +210,8 @@ class BedrockGuardrailProvider(GuardrailProvider):
                 aws_access_key_id=temp_credentials['AccessKeyId'],
                 aws_secret_access_key=temp_credentials['SecretAccessKey'],
                 aws_session_token=temp_credentials['SessionToken'],
-                region_name=self.connection_details['region']
+                region_name=self.connection_details['region'],
+                **client_kwargs
             )
 
         if all(key in self.connection_details for key in self.REQUIRED_IAM_ROLE_KEYS):
@@ -219,10 +227,11 @@ class BedrockGuardrailProvider(GuardrailProvider):
                 aws_access_key_id=temp_credentials['AccessKeyId'],
                 aws_secret_access_key=temp_credentials['SecretAccessKey'],
                 aws_session_token=temp_credentials['SessionToken'],
-                region_name=self.connection_details['region']
+                region_name=self.connection_details['region'],
+                **client_kwargs
             )
 
-        return boto3.client(client_name, region_name=self.connection_details['region'])
+        return boto3.client(client_name, region_name=self.connection_details['region'], **client_kwargs)
 
     def get_create_bedrock_guardrail_payload(self, request: GuardrailRequest, **kwargs) -> dict:
         """Construct the payload for creating a Bedrock guardrail.
@@ -3,6 +3,8 @@ from typing import List, Dict, Any
 from paig_common.encryption import DataEncryptor
 from sqlalchemy.exc import NoResultFound
 
+from api.authz.utils.cache_invalidation import invalidate_guardrail_cache
+from core.db_session import run_after_commit
 from api.encryption.api_schemas.encryption_key import EncryptionKeyView
 from api.encryption.database.db_models.encryption_key_model import EncryptionKeyType
 from api.encryption.events.startup import create_encryption_keys_if_not_exists
@@ -295,7 +297,9 @@ class GRConnectionService(BaseController[GRConnectionModel, GRConnectionView]):
         """
         await self.gr_connection_request_validator.validate_update_request(id, request)
         await self.encrypt_connection_details(request)
-        return await self.update_record(id, request)
+        result = await self.update_record(id, request)
+        run_after_commit(invalidate_guardrail_cache)
+        return result
 
     async def delete(self, id: int):
         """
@@ -305,7 +309,9 @@ class GRConnectionService(BaseController[GRConnectionModel, GRConnectionView]):
             id (int): The ID of the Guardrail Connection to delete.
         """
         await self.gr_connection_request_validator.validate_delete_request(id)
-        return await self.delete_record(id)
+        result = await self.delete_record(id)
+        run_after_commit(invalidate_guardrail_cache)
+        return result
 
     async def encrypt_connection_details(self, gr_connection):
         connection_details = gr_connection.connection_details
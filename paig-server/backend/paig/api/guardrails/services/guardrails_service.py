@@ -5,6 +5,8 @@ from typing import List
 import sqlalchemy
 
 from api.audit.api_schemas.admin_audit_schema import BaseAdminAuditView
+from api.authz.utils.cache_invalidation import invalidate_guardrail_cache
+from core.db_session import run_after_commit
 from api.audit.controllers.data_store_controller import get_service_instance
 from api.governance.api_schemas.ai_app import GuardrailApplicationsAssociation
 from api.governance.services.ai_app_service import AIAppService
@@ -433,6 +435,7 @@ class GuardrailService(BaseController[GuardrailModel, GuardrailView]):
         # log the audit
         audit_log = self.prepare_audit_log_object("CREATE", guardrail=GuardrailView.model_validate(guardrail))
         await self.data_service.create_admin_audit(audit_log)
+        run_after_commit(invalidate_guardrail_cache)
 
         result = GuardrailView(**request.model_dump(mode="json"))
         result.id = guardrail.id
@@ -592,6 +595,7 @@ class GuardrailService(BaseController[GuardrailModel, GuardrailView]):
         # log the audit
         audit_log = self.prepare_audit_log_object("UPDATE", guardrail=GuardrailView.model_validate(guardrail), previous_guardrail=existing_guardrail)
         await self.data_service.create_admin_audit(audit_log)
+        run_after_commit(invalidate_guardrail_cache)
 
         guardrail_view.guardrail_provider_response = None
         return guardrail_view
@@ -858,6 +862,7 @@ class GuardrailService(BaseController[GuardrailModel, GuardrailView]):
         # log the audit
         audit_log = self.prepare_audit_log_object("DELETE", previous_guardrail=guardrail)
         await self.data_service.create_admin_audit(audit_log)
+        run_after_commit(invalidate_guardrail_cache)
 
     async def get_history(self, id, filter: GRVersionHistoryFilter, page_number: int, size: int, sort: List[str]) -> Pageable:
         """
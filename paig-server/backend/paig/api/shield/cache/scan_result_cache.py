@@ -0,0 +1,235 @@
+import copy
+import hashlib
+import logging
+import sys
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from opentelemetry import metrics
+from opentelemetry.metrics import Observation
+
+meter = metrics.get_meter(__name__)
+
+logger = logging.getLogger(__name__)
+
+
+class ScanResultCache:
+    """
+    A content-addressed cache for scanner results, bounded by the estimated byte size of the cached results.
+
+    The cache key is built from the hash of the message text and the scanner configuration the result was produced
+    with, so the same message scanned again with the same scanners is served from the cache. Least recently used
+    entries are evicted once the total size of the cached results goes beyond the configured limit. The results are
+    updated by the requests using them (the masking sets the positions of the analyzer results), so the cache keeps
+    its own copy of them and returns a copy on every hit.
+
+    Args:
+        cache_name (str): The name of the cache, used as prefix of the OTel metrics.
+        max_size_bytes (int): The maximum estimated size in bytes of all the cached results.
+        ttl_sec (int): The maximum time (in seconds) an entry is served from the cache after it is added.
+
+    Attributes:
+        cache (OrderedDict): An ordered dictionary of key to (value, size, expiry time), in least recently used order.
+        size_bytes (int): The estimated size in bytes of all the cached results.
+        lock (Lock): A threading lock to ensure thread safety.
+        hits (int): The number of cache hits.
+        misses (int): The number of cache misses.
+        evictions (int): The number of cache evictions.
+    """
+
+    def __init__(self, cache_name, max_size_bytes, ttl_sec):
+        self.cache = OrderedDict()
+        self.cache_name = cache_name
+        self.max_size_bytes = max_size_bytes
+        self.ttl_sec = ttl_sec
+        self.size_bytes = 0
+        self.lock = Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # OTel metrics
+        self.cache_size_metric = meter.create_observable_gauge(
+            name=self.cache_name + "_cache_size",
+            callbacks=[self.get_cache_size],
+            description="The current number of entries in the cache"
+        )
+
+        self.cache_size_bytes_metric = meter.create_observable_gauge(
+            name=self.cache_name + "_cache_size_bytes",
+            callbacks=[self.get_cache_size_bytes],
+            description="The current estimated size of the cache in bytes"
+        )
+
+        self.cache_hit_ratio_metric = meter.create_observable_gauge(
+            name=self.cache_name + "_cache_hit_ratio",
+            callbacks=[self.get_cache_hit_ratio],
+            description="The cache hit ratio"
+        )
+
+        self.cache_eviction_rate_metric = meter.create_observable_gauge(
+            name=self.cache_name + "_cache_eviction_rate",
+            callbacks=[self.get_cache_eviction_rate],
+            description="The cache eviction rate"
+        )
+
+    @staticmethod
+    def build_key(message: str, *key_parts) -> tuple:
+        """
+        Build the cache key for the given message and key parts.
+
+        Args:
+            message (str): The scanned message, only its hash is kept in the key.
+            *key_parts: The scanner configuration the result depends on.
+
+        Returns:
+            tuple: The cache key.
+        """
+        return tuple(key_parts) + (hashlib.sha256(message.encode('utf-8')).hexdigest(),)
+
+    def get(self, key):
+        """
+        Retrieve a value from the cache by key.
+
+        Args:
+            key (tuple): The key to retrieve the value for.
+
+        Returns:
+            Any: A copy of the value associated with the key, or None if the key is not found or has expired.
+        """
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is not None and entry[2] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.cache.move_to_end(key)
+            self.hits += 1
+        # The cached value itself is never updated, it is copied outside the lock
+        return copy.deepcopy(entry[0])
+
+    def put(self, key, value):
+        """
+        Put a copy of the value into the cache, evicting the least recently used entries if the cache is full.
+        Values larger than the whole cache are not cached.
+
+        Args:
+            key (tuple): The key of the item to be stored.
+            value (Any): The value to be stored.
+
+        Returns:
+            None
+        """
+        value = copy.deepcopy(value)
+        size = estimate_size(value)
+        if size > self.max_size_bytes:
+            logger.debug(f"Skipping caching of {size} bytes result in cache: {self.cache_name}")
+            return
+        with self.lock:
+            if key in self.cache:
+                self._remove(key)
+            while self.cache and self.size_bytes + size > self.max_size_bytes:
+                oldest_key = next(iter(self.cache))
+                self._remove(oldest_key)
+                self.evictions += 1
+            self.cache[key] = (value, size, time.monotonic() + self.ttl_sec)
+            self.size_bytes += size
+
+    def invalidate(self, predicate=None):
+        """
+        Remove the entries matching the given predicate on the key, or all the entries if no predicate is given.
+
+        Args:
+            predicate (callable): A function taking the key and returning True if the entry should be removed.
+
+        Returns:
+            int: The number of removed entries.
+        """
+        with self.lock:
+            keys_to_delete = [key for key in self.cache if predicate is None or predicate(key)]
+            for key in keys_to_delete:
+                self._remove(key)
+        if keys_to_delete:
+            logger.info(f"Invalidated {len(keys_to_delete)} entries from cache: {self.cache_name}")
+        return len(keys_to_delete)
+
+    def _remove(self, key):
+        _, size, _ = self.cache.pop(key)
+        self.size_bytes -= size
+
+    def get_cache_size(self, options):
+        """
+        Get the current number of entries in the cache.
+
+        Returns:
+            Iterable[Observation]: The current number of items in the cache.
+        """
+        with self.lock:
+            return [Observation(value=len(self.cache))]
+
+    def get_cache_size_bytes(self, options):
+        """
+        Get the current estimated size of the cache in bytes.
+
+        Returns:
+            Iterable[Observation]: The current size of the cache in bytes.
+        """
+        with self.lock:
+            return [Observation(value=self.size_bytes)]
+
+    def get_cache_hit_ratio(self, options):
+        """
+        Get the cache hit ratio.
+
+        Returns:
+            Iterable[Observation]: The cache hit ratio.
+        """
+        with self.lock:
+            total_accesses = self.hits + self.misses
+            if total_accesses == 0:
+                return [Observation(value=0.0)]
+            return [Observation(value=self.hits / total_accesses)]
+
+    def get_cache_eviction_rate(self, options):
+        """
+        Get the cache eviction rate.
+
+        Returns:
+            Iterable[Observation]: The cache eviction rate.
+        """
+        with self.lock:
+            total_accesses = self.hits + self.misses
+            if total_accesses == 0:
+                return [Observation(value=0.0)]
+            return [Observation(value=self.evictions / total_accesses)]
+
+
+def estimate_size(value, _seen=None) -> int:
+    """
+    Estimate the memory size in bytes of the given value, following containers and object attributes.
+
+    Args:
+        value (Any): The value to estimate the size of.
+
+    Returns:
+        int: The estimated size in bytes.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _seen) for item in value)
+    elif hasattr(value, '__dict__'):
+        size += estimate_size(vars(value), _seen)
+    return size
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from botocore.config import Config
+from opentelemetry import metrics
+from opentelemetry.metrics import Observation
+
+from api.shield.utils import config_utils
+from core.utils import Singleton
+
+logger = logging.getLogger(__name__)
+meter = metrics.get_meter(__name__)
+
+
+class BedrockRuntimeClientPool(Singleton):
+    """
+    Pool of the Bedrock runtime clients used to apply the AWS Bedrock guardrails.
+
+    Creating a Boto3 client resolves the credentials and the endpoint, and each client keeps its own HTTP connection
+    pool, so the clients are reused across the scans instead of being created for each message. The clients are
+    keyed by region, guardrail connection and a hash of the connection details, so a change of the connection
+    details gets a new client. Clients are recreated after a time to live, as the credentials of assumed roles
+    expire, and the least recently used clients are dropped once the pool is full.
+
+    Attributes:
+        max_size (int): The maximum number of clients in the pool.
+        ttl_sec (int): The time (in seconds) a client is reused after its creation.
+        max_pool_connections (int): The maximum number of HTTP connections each client keeps open.
+        endpoint_url (str): The Bedrock runtime endpoint, e.g. a local stub endpoint, None for the AWS endpoint.
+        clients (OrderedDict): The clients and their expiry time, by client key, in least recently used order.
+    """
+
+    def __init__(self):
+        if self.is_instance_initialized():
+            return
+        self.max_size = config_utils.get_property_value_int("bedrock_client_pool_max_size", 16)
+        self.ttl_sec = config_utils.get_property_value_int("bedrock_client_pool_ttl_sec", 900)
+        self.max_pool_connections = config_utils.get_property_value_int("bedrock_client_max_pool_connections", 10)
+        self.endpoint_url = config_utils.get_property_value("bedrock_runtime_endpoint_url")
+        self.clients = OrderedDict()
+        self.lock = Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+
+        # OTel metrics
+        self.pool_size_metric = meter.create_observable_gauge(
+            name="bedrock_client_pool_size",
+            callbacks=[self.get_pool_size],
+            description="The number of Bedrock runtime clients in the pool"
+        )
+
+    def get_client(self, connection_details: dict, connection_name: str = None):
+        """
+        Get a Bedrock runtime client for the given connection details, creating it when the pool has none.
+
+        Args:
+            connection_details (dict): The decrypted connection details of the guardrail connection.
+            connection_name (str): The name of the guardrail connection.
+
+        Returns:
+            botocore.client.BaseClient: The Bedrock runtime client.
+        """
+        connection_details = connection_details or {}
+        key = get_client_key(connection_details, connection_name)
+        with self.lock:
+            entry = self.clients.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self.clients.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        client = self._create_client(connection_details)
+        with self.lock:
+            self.clients[key] = (client, time.monotonic() + self.ttl_sec)
+            self.clients.move_to_end(key)
+            while len(self.clients) > self.max_size:
+                self.clients.popitem(last=False)
+        return client
+
+    def _create_client(self, connection_details: dict):
+        from api.guardrails.providers.backend.bedrock import BedrockGuardrailProvider
+        client_kwargs = {"config": Config(max_pool_connections=self.max_pool_connections)}
+        if self.endpoint_url:
+            client_kwargs["endpoint_url"] = self.endpoint_url
+        logger.debug(f"Creating Bedrock runtime client for region {connection_details.get('region', 'us-east-1')}")
+        # the provider sets the default region on the connection details, so it gets a copy
+        bedrock_client_provider = BedrockGuardrailProvider(dict(connection_details))
+        return bedrock_client_provider.create_bedrock_client('bedrock-runtime', **client_kwargs)
+
+    def clear(self):
+        """
+        Remove all the clients from the pool.
+        """
+        with self.lock:
+            self.clients.clear()
+
+    def get_pool_size(self, options):
+        """
+        Get the number of clients in the pool.
+
+        Returns:
+            Iterable[Observation]: The current pool size.
+        """
+        with self.lock:
+            return [Observation(value=len(self.clients))]
+
+
+def get_client_key(connection_details: dict, connection_name: str = None) -> tuple:
+    """
+    Get the pool key of the given connection details, the credentials are only part of the key as a hash.
+
+    Args:
+        connection_details (dict): The decrypted connection details of the guardrail connection.
+        connection_name (str): The name of the guardrail connection.
+
+    Returns:
+        tuple: The region, the connection name and the hash of the connection details.
+    """
+    credentials_hash = hashlib.sha256(json.dumps(connection_details, sort_keys=True, default=str).encode("utf-8"))
+    return connection_details.get('region', 'us-east-1'), connection_name, credentials_hash.hexdigest()
@@ -1,3 +1,4 @@
+import json
 import logging
 
 from api.shield.client.base_rest_http_client import BaseRESTHttpClient
@@ -63,3 +64,33 @@ class FluentdRestHttpClient(BaseRESTHttpClient):
         except Exception as ex:
             logger.error(f"Failed to log message: {message} with error: {ex}")
             raise ShieldException(f"Failed to log message: {message} with error: {ex}")
+
+    def log_messages(self, messages: list):
+        """
+        Sends a batch of log messages to the Fluentd service, in a single NDJSON request.
+
+        Args:
+            messages (list): The messages to be logged.
+
+        Raises:
+            ShieldException: If an error occurs while logging the messages.
+        """
+
+        logger.debug(f"Using base-url={self.baseUrl} , tag={self.audit_tag} and logging {len(messages)} messages")
+        try:
+            headers = self.get_headers()
+            headers["Content-Type"] = "application/x-ndjson"
+            response = self.post(
+                url="/" + self.audit_tag,
+                headers=headers,
+                body="".join(json.dumps(message) + "\n" for message in messages)
+            )
+            logger.debug(f"logging response received: {response.__str__()}")
+            if response.status_code == 200:
+                logger.debug(f"Successfully logged {len(messages)} messages")
+            else:
+                logger.error(f"Failed to log {len(messages)} messages with response: {response.__str__()}")
+                raise ShieldException(f"Failed to log {len(messages)} messages with response: {response.__str__()}")
+        except Exception as ex:
+            logger.error(f"Failed to log {len(messages)} messages with error: {ex}")
+            raise ShieldException(f"Failed to log {len(messages)} messages with error: {ex}")
@@ -1,12 +1,15 @@
 from api.shield.services.shield_service import ShieldService
 from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
 from api.shield.utils.custom_exceptions import BadRequestException
 from api.shield.model.authorize_request import AuthorizeRequest
-from api.shield.utils import json_utils
+from api.shield.utils import json_utils, config_utils
+import hashlib
 import json
 import logging
 
 from core.utils import SingletonDepends
+from paig_common.encryption import SUPPORTED_ENCRYPTION_MODES, negotiate_encryption_mode
 
 logger = logging.getLogger(__name__)
 
@@ -63,8 +66,17 @@ class ShieldController:
                                                     shield_plugin_key_id,
                                                     application_key)
 
-        return Response(content=f"Initialization completed successfully for tenant {x_tenant_id}",
-                        media_type="text/plain")
+        message = f"Initialization completed successfully for tenant {x_tenant_id}"
+
+        # Plugins offering encryption modes get the negotiated mode, older plugins keep the plain text response
+        encryption_modes = req_obj.get("encryptionModes")
+        if encryption_modes is None:
+            return Response(content=message, media_type="text/plain")
+
+        encryption_mode = negotiate_encryption_mode(
+            encryption_modes, config_utils.get_property_value_list("shield_encryption_modes", SUPPORTED_ENCRYPTION_MODES))
+        return Response(content=json.dumps({"message": message, "encryptionMode": encryption_mode}),
+                        media_type="application/json")
 
     async def authorize(self, request, x_tenant_id, x_user_role):
         """
@@ -91,14 +103,62 @@ class ShieldController:
 
         return Response(content=response, media_type="application/json")
 
-    async def authorize_vectordb(self, request, x_tenant_id, x_user_role):
+    async def authorize_batch(self, request, x_tenant_id, x_user_role):
+        """
+        Authorizes a batch of independent requests for a specific tenant and user role.
+
+        Args:
+            request (dict): The batch request, with the authorization requests in the `requests` list.
+            x_tenant_id (str): The tenant ID.
+            x_user_role (str): The user role.
+
+        Returns:
+            StreamingResponse: A newline delimited JSON response with one line per request, in order of completion.
+            Each line holds the `index` of the request in the batch and either its authorization `response` or the
+            `error_code` and `message` of the error which occurred while authorizing it.
+
+        Raises:
+            BadRequestException: If the requests are missing or the batch is too large.
+        """
+        requests = request.get("requests") if isinstance(request, dict) else None
+        if not isinstance(requests, list) or not requests:
+            raise BadRequestException("Missing requests in batch request")
+
+        max_batch_size = config_utils.get_property_value_int("shield_authorize_batch_max_size", 1000)
+        if len(requests) > max_batch_size:
+            raise BadRequestException(f"Batch request exceeds the maximum of {max_batch_size} requests")
+
+        logger.debug(f"Batch authorization started for tenant: {x_tenant_id} with {len(requests)} requests")
+
+        invalid_requests = {}
+        auth_requests, auth_request_indexes = [], []
+        for index, req_data in enumerate(requests):
+            try:
+                auth_requests.append(AuthorizeRequest(req_data, x_tenant_id, x_user_role))
+                auth_request_indexes.append(index)
+            except Exception as e:
+                invalid_requests[index] = e
+
+        async def stream_responses():
+            for index, error in invalid_requests.items():
+                yield _batch_item_line(index, error)
+            async for position, auth_result in self.shield_service.authorize_batch(auth_requests):
+                yield _batch_item_line(auth_request_indexes[position], auth_result)
+
+        return StreamingResponse(stream_responses(), media_type="application/x-ndjson")
+
+    async def authorize_vectordb(self, request, x_tenant_id, x_user_role, if_none_match=None):
         """
         Authorizes a VectorDB request for a specific tenant and user role.
 
+        The response carries an ETag of its content, a client sending the ETag of the response it holds in the
+        If-None-Match header gets a 304 response without body while the result is unchanged.
+
         Args:
             request (Request): The incoming HTTP request.
             x_tenant_id (str): The tenant ID.
             x_user_role (str): The user role.
+            if_none_match (str): The ETags of the responses the client holds.
 
         Returns:
             Response: A JSON response containing the VectorDB authorization result.
@@ -107,7 +167,10 @@ class ShieldController:
         logger.debug(f"Incoming request {masked_req_obj}")
         vectordb_auth_res = await self.shield_service.authorize_vectordb(x_tenant_id, x_user_role, request)
         response = json.dumps(vectordb_auth_res.__dict__)
-        return Response(content=response, media_type="application/json")
+        etag = _get_etag(response)
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(content=response, media_type="application/json", headers={"ETag": etag})
 
     async def audit(self, request):
         """
@@ -144,3 +207,32 @@ class ShieldController:
         response = await self.shield_service.guardrail_test(request, tenant_id, user_role)
 
         return Response(content=json.dumps(response), media_type="application/json")
+
+
+def _batch_item_line(index, auth_result):
+    """
+    Builds the newline delimited JSON line of a request of a batch authorization.
+    """
+    if isinstance(auth_result, Exception):
+        error_code = 400 if isinstance(auth_result, BadRequestException) else 500
+        item = {"index": index, "error_code": error_code, "success": False, "message": str(auth_result)}
+    else:
+        item = {"index": index, "response": auth_result.__dict__}
+    return json.dumps(item) + "\n"
+
+
+def _get_etag(content: str) -> str:
+    """
+    Builds the ETag of a response content.
+    """
+    return '"' + hashlib.sha256(content.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match, etag):
+    """
+    Checks if an If-None-Match header value holds the given ETag, the weak ETags being compared as strong ones.
+    """
+    if not if_none_match:
+        return False
+    client_etags = [client_etag.strip().removeprefix("W/") for client_etag in if_none_match.split(",")]
+    return "*" in client_etags or etag in client_etags
@@ -1,12 +1,81 @@
+import asyncio
 import os
+import threading
+import uuid
+from collections import defaultdict
+from typing import List
 
+from opentelemetry import metrics
+from opentelemetry.metrics import Observation
 from paig_common.audit_spooler import AuditLogger
 
 from api.shield.client.http_fluentd_client import FluentdRestHttpClient
 from api.shield.model.shield_audit import ShieldAudit
+from api.shield.utils import config_utils
 import logging
 
 logger = logging.getLogger(__name__)
+meter = metrics.get_meter(__name__)
+
+
+def get_audit_batch_config(property_prefix: str = "audit", max_batch_size: int = 100, batch_linger_ms: int = 200,
+                           sender_workers: int = 2, max_replay_size: int = 1000) -> dict:
+    """
+    Get the batching configs of the audit loggers.
+
+    Args:
+        property_prefix (str): The prefix of the batching properties of the audit logger.
+        max_batch_size (int): The default max batch size.
+        batch_linger_ms (int): The default batch linger time.
+        sender_workers (int): The default number of sender workers.
+        max_replay_size (int): The default number of spooled audit events replayed at a time.
+
+    Returns:
+        dict: The max batch size, batch linger time, sender workers and max replay size of the audit pipeline.
+    """
+    return {
+        "max_batch_size": config_utils.get_property_value_int(f"{property_prefix}_batch_max_size", max_batch_size),
+        "batch_linger_ms": config_utils.get_property_value_int(f"{property_prefix}_batch_linger_ms", batch_linger_ms),
+        "sender_workers": config_utils.get_property_value_int(f"{property_prefix}_sender_workers", sender_workers),
+        "max_replay_size": config_utils.get_property_value_int(f"{property_prefix}_spool_replay_max_size",
+                                                               max_replay_size)
+    }
+
+
+def create_audit_logger_metrics(audit_logger: AuditLogger, name: str):
+    """
+    Create the backpressure gauges of an audit logger.
+
+    Args:
+        audit_logger (AuditLogger): The audit logger.
+        name (str): The name of the audit logger, used as metric name prefix.
+    """
+    for metric_name, description in [("queue_size", "The number of audit events waiting to be pushed"),
+                                      ("failed_queue_size", "The number of audit events waiting for a retry"),
+                                      ("spooled_audit_event_count", "The number of spooled audit events not pushed"),
+                                      ("queue_full_count", "The number of audit events rejected by a full queue")]:
+        meter.create_observable_gauge(
+            name=f"{name}_audit_logger_{metric_name}",
+            callbacks=[lambda options, key=metric_name: [Observation(value=audit_logger.get_metrics()[key])]],
+            description=description
+        )
+
+
+def group_audit_events(audit_events: List[ShieldAudit], get_key) -> dict:
+    """
+    Group the audit events of a batch, keeping their order.
+
+    Args:
+        audit_events (List[ShieldAudit]): The audit events of the batch.
+        get_key (callable): Returns the group key of an audit event.
+
+    Returns:
+        dict: The list of audit events, by group key.
+    """
+    groups = defaultdict(list)
+    for audit_event in audit_events:
+        groups[get_key(audit_event)].append(audit_event)
+    return groups
 
 
 def create_message_log_path(directory_path):
@@ -33,8 +102,10 @@ class FluentdAuditLogger(AuditLogger):
         """
         # Setting max_queue_size to 0 to make the queue size infinite
         super().__init__(audit_spool_dir=audit_spool_dir, audit_event_cls=ShieldAudit,
-                         max_queue_size=max_queue_size, audit_event_queue_timeout=audit_event_queue_timeout_sec)
+                         max_queue_size=max_queue_size, audit_event_queue_timeout=audit_event_queue_timeout_sec,
+                         **get_audit_batch_config())
         self.http_fluentd_client = http_fluentd_client
+        create_audit_logger_metrics(self, "fluentd")
 
     def push_audit_event_to_server(self, audit_event: ShieldAudit):
         """
@@ -45,6 +116,15 @@ class FluentdAuditLogger(AuditLogger):
         """
         self.http_fluentd_client.log_message(audit_event.to_payload_dict())
 
+    def push_audit_events_to_server(self, audit_events: List[ShieldAudit]):
+        """
+        Pushes a batch of audit events to the server, in a single NDJSON request.
+
+        Args:
+            audit_events (List[ShieldAudit]): The audit events to push.
+        """
+        self.http_fluentd_client.log_messages([audit_event.to_payload_dict() for audit_event in audit_events])
+
 
 class S3AuditLogger(AuditLogger):
     """
@@ -66,8 +146,12 @@ class S3AuditLogger(AuditLogger):
         """
         # Setting max_queue_size to 0 to make the queue size infinite
         super().__init__(audit_spool_dir=audit_spool_dir, audit_event_cls=ShieldAudit,
-                         max_queue_size=max_queue_size, audit_event_queue_timeout=audit_event_queue_timeout_sec)
+                         max_queue_size=max_queue_size, audit_event_queue_timeout=audit_event_queue_timeout_sec,
+                         **get_audit_batch_config())
         self.log_message_in_s3 = log_message_in_s3
+        # The writer rolling the audit events up into part files, None to write the batches directly
+        self.rollup_writer = None
+        create_audit_logger_metrics(self, "s3")
 
     def push_audit_event_to_server(self, audit_event: ShieldAudit):
         """
@@ -83,6 +167,28 @@ class S3AuditLogger(AuditLogger):
             f"Uploading logs to S3 bucket: {self.log_message_in_s3.bucket_name} with object key: {full_object_key}")
         self.log_message_in_s3.write_log_to_s3(full_object_key, audit_event)
 
+    def push_audit_events_to_server(self, audit_events: List[ShieldAudit]):
+        """
+        Pushes a batch of audit events to the server, as one multi-record object per tenant and day, or to the
+        rolled up part files when the rollup is enabled.
+
+        Args:
+            audit_events (List[ShieldAudit]): The audit events to push.
+        """
+        if self.rollup_writer is not None:
+            self.rollup_writer.append(audit_events)
+            return
+        batch_id = uuid.uuid4().hex
+        groups = group_audit_events(audit_events, self.log_message_in_s3.create_folder_structure)
+        for audit_event_group in groups.values():
+            object_key = self.log_message_in_s3.create_batch_file_structure(audit_event_group[0], batch_id)
+            full_object_key = "/".join(
+                [self.log_message_in_s3.bucket_prefix, object_key]) if self.log_message_in_s3.bucket_prefix else object_key
+            logger.debug(
+                f"Uploading {len(audit_event_group)} logs to S3 bucket: {self.log_message_in_s3.bucket_name} with "
+                f"object key: {full_object_key}")
+            self.log_message_in_s3.write_logs_to_s3(full_object_key, audit_event_group)
+
 
 class LocalAuditLogger(AuditLogger):
     """
@@ -105,8 +211,12 @@ class LocalAuditLogger(AuditLogger):
         """
         # Setting max_queue_size to 0 to make the queue size infinite
         super().__init__(audit_spool_dir=audit_spool_dir, audit_event_cls=ShieldAudit,
-                         max_queue_size=max_queue_size, audit_event_queue_timeout=audit_event_queue_timeout_sec)
+                         max_queue_size=max_queue_size, audit_event_queue_timeout=audit_event_queue_timeout_sec,
+                         **get_audit_batch_config())
         self.log_message_in_local = log_message_in_local
+        # The writer rolling the audit events up into part files, None to write the batches directly
+        self.rollup_writer = None
+        create_audit_logger_metrics(self, "local")
 
     def push_audit_event_to_server(self, audit_event: ShieldAudit):
         """
@@ -120,3 +230,70 @@ class LocalAuditLogger(AuditLogger):
         log_path = os.path.dirname(full_log_path)
         create_message_log_path(log_path)
         self.log_message_in_local.write_log_to_local_file(full_log_path, audit_event)
+
+    def push_audit_events_to_server(self, audit_events: List[ShieldAudit]):
+        """
+        Pushes a batch of audit events to the server, appending them to one file per tenant and time window, or to
+        the rolled up part files when the rollup is enabled.
+
+        Args:
+            audit_events (List[ShieldAudit]): The audit events to push.
+        """
+        if self.rollup_writer is not None:
+            self.rollup_writer.append(audit_events)
+            return
+        groups = group_audit_events(audit_events, self.log_message_in_local.create_window_file_structure)
+        for log_file, audit_event_group in groups.items():
+            full_log_path = os.path.join(self.log_message_in_local.directory_path, log_file)
+            create_message_log_path(os.path.dirname(full_log_path))
+            self.log_message_in_local.append_logs_to_local_file(full_log_path, audit_event_group)
+
+
+class DataServiceAuditLogger(AuditLogger):
+    """
+    DataServiceAuditLogger class for logging audit events to the data service, with one bulk insert per batch.
+    """
+
+    def __init__(self, log_message_in_data_service, audit_spool_dir: str,
+                 max_queue_size: int,
+                 audit_event_queue_timeout_sec: int):
+        """
+        Initializes a DataServiceAuditLogger object.
+
+        Args:
+            log_message_in_data_service (LogMessageInDataService): The data service logger.
+            audit_spool_dir (str): The directory path where spooled audit events are stored.
+            max_queue_size (int): The maximum queue size.
+            audit_event_queue_timeout_sec (int): The audit event queue timeout in seconds.
+        """
+        # Larger batches than the other loggers, and one sender as the database serializes the writes anyway
+        super().__init__(audit_spool_dir=audit_spool_dir, audit_event_cls=ShieldAudit,
+                         max_queue_size=max_queue_size, audit_event_queue_timeout=audit_event_queue_timeout_sec,
+                         **get_audit_batch_config("data_service_audit", max_batch_size=500, batch_linger_ms=500,
+                                                  sender_workers=1))
+        self.log_message_in_data_service = log_message_in_data_service
+        # The data service is async, the batches are written on an event loop owned by the logger
+        self.event_loop = asyncio.new_event_loop()
+        self.event_loop_thread = threading.Thread(target=self.event_loop.run_forever, name=f"{self.name}-event-loop")
+        self.event_loop_thread.daemon = True
+        self.event_loop_thread.start()
+        create_audit_logger_metrics(self, "data_service")
+
+    def push_audit_event_to_server(self, audit_event: ShieldAudit):
+        """
+        Pushes the audit event to the server.
+
+        Args:
+            audit_event (T): The audit event to push.
+        """
+        self.push_audit_events_to_server([audit_event])
+
+    def push_audit_events_to_server(self, audit_events: List[ShieldAudit]):
+        """
+        Pushes a batch of audit events to the server, in a single bulk insert.
+
+        Args:
+            audit_events (List[ShieldAudit]): The audit events to push.
+        """
+        asyncio.run_coroutine_threadsafe(self.log_message_in_data_service.write_audits(audit_events),
+                                         self.event_loop).result()
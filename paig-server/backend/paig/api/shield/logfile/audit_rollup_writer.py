@@ -0,0 +1,371 @@
+import gzip
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import traceback
+import uuid
+import zlib
+from typing import List
+
+from api.shield.logfile.audit_loggers import group_audit_events
+from api.shield.model.shield_audit import ShieldAudit
+from api.shield.utils import config_utils
+from api.shield.utils.custom_exceptions import ShieldException
+from core.utils import acquire_lock
+
+logger = logging.getLogger(__name__)
+
+NDJSON_GZ_SUFFIX = ".ndjson.gz"
+PARQUET_SUFFIX = ".parquet"
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+RECOVERY_READ_SIZE = 1048576
+
+# The file locks are held per process, so the writers alive in this process are tracked separately
+_live_writer_ids = set()
+
+
+class RollupPart:
+    """
+    An open part file of the audit rollup, staged on the local disk until it is sealed.
+
+    Attributes:
+        part_key (str): The key of the part file relative to the audit root, e.g. the S3 object key.
+        staged_path (str): The path of the staged part file.
+        record_count (int): The number of audit events in the part.
+        size_bytes (int): The compressed size of the part.
+        min_event_time (int): The smallest event time of the audit events in the part.
+        max_event_time (int): The largest event time of the audit events in the part.
+        opened_at (float): The monotonic time the part was opened.
+    """
+
+    def __init__(self, part_key: str, staged_path: str):
+        self.part_key = part_key
+        self.staged_path = staged_path
+        self.record_count = 0
+        self.size_bytes = 0
+        self.min_event_time = None
+        self.max_event_time = None
+        self.opened_at = time.monotonic()
+
+    def to_manifest_entry(self, part_key: str) -> dict:
+        return {
+            "key": part_key,
+            "records": self.record_count,
+            "size_bytes": self.size_bytes,
+            "min_event_time": self.min_event_time,
+            "max_event_time": self.max_event_time,
+            "sealed_time": int(time.time() * 1000)
+        }
+
+
+class AuditRollupWriter:
+    """
+    Rolls the audit events up into compressed multi-record part files, instead of writing an object per event or
+    per batch.
+
+    The audit events are appended as gzip members to a part file per tenant and time window, staged on the local
+    disk, so the events are durable once appended and the spooled audit events can be acknowledged. A part is
+    sealed and published by the sink once it reaches audit_rollup_max_part_size_bytes, once it is older than
+    audit_rollup_max_part_age_sec, or when the writer is closed. The sealed parts are published outside the lock of
+    the open parts, so the appends are not blocked by the uploads. Every published part is listed in the manifest of
+    the writer in the part folder, which lets the readers find the parts without listing the folder.
+
+    Each writer stages its parts in its own directory, locked while the writer is alive, so the parts staged by a
+    writer which did not close are sealed by the next writer.
+
+    The sink must implement create_window_file_structure, publish_rollup_part(staged_path, part_key),
+    read_rollup_manifest(manifest_key) and publish_rollup_manifest(manifest_key, manifest).
+
+    Attributes:
+        sink (LogMessageInFile): The audit file sink publishing the sealed parts and the manifests.
+        staging_dir (str): The directory where the open parts are staged.
+        writer_id (str): The unique ID of the writer, part of the part file and manifest names.
+        open_parts (dict): The open parts, by tenant and time window.
+        sealed_parts (list): The sealed parts which are not published yet, published again if publishing failed.
+        manifests (dict): The manifest entries of the published parts, by part folder.
+    """
+
+    def __init__(self, sink, staging_dir: str):
+        self.sink = sink
+        self.staging_dir = staging_dir
+        self.max_part_size_bytes = config_utils.get_property_value_int("audit_rollup_max_part_size_bytes", 33554432)
+        self.max_part_age_sec = config_utils.get_property_value_int("audit_rollup_max_part_age_sec", 300)
+        self.part_format = config_utils.get_property_value("audit_rollup_format", "ndjson").lower()
+        if self.part_format not in ("ndjson", "parquet"):
+            raise ShieldException(f"Audit rollup format {self.part_format} is invalid! Supported formats are ndjson "
+                                  f"and parquet")
+        if self.part_format == "parquet":
+            try:
+                import pyarrow.json  # noqa: F401
+                import pyarrow.parquet  # noqa: F401
+            except ImportError:
+                raise ShieldException("Audit rollup format parquet requires the pyarrow package to be installed")
+
+        self.writer_id = uuid.uuid4().hex[:12]
+        self.writer_dir = os.path.join(self.staging_dir, self.writer_id)
+        os.makedirs(self.writer_dir, exist_ok=True)
+        self.writer_lock = acquire_lock(os.path.join(self.staging_dir, f"{self.writer_id}.lock"))
+        _live_writer_ids.add(self.writer_id)
+        self.part_sequence = 0
+        self.open_parts = {}
+        self.sealed_parts = []
+        self.manifests = {}
+        self.lock = threading.RLock()
+        # Serializes the publishing of the parts and the manifest updates, the appends only need self.lock
+        self.publish_lock = threading.Lock()
+        self.closed = False
+
+        self.recover_staged_parts()
+
+        self.rotate_thread = threading.Thread(target=self.rotate_expired_parts_periodically,
+                                              name="audit-rollup-rotate")
+        self.rotate_thread.daemon = True
+        self.rotate_thread.start()
+
+    def append(self, audit_events: List[ShieldAudit]):
+        """
+        Appends the audit events to the open parts of their tenant and time window, sealing the parts which are
+        full.
+
+        Args:
+            audit_events (List[ShieldAudit]): The audit events to append.
+
+        Raises:
+            ShieldException: If there is an error writing the audit events to the staged parts.
+        """
+        groups = group_audit_events(audit_events, self.sink.create_window_file_structure)
+        with self.lock:
+            if self.closed:
+                raise ShieldException("Audit rollup writer is closed")
+            for window_file, audit_event_group in groups.items():
+                part = self.open_parts.get(window_file)
+                if part is None:
+                    part = self.open_parts[window_file] = self.open_part(window_file)
+                data = gzip.compress("".join(json.dumps(audit_event.__dict__) + "\n"
+                                             for audit_event in audit_event_group).encode("utf-8"))
+                try:
+                    with open(part.staged_path, 'ab') as part_file:
+                        part_file.write(data)
+                except Exception as e:
+                    logger.error(f"Error writing audit rollup part {part.staged_path}=>{e.__class__}:{e}\n"
+                                 f"{traceback.format_exc()}")
+                    raise ShieldException(f"Error writing audit rollup part {part.staged_path}=>{e.__class__}:{e}")
+                part.record_count += len(audit_event_group)
+                part.size_bytes += len(data)
+                event_times = [audit_event.eventTime for audit_event in audit_event_group]
+                part.min_event_time = min(filter(None, [part.min_event_time, *event_times]), default=None)
+                part.max_event_time = max(filter(None, [part.max_event_time, *event_times]), default=None)
+                if part.size_bytes >= self.max_part_size_bytes:
+                    self.seal_part(window_file)
+        self.publish_sealed_parts(blocking=False)
+
+    def open_part(self, window_file: str) -> RollupPart:
+        self.part_sequence += 1
+        part_key = f"{window_file[:-len('.json')]}_{self.writer_id}_{self.part_sequence:06d}{NDJSON_GZ_SUFFIX}"
+        staged_path = os.path.join(self.writer_dir, part_key)
+        os.makedirs(os.path.dirname(staged_path), exist_ok=True)
+        return RollupPart(part_key, staged_path)
+
+    def seal_part(self, window_file: str):
+        """
+        Seals the open part of the given tenant and time window, the next audit events of the window go to a new
+        part. The sealed part is published by publish_sealed_parts.
+
+        Args:
+            window_file (str): The tenant and time window file of the part.
+        """
+        with self.lock:
+            self.sealed_parts.append(self.open_parts.pop(window_file))
+
+    def publish_sealed_parts(self, blocking: bool = True):
+        """
+        Publishes the sealed parts with the sink and adds them to the manifests of their folders. The parts which
+        could not be published stay staged, they are published again by the next rotation.
+
+        Args:
+            blocking (bool): Whether to wait for the thread publishing the parts, if any, instead of leaving the
+            parts sealed meanwhile to it or to the next rotation.
+        """
+        if not self.publish_lock.acquire(blocking=blocking):
+            return
+        try:
+            attempted = set()
+            while True:
+                with self.lock:
+                    sealed_parts = [part for part in self.sealed_parts if id(part) not in attempted]
+                if not sealed_parts:
+                    return
+                for part in sealed_parts:
+                    attempted.add(id(part))
+                    try:
+                        self.publish_part(part)
+                    except Exception as e:
+                        logger.error(f"Error publishing audit rollup part {part.part_key}=>{e.__class__}:{e}")
+                        continue
+                    with self.lock:
+                        self.sealed_parts.remove(part)
+        finally:
+            self.publish_lock.release()
+
+    def publish_part(self, part: RollupPart):
+        part_key, staged_path = part.part_key, part.staged_path
+        if self.part_format == "parquet":
+            staged_path = self.convert_to_parquet(staged_path)
+            part_key = part_key[:-len(NDJSON_GZ_SUFFIX)] + PARQUET_SUFFIX
+        self.sink.publish_rollup_part(staged_path, part_key)
+
+        folder = os.path.dirname(part_key)
+        manifest_key = f"{folder}/_manifest/{self.writer_id}.json"
+        if folder not in self.manifests:
+            existing_manifest = self.sink.read_rollup_manifest(manifest_key) or {}
+            self.manifests[folder] = existing_manifest.get("parts", [])
+        manifest_parts = self.manifests[folder] + [part.to_manifest_entry(part_key)]
+        self.sink.publish_rollup_manifest(manifest_key, {"writer_id": self.writer_id, "parts": manifest_parts})
+        self.manifests[folder] = manifest_parts
+
+        for path in {part.staged_path, staged_path}:
+            if os.path.exists(path):
+                os.remove(path)
+        logger.debug(f"Sealed audit rollup part {part_key} with {part.record_count} audit events")
+
+    @staticmethod
+    def convert_to_parquet(staged_path: str) -> str:
+        import pyarrow.json
+        import pyarrow.parquet
+        parquet_path = staged_path[:-len(NDJSON_GZ_SUFFIX)] + PARQUET_SUFFIX
+        with gzip.open(staged_path, 'rb') as part_file:
+            table = pyarrow.json.read_json(part_file)
+        pyarrow.parquet.write_table(table, parquet_path, compression="zstd")
+        return parquet_path
+
+    def rotate_expired_parts(self):
+        """
+        Seals the open parts older than audit_rollup_max_part_age_sec, and publishes the sealed parts.
+        """
+        with self.lock:
+            now = time.monotonic()
+            for window_file in [window_file for window_file, part in self.open_parts.items()
+                                if now - part.opened_at >= self.max_part_age_sec]:
+                self.seal_part(window_file)
+        self.publish_sealed_parts()
+        with self.publish_lock, self.lock:
+            # The manifests of the folders without staged parts are read back from the sink when needed
+            staged_folders = {os.path.dirname(part.part_key)
+                              for part in [*self.open_parts.values(), *self.sealed_parts]}
+            for folder in [folder for folder in self.manifests if folder not in staged_folders]:
+                del self.manifests[folder]
+
+    def rotate_expired_parts_periodically(self):
+        while not self.closed:
+            time.sleep(max(min(self.max_part_age_sec, 10), 1))
+            self.rotate_expired_parts()
+
+    def recover_staged_parts(self):
+        """
+        Seals the parts left in the staging directory by the writers which are not alive anymore.
+        """
+        for entry in sorted(os.listdir(self.staging_dir)):
+            writer_dir = os.path.join(self.staging_dir, entry)
+            if entry in _live_writer_ids or not os.path.isdir(writer_dir):
+                continue
+            lock_file_path = os.path.join(self.staging_dir, f"{entry}.lock")
+            writer_lock = acquire_lock(lock_file_path)
+            if writer_lock is None:
+                # The writer is still alive
+                continue
+            try:
+                for root, _, files in os.walk(writer_dir):
+                    for file_name in sorted(files):
+                        if file_name.endswith(NDJSON_GZ_SUFFIX):
+                            self.recover_staged_part(writer_dir, os.path.join(root, file_name))
+                shutil.rmtree(writer_dir)
+            except Exception as e:
+                logger.error(f"Error recovering audit rollup parts of {writer_dir}=>{e.__class__}:{e}")
+            finally:
+                writer_lock.release()
+            if not os.path.exists(writer_dir) and os.path.exists(lock_file_path):
+                os.remove(lock_file_path)
+
+    def recover_staged_part(self, writer_dir: str, staged_path: str):
+        """
+        Publishes a part staged by a writer which is not alive anymore. A gzip member cut by a crash while the
+        audit events were appended is truncated, the audit events of the complete members are published.
+        """
+        part = RollupPart(os.path.relpath(staged_path, writer_dir).replace(os.sep, "/"), staged_path)
+        complete_size = 0
+        try:
+            for member_data, complete_size in read_complete_members(staged_path):
+                for line in member_data.decode("utf-8").splitlines():
+                    event_time = json.loads(line).get("eventTime")
+                    part.record_count += 1
+                    part.min_event_time = min(filter(None, [part.min_event_time, event_time]), default=None)
+                    part.max_event_time = max(filter(None, [part.max_event_time, event_time]), default=None)
+        except zlib.error as e:
+            logger.warning(f"Invalid gzip member in audit rollup part {staged_path}=>{e.__class__}:{e}")
+        if complete_size < os.path.getsize(staged_path):
+            logger.warning(f"Truncating the incomplete audit events at offset {complete_size} of audit rollup part "
+                           f"{staged_path}")
+            os.truncate(staged_path, complete_size)
+        if part.record_count == 0:
+            os.remove(staged_path)
+            return
+        part.size_bytes = complete_size
+        with self.publish_lock:
+            self.publish_part(part)
+        logger.info(f"Recovered audit rollup part {part.part_key} with {part.record_count} audit events")
+
+    def close(self):
+        """
+        Seals all the open parts, called on shutdown.
+        """
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            for window_file in list(self.open_parts):
+                self.seal_part(window_file)
+        self.publish_sealed_parts()
+        with self.lock:
+            # The parts which could not be published stay staged for the next writer
+            if not self.sealed_parts:
+                shutil.rmtree(self.writer_dir, ignore_errors=True)
+            if self.writer_lock is not None:
+                self.writer_lock.release()
+            _live_writer_ids.discard(self.writer_id)
+
+
+def read_complete_members(staged_path: str):
+    """
+    Reads the gzip members of a staged part, one per append.
+
+    Args:
+        staged_path (str): The path of the staged part file.
+
+    Yields:
+        tuple: The decompressed data of each complete member, and the size of the part up to the end of the
+        member. A member cut at the end of the file is not yielded.
+
+    Raises:
+        zlib.error: If a member is not valid gzip data.
+    """
+    with open(staged_path, 'rb') as part_file:
+        member_start = 0
+        member_read_size = 0
+        member_data = []
+        decompressor = zlib.decompressobj(GZIP_WBITS)
+        data = part_file.read(RECOVERY_READ_SIZE)
+        while data:
+            member_data.append(decompressor.decompress(data))
+            if not decompressor.eof:
+                member_read_size += len(data)
+                data = part_file.read(RECOVERY_READ_SIZE)
+                continue
+            member_start += member_read_size + len(data) - len(decompressor.unused_data)
+            yield b"".join(member_data), member_start
+            data = decompressor.unused_data or part_file.read(RECOVERY_READ_SIZE)
+            member_read_size = 0
+            member_data = []
+            decompressor = zlib.decompressobj(GZIP_WBITS)
@@ -1,14 +1,23 @@
+import os
+from typing import List
+
+from api.shield.logfile.audit_loggers import DataServiceAuditLogger
 from api.shield.logfile.log_message_in_file import LogMessageInFile
 from api.audit.api_schemas.access_audit_schema import BaseAccessAuditView
 from api.shield.model.shield_audit import ShieldAudit
+from api.shield.utils import config_utils
 
 
 class LogMessageInDataService(LogMessageInFile):
     """
     This class is responsible for logging messages in the data service. It inherits from the LogMessageInFile class.
 
+    With bulk insert enabled the audits are spooled and written in batches by a DataServiceAuditLogger, with one
+    multi-row insert per batch instead of one transaction per audit.
+
     Attributes:
         data_service: An instance of the data service controller's service.
+        bulk_insert_enabled (bool): Whether the audits are written in batches.
     """
 
     def __init__(self, data_store_controller):
@@ -20,6 +29,11 @@ class LogMessageInDataService(LogMessageInFile):
         """
         super().__init__()
         self.data_service = data_store_controller.get_service()
+        self.bulk_insert_enabled = config_utils.get_property_value_boolean("data_service_audit_bulk_insert_enabled",
+                                                                           True)
+        self.audit_spool_dir = os.path.join(
+            config_utils.get_property_value("audit_spool_dir", "/workdir/shield/audit-spool"), "data-service")
+        self.data_service_audit_logger = None
 
     async def log(self, log_data: ShieldAudit):
         """
@@ -31,9 +45,31 @@ class LogMessageInDataService(LogMessageInFile):
         Returns:
             None
         """
+        if self.bulk_insert_enabled:
+            self.get_or_create_data_service_audit_logger().log(log_data)
+            return
         transformed_audit: BaseAccessAuditView = self.transform_log_audit(log_data)
         await self.data_service.create_access_audit(transformed_audit)
 
+    async def write_audits(self, log_data_list: List[ShieldAudit]):
+        """
+        Writes a batch of audits to the data service, in a single bulk insert.
+
+        Args:
+            log_data_list: The audits to write, instances of ShieldAudit.
+        """
+        await self.data_service.create_access_audits([self.transform_log_audit(log_data)
+                                                      for log_data in log_data_list])
+
+    def get_or_create_data_service_audit_logger(self):
+        if self.data_service_audit_logger is None:
+            self.data_service_audit_logger = DataServiceAuditLogger(self, self.audit_spool_dir,
+                                                                    self.max_queue_size,
+                                                                    self.audit_event_queue_timeout_sec)
+            self.data_service_audit_logger.daemon = True
+            self.data_service_audit_logger.start()
+        return self.data_service_audit_logger
+
     def transform_log_audit(self, log_data: ShieldAudit) -> BaseAccessAuditView:
         """
         Transforms the provided log data into a BaseAccessAuditView instance.
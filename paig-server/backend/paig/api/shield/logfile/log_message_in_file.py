@@ -1,6 +1,8 @@
+import atexit
 from abc import abstractmethod
 from datetime import datetime
 
+from api.shield.logfile.audit_rollup_writer import AuditRollupWriter
 from api.shield.model.shield_audit import ShieldAudit
 from api.shield.utils import config_utils
 from api.shield.utils.custom_exceptions import ShieldException
@@ -22,6 +24,9 @@ class LogMessageInFile:
         self.audit_failure_error_enabled = config_utils.get_property_value_boolean("audit_failure_error_enabled", True)
         self.audit_event_queue_timeout_sec = config_utils.get_property_value_int("audit_event_queue_timeout_sec", 5)
         self.max_queue_size = config_utils.get_property_value_int("max_queue_size", 0)
+        self.audit_file_window_minutes = config_utils.get_property_value_int("audit_file_window_minutes", 60)
+        self.audit_rollup_enabled = config_utils.get_property_value_boolean("audit_rollup_enabled", False)
+        self.rollup_writer = None
 
     def create_file_structure(self, message_data: ShieldAudit) -> str:
         """
@@ -33,16 +38,67 @@ class LogMessageInFile:
         Returns:
             str: The file path where the log should be stored.
         """
-        event_datetime = datetime.fromtimestamp(message_data.eventTime/1000)
-        event_time_year = event_datetime.strftime("%Y")
-        event_time_month = event_datetime.strftime("%m")
-        event_time_day = event_datetime.strftime("%d")
-
-        folder_structure = f'tenant_id={message_data.tenantId}/year={event_time_year}/month={event_time_month}/day={event_time_day}'
-        log_file_name = f'{message_data.tenantId}_{event_time_year}_{event_time_month}_{event_time_day}_{message_data.threadId}_{message_data.threadSequenceNumber}.json'
+        folder_structure = self.create_folder_structure(message_data)
+        log_file_name = f'{self.get_log_file_prefix(message_data)}_{message_data.threadId}_{message_data.threadSequenceNumber}.json'
 
         return f'{folder_structure}/{log_file_name}'
 
+    def create_batch_file_structure(self, message_data: ShieldAudit, batch_id: str) -> str:
+        """
+        Creates the file structure of a batch of audit events, named after the batch ID.
+
+        Args:
+            message_data (ShieldAudit): The first audit data of the batch.
+            batch_id (str): The unique ID of the batch.
+
+        Returns:
+            str: The file path where the batch should be stored.
+        """
+        return f'{self.create_folder_structure(message_data)}/{self.get_log_file_prefix(message_data)}_{batch_id}.json'
+
+    def create_window_file_structure(self, message_data: ShieldAudit) -> str:
+        """
+        Creates the file structure of the time window of the event time, the audit events of a time window are
+        appended to the same file.
+
+        Args:
+            message_data (ShieldAudit): The audit data containing tenant ID and event time.
+
+        Returns:
+            str: The file path where the log should be appended.
+        """
+        window_sec = max(self.audit_file_window_minutes, 1) * 60
+        window_start = datetime.fromtimestamp((message_data.eventTime // 1000) // window_sec * window_sec)
+        return (f'{self.create_folder_structure(message_data)}/{self.get_log_file_prefix(message_data)}_'
+                f'{window_start.strftime("%H%M")}.json')
+
+    def get_or_create_rollup_writer(self, staging_dir: str) -> AuditRollupWriter:
+        """
+        Get the rollup writer of the audit events, creating it on the first use. The open parts of the writer are
+        sealed when the process exits.
+
+        Args:
+            staging_dir (str): The directory where the open parts are staged.
+
+        Returns:
+            AuditRollupWriter: The rollup writer.
+        """
+        if self.rollup_writer is None:
+            self.rollup_writer = AuditRollupWriter(self, staging_dir)
+            atexit.register(self.rollup_writer.close)
+        return self.rollup_writer
+
+    @staticmethod
+    def create_folder_structure(message_data: ShieldAudit) -> str:
+        event_datetime = datetime.fromtimestamp(message_data.eventTime/1000)
+        return (f'tenant_id={message_data.tenantId}/year={event_datetime.strftime("%Y")}/'
+                f'month={event_datetime.strftime("%m")}/day={event_datetime.strftime("%d")}')
+
+    @staticmethod
+    def get_log_file_prefix(message_data: ShieldAudit) -> str:
+        event_datetime = datetime.fromtimestamp(message_data.eventTime/1000)
+        return f'{message_data.tenantId}_{event_datetime.strftime("%Y_%m_%d")}'
+
     @abstractmethod
     def log(self, log_data: ShieldAudit):
         """
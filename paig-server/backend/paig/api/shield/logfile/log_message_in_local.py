@@ -1,5 +1,8 @@
 import json
 import logging
+import os
+import shutil
+import threading
 import traceback
 
 from api.shield.logfile.audit_loggers import LocalAuditLogger
@@ -23,7 +26,10 @@ class LogMessageInLocal(LogMessageInFile):
         super().__init__()
         self.directory_path = config_utils.get_property_value("local_directory_path", "/workdir/shield/audit_logs")
         self.local_audit_logger = None
+        self.append_lock = threading.Lock()
         self.audit_spool_dir = config_utils.get_property_value("audit_spool_dir", "/workdir/shield/audit-spool")
+        # Staged next to the audit logs, so the sealed parts are moved without copying them
+        self.audit_rollup_staging_dir = os.path.join(self.directory_path, ".rollup-staging")
 
     async def log(self, log_data: ShieldAudit):
         """
@@ -60,11 +66,98 @@ class LogMessageInLocal(LogMessageInFile):
             raise ShieldException(f"Error writing logs to local path=>{e.__class__}:{e}, Please check whether the "
                                   f"user has sufficient permission to write to the path")
 
+    def append_logs_to_local_file(self, full_log_path, log_data_list):
+        """
+        Appends a batch of log data to a local file, one JSON record per line.
+
+        Args:
+            full_log_path (str): The full path to the log file.
+            log_data_list (List[ShieldAudit]): The audit data to log.
+
+        Raises:
+            ShieldException: If there is an error writing logs to the local path.
+        """
+        logger.debug(f"Appending {len(log_data_list)} logs to local path: {full_log_path}")
+        try:
+            lines = "".join(json.dumps(log_data.__dict__) + "\n" for log_data in log_data_list)
+            # The sender workers can append to the same time window file
+            with self.append_lock, open(full_log_path, 'a') as json_file:
+                json_file.write(lines)
+            logger.debug(f"Logs appended to local path: {full_log_path} successfully.")
+        except Exception as e:
+            logger.error(f"Error writing logs to local path=>{e.__class__}:{e} , Please check whether the user has "
+                         f"sufficient permission to write to the path \n{traceback.format_exc()}")
+            raise ShieldException(f"Error writing logs to local path=>{e.__class__}:{e}, Please check whether the "
+                                  f"user has sufficient permission to write to the path")
+
+    def publish_rollup_part(self, staged_path, part_key):
+        """
+        Moves a sealed rollup part from the staging directory to the local path.
+
+        Args:
+            staged_path (str): The path of the sealed part in the staging directory.
+            part_key (str): The path of the part relative to the local directory path.
+
+        Raises:
+            ShieldException: If there is an error writing logs to the local path.
+        """
+        full_log_path = os.path.join(self.directory_path, part_key)
+        try:
+            os.makedirs(os.path.dirname(full_log_path), exist_ok=True)
+            shutil.move(staged_path, full_log_path)
+            logger.debug(f"Audit rollup part written to local path: {full_log_path} successfully.")
+        except Exception as e:
+            logger.error(f"Error writing logs to local path=>{e.__class__}:{e} , Please check whether the user has "
+                         f"sufficient permission to write to the path \n{traceback.format_exc()}")
+            raise ShieldException(f"Error writing logs to local path=>{e.__class__}:{e}, Please check whether the "
+                                  f"user has sufficient permission to write to the path")
+
+    def read_rollup_manifest(self, manifest_key):
+        """
+        Reads a rollup manifest from the local path.
+
+        Args:
+            manifest_key (str): The path of the manifest relative to the local directory path.
+
+        Returns:
+            dict: The manifest, or None if it does not exist.
+        """
+        full_manifest_path = os.path.join(self.directory_path, manifest_key)
+        if not os.path.exists(full_manifest_path):
+            return None
+        with open(full_manifest_path, 'r') as manifest_file:
+            return json.load(manifest_file)
+
+    def publish_rollup_manifest(self, manifest_key, manifest):
+        """
+        Writes a rollup manifest to the local path, replacing the previous version atomically.
+
+        Args:
+            manifest_key (str): The path of the manifest relative to the local directory path.
+            manifest (dict): The manifest.
+
+        Raises:
+            ShieldException: If there is an error writing logs to the local path.
+        """
+        full_manifest_path = os.path.join(self.directory_path, manifest_key)
+        try:
+            os.makedirs(os.path.dirname(full_manifest_path), exist_ok=True)
+            with open(f"{full_manifest_path}.tmp", 'w') as manifest_file:
+                json.dump(manifest, manifest_file)
+            os.replace(f"{full_manifest_path}.tmp", full_manifest_path)
+        except Exception as e:
+            logger.error(f"Error writing logs to local path=>{e.__class__}:{e} , Please check whether the user has "
+                         f"sufficient permission to write to the path \n{traceback.format_exc()}")
+            raise ShieldException(f"Error writing logs to local path=>{e.__class__}:{e}, Please check whether the "
+                                  f"user has sufficient permission to write to the path")
+
     def get_or_create_local_audit_logger(self):
         if self.local_audit_logger is None:
             self.local_audit_logger = LocalAuditLogger(self, self.audit_spool_dir,
                                                        self.max_queue_size,
                                                        self.audit_event_queue_timeout_sec)
+            if self.audit_rollup_enabled:
+                self.local_audit_logger.rollup_writer = self.get_or_create_rollup_writer(self.audit_rollup_staging_dir)
             self.local_audit_logger.daemon = True
             self.local_audit_logger.start()
         return self.local_audit_logger
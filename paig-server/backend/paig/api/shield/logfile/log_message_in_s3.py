@@ -5,6 +5,7 @@ import boto3
 import logging
 
 from botocore.credentials import DeferredRefreshableCredentials
+from botocore.exceptions import ClientError
 from botocore.credentials import create_assume_role_refresher
 
 from api.shield.logfile.audit_loggers import S3AuditLogger
@@ -63,6 +64,8 @@ class LogMessageInS3File(LogMessageInFile):
 
         self.s3_audit_logger = None
         self.audit_spool_dir = config_utils.get_property_value("audit_spool_dir", "/workdir/shield/audit-spool")
+        self.audit_rollup_staging_dir = config_utils.get_property_value("audit_rollup_staging_dir",
+                                                                        "/workdir/shield/audit-rollup")
 
     def init_s3_client(self):
         """
@@ -158,11 +161,98 @@ class LogMessageInS3File(LogMessageInFile):
             logger.error(f"Error uploading logs to S3=> {type(e).__name__}: {str(e)} \n{traceback.format_exc()}")
             raise ShieldException(f"Error uploading logs to S3=> {type(e).__name__}: {str(e)}")
 
+    def write_logs_to_s3(self, full_object_key, log_data_list):
+        """
+        Writes a batch of log data to the S3 bucket, as a single NDJSON object.
+
+        Args:
+            full_object_key (str): The full S3 object key where the log data will be stored.
+            log_data_list (List[ShieldAudit]): The audit data to log.
+
+        Raises:
+            ShieldException: If there is an error uploading logs to S3.
+        """
+        try:
+            response = self.s3_client.put_object(
+                Body="".join(json.dumps(log_data.__dict__) + "\n" for log_data in log_data_list),
+                Bucket=self.bucket_name,
+                Key=full_object_key
+            )
+
+            logger.debug(f"Logs uploaded successfully:{response}")
+        except Exception as e:
+            logger.error(f"Error uploading logs to S3=> {type(e).__name__}: {str(e)} \n{traceback.format_exc()}")
+            raise ShieldException(f"Error uploading logs to S3=> {type(e).__name__}: {str(e)}")
+
+    def get_full_object_key(self, object_key):
+        return "/".join([self.bucket_prefix, object_key]) if self.bucket_prefix else object_key
+
+    def publish_rollup_part(self, staged_path, part_key):
+        """
+        Uploads a sealed rollup part to the S3 bucket, in a multipart upload for the large parts.
+
+        Args:
+            staged_path (str): The path of the sealed part in the staging directory.
+            part_key (str): The object key of the part relative to the bucket prefix.
+
+        Raises:
+            ShieldException: If there is an error uploading logs to S3.
+        """
+        full_object_key = self.get_full_object_key(part_key)
+        try:
+            self.s3_client.upload_file(staged_path, self.bucket_name, full_object_key)
+            logger.debug(f"Audit rollup part uploaded successfully to {full_object_key}")
+        except Exception as e:
+            logger.error(f"Error uploading logs to S3=> {type(e).__name__}: {str(e)} \n{traceback.format_exc()}")
+            raise ShieldException(f"Error uploading logs to S3=> {type(e).__name__}: {str(e)}")
+
+    def read_rollup_manifest(self, manifest_key):
+        """
+        Reads a rollup manifest from the S3 bucket.
+
+        Args:
+            manifest_key (str): The object key of the manifest relative to the bucket prefix.
+
+        Returns:
+            dict: The manifest, or None if it does not exist.
+        """
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=self.get_full_object_key(manifest_key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                return None
+            raise
+        return json.loads(response["Body"].read())
+
+    def publish_rollup_manifest(self, manifest_key, manifest):
+        """
+        Writes a rollup manifest to the S3 bucket.
+
+        Args:
+            manifest_key (str): The object key of the manifest relative to the bucket prefix.
+            manifest (dict): The manifest.
+
+        Raises:
+            ShieldException: If there is an error uploading logs to S3.
+        """
+        try:
+            self.s3_client.put_object(
+                Body=json.dumps(manifest),
+                Bucket=self.bucket_name,
+                Key=self.get_full_object_key(manifest_key),
+                ContentType="application/json"
+            )
+        except Exception as e:
+            logger.error(f"Error uploading logs to S3=> {type(e).__name__}: {str(e)} \n{traceback.format_exc()}")
+            raise ShieldException(f"Error uploading logs to S3=> {type(e).__name__}: {str(e)}")
+
     def get_or_create_s3_audit_logger(self):
         if self.s3_audit_logger is None:
             self.s3_audit_logger = S3AuditLogger(self, self.audit_spool_dir,
                                                  self.max_queue_size,
                                                  self.audit_event_queue_timeout_sec)
+            if self.audit_rollup_enabled:
+                self.s3_audit_logger.rollup_writer = self.get_or_create_rollup_writer(self.audit_rollup_staging_dir)
             self.s3_audit_logger.daemon = True
             self.s3_audit_logger.start()
         return self.s3_audit_logger
@@ -1,5 +1,6 @@
 from typing import Dict
 from api.shield.utils.custom_exceptions import BadRequestException
+from paig_common.encryption import ENCRYPTION_MODE_CHUNKED
 
 
 class AuthorizeRequest:
@@ -37,6 +38,8 @@ class AuthorizeRequest:
         self.client_hostname = req_data.get("clientHostName")
         self.stream_id = req_data.get("streamId")
         self.enable_audit = req_data.get("enableAudit")
+        # Encryption mode of the request messages and of the response messages, chunked for older plugins
+        self.encryption_mode = req_data.get("encryptionMode") or ENCRYPTION_MODE_CHUNKED
         self.user_role = user_role
 
     @staticmethod
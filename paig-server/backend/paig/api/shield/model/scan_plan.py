@@ -0,0 +1,48 @@
+from typing import NamedTuple, Any
+
+
+class ScanOptions(NamedTuple):
+    """
+    The per-request options of a scan. The scanners are shared by all the requests of an application, so everything
+    which depends on the request is passed to the scanners in the scan options instead of being set on the scanners.
+
+    Attributes:
+        scan_for_req_type (str): The request type the message is scanned for.
+        application_key (str): The application key.
+        guardrail_id (str): The ID of the AWS Bedrock guardrail to apply.
+        guardrail_version (str): The version of the AWS Bedrock guardrail to apply.
+        region (str): The region of the AWS Bedrock guardrail.
+        connection_details (dict): The connection details of the AWS Bedrock guardrail.
+        connection_name (str): The name of the guardrail connection of the AWS Bedrock guardrail.
+        sensitive_data_config (dict): The sensitive data config of the PAIG guardrail.
+        pii_traits (tuple): The PII traits found in the message by the access control scanners.
+    """
+    scan_for_req_type: str = None
+    application_key: str = None
+    guardrail_id: str = None
+    guardrail_version: str = None
+    region: str = None
+    connection_details: dict = None
+    connection_name: str = None
+    sensitive_data_config: dict = None
+    pii_traits: tuple = None
+
+    def get(self, key, default=None) -> Any | None:
+        """
+        Retrieve an option by key. Returns default if the option is not set.
+        """
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+
+class ScanPlan(NamedTuple):
+    """
+    The scanners to run for a request together with the options of the request. A scan plan is built per request
+    and is never modified, so the requests can be scanned concurrently with the same scanners.
+
+    Attributes:
+        scanners (tuple): The scanners to run.
+        options (ScanOptions): The per-request options passed to the scanners.
+    """
+    scanners: tuple
+    options: ScanOptions
@@ -0,0 +1,347 @@
+"""
+Module: keyword_recognizer
+
+This module provides a presidio recognizer for large keyword lists, backed by an Aho-Corasick automaton.
+
+Presidio turns the deny list of a PatternRecognizer into a single alternation regex, which is tried against every
+position of the text, so the matching time grows with the size of the list. The automaton matches all the keywords
+in one pass over the text, so the matching time only depends on the length of the text.
+
+Classes:
+    KeywordAutomaton: Aho-Corasick automaton stored in flat arrays, which can be serialized and loaded by mmap.
+    KeywordRecognizer: Presidio recognizer which detects the keywords of an automaton.
+
+Functions:
+    load_keyword_automaton: Loads the automaton of a keyword list from its cache file, building it when needed.
+"""
+import hashlib
+import logging
+import mmap
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import List, Optional
+
+from presidio_analyzer import EntityRecognizer, RecognizerResult, AnalysisExplanation
+from presidio_analyzer.nlp_engine import NlpArtifacts
+
+logger = logging.getLogger(__name__)
+
+AUTOMATON_FILE_MAGIC = b"PAIGKWA1"
+AUTOMATON_FILE_EXTENSION = ".kwa"
+BYTE_ORDER_MARK = 0x01020304
+HEADER_SIZE = len(AUTOMATON_FILE_MAGIC) + 4 * 4
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton of a keyword list. Keywords are matched case-insensitively and only as whole words, the
+    same way as the presidio deny lists.
+
+    The automaton is stored in flat arrays of unsigned integers, so it can be written to a file and used directly from
+    a read-only memory map, shared by all the processes loading the same file.
+
+    Attributes:
+        edge_start: The index of the first edge of each node, the edges of a node are sorted by character.
+        edge_chars: The character code of each edge.
+        edge_targets: The target node of each edge.
+        fail: The failure link of each node.
+        output_length: The length of the keyword ending at each node, 0 if no keyword ends at the node.
+        output_link: The nearest node on the failure chain of each node where a keyword ends, 0 if there is none.
+    """
+
+    def __init__(self, edge_start, edge_chars, edge_targets, fail, output_length, output_link, buffer=None):
+        self.edge_start = edge_start
+        self.edge_chars = edge_chars
+        self.edge_targets = edge_targets
+        self.fail = fail
+        self.output_length = output_length
+        self.output_link = output_link
+        # keeps the memory map of a loaded automaton open
+        self.buffer = buffer
+
+    @classmethod
+    def build(cls, keywords: List[str]) -> "KeywordAutomaton":
+        """
+        Build the automaton of the given keywords.
+
+        Args:
+            keywords (List[str]): The keywords, empty keywords are ignored.
+
+        Returns:
+            KeywordAutomaton: The automaton.
+        """
+        children = [{}]
+        output_length = [0]
+        for keyword in keywords:
+            folded_keyword = fold_case(keyword.strip())
+            if not folded_keyword:
+                continue
+            node = 0
+            for char in folded_keyword:
+                code = ord(char)
+                next_node = children[node].get(code)
+                if next_node is None:
+                    next_node = len(children)
+                    children[node][code] = next_node
+                    children.append({})
+                    output_length.append(0)
+                node = next_node
+            output_length[node] = len(folded_keyword)
+
+        # number the nodes in breadth first order, so the failure links always point to lower node ids
+        order = [0]
+        queue = deque([0])
+        while queue:
+            node = queue.popleft()
+            for _, child in sorted(children[node].items()):
+                order.append(child)
+                queue.append(child)
+        node_ids = {node: node_id for node_id, node in enumerate(order)}
+
+        node_count = len(order)
+        edge_start = array('I', [0] * (node_count + 1))
+        edge_chars, edge_targets = array('I'), array('I')
+        fail = array('I', [0] * node_count)
+        node_output_length = array('I', [0] * node_count)
+        output_link = array('I', [0] * node_count)
+
+        for node_id, node in enumerate(order):
+            edge_start[node_id] = len(edge_chars)
+            node_output_length[node_id] = output_length[node]
+            for code, child in sorted(children[node].items()):
+                edge_chars.append(code)
+                edge_targets.append(node_ids[child])
+        edge_start[node_count] = len(edge_chars)
+
+        automaton = cls(edge_start, edge_chars, edge_targets, fail, node_output_length, output_link)
+        for node_id in range(node_count):
+            for edge in range(edge_start[node_id], edge_start[node_id + 1]):
+                child_id, code = edge_targets[edge], edge_chars[edge]
+                fail_node = fail[node_id]
+                child_fail = 0
+                if node_id != 0:
+                    while True:
+                        target = automaton._goto(fail_node, code)
+                        if target >= 0:
+                            child_fail = target
+                            break
+                        if fail_node == 0:
+                            break
+                        fail_node = fail[fail_node]
+                fail[child_id] = child_fail
+                output_link[child_id] = child_fail if node_output_length[child_fail] else output_link[child_fail]
+        return automaton
+
+    def find_matches(self, text: str) -> List[tuple]:
+        """
+        Find the keywords in the given text. Keywords are only matched as whole words, and when matches overlap the
+        leftmost and then longest match is kept.
+
+        Args:
+            text (str): The text to search.
+
+        Returns:
+            List[tuple]: The start and end offsets of the matches, in the order of the text.
+        """
+        folded_text = fold_case(text)
+        candidates = []
+        state = 0
+        for index, char in enumerate(folded_text):
+            code = ord(char)
+            while True:
+                target = self._goto(state, code)
+                if target >= 0:
+                    state = target
+                    break
+                if state == 0:
+                    break
+                state = self.fail[state]
+
+            node = state if self.output_length[state] else self.output_link[state]
+            while node:
+                end = index + 1
+                start = end - self.output_length[node]
+                if _is_word_boundary(text, start, end):
+                    candidates.append((start, end))
+                node = self.output_link[node]
+
+        matches = []
+        last_end = 0
+        for start, end in sorted(candidates, key=lambda match: (match[0], -match[1])):
+            if start >= last_end:
+                matches.append((start, end))
+                last_end = end
+        return matches
+
+    def _goto(self, node: int, code: int) -> int:
+        first_edge, last_edge = self.edge_start[node], self.edge_start[node + 1]
+        edge = bisect_left(self.edge_chars, code, first_edge, last_edge)
+        if edge < last_edge and self.edge_chars[edge] == code:
+            return self.edge_targets[edge]
+        return -1
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the automaton.
+
+        Returns:
+            bytes: The serialized automaton, in the native byte order.
+        """
+        node_count, edge_count = len(self.fail), len(self.edge_chars)
+        header = array('I', [BYTE_ORDER_MARK, node_count, edge_count, 0])
+        body = array('I')
+        for values in (self.edge_start, self.edge_chars, self.edge_targets, self.fail, self.output_length,
+                       self.output_link):
+            body.extend(values)
+        return AUTOMATON_FILE_MAGIC + header.tobytes() + body.tobytes()
+
+    @classmethod
+    def from_buffer(cls, buffer) -> "KeywordAutomaton":
+        """
+        Use a serialized automaton without copying it.
+
+        Args:
+            buffer: The serialized automaton, e.g. a memory map of an automaton file.
+
+        Returns:
+            KeywordAutomaton: The automaton.
+
+        Raises:
+            ValueError: If the buffer is not a serialized automaton of the native byte order.
+        """
+        view = memoryview(buffer)
+        if bytes(view[:len(AUTOMATON_FILE_MAGIC)]) != AUTOMATON_FILE_MAGIC:
+            raise ValueError("Not a keyword automaton")
+        byte_order_mark, node_count, edge_count, _ = view[len(AUTOMATON_FILE_MAGIC):HEADER_SIZE].cast('I')
+        if byte_order_mark != BYTE_ORDER_MARK:
+            raise ValueError(f"Keyword automaton was not written with the {sys.byteorder} endian byte order")
+        words = view[HEADER_SIZE:].cast('I')
+        if len(words) != 4 * node_count + 1 + 2 * edge_count:
+            raise ValueError("Truncated keyword automaton")
+
+        arrays = []
+        offset = 0
+        for size in (node_count + 1, edge_count, edge_count, node_count, node_count, node_count):
+            arrays.append(words[offset:offset + size])
+            offset += size
+        return cls(*arrays, buffer=buffer)
+
+    @classmethod
+    def load(cls, file_path: str) -> "KeywordAutomaton":
+        """
+        Load an automaton file by a read-only memory map.
+
+        Args:
+            file_path (str): The automaton file.
+
+        Returns:
+            KeywordAutomaton: The automaton.
+        """
+        with open(file_path, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls.from_buffer(buffer)
+        except ValueError:
+            buffer.close()
+            raise
+
+    def __reduce__(self):
+        # memory maps can not be pickled, e.g. for the scanners running in the process pool
+        return KeywordAutomaton.from_buffer, (self.to_bytes(),)
+
+
+class KeywordRecognizer(EntityRecognizer):
+    """
+    Presidio recognizer detecting the keywords of a KeywordAutomaton.
+
+    Args:
+        supported_entity (str): The entity type of the keywords.
+        name (str): The name of the recognizer.
+        automaton (KeywordAutomaton): The automaton of the keywords.
+        score (float): The score of the detected keywords.
+    """
+
+    def __init__(self, supported_entity: str, name: str, automaton: KeywordAutomaton, score: float = 1.0):
+        self.automaton = automaton
+        self.score = score
+        super().__init__(supported_entities=[supported_entity], name=name)
+
+    def load(self) -> None:
+        pass
+
+    def analyze(self, text: str, entities: List[str], nlp_artifacts: Optional[NlpArtifacts] = None) -> List[RecognizerResult]:
+        results = []
+        for start, end in self.automaton.find_matches(text):
+            explanation = AnalysisExplanation(recognizer=self.__class__.__name__, original_score=self.score,
+                                              pattern_name="detect_list",
+                                              textual_explanation=f"Detected by keyword list of {self.name}")
+            results.append(RecognizerResult(entity_type=self.supported_entities[0], start=start, end=end,
+                                            score=self.score, analysis_explanation=explanation,
+                                            recognition_metadata={
+                                                RecognizerResult.RECOGNIZER_NAME_KEY: self.name,
+                                                RecognizerResult.RECOGNIZER_IDENTIFIER_KEY: self.id,
+                                            }))
+        return results
+
+
+def load_keyword_automaton(keywords: List[str], cache_dir: str = None, cache_name: str = None) -> KeywordAutomaton:
+    """
+    Load the automaton of a keyword list. When a cache directory is given, the automaton is serialized to a file named
+    after the cache name and the digest of the keywords, and loaded from it by mmap. Automaton files of previous
+    versions of the keyword list are removed.
+
+    Args:
+        keywords (List[str]): The keywords.
+        cache_dir (str): The directory of the automaton file, the automaton is only kept in memory when not set.
+        cache_name (str): The name of the keyword list, used as the automaton file name prefix.
+
+    Returns:
+        KeywordAutomaton: The automaton.
+    """
+    if not cache_dir:
+        return KeywordAutomaton.build(keywords)
+
+    digest = hashlib.sha256("\n".join(fold_case(keyword.strip()) for keyword in keywords).encode("utf-8"))
+    file_prefix = f".{cache_name}."
+    file_path = os.path.join(cache_dir, f"{file_prefix}{digest.hexdigest()[:16]}{AUTOMATON_FILE_EXTENSION}")
+    if os.path.exists(file_path):
+        try:
+            return KeywordAutomaton.load(file_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Rebuilding keyword automaton {file_path}: {e}")
+
+    automaton = KeywordAutomaton.build(keywords)
+    try:
+        temp_file_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(temp_file_path, "wb") as file:
+            file.write(automaton.to_bytes())
+        os.replace(temp_file_path, file_path)
+        for file_name in os.listdir(cache_dir):
+            if file_name.startswith(file_prefix) and file_name.endswith(AUTOMATON_FILE_EXTENSION) \
+                    and os.path.join(cache_dir, file_name) != file_path:
+                os.remove(os.path.join(cache_dir, file_name))
+        return KeywordAutomaton.load(file_path)
+    except OSError as e:
+        logger.debug(f"Keyword automaton {file_path} is kept in memory, as it could not be written: {e}")
+        return automaton
+
+
+def fold_case(text: str) -> str:
+    """
+    Lower case the text without changing its length, so the offsets in the folded text are offsets in the text.
+    """
+    folded_text = text.lower()
+    if len(folded_text) == len(text):
+        return folded_text
+    return "".join(char if len(char.lower()) != 1 else char.lower() for char in text)
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _is_word_boundary(text: str, start: int, end: int) -> bool:
+    return (start == 0 or not _is_word_char(text[start - 1])) and (end == len(text) or not _is_word_char(text[end]))
@@ -1,6 +1,6 @@
 import logging
 
-from presidio_analyzer import AnalyzerEngine
+from presidio_analyzer import AnalyzerEngine, BatchAnalyzerEngine
 
 from api.shield.presidio.nlp_handler import NLPHandler
 from api.shield.utils import config_utils
@@ -28,6 +28,7 @@ class PresidioAnalyzerEngine:
             supported_languages=["en"]
         )
         self.remove_unwanted_recognizers()
+        self.batch_analyzer = BatchAnalyzerEngine(analyzer_engine=self.analyzer)
 
     def remove_unwanted_recognizers(self):
         """
@@ -62,3 +63,18 @@ class PresidioAnalyzerEngine:
             score_threshold=self.score_threshold)
         logger.debug("Analyzing completed")
         return analyzer_result
+
+    def analyze_batch(self, texts: list[str]):
+        """
+        Analyze the given texts using the presidio batch analyzer, the spaCy pipeline runs once for the whole batch
+        :param texts:
+        :return: list of RecognizerResult lists as analyzer result, in the order of the texts
+        """
+        logger.debug(f"Batch analyzing starting for {len(texts)} texts")
+        analyzer_results = self.batch_analyzer.analyze_iterator(
+            texts=texts,
+            language="en",
+            entities=None,
+            score_threshold=self.score_threshold)
+        logger.debug("Batch analyzing completed")
+        return analyzer_results
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import logging
+import time
+from threading import Lock
+
+from core.utils import Singleton
+
+logger = logging.getLogger(__name__)
+
+
+class PresidioAnalyzerRegistry(Singleton):
+    """
+    Process-wide registry of the presidio analyzer engines, keyed by the fingerprint of the custom recognizers
+    configuration.
+
+    Building an analyzer engine creates the presidio recognizer registry and loads the deny lists of the custom
+    recognizers, so the PII scanners with the same recognizers configuration share one analyzer engine instead of
+    building their own for each application key.
+
+    Attributes:
+        analyzers (dict): The analyzer engines, by recognizers fingerprint.
+        build_timings (dict): The time in milliseconds it took to build each analyzer engine, by recognizers
+        fingerprint.
+    """
+
+    def __init__(self):
+        if self.is_instance_initialized():
+            return
+        self.analyzers = {}
+        self.build_timings = {}
+        self.lock = Lock()
+
+    def get_analyzer(self, fingerprint: str, create_analyzer):
+        """
+        Get the analyzer engine of the given recognizers fingerprint, creating it on the first use.
+
+        Args:
+            fingerprint (str): The fingerprint of the custom recognizers configuration.
+            create_analyzer (callable): Creates the analyzer engine when it is not in the registry yet.
+
+        Returns:
+            PresidioAnalyzerEngine: The shared analyzer engine.
+        """
+        analyzer = self.analyzers.get(fingerprint)
+        if analyzer is not None:
+            return analyzer
+        with self.lock:
+            analyzer = self.analyzers.get(fingerprint)
+            if analyzer is None:
+                build_start_time = time.perf_counter()
+                analyzer = create_analyzer()
+                self.build_timings[fingerprint] = (time.perf_counter() - build_start_time) * 1000
+                self.analyzers[fingerprint] = analyzer
+                logger.info(f"Presidio analyzer {fingerprint[:12]} built in "
+                            f"{self.build_timings[fingerprint]:.3f} ms")
+        return analyzer
+
+    def clear(self):
+        """
+        Remove all the analyzer engines from the registry.
+        """
+        with self.lock:
+            self.analyzers.clear()
+            self.build_timings.clear()
+
+    def __len__(self):
+        return len(self.analyzers)
+
+
+def get_recognizers_fingerprint(recognizers: dict) -> str:
+    """
+    Get the fingerprint of a custom recognizers configuration. The ignore lists are not part of the fingerprint, as
+    they are applied by the scanner on the analyzer results.
+
+    Args:
+        recognizers (dict): The custom recognizers, by recognizer index.
+
+    Returns:
+        str: The hex digest identifying the recognizers configuration.
+    """
+    recognizers_config = [
+        [recognizer.name, recognizer.entity_type, recognizer.detect_list, recognizer.detect_regex,
+         recognizer.detect_list_score]
+        for _, recognizer in sorted(recognizers.items())
+    ]
+    return hashlib.sha256(json.dumps(recognizers_config, default=str).encode("utf-8")).hexdigest()
@@ -23,3 +23,20 @@ async def authorize_app(request: Annotated[dict | None, Body()],
         The result of the authorization operation handled by `ShieldController`.
     """
     return await shield_controller.authorize(request, x_tenant_id, x_user_role)
+
+
+@authorize_app_router.post("/batch")
+async def authorize_app_batch(request: Annotated[dict | None, Body()],
+                              x_tenant_id: Annotated[Optional[str], Header()] = None,
+                              x_user_role: Annotated[Optional[str], Header()] = None,
+                              shield_controller: ShieldController = shield_controller_instance):
+    """
+    Handles POST requests to authorize a batch of independent requests of applications.
+
+    This endpoint processes the authorization requests of the `requests` list together and streams back one
+    newline delimited JSON result per request, delegating the task to the `ShieldController`.
+
+    Returns:
+        The streamed results of the batch authorization handled by `ShieldController`.
+    """
+    return await shield_controller.authorize_batch(request, x_tenant_id, x_user_role)
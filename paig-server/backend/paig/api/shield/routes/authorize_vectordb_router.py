@@ -12,6 +12,7 @@ shield_controller_instance = Depends(SingletonDepends(ShieldController, called_i
 async def authorize_vectordb_app(request: Annotated[dict | None, Body()],
                                  x_tenant_id: Annotated[Optional[str], Header()] = None,
                                  x_user_role: Annotated[Optional[str], Header()] = None,
+                                 if_none_match: Annotated[Optional[str], Header()] = None,
                                  shield_controller: ShieldController = shield_controller_instance):
     """
     Handles POST requests to authorize access to VectorDB.
@@ -20,6 +21,7 @@ async def authorize_vectordb_app(request: Annotated[dict | None, Body()],
     delegates the task to the `ShieldController` to handle the authorization logic.
 
     Returns:
-        The result of the VectorDB authorization operation handled by `ShieldController`.
+        The result of the VectorDB authorization operation handled by `ShieldController`, or a 304 response without
+        body if it matches the ETag sent in the If-None-Match header.
     """
-    return await shield_controller.authorize_vectordb(request, x_tenant_id, x_user_role)
+    return await shield_controller.authorize_vectordb(request, x_tenant_id, x_user_role, if_none_match)
@@ -1,7 +1,9 @@
 import logging
 import os
 
+from api.shield.client.bedrock_runtime_client_pool import BedrockRuntimeClientPool
 from api.shield.enum.ShieldEnums import Guardrail, RequestType
+from api.shield.model.scan_plan import ScanOptions
 from api.shield.model.scanner_result import ScannerResult
 from api.shield.model.analyzer_result import AnalyzerResult
 from api.shield.scanners.BaseScanner import Scanner
@@ -31,32 +33,33 @@ class AWSBedrockGuardrailScanner(Scanner):
         """
         super().__init__(**kwargs)
 
-    def scan(self, message: str) -> ScannerResult:
+    def scan(self, message: str, options: ScanOptions = None) -> ScannerResult:
         """
         Scan the input prompt through the Bedrock guardrail.
 
         Parameters:
             message (str): The input prompt that needs to be scanned.
+            options (ScanOptions): The per-request options, with the guardrail details and the request type.
 
         Returns:
             dict: Scan result including traits, actions, and output text if intervention occurs.
         """
-        guardrail_id, guardrail_version, region = self._get_guardrail_details()
+        options = self.get_scan_options(options)
+        guardrail_id, guardrail_version, region = self._get_guardrail_details(options)
         if not guardrail_id or not guardrail_version or not region:
             logger.debug("AWSBedrockGuardrailScanner: Guardrail details not found. Hence skipping the scan.")
             return ScannerResult(traits=[])
 
-        from api.guardrails.providers.backend.bedrock import BedrockGuardrailProvider
-        connection_details = self.get_property('connection_details')
-        bedrock_client_provider = BedrockGuardrailProvider(connection_details if connection_details else {})
-        bedrock_client = bedrock_client_provider.create_bedrock_client('bedrock-runtime')
+        bedrock_client = BedrockRuntimeClientPool().get_client(options.get('connection_details', {}),
+                                                               options.get('connection_name'))
 
-        guardrail_source = Guardrail.INPUT.value if self.get_property('scan_for_req_type') in [
+        scan_for_req_type = options.get('scan_for_req_type')
+        guardrail_source = Guardrail.INPUT.value if scan_for_req_type in [
             RequestType.PROMPT.value,
             RequestType.ENRICHED_PROMPT.value,
             RequestType.RAG.value
         ] else Guardrail.OUTPUT.value
-        logger.debug(f"AWSBedrockGuardrailScanner: Scanning message: {message} with guardrail source: {guardrail_source} for {self.get_property('scan_for_req_type')}")
+        logger.debug(f"AWSBedrockGuardrailScanner: Scanning message: {message} with guardrail source: {guardrail_source} for {scan_for_req_type}")
 
         response = bedrock_client.apply_guardrail(
             guardrailIdentifier=guardrail_id,
@@ -88,13 +91,28 @@ class AWSBedrockGuardrailScanner(Scanner):
         logger.info("AWSBedrockGuardrailScanner: No action required for the message.")
         return ScannerResult(traits=[])
 
-    def _get_guardrail_details(self) -> (str, str, str):
+    def get_scan_cache_key(self, options: ScanOptions = None) -> str | None:
+        """
+        The scan result depends on the guardrail the message is applied to and on the guardrail source, so they are
+        part of the cache key. Nothing is cached when the guardrail details are not set, as the scan is skipped, or
+        for the DRAFT version, which is changed in place when the guardrail is edited.
+        """
+        options = self.get_scan_options(options)
+        guardrail_id, guardrail_version, region = self._get_guardrail_details(options)
+        if not guardrail_id or not guardrail_version or not region:
+            return None
+        if str(guardrail_version).upper() == "DRAFT":
+            return None
+        return f"{region}:{guardrail_id}:{guardrail_version}:{options.get('scan_for_req_type')}"
+
+    # noinspection PyMethodMayBeStatic
+    def _get_guardrail_details(self, options: ScanOptions) -> (str, str, str):
         """
         Fetch guardrail details
         """
-        default_guardrail_id = self.get_property('guardrail_id')
-        default_guardrail_version = self.get_property('guardrail_version')
-        default_region = getattr(self,'region', 'us-east-1')
+        default_guardrail_id = options.get('guardrail_id')
+        default_guardrail_version = options.get('guardrail_version')
+        default_region = options.get('region', 'us-east-1')
         guardrail_id = os.environ.get('BEDROCK_GUARDRAIL_ID', default_guardrail_id)
         guardrail_version = os.environ.get('BEDROCK_GUARDRAIL_VERSION', default_guardrail_version)
         region = os.environ.get('BEDROCK_REGION', default_region)
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import Any
 
+from api.shield.model.scan_plan import ScanOptions
 from api.shield.model.scanner_result import ScannerResult
 
 
@@ -35,14 +36,52 @@ class Scanner(ABC):
         """
         return getattr(self, key, None)
 
+    def get_scan_options(self, options: ScanOptions = None) -> ScanOptions:
+        """
+        Retrieve the options of a scan. When the scan is not given per-request options, e.g. when the scanner is
+        created for a single use, the options are taken from the properties of the scanner.
+        """
+        if options is not None:
+            return options
+        return ScanOptions(**{key: self.get_property(key) for key in ScanOptions._fields})
+
     @abstractmethod
-    def scan(self, message: str) -> ScannerResult:
+    def scan(self, message: str, options: ScanOptions = None) -> ScannerResult:
         """
         Process and sanitize the input prompt according to the specific scanner's implementation.
 
         Parameters:
             message (str): The input prompt that needs to be processed.
+            options (ScanOptions): The per-request options of the scan.
 
         Returns:
             ScannerResult: The result of the scanner operation.
         """
+
+    def scan_batch(self, messages: list[str], options: ScanOptions = None) -> list[ScannerResult]:
+        """
+        Process a batch of input prompts. Scanners which can share work across the messages of a batch override this
+        method, the default implementation scans the messages one by one.
+
+        Parameters:
+            messages (list[str]): The input prompts that need to be processed.
+            options (ScanOptions): The per-request options of the scan.
+
+        Returns:
+            list[ScannerResult]: The result of the scanner operation for each message, in the order of the messages.
+        """
+        return [self.scan(message, options) for message in messages]
+
+    def get_scan_cache_key(self, options: ScanOptions = None) -> str | None:
+        """
+        Retrieve the part of the scan result cache key which depends on the per-request configuration of the scanner.
+        Scanners whose result only depends on the message and the scanner configuration return an empty string,
+        scanners whose result can not be cached return None, which is the default.
+
+        Parameters:
+            options (ScanOptions): The per-request options of the scan.
+
+        Returns:
+            str | None: The cache key part, or None if the scan result should not be cached.
+        """
+        return None
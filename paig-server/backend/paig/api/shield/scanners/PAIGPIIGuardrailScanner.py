@@ -1,5 +1,6 @@
 import logging
 
+from api.shield.model.scan_plan import ScanOptions
 from api.shield.model.scanner_result import ScannerResult
 from api.shield.scanners.BaseScanner import Scanner
 
@@ -28,19 +29,21 @@ class PAIGPIIGuardrailScanner(Scanner):
         """
         super().__init__(**kwargs)
 
-    def scan(self, message: str) -> ScannerResult:
+    def scan(self, message: str, options: ScanOptions = None) -> ScannerResult:
         """
         Scan the input prompt through the PII guardrail.
 
         Parameters:
             message (str): The input prompt that needs to be scanned.
+            options (ScanOptions): The per-request options, with the PII traits and the sensitive data config.
 
         Returns:
             dict: Scan result including traits, actions, and output text if intervention occurs.
         """
         # do pii guardrail evaluation
-        pii_traits = self.get_property("pii_traits")
-        sensitive_data_config = self.get_property("sensitive_data_config")
+        options = self.get_scan_options(options)
+        pii_traits = options.get("pii_traits")
+        sensitive_data_config = options.get("sensitive_data_config")
 
         from api.shield.services.guardrail_service import paig_pii_guardrail_evaluation
         deny_policies_list , redact_policies_dict = paig_pii_guardrail_evaluation(sensitive_data_config, pii_traits)
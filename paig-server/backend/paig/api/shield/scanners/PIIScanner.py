@@ -2,11 +2,14 @@ import csv
 import os.path
 import logging
 
+from api.shield.model.scan_plan import ScanOptions
 from api.shield.model.scanner_result import ScannerResult
 from core.utils import format_to_root_path
 from api.shield.model.analyzer_result import AnalyzerResult
 from api.shield.scanners.BaseScanner import Scanner
+from api.shield.presidio.keyword_recognizer import KeywordRecognizer, load_keyword_automaton
 from api.shield.presidio.presidio_analyzer_engine import PresidioAnalyzerEngine
+from api.shield.presidio.presidio_analyzer_registry import PresidioAnalyzerRegistry, get_recognizers_fingerprint
 from presidio_analyzer import PatternRecognizer, Pattern
 
 from api.shield.utils.custom_exceptions import ShieldException, UnsupportedFileTypeException
@@ -136,21 +139,35 @@ class PIIScanner(Scanner):
         """
         super().__init__(**kwargs)
 
-        self.presidio_analyzer = PresidioAnalyzerEngine()
+        self._presidio_analyzer = None
         self.recognizers = {}
         self.recognizer_ignore_dict = {}
 
+    @property
+    def presidio_analyzer(self) -> PresidioAnalyzerEngine:
+        """
+        The presidio analyzer of the custom recognizers of the scanner, shared through the PresidioAnalyzerRegistry
+        with the other scanners having the same recognizers.
+        """
+        if self._presidio_analyzer is None:
+            self._presidio_analyzer = PresidioAnalyzerRegistry().get_analyzer(
+                get_recognizers_fingerprint(self.recognizers), self._create_presidio_analyzer)
+        return self._presidio_analyzer
+
     def init_recognizers(self):
-        self._add_custom_recognizers()
+        # the analyzer is looked up again, as the recognizers have been set after the scanner creation
+        self._presidio_analyzer = None
+        _ = self.presidio_analyzer
         # check if there's any traits to ignore
         self.recognizer_ignore_dict = self._load_recognizer_ignore_list()
 
-    def scan(self, message: str) -> ScannerResult:
+    def scan(self, message: str, options: ScanOptions = None) -> ScannerResult:
         """
         Process and sanitize the input prompt according to the specific scanner's implementation.
 
         Parameters:
             message (str): The input prompt that needs to be processed.
+            options (ScanOptions): The per-request options of the scan, not used by this scanner.
 
         Returns:
             dict: dictionary consisting of tags and other additional infos
@@ -158,6 +175,30 @@ class PIIScanner(Scanner):
 
         # analyze the prompt using the presidio analyzer
         analyzer_result_list = self.presidio_analyzer.analyze(message)
+        return self._build_scanner_result(analyzer_result_list, message)
+
+    def get_scan_cache_key(self, options: ScanOptions = None) -> str | None:
+        """
+        The scan result only depends on the message and the scanner configuration, so it can always be cached.
+        """
+        return ""
+
+    def scan_batch(self, messages: list[str], options: ScanOptions = None) -> list[ScannerResult]:
+        """
+        Process a batch of input prompts with a single run of the presidio batch analyzer.
+
+        Parameters:
+            messages (list[str]): The input prompts that need to be processed.
+            options (ScanOptions): The per-request options of the scan, not used by this scanner.
+
+        Returns:
+            list[ScannerResult]: The scanner result for each message, in the order of the messages.
+        """
+        analyzer_result_lists = self.presidio_analyzer.analyze_batch(messages)
+        return [self._build_scanner_result(analyzer_result_list, message)
+                for analyzer_result_list, message in zip(analyzer_result_lists, messages)]
+
+    def _build_scanner_result(self, analyzer_result_list, message: str) -> ScannerResult:
         refined_analyzer_results = build_analyzer_result(analyzer_result_list, model_name=self.model_path,
                                                          scanner_name=self.name)
 
@@ -179,12 +220,22 @@ class PIIScanner(Scanner):
         for key, value in self.recognizers.items():
             ignore_list = self._load_keyword_list(value.ignore_list)
             if ignore_list:
-                recognizer_ignore_dict[value.name] = ignore_list
+                recognizer_ignore_dict[value.name] = frozenset(ignore_list)
         return recognizer_ignore_dict
 
-    def _add_custom_recognizers(self):
+    def _create_presidio_analyzer(self) -> PresidioAnalyzerEngine:
+        """
+        Create a presidio analyzer with the custom recognizers of the scanner
+        :return: PresidioAnalyzerEngine
+        """
+        presidio_analyzer = PresidioAnalyzerEngine()
+        self._add_custom_recognizers(presidio_analyzer)
+        return presidio_analyzer
+
+    def _add_custom_recognizers(self, presidio_analyzer: PresidioAnalyzerEngine):
         """
         Add custom recognizers to the presidio analyzer
+        :param presidio_analyzer: The presidio analyzer to add the recognizers to
         :return: None
         """
         logger.debug("Adding custom recognizers to presidio registry")
@@ -192,21 +243,28 @@ class PIIScanner(Scanner):
         for key, value in self.recognizers.items():
 
             detect_list = self._load_keyword_list(value.detect_list)
+            if detect_list:
+                # the detect list is matched by an Aho-Corasick automaton instead of a presidio deny list regex
+                automaton = load_keyword_automaton(detect_list, cache_dir=self._get_keyword_list_dir(value.detect_list),
+                                                   cache_name=value.name)
+                presidio_analyzer.analyzer.registry.add_recognizer(
+                    KeywordRecognizer(supported_entity=value.entity_type, name=value.name, automaton=automaton,
+                                      score=value.detect_list_score))
 
             # check if the regex pattern is provided
-            detect_regex_pattern = None
             if value.detect_regex:
                 detect_regex_pattern = [Pattern(name="detect_regex", regex=value.detect_regex,
                                                 score=value.detect_list_score)]
-            # create custom recognizer
-            _custom_recognizer = PatternRecognizer(name=value.name,
-                                                   supported_entity=value.entity_type,
-                                                   deny_list=detect_list,
-                                                   deny_list_score=value.detect_list_score,
-                                                   patterns=detect_regex_pattern)
+                # create custom recognizer
+                _custom_recognizer = PatternRecognizer(name=value.name,
+                                                       supported_entity=value.entity_type,
+                                                       patterns=detect_regex_pattern)
+
+                # add custom recognizer to presidio analyzer recognizer registry
+                presidio_analyzer.analyzer.registry.add_recognizer(_custom_recognizer)
 
-            # add custom recognizer to presidio analyzer recognizer registry
-            self.presidio_analyzer.analyzer.registry.add_recognizer(_custom_recognizer)
+            if not detect_list and not value.detect_regex:
+                logger.warning(f"Recognizer {value.name} has no detect list or detect regex, hence skipping it")
 
     @staticmethod
     def _remove_ignore_list_keywords(analyzer_result_list, recognizer_ignore_dict, message):
@@ -234,6 +292,20 @@ class PIIScanner(Scanner):
 
         return new_analyzer_result_list
 
+    @staticmethod
+    def _get_keyword_list_dir(prop_value) -> str | None:
+        """
+        Get the directory of the first keyword list file, where the keyword automaton is kept.
+        :param prop_value: List of file paths or keywords.
+        :return: The directory, or None if the keywords are not read from a file.
+        """
+        for prop in prop_value or []:
+            prop = prop.strip()
+            _, is_file_path = validate_and_get_file_type(prop)
+            if is_file_path:
+                return os.path.dirname(format_to_root_path(prop))
+        return None
+
     @staticmethod
     def _load_keyword_list(prop_value) -> list:
         """
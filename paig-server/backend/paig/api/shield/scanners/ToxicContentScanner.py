@@ -1,5 +1,6 @@
 import logging
 
+from api.shield.model.scan_plan import ScanOptions
 from api.shield.model.scanner_result import ScannerResult
 from api.shield.model.analyzer_result import AnalyzerResult
 from api.shield.scanners.BaseScanner import Scanner
@@ -30,17 +31,44 @@ class ToxicContentScanner(Scanner):
         """
         super().__init__(**kwargs)
 
-    def scan(self, message: str) -> ScannerResult:
+    def scan(self, message: str, options: ScanOptions = None) -> ScannerResult:
         """
         Process the input prompt according to the specific scanner's implementation.
 
         Parameters:
             message (str): The input prompt that needs to be processed.
+            options (ScanOptions): The per-request options of the scan, not used by this scanner.
 
         Returns:
             dict: dictionary consisting of tags and other additional infos
         """
         score = predict_prob([message])
+        return self._build_scanner_result(message, score)
+
+    def get_scan_cache_key(self, options: ScanOptions = None) -> str | None:
+        """
+        The scan result only depends on the message and the scanner configuration, so it can always be cached.
+        """
+        return ""
+
+    def scan_batch(self, messages: list[str], options: ScanOptions = None) -> list[ScannerResult]:
+        """
+        Process a batch of input prompts with a single prediction call.
+
+        Parameters:
+            messages (list[str]): The input prompts that need to be processed.
+            options (ScanOptions): The per-request options of the scan, not used by this scanner.
+
+        Returns:
+            list[ScannerResult]: The scanner result for each message, in the order of the messages.
+        """
+        if not messages:
+            return []
+        scores = predict_prob(messages)
+        # keep the score of each message as a single element array, same as the single message scan
+        return [self._build_scanner_result(message, scores[index:index + 1]) for index, message in enumerate(messages)]
+
+    def _build_scanner_result(self, message: str, score) -> ScannerResult:
         is_safe = score[0] < self.model_score_threshold
 
         if not is_safe:
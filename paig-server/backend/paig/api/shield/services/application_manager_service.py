@@ -2,28 +2,25 @@ import logging
 
 from api.shield.model.scanner_result import ScannerResult
 from api.shield.model.authorize_request import AuthorizeRequest
-from api.shield.scanners.BaseScanner import Scanner
+from api.shield.model.scan_plan import ScanOptions, ScanPlan
 from api.shield.scanners.scanner_util import parse_properties
 from api.shield.cache.lru_cache import LRUCache
+from api.shield.cache.scan_result_cache import ScanResultCache
+from api.shield.services.scanner_execution_service import ScannerExecutionEngine
 from api.shield.utils import config_utils
-from opentelemetry import metrics
-import concurrent.futures
-
-from api.shield.utils.custom_exceptions import ShieldException
-import time
 
 from core.utils import Singleton
 
 logger = logging.getLogger(__name__)
-meter = metrics.get_meter(__name__)
 
 
 class ApplicationManager(Singleton):
     """
     The ApplicationManager class is responsible for managing the application's scanners.
-    It uses an LRUCache to store the scanners for each application key.
+    It uses an LRUCache to store the scanners for each application key and the ScannerExecutionEngine to run them.
+    The results of the scanners which support it are kept in a ScanResultCache, keyed by the message hash, the
+    scanner configuration version and the request type.
     """
-    scan_timings_histogram = None
 
     def __init__(self):
         """
@@ -36,9 +33,13 @@ class ApplicationManager(Singleton):
         max_idle_time = config_utils.get_property_value_int("max_scanners_cache_idle_time", 1800)
         self.cache_name = "ApplicationKey_Scanners"
         self.application_key_scanners = LRUCache(self.cache_name, max_capacity, max_idle_time)
-        self.shield_scanner_max_workers = config_utils.get_property_value_int("shield_scanner_max_workers", 4)
-        ApplicationManager.scan_timings_histogram = meter.create_histogram("scan_timings", "ms",
-                                                                           "Histogram for scan timings")
+        self.scanner_execution_engine = ScannerExecutionEngine()
+        self.scanner_config_versions = {}
+        self.scan_result_cache = None
+        if config_utils.get_property_value_boolean("scan_result_cache_enabled", True):
+            max_size_bytes = config_utils.get_property_value_int("scan_result_cache_max_size_bytes", 67108864)
+            ttl_sec = config_utils.get_property_value_int("scan_result_cache_ttl_sec", 3600)
+            self.scan_result_cache = ScanResultCache("Scan_Results", max_size_bytes, ttl_sec)
 
     def load_scanners(self, application_key: str):
         """
@@ -49,9 +50,13 @@ class ApplicationManager(Singleton):
         """
         scanner_list = parse_properties(application_key)
         self.application_key_scanners.put(application_key, scanner_list)
+        # results of the previous scanner configuration must not be served anymore
+        self.scanner_config_versions[application_key] = self.scanner_config_versions.get(application_key, 0) + 1
+        if self.scan_result_cache is not None:
+            self.scan_result_cache.invalidate(lambda key: key[0] == application_key)
         logger.info(f"Found {scanner_list} scanners for application key: {application_key}")
 
-    def get_scanners(self, application_key: str, request_type: str, is_authz_scan: bool, auth_req: AuthorizeRequest) -> list:
+    def get_scanners(self, application_key: str, request_type: str, is_authz_scan: bool) -> list:
         """
         Get the scanners for the given application key.
         If the scanners are not in the cache, load them.
@@ -60,7 +65,6 @@ class ApplicationManager(Singleton):
             application_key (str): The application key.
             request_type (str): The request type.
             is_authz_scan (bool): The flag to determine if the scan is an authz or non authz.
-            auth_req (AuthorizeRequest): The request object.
 
         Returns:
             list: The list of scanners for the application key.
@@ -70,37 +74,34 @@ class ApplicationManager(Singleton):
 
         all_scanners = self.application_key_scanners.get(application_key)
 
-        scanners_list = [
+        return [
             scanner for scanner in all_scanners
             if getattr(scanner, 'enforce_access_control', False) == is_authz_scan and request_type in getattr(scanner, 'request_types', [])
         ]
 
-        guardrail_instance_infos = _extract_guardrail_instance_infos(auth_req.context)
-        guardrail_info = next((g for g in guardrail_instance_infos if isinstance(g, dict)), {})
+    def get_scan_plan(self, application_key: str, request_type: str, is_authz_scan: bool, auth_req: AuthorizeRequest) -> ScanPlan:
+        """
+        Build the scan plan of a request. The scanners are shared by all the requests of the application and are not
+        modified, the configuration of the request is carried by the options of the plan.
 
-        for scanner in scanners_list:
-            setattr(scanner, 'scan_for_req_type', request_type)
-            setattr(scanner, 'application_key', application_key)
-
-            if getattr(scanner, 'name') == 'AWSBedrockGuardrailScanner':
-                for attr in ['guardrail_id', 'guardrail_version', 'region', 'connection_details']:
-                    value = guardrail_info.get(attr)
-                    if value:
-                        setattr(scanner, attr, value)
-                    elif hasattr(scanner, attr):
-                        delattr(scanner, attr)
-            if getattr(scanner, 'name') == 'PAIGPIIGuardrailScanner':
-                from api.shield.services.guardrail_service import process_guardrail_response
-                guardrails_configs = process_guardrail_response(auth_req.context.get("guardrail_info", {}))
-                sensitive_data_configs = guardrails_configs.get("config_type", {}).get("SENSITIVE_DATA", {})
-                setattr(scanner, 'sensitive_data_config', sensitive_data_configs)
-                setattr(scanner, 'pii_traits', auth_req.context.get('pii_traits'))
-
-        return scanners_list
-
-    def scan_messages(self, message: str, auth_req: AuthorizeRequest, is_authz_scan: bool) -> (dict[str, ScannerResult], dict[str, str]):
+        Args:
+            application_key (str): The application key.
+            request_type (str): The request type.
+            is_authz_scan (bool): The flag to determine if the scan is an authz or non authz.
+            auth_req (AuthorizeRequest): The request object.
+
+        Returns:
+            ScanPlan: The scanners to run and the options of the request.
+        """
+        scanners = tuple(self.get_scanners(application_key, request_type, is_authz_scan))
+        scanner_names = {getattr(scanner, 'name', None) for scanner in scanners}
+        return ScanPlan(scanners=scanners, options=_build_scan_options(application_key, request_type, auth_req,
+                                                                      scanner_names))
+
+    async def scan_messages(self, message: str, auth_req: AuthorizeRequest, is_authz_scan: bool) -> (dict[str, ScannerResult], dict[str, str]):
         """
         Scan the given messages for all the scanners where the enforce access control flag is true.
+        The scanners run on the worker pools of the ScannerExecutionEngine, so the event loop is not blocked.
 
         Args:
             message (str): The message to scan.
@@ -114,46 +115,101 @@ class ApplicationManager(Singleton):
         application_key = auth_req.application_key
         request_type = auth_req.request_type
         tenant_id = auth_req.tenant_id
-        scanners = self.get_scanners(application_key, request_type, is_authz_scan, auth_req)
+        scan_plan = self.get_scan_plan(application_key, request_type, is_authz_scan, auth_req)
+        logger.debug(f"Found {len(scan_plan.scanners)} scanners for application key: {application_key}")
+
+        return await self.scanner_execution_engine.scan_messages(list(scan_plan.scanners), message, tenant_id,
+                                                                 scan_plan.options)
+
+
+    async def scan_messages_batch(self, messages: list[str], auth_req: AuthorizeRequest, is_authz_scan: bool) -> list[tuple[dict[str, ScannerResult], dict[str, str]]]:
+        """
+        Scan all the given messages of a request in one batch per scanner. Messages which have a cached result for
+        a scanner are served from the scan result cache and are left out of the batch of that scanner.
+
+        Args:
+            messages (list[str]): The messages to scan.
+            auth_req (AuthorizeRequest): The request object.
+            is_authz_scan (bool): The flag to determine if the scan is an authz or non authz.
+
+        Returns:
+            list: For each message, a tuple containing the scan results and the scan timings.
+        """
+        application_key = auth_req.application_key
+        request_type = auth_req.request_type
+        scan_plan = self.get_scan_plan(application_key, request_type, is_authz_scan, auth_req)
+        scanners, options = scan_plan.scanners, scan_plan.options
         logger.debug(f"Found {len(scanners)} scanners for application key: {application_key}")
 
-        scan_results, scan_timings = {}, {}
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.shield_scanner_max_workers) as executor:
-            future_to_scanner = {executor.submit(scan_with_scanner, scanner, message, tenant_id): scanner for scanner in scanners}
-            for future in concurrent.futures.as_completed(future_to_scanner):
-                scanner = future_to_scanner[future]
-                try:
-                    scanner_name, result, message_scan_time = future.result()
-                    scan_results[scanner_name] = result
-                    scan_timings[scanner_name] = message_scan_time
-                except Exception as e:
-                    logger.error(f"Scanner {scanner.name} failed with exception: {e}")
-                    raise ShieldException(f"Scanner {scanner.name} failed with exception: {e}")
-        return scan_results, scan_timings
-
-
-def scan_with_scanner(scanner: Scanner, message: str, tenant_id: str) -> (str, ScannerResult, str):
+        per_message_results = [({}, {}) for _ in messages]
+        if not scanners or not messages:
+            return per_message_results
+
+        # serve the cached results and collect the messages which still need to be scanned by each scanner
+        scanner_batches, scanner_batch_cache_keys = [], []
+        config_version = self.scanner_config_versions.get(application_key, 0)
+        for scanner in scanners:
+            scanner_cache_key = scanner.get_scan_cache_key(options) if self.scan_result_cache is not None else None
+            batch_indexes, batch_cache_keys = [], []
+            for index, message in enumerate(messages):
+                cache_key = None
+                if scanner_cache_key is not None:
+                    cache_key = ScanResultCache.build_key(message, application_key, config_version, request_type,
+                                                          scanner.name, scanner_cache_key)
+                    cached_result = self.scan_result_cache.get(cache_key)
+                    if cached_result is not None:
+                        per_message_results[index][0][scanner.name] = cached_result
+                        per_message_results[index][1][scanner.name] = "0.000"
+                        continue
+                batch_indexes.append(index)
+                batch_cache_keys.append(cache_key)
+            if batch_indexes:
+                scanner_batches.append((scanner, batch_indexes))
+                scanner_batch_cache_keys.append(batch_cache_keys)
+
+        results = await self.scanner_execution_engine.scan_batches(
+            [(scanner, [messages[index] for index in batch_indexes]) for scanner, batch_indexes in scanner_batches],
+            auth_req.tenant_id, options)
+
+        for (scanner, batch_indexes), batch_cache_keys, (scanner_name, scanner_results, batch_scan_time) in zip(
+                scanner_batches, scanner_batch_cache_keys, results):
+            message_scan_time = f"{(float(batch_scan_time) / len(batch_indexes)):.3f}"
+            for index, cache_key, scanner_result in zip(batch_indexes, batch_cache_keys, scanner_results):
+                per_message_results[index][0][scanner_name] = scanner_result
+                per_message_results[index][1][scanner_name] = message_scan_time
+                if cache_key is not None:
+                    self.scan_result_cache.put(cache_key, scanner_result)
+
+        return per_message_results
+
+
+def _build_scan_options(application_key: str, request_type: str, auth_req: AuthorizeRequest, scanner_names: set) -> ScanOptions:
     """
-    Scan the given message with the given scanner.
+    Build the per-request scan options. The guardrail options are only built when a scanner of the plan uses them.
 
     Args:
-        scanner (Scanner): The scanner to use.
-        message (str): The message to scan.
-        tenant_id (str): The tenant ID.
+        application_key (str): The application key.
+        request_type (str): The request type.
+        auth_req (AuthorizeRequest): The request object.
+        scanner_names (set): The names of the scanners of the plan.
 
     Returns:
-        dict: The scan results.
+        ScanOptions: The scan options of the request.
     """
-    logger.debug(f"Scanning message with scanner: {scanner.name}")
-    message_scan_start_time = time.perf_counter()
-    result = scanner.scan(message)
-    logger.debug(f"Scanner {scanner.name} got this result: {result} for message: {message}, which is having access "
-                 f"control: {scanner.enforce_access_control}")
-    message_scan_time = f"{((time.perf_counter() - message_scan_start_time) * 1000):.3f}"
-    ApplicationManager.scan_timings_histogram.record(float(message_scan_time),
-                                                     {"scanner": scanner.name,
-                                                      "tenant_id": tenant_id})
-    return scanner.name, result, message_scan_time
+    guardrail_options = {}
+    if 'AWSBedrockGuardrailScanner' in scanner_names:
+        guardrail_instance_infos = _extract_guardrail_instance_infos(auth_req.context)
+        guardrail_info = next((g for g in guardrail_instance_infos if isinstance(g, dict)), {})
+        for attr in ['guardrail_id', 'guardrail_version', 'region', 'connection_details', 'connection_name']:
+            guardrail_options[attr] = guardrail_info.get(attr) or None
+    if 'PAIGPIIGuardrailScanner' in scanner_names:
+        from api.shield.services.guardrail_service import process_guardrail_response
+        guardrails_configs = process_guardrail_response(auth_req.context.get("guardrail_info", {}))
+        guardrail_options['sensitive_data_config'] = guardrails_configs.get("config_type", {}).get("SENSITIVE_DATA", {})
+        pii_traits = auth_req.context.get('pii_traits')
+        guardrail_options['pii_traits'] = tuple(pii_traits) if pii_traits is not None else None
+    return ScanOptions(scan_for_req_type=request_type, application_key=application_key, **guardrail_options)
+
 
 def _extract_guardrail_instance_infos(context: dict) -> list:
     """
@@ -174,5 +230,6 @@ def _extract_guardrail_instance_infos(context: dict) -> list:
         guardrail_id, version = aws_response.get('guardrailId'), aws_response.get('version')
         if guardrail_id and version:
             result.append({'guardrail_id': guardrail_id, 'guardrail_version': version,
-                           'region':region, 'connection_details': aws_guardrail_connection_details})
+                           'region':region, 'connection_details': aws_guardrail_connection_details,
+                           'connection_name': guardrail.get('guardrail_connection_name')})
     return result
\ No newline at end of file
@@ -1,9 +1,11 @@
+import asyncio
 import copy
 import json
 import logging
 import time
 import traceback
 
+from api.authz.utils.cache_decorator import AsyncTTLCache, register_cache
 from api.shield.enum.ShieldEnums import Guardrail
 from api.shield.factory.account_service_factory import AccountServiceFactory
 from api.shield.factory.authz_service_client_factory import AuthzServiceClientFactory
@@ -71,6 +73,10 @@ class AuthService:
         self.fluentd_logger_client = FluentdRestHttpClient()
         self.tenant_data_encryptor_service = TenantDataEncryptorService(self.account_service_client)
         self.presidio_anonymizer_engine = PresidioAnonymizerEngine()
+        self.guardrail_info_cache = register_cache(AsyncTTLCache(
+            "get_application_guardrail_info",
+            config_utils.get_property_value_int("guardrail_info_cache_max_size", 1000),
+            config_utils.get_property_value_int("guardrail_info_cache_ttl_sec", 60)))
 
         self.access_log_timing_message = ""
         self.auth_req_context = {}
@@ -96,8 +102,6 @@ class AuthService:
 
         """
         authorize_start_time = time.perf_counter()
-        masked_messages = []
-        original_masked_text_list = []
         all_result_traits = []
         access_control_traits = set()
         analyzer_result_map = {}
@@ -112,7 +116,7 @@ class AuthService:
 
         # loop through the messages in request to scan for traits
         message_analyze_start_time = time.perf_counter()
-        scan_timings_per_message = self.analyze_scan_messages(access_control_traits, all_result_traits,
+        scan_timings_per_message = await self.analyze_scan_messages(access_control_traits, all_result_traits,
                                                               analyzer_result_map, auth_req, True, {})
         message_analyze_time = f"{((time.perf_counter() - message_analyze_start_time) * 1000):.3f}"
         logger.debug(f"All resulted tags from input text {all_result_traits}")
@@ -124,6 +128,136 @@ class AuthService:
         authz_service_res = await self.do_authz_authorize(auth_req, all_result_traits)
         authz_time = f"{((time.perf_counter() - authz_start_time) * 1000):.3f}"
         logger.debug(f"Received authz service response: {authz_service_res.__dict__}")
+
+        auth_response, post_authz_timings = await self.complete_authorization(auth_req, authz_service_res,
+                                                                              access_control_traits,
+                                                                              all_result_traits, analyzer_result_map)
+        non_authz_scan_timings_per_message = post_authz_timings["non_authz_scan_timings"]
+        masking_time = post_authz_timings["masking_time"]
+        encrypt_time = post_authz_timings["encrypt_time"]
+        audit_cloud_time = post_authz_timings["audit_cloud_time"]
+        audit_self_managed_time = post_authz_timings["audit_self_managed_time"]
+
+        authorize_total_time = f"{((time.perf_counter() - authorize_start_time) * 1000):.3f}"
+        self.access_log_timing_message = (f" Total time= {authorize_total_time}ms, "
+                                          f"Decryption time= {decrypt_time}ms, Message analysis time= {message_analyze_time}ms, "
+                                          f"Authz authorization time = {authz_time}ms, Masking time= {masking_time}ms, "
+                                          f"Encryption time= {encrypt_time}ms, Audit Cloud time= {audit_cloud_time}ms ,"
+                                          f"Audit Self managed time= {audit_self_managed_time}ms ,"
+                                          f"Message Scan timings= {scan_timings_per_message}ms, "
+                                          f"Non Authz Message Scan timings= {non_authz_scan_timings_per_message}ms")
+
+        return auth_response
+
+    async def authorize_batch(self, auth_reqs: list[AuthorizeRequest]):
+        """
+        Authorizes a batch of independent requests.
+
+        The requests are decrypted concurrently, the messages of all the requests of the same application and request
+        type are scanned together in one batch per scanner, and the authz service is called once per distinct user,
+        application, request type and set of traits. Each request is then completed, audited and encrypted on its own.
+
+        Args:
+            auth_reqs (list[AuthorizeRequest]): The authorization requests.
+
+        Yields:
+            tuple: The position of the request in the batch and its AuthorizeResponse, or the exception raised while
+                   authorizing it. Results are yielded as soon as each request is completed.
+        """
+        batch_start_time = time.perf_counter()
+        failures = {}
+
+        decrypt_results = await asyncio.gather(
+            *[self.tenant_data_encryptor_service.decrypt_authorize_request(auth_req) for auth_req in auth_reqs],
+            return_exceptions=True)
+        for index, decrypt_result in enumerate(decrypt_results):
+            if isinstance(decrypt_result, Exception):
+                failures[index] = decrypt_result
+
+        # scan the messages of the requests of the same application and request type together
+        scan_groups = {}
+        for index, auth_req in enumerate(auth_reqs):
+            if index not in failures:
+                group_key = (auth_req.tenant_id, auth_req.application_key, auth_req.request_type)
+                scan_groups.setdefault(group_key, []).append(index)
+
+        batch_scan_results = {}
+        for indexes in scan_groups.values():
+            messages = [message for index in indexes for message in auth_reqs[index].messages]
+            try:
+                scan_results = await self.application_manager.scan_messages_batch(messages, auth_reqs[indexes[0]],
+                                                                                  True)
+            except Exception as e:
+                for index in indexes:
+                    failures[index] = e
+                continue
+            offset = 0
+            for index in indexes:
+                message_count = len(auth_reqs[index].messages)
+                batch_scan_results[index] = scan_results[offset:offset + message_count]
+                offset += message_count
+
+        authz_responses = {}
+        for index, auth_req in enumerate(auth_reqs):
+            if index in failures:
+                yield index, failures[index]
+                continue
+            try:
+                all_result_traits = []
+                access_control_traits = set()
+                analyzer_result_map = {}
+                self.collect_scan_results(batch_scan_results[index], auth_req.messages, access_control_traits,
+                                          all_result_traits, analyzer_result_map, {})
+
+                authz_service_res = await self.get_batch_authz_response(authz_responses, auth_req, all_result_traits)
+                auth_response, _ = await self.complete_authorization(auth_req, authz_service_res,
+                                                                     access_control_traits, all_result_traits,
+                                                                     analyzer_result_map)
+                yield index, auth_response
+            except Exception as e:
+                logger.error(f"Error while authorizing request {index} of the batch: {type(e).__name__}: {str(e)}")
+                yield index, e
+
+        batch_total_time = f"{((time.perf_counter() - batch_start_time) * 1000):.3f}"
+        self.access_log_timing_message = (f" Total time= {batch_total_time}ms, Batch size= {len(auth_reqs)}, "
+                                          f"Failed requests= {len(failures)}, "
+                                          f"Authz authorization calls= {len(authz_responses)}")
+
+    async def get_batch_authz_response(self, authz_responses: dict, auth_req: AuthorizeRequest, traits: list):
+        """
+        Returns the authz service response for the request, calling the authz service only for the first request of
+        a batch with the same user, application, request type and set of traits.
+
+        Args:
+            authz_responses (dict): The authz service responses of the batch, by authz key.
+            auth_req (AuthorizeRequest): The authorization request.
+            traits (list): The traits found in the messages of the request.
+
+        Returns:
+            AuthzServiceResponse: A copy of the authz service response for the request.
+        """
+        authz_service_req = AuthzServiceRequest(auth_req=auth_req, traits=traits)
+        authz_key = (auth_req.tenant_id, auth_req.application_key, auth_req.client_application_key, auth_req.user_id,
+                     auth_req.user_role, authz_service_req.requestType, frozenset(traits))
+        if authz_key not in authz_responses:
+            authz_responses[authz_key] = await self.authz_service_client.post_authorize(authz_service_req,
+                                                                                        auth_req.tenant_id)
+        # the response is updated by the guardrail scan of each request
+        authz_service_res = copy.deepcopy(authz_responses[authz_key])
+        authz_service_res.request_id = auth_req.request_id
+        return authz_service_res
+
+    async def complete_authorization(self, auth_req: AuthorizeRequest, authz_service_res: AuthzServiceResponse,
+                                     access_control_traits, all_result_traits, analyzer_result_map):
+        """
+        Completes the authorization of a request once its messages are scanned and the authz service responded:
+        runs the guardrail scan, masks the messages, logs the audit and builds the encrypted response.
+
+        Returns:
+            tuple: The AuthorizeResponse and a dictionary of the timings of each step in milliseconds.
+        """
+        masked_messages = []
+        original_masked_text_list = []
         is_allowed = authz_service_res.authorized
 
         # process for non authz scanners
@@ -136,6 +270,7 @@ class AuthService:
 
         masking_start_time = time.perf_counter()
         # post authz process i.e masking the message
+        self.auth_req_context = auth_req.context
         self.post_authz_process(analyzer_result_map, auth_req, authz_service_res, masked_messages, original_masked_text_list)
         masking_time = f"{((time.perf_counter() - masking_start_time) * 1000):.3f}"
 
@@ -169,16 +304,10 @@ class AuthService:
                 ['responseMessages']))
         encrypt_time = f"{((time.perf_counter() - encrypt_start_time) * 1000):.3f}"
 
-        authorize_total_time = f"{((time.perf_counter() - authorize_start_time) * 1000):.3f}"
-        self.access_log_timing_message = (f" Total time= {authorize_total_time}ms, "
-                                          f"Decryption time= {decrypt_time}ms, Message analysis time= {message_analyze_time}ms, "
-                                          f"Authz authorization time = {authz_time}ms, Masking time= {masking_time}ms, "
-                                          f"Encryption time= {encrypt_time}ms, Audit Cloud time= {audit_cloud_time}ms ,"
-                                          f"Audit Self managed time= {audit_self_managed_time}ms ,"
-                                          f"Message Scan timings= {scan_timings_per_message}ms, "
-                                          f"Non Authz Message Scan timings= {non_authz_scan_timings_per_message}ms")
-
-        return auth_response
+        timings = {"non_authz_scan_timings": non_authz_scan_timings_per_message, "masking_time": masking_time,
+                   "encrypt_time": encrypt_time, "audit_cloud_time": audit_cloud_time,
+                   "audit_self_managed_time": audit_self_managed_time}
+        return auth_response, timings
 
     def post_authz_process(self, analyzer_result_map, auth_req, authz_service_res, masked_messages,
                            original_masked_text_list):
@@ -192,20 +321,33 @@ class AuthService:
                                     masked_messages,
                                     original_masked_text_list)
 
-    def analyze_scan_messages(self, access_control_traits, all_result_traits, analyzer_result_map, auth_req,
+    async def analyze_scan_messages(self, access_control_traits, all_result_traits, analyzer_result_map, auth_req,
                               is_authz_scan, masked_traits_dict):
         """
         Analyzes the messages in the authorization request to extract traits and generate scan results.
 
+        Returns:
+            list: A list of dictionaries where each dictionary contains the scan timings for a message, with each
+                  dictionary keyed by scanner names and their respective scan timings in milliseconds.
+        """
+        # Analyze traits of all the messages in one batch per scanner
+        batch_scan_results = await self.application_manager.scan_messages_batch(auth_req.messages, auth_req,
+                                                                                 is_authz_scan)
+        return self.collect_scan_results(batch_scan_results, auth_req.messages, access_control_traits,
+                                         all_result_traits, analyzer_result_map, masked_traits_dict)
+
+    @staticmethod
+    def collect_scan_results(batch_scan_results, messages, access_control_traits, all_result_traits,
+                             analyzer_result_map, masked_traits_dict):
+        """
+        Collects the traits, analyzer results, actions and masked traits from the scan results of the messages.
+
         Returns:
             list: A list of dictionaries where each dictionary contains the scan timings for a message, with each
                   dictionary keyed by scanner names and their respective scan timings in milliseconds.
         """
         scan_timings_per_message = []
-        for request_text in auth_req.messages:
-            # Analyze traits
-            scanners_results, message_scan_timings = self.application_manager.scan_messages(
-                request_text, auth_req, is_authz_scan)
+        for request_text, (scanners_results, message_scan_timings) in zip(messages, batch_scan_results):
             scan_timings = {scanner_name: f"{message_scan_time}ms" for scanner_name, message_scan_time in
                             message_scan_timings.items()}
 
@@ -521,23 +663,48 @@ class AuthService:
 
         return response_text_message
 
+    async def get_application_guardrail_info(self, tenant_id, application_key):
+        """
+        Get the guardrail associated with the application and its info with the decrypted connection details.
+        The result is cached, as it is needed for every request of the application and only changes with the
+        application or the guardrail.
+
+        Args:
+            tenant_id (str): The tenant ID.
+            application_key (str): The application key.
+
+        Returns:
+            tuple: The guardrail name, or None if the application has no guardrail, and the guardrail info.
+        """
+        return await self.guardrail_info_cache.get_or_load(
+            (tenant_id, application_key),
+            lambda: self._load_application_guardrail_info(tenant_id, application_key))
+
+    async def _load_application_guardrail_info(self, tenant_id, application_key):
+        guardrail_name = await self.governance_service_client.get_application_guardrail_name(tenant_id, application_key)
+        if not guardrail_name:
+            return guardrail_name, None
+
+        guardrail_info = await self.guardrail_service_client.get_guardrail_info_by_name(tenant_id, guardrail_name)
+        if guardrail_info:
+            await self.tenant_data_encryptor_service.decrypt_guardrail_connection_details(tenant_id, guardrail_info.get("guardrail_connection_details", {}))
+        return guardrail_name, guardrail_info
+
     async def do_guardrail_scan(self, access_control_traits, all_result_traits, analyzer_result_map, auth_req,
                                     authz_service_res):
-        guardrail_name = await self.governance_service_client.get_application_guardrail_name(auth_req.tenant_id, auth_req.application_key)
+        guardrail_name, guardrail_info = await self.get_application_guardrail_info(auth_req.tenant_id, auth_req.application_key)
         if not guardrail_name:
             logger.debug("No guardrail info association for the application. Hence, skipping guardrail scan.")
             return True, 0
 
-        guardrail_info = await self.guardrail_service_client.get_guardrail_info_by_name(auth_req.tenant_id, guardrail_name)
         non_authz_scan_timings_per_message = 0
         is_allowed = True
         if guardrail_info:
-            await self.tenant_data_encryptor_service.decrypt_guardrail_connection_details(auth_req.tenant_id, guardrail_info.get("guardrail_connection_details", {}))
             auth_req.context.update({"guardrail_info": guardrail_info})
             auth_req.context.update({"pii_traits": all_result_traits})
             auth_req.context.update({"guardrail_name": guardrail_name})
             masked_traits = {}
-            non_authz_scan_timings_per_message = self.analyze_scan_messages(access_control_traits, all_result_traits,
+            non_authz_scan_timings_per_message = await self.analyze_scan_messages(access_control_traits, all_result_traits,
                                                                             analyzer_result_map, auth_req, False,
                                                                             masked_traits)
 
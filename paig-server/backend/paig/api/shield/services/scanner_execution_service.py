@@ -0,0 +1,292 @@
+import asyncio
+import concurrent.futures
+import logging
+import time
+from threading import Lock
+
+from opentelemetry import metrics
+from opentelemetry.metrics import Observation
+
+from api.shield.model.scan_plan import ScanOptions
+from api.shield.model.scanner_result import ScannerResult
+from api.shield.scanners.BaseScanner import Scanner
+from api.shield.utils import config_utils
+from api.shield.utils.custom_exceptions import ShieldException
+from core.utils import Singleton
+
+logger = logging.getLogger(__name__)
+meter = metrics.get_meter(__name__)
+
+
+class ScannerExecutionEngine(Singleton):
+    """
+    Long-lived execution engine which runs the scanners outside the event loop.
+
+    The engine owns a thread pool which is shared by all the requests of the worker and an optional process pool
+    for scanners which are configured with `execution_mode=process`. The number of scan tasks waiting for or running
+    on the pools is bounded, once the bound is reached new scans are rejected with a ShieldException instead of
+    piling up behind the slow ones.
+
+    Attributes:
+        max_thread_workers (int): The number of threads in the scanner thread pool.
+        max_process_workers (int): The number of processes in the scanner process pool, 0 disables the pool.
+        max_queue_size (int): The maximum number of scan tasks which can be queued or running at a time.
+        pending_tasks (int): The number of scan tasks currently queued or running.
+    """
+
+    scan_timings_histogram = None
+    scan_wait_timings_histogram = None
+
+    def __init__(self):
+        """
+        Initialize the pools and the OTel metrics of the engine from the shield configs.
+        """
+        if self.is_instance_initialized():
+            return
+        self.max_thread_workers = config_utils.get_property_value_int("shield_scanner_max_workers", 4)
+        self.max_process_workers = config_utils.get_property_value_int("shield_scanner_max_process_workers", 0)
+        self.max_queue_size = config_utils.get_property_value_int("shield_scanner_max_queue_size", 1000)
+
+        self.thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_thread_workers,
+                                                                 thread_name_prefix="shield-scanner")
+        self.process_pool = None
+        if self.max_process_workers > 0:
+            self.process_pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_process_workers)
+
+        self.pending_tasks = 0
+        self.lock = Lock()
+
+        # OTel metrics
+        ScannerExecutionEngine.scan_timings_histogram = meter.create_histogram("scan_timings", "ms",
+                                                                               "Histogram for scan timings")
+        ScannerExecutionEngine.scan_wait_timings_histogram = meter.create_histogram(
+            "scan_wait_timings", "ms", "Histogram for the time scans wait for a free scanner worker")
+        self.pool_size_metric = meter.create_observable_gauge(
+            name="scanner_pool_size",
+            callbacks=[self.get_pool_size],
+            description="The number of workers in the scanner pools"
+        )
+        self.queue_depth_metric = meter.create_observable_gauge(
+            name="scanner_queue_depth",
+            callbacks=[self.get_queue_depth],
+            description="The number of scan tasks queued or running on the scanner pools"
+        )
+        logger.info(f"ScannerExecutionEngine initialized with {self.max_thread_workers} threads, "
+                    f"{self.max_process_workers} processes and queue size {self.max_queue_size}")
+
+    async def scan_messages(self, scanners: list[Scanner], message: str, tenant_id: str, options: ScanOptions = None) -> (dict[str, ScannerResult], dict[str, str]):
+        """
+        Scan the given message with all the given scanners concurrently without blocking the event loop.
+
+        Args:
+            scanners (list[Scanner]): The scanners to run.
+            message (str): The message to scan.
+            tenant_id (str): The tenant ID.
+            options (ScanOptions): The per-request options passed to the scanners.
+
+        Returns:
+            tuple: A tuple containing the scan results and the scan timings keyed by scanner name.
+
+        Raises:
+            ShieldException: If the scan queue is full or any of the scanners fails.
+        """
+        if not scanners:
+            return {}, {}
+
+        results = await self._run_on_pools([(scanner, message) for scanner in scanners], scan_with_scanner, tenant_id,
+                                           options)
+
+        scan_results, scan_timings = {}, {}
+        for scanner_name, scanner_result, message_scan_time in results:
+            scan_results[scanner_name] = scanner_result
+            scan_timings[scanner_name] = message_scan_time
+        return scan_results, scan_timings
+
+    async def scan_messages_batch(self, scanners: list[Scanner], messages: list[str], tenant_id: str, options: ScanOptions = None) -> list[tuple[dict[str, ScannerResult], dict[str, str]]]:
+        """
+        Scan all the given messages with all the given scanners. Each scanner gets the whole batch in a single
+        `scan_batch` call, so scanners which support batching pay their setup cost once per batch.
+
+        Args:
+            scanners (list[Scanner]): The scanners to run.
+            messages (list[str]): The messages to scan.
+            tenant_id (str): The tenant ID.
+            options (ScanOptions): The per-request options passed to the scanners.
+
+        Returns:
+            list: For each message, in the order of the messages, a tuple containing the scan results and the scan
+            timings keyed by scanner name. The scan timing of a message is the batch scan time amortized over the
+            messages of the batch.
+
+        Raises:
+            ShieldException: If the scan queue is full or any of the scanners fails.
+        """
+        per_message_results = [({}, {}) for _ in messages]
+        if not scanners or not messages:
+            return per_message_results
+
+        results = await self.scan_batches([(scanner, messages) for scanner in scanners], tenant_id, options)
+
+        for scanner_name, scanner_results, batch_scan_time in results:
+            message_scan_time = f"{(float(batch_scan_time) / len(messages)):.3f}"
+            for (scan_results, scan_timings), scanner_result in zip(per_message_results, scanner_results):
+                scan_results[scanner_name] = scanner_result
+                scan_timings[scanner_name] = message_scan_time
+        return per_message_results
+
+    async def scan_batches(self, scanner_batches: list[tuple[Scanner, list[str]]], tenant_id: str, options: ScanOptions = None) -> list[tuple[str, list[ScannerResult], str]]:
+        """
+        Scan a batch of messages per scanner, the batches of the different scanners may differ.
+
+        Args:
+            scanner_batches (list): The scanners to run, each with the batch of messages it should scan.
+            tenant_id (str): The tenant ID.
+            options (ScanOptions): The per-request options passed to the scanners.
+
+        Returns:
+            list: For each scanner, in the order of the given batches, a tuple containing the scanner name, the scan
+            result of each message of its batch and the batch scan time in milliseconds.
+
+        Raises:
+            ShieldException: If the scan queue is full or any of the scanners fails.
+        """
+        if not scanner_batches:
+            return []
+        return await self._run_on_pools(scanner_batches, scan_batch_with_scanner, tenant_id, options)
+
+    async def _run_on_pools(self, scanner_inputs: list[tuple[Scanner, object]], scan_function, tenant_id: str, options: ScanOptions = None) -> list:
+        """
+        Run the scan function for each scanner and its input on the scanner pools and wait for all of them to
+        complete.
+        """
+        self._acquire_slots(len(scanner_inputs))
+        loop = asyncio.get_running_loop()
+        futures = []
+        try:
+            for scanner, scan_input in scanner_inputs:
+                futures.append(loop.run_in_executor(self._get_executor(scanner), scan_function, scanner, scan_input,
+                                                    tenant_id, time.perf_counter(), options))
+            results = await asyncio.gather(*futures, return_exceptions=True)
+        finally:
+            self._release_slots(len(scanner_inputs))
+
+        for (scanner, _), result in zip(scanner_inputs, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Scanner {scanner.name} failed with exception: {result}")
+                raise ShieldException(f"Scanner {scanner.name} failed with exception: {result}")
+        return results
+
+    def _get_executor(self, scanner: Scanner) -> concurrent.futures.Executor:
+        """
+        Get the pool to run the given scanner on. Scanners run on the thread pool unless they are configured with
+        `execution_mode=process` and the process pool is enabled.
+        """
+        if self.process_pool is not None and getattr(scanner, 'execution_mode', 'thread') == 'process':
+            return self.process_pool
+        return self.thread_pool
+
+    def _acquire_slots(self, count: int):
+        with self.lock:
+            if self.pending_tasks + count > self.max_queue_size:
+                raise ShieldException(f"Scanner queue is full. The scan rate is too high for the configured "
+                                      f"{self.max_queue_size} queue size.")
+            self.pending_tasks += count
+
+    def _release_slots(self, count: int):
+        with self.lock:
+            self.pending_tasks -= count
+
+    def get_pool_size(self, options):
+        """
+        Get the number of workers in the scanner pools.
+
+        Returns:
+            Iterable[Observation]: The pool size of each pool.
+        """
+        observations = [Observation(value=self.max_thread_workers, attributes={"pool": "thread"})]
+        if self.process_pool is not None:
+            observations.append(Observation(value=self.max_process_workers, attributes={"pool": "process"}))
+        return observations
+
+    def get_queue_depth(self, options):
+        """
+        Get the number of scan tasks queued or running on the scanner pools.
+
+        Returns:
+            Iterable[Observation]: The current queue depth.
+        """
+        with self.lock:
+            return [Observation(value=self.pending_tasks)]
+
+    def shutdown(self):
+        """
+        Shutdown the scanner pools, waiting for the running scans to complete.
+        """
+        self.thread_pool.shutdown(wait=True)
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=True)
+        logger.info("ScannerExecutionEngine shutdown completed")
+
+
+def scan_with_scanner(scanner: Scanner, message: str, tenant_id: str, submit_time: float = None, options: ScanOptions = None) -> (str, ScannerResult, str):
+    """
+    Scan the given message with the given scanner.
+
+    Args:
+        scanner (Scanner): The scanner to use.
+        message (str): The message to scan.
+        tenant_id (str): The tenant ID.
+        submit_time (float): The perf counter value when the scan was submitted to the pool.
+        options (ScanOptions): The per-request options passed to the scanner.
+
+    Returns:
+        tuple: The scanner name, the scan result and the scan time in milliseconds.
+    """
+    logger.debug(f"Scanning message with scanner: {scanner.name}")
+    message_scan_start_time = time.perf_counter()
+    _record_scan_wait_time(scanner, tenant_id, submit_time, message_scan_start_time)
+    result = scanner.scan(message, options)
+    logger.debug(f"Scanner {scanner.name} got this result: {result} for message: {message}, which is having access "
+                 f"control: {scanner.enforce_access_control}")
+    message_scan_time = f"{((time.perf_counter() - message_scan_start_time) * 1000):.3f}"
+    _record_scan_time(scanner, tenant_id, message_scan_time)
+    return scanner.name, result, message_scan_time
+
+
+def scan_batch_with_scanner(scanner: Scanner, messages: list[str], tenant_id: str, submit_time: float = None, options: ScanOptions = None) -> (str, list[ScannerResult], str):
+    """
+    Scan the given batch of messages with the given scanner.
+
+    Args:
+        scanner (Scanner): The scanner to use.
+        messages (list[str]): The messages to scan.
+        tenant_id (str): The tenant ID.
+        submit_time (float): The perf counter value when the scan was submitted to the pool.
+        options (ScanOptions): The per-request options passed to the scanner.
+
+    Returns:
+        tuple: The scanner name, the scan result of each message and the batch scan time in milliseconds.
+    """
+    logger.debug(f"Scanning batch of {len(messages)} messages with scanner: {scanner.name}")
+    batch_scan_start_time = time.perf_counter()
+    _record_scan_wait_time(scanner, tenant_id, submit_time, batch_scan_start_time)
+    results = scanner.scan_batch(messages, options)
+    if len(results) != len(messages):
+        raise ShieldException(f"Scanner {scanner.name} returned {len(results)} results for {len(messages)} messages")
+    batch_scan_time = f"{((time.perf_counter() - batch_scan_start_time) * 1000):.3f}"
+    _record_scan_time(scanner, tenant_id, batch_scan_time)
+    return scanner.name, results, batch_scan_time
+
+
+def _record_scan_wait_time(scanner: Scanner, tenant_id: str, submit_time: float, scan_start_time: float):
+    if submit_time is not None and ScannerExecutionEngine.scan_wait_timings_histogram is not None:
+        ScannerExecutionEngine.scan_wait_timings_histogram.record((scan_start_time - submit_time) * 1000,
+                                                                  {"scanner": scanner.name,
+                                                                   "tenant_id": tenant_id})
+
+
+def _record_scan_time(scanner: Scanner, tenant_id: str, scan_time: str):
+    if ScannerExecutionEngine.scan_timings_histogram is not None:
+        ScannerExecutionEngine.scan_timings_histogram.record(float(scan_time),
+                                                             {"scanner": scanner.name,
+                                                              "tenant_id": tenant_id})
@@ -73,6 +73,12 @@ class ShieldService:
         logger.debug(f"Authorization response: {auth_response}")
         return auth_response
 
+    async def authorize_batch(self, auth_reqs: list[AuthorizeRequest]):
+        logger.debug(f"Processing batch authorization request of {len(auth_reqs)} requests")
+
+        async for index, auth_result in self.auth_service.authorize_batch(auth_reqs):
+            yield index, auth_result
+
     async def authorize_vectordb(self, x_tenant_id, x_user_role, request):
         vectordb_auth_req = AuthorizeVectorDBRequest(request, x_user_role)
         vectordb_auth_res = await self.auth_service.authorize_vectordb(vectordb_auth_req, x_tenant_id)
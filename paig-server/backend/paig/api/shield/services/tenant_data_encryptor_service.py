@@ -10,7 +10,7 @@ from pathlib import Path
 
 from api.shield.model.shield_audit import ShieldAuditViaApi
 from api.shield.utils.custom_exceptions import ShieldException
-from paig_common.encryption import DataEncryptor
+from paig_common.encryption import DataEncryptor, ENCRYPTION_MODE_ENVELOPE
 from api.shield.model.encryption_key_info import EncryptionKeyInfo
 from api.shield.model.authorize_response import AuthorizeResponse
 from api.shield.utils import config_utils
@@ -70,12 +70,12 @@ class ShieldDataEncryptor:
 
         logger.debug(f"<== {self.tenant_id} : ShieldDataEncryptor::create_data_encryptor()")
 
-    def encrypt(self, data):
+    def encrypt(self, data, encryption_mode=None):
         if self.data_encryptor is None:
             logger.error(f"Encryption keys not loaded for tenant = {self.tenant_id}")
             raise ShieldException()
 
-        return self.data_encryptor.encrypt(data)
+        return self.data_encryptor.encrypt(data, encryption_mode)
 
     def decrypt(self, data):
         if self.data_encryptor is None:
@@ -259,6 +259,10 @@ class TenantDataEncryptorService(Singleton):
         self.data_encryptors_cleanup_thread.daemon = True
         self.data_encryptors_cleanup_thread_started = False
 
+        # Encryption mode of the audit messages, envelope seals each message with a session AES-GCM data key
+        self.audit_encryption_mode = config_utils.get_property_value("shield_audit_encryption_mode",
+                                                                     ENCRYPTION_MODE_ENVELOPE)
+
         logger.debug("<== TenantDataEncryptorService()")
 
     async def get_data_encryptor(self, tenant_id, encryption_key_id=None) -> ShieldDataEncryptor:
@@ -315,9 +319,9 @@ class TenantDataEncryptorService(Singleton):
 
             time.sleep(self.cleanup_interval_sec)
 
-    async def encrypt(self, tenant_id, data, encryption_key_id=None):
+    async def encrypt(self, tenant_id, data, encryption_key_id=None, encryption_mode=None):
         data_encryptor = await self.get_data_encryptor(tenant_id, encryption_key_id)
-        return data_encryptor.encrypt(data)
+        return data_encryptor.encrypt(data, encryption_mode)
 
     async def decrypt(self, tenant_id, data, encryption_key_id=None):
         data_encryptor = await self.get_data_encryptor(tenant_id, encryption_key_id)
@@ -327,9 +331,11 @@ class TenantDataEncryptorService(Singleton):
         for message_object in audit_message:
             for key, value in message_object.items():
                 if value is not None and key != "analyzerResult":
-                    message_object[key] = await self.encrypt(tenant_id, value, encryption_key_id)
+                    message_object[key] = await self.encrypt(tenant_id, value, encryption_key_id,
+                                                             self.audit_encryption_mode)
 
     async def decrypt_authorize_request(self, auth_request: AuthorizeRequest):
+        # The envelope and chunked messages are both decrypted, the format is detected from the message
         decrypted_messages = []
         for message in auth_request.messages:
             decrypted_message = await self.decrypt(auth_request.tenant_id, message, auth_request.shield_server_key_id)
@@ -344,11 +350,13 @@ class TenantDataEncryptorService(Singleton):
                     message_object[key] = await self.decrypt(shield_audit.tenantId, value, shield_audit.encryptionKeyId)
 
     async def encrypt_authorize_response(self, auth_request: AuthorizeRequest, auth_response: AuthorizeResponse):
+        # The response messages are encrypted in the encryption mode negotiated by the plugin
         encrypted_messages = []
         for message in auth_response.responseMessages:
             message_copy = message.copy()
             message_copy["responseText"] = await self.encrypt(auth_request.tenant_id, message_copy["responseText"],
-                                                              auth_request.shield_plugin_key_id)
+                                                              auth_request.shield_plugin_key_id,
+                                                              auth_request.encryption_mode)
             encrypted_messages.append(message_copy)
 
         auth_response.responseMessages = encrypted_messages
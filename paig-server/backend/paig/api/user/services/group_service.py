@@ -7,6 +7,8 @@ from api.user.database.db_operations.user_repository import UserRepository
 from core.exceptions import BadRequestException, NotFoundException
 from core.controllers.paginated_response import create_pageable_response
 from core.utils import SingletonDepends
+from api.authz.utils.cache_invalidation import invalidate_user_cache
+from core.db_session import run_after_commit
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +47,7 @@ class GroupService:
         await self.gov_service_validation_util.validate_entity_is_not_utilized(group.name, "Group")
 
         await self.group_repository.delete_group(group)
+        run_after_commit(invalidate_user_cache)
         return group.to_ui_dict()
 
     async def update_group(self, group_id, group_params):
@@ -101,6 +104,7 @@ class GroupService:
         if members_to_remove and len(members_to_remove) > 0:
             await self.group_member_repository.delete_in_bulk(group_id, list(members_to_remove))
 
+        run_after_commit(invalidate_user_cache)
         return {"message": "Group members updated successfully"}
 
     async def get_groups_with_members_count(self, search_filters, page, size, sort):
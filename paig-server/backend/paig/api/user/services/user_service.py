@@ -11,6 +11,8 @@ from core.config import load_config_file
 import api.user.constants as users_constants
 from core.constants import DEFAULT_TENANT_ID
 from core.controllers.paginated_response import create_pageable_response
+from api.authz.utils.cache_invalidation import invalidate_user_cache
+from core.db_session import run_after_commit
 
 logger = logging.getLogger(__name__)
 config = load_config_file()
@@ -72,6 +74,7 @@ class UserService:
         if groups and len(groups) > 0:
             group_model = await self.group_repository.get_groups_by_in_list('name', groups)
         user = await self.user_repository.create_user(user_model_params, group_model)
+        run_after_commit(invalidate_user_cache)
         return user.to_ui_dict()
 
     async def get_user_tenants(self, user: dict):
@@ -114,6 +117,7 @@ class UserService:
         target_groups = await self.group_repository.get_groups_by_in_list('name', new_groups)
         user_model.groups = target_groups
         updated_user = await self.user_repository.update_user(user_new_params, user_model)
+        run_after_commit(invalidate_user_cache)
         return updated_user.to_ui_dict()
 
     async def delete_user(self, id: int, user: dict):
@@ -126,6 +130,7 @@ class UserService:
             # Validate if users is part of app config, app policy or vector db policy
             await self.gov_service_validation_util.validate_entity_is_not_utilized(user_info.username, "User")
             await self.user_repository.delete_user(user_info)
+            run_after_commit(invalidate_user_cache)
             return user_info.to_ui_dict()
         raise UnauthorizedException("Unauthorized to perform this action")
 
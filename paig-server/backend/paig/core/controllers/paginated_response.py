@@ -1,6 +1,15 @@
-from typing import List
+import base64
+import binascii
+import json
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
+from core.exceptions import BadRequestException
+
+COUNT_MODE_EXACT = "exact"
+COUNT_MODE_CAPPED = "capped"
+COUNT_MODE_NONE = "none"
+
 
 class Pageable(BaseModel):
     """
@@ -69,3 +78,79 @@ def create_pageable_response(content: list, total_elements: int, page_number: in
         first=page_number == 0,
         empty=len(content) == 0
     )
+
+
+class CursorPageable(Pageable):
+    """
+    Model representing a pageable response which can also be paged with a cursor, instead of a page number.
+
+    Attributes:
+        nextCursor (str): The cursor of the next page, None on the last page or when the sort does not support cursors.
+        totalElementsExact (bool): Indicates if totalElements is exact, instead of a lower bound when the count is
+        capped or not requested.
+    """
+
+    nextCursor: Optional[str] = Field(None, description="The cursor of the next page")
+    totalElementsExact: bool = Field(True, description="Indicates if the total number of elements is exact")
+
+
+def create_cursor_pageable_response(content: list, total_elements: Optional[int], page_number: int, size: int,
+                                    sort: List[str], has_more: bool, next_cursor: str = None,
+                                    total_elements_exact: bool = True) -> CursorPageable:
+    """
+    Create a pageable response object of a page which was fetched with one more element than the page size, to know
+    whether it is the last page without counting the elements.
+
+    Args:
+        content (list): List of content items for the current page.
+        total_elements (int): Total number of elements across all pages, None if not counted.
+        page_number (int): Current page number (starting from 0).
+        size (int): Size of each page.
+        sort (List[str]): Sorting criteria.
+        has_more (bool): Whether there are elements after the current page.
+        next_cursor (str): The cursor of the next page.
+        total_elements_exact (bool): Whether the total number of elements is exact.
+
+    Returns:
+        CursorPageable: Instance of CursorPageable representing the paginated response.
+    """
+    if total_elements is None:
+        total_elements = page_number * size + len(content) + (1 if has_more else 0)
+        total_elements_exact = not has_more
+    return CursorPageable(
+        content=content,
+        totalPages=(total_elements + size - 1) // size,
+        totalElements=total_elements,
+        last=not has_more,
+        size=size,
+        number=page_number,
+        sort=sort,
+        numberOfElements=len(content),
+        first=page_number == 0,
+        empty=len(content) == 0,
+        nextCursor=next_cursor if has_more else None,
+        totalElementsExact=total_elements_exact
+    )
+
+
+def encode_cursor(values: list) -> str:
+    """
+    Encode the sort values of the last element of a page into an opaque cursor.
+    """
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> list:
+    """
+    Decode a cursor into the sort values of the last element of the previous page.
+
+    Raises:
+        BadRequestException: If the cursor is invalid.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, binascii.Error):
+        raise BadRequestException("Invalid cursor")
+    if not isinstance(values, list):
+        raise BadRequestException("Invalid cursor")
+    return values
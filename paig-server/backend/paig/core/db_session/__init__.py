@@ -4,7 +4,7 @@ from .session import (
     session,
     set_session_context,
 )
-from .transactional import Propagation, Transactional
+from .transactional import Propagation, Transactional, run_after_commit
 
 __all__ = [
     "Base",
@@ -12,5 +12,6 @@ __all__ = [
     "set_session_context",
     "reset_session_context",
     "Propagation",
-    "Transactional"
+    "Transactional",
+    "run_after_commit"
 ]
\ No newline at end of file
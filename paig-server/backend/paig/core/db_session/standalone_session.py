@@ -1,9 +1,11 @@
+import asyncio
 import logging
-from typing import List, Dict
+import weakref
+from typing import Callable, List, Dict, Tuple
 
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import MetaData, select, func, update, insert
+from sqlalchemy import MetaData, Table, select, func, update, insert
 
 from core import config
 
@@ -11,15 +13,30 @@ logger = logging.getLogger(__name__)
 cnf = config.load_config_file()
 database_url = cnf["database"]["url"]
 
-# Create engine factory
+BULK_INSERT_BATCH_SIZE = 400
+
+# Engines by event loop, the pooled connections of an engine can only be used in the event loop which opened them
+_engines = weakref.WeakKeyDictionary()
+
+
+# Create engine factory, the engine and its connection pool are reused within an event loop
 def get_engine():
-    return create_async_engine(
-        url=database_url,
-        pool_pre_ping=True,
-        pool_recycle=1800,
-        echo=False,
-        future=True
-    )
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    engine = _engines.get(loop) if loop is not None else None
+    if engine is None:
+        engine = create_async_engine(
+            url=database_url,
+            pool_pre_ping=True,
+            pool_recycle=1800,
+            echo=False,
+            future=True
+        )
+        if loop is not None:
+            _engines[loop] = engine
+    return engine
 
 # Session factory
 def get_session():
@@ -108,9 +125,43 @@ async def update_table_fields(
         logger.error(f"Error in update_table_fields: {e}")
         return f"Error: {e}"
 
+# Insert rows into a table in a single transaction, with one multi-row insert per batch. The given statements and
+# their parameters are executed in the same transaction after the rows are inserted, child_statements gets the
+# primary keys of the inserted rows, in the order of the records, and returns the statements of their child rows.
+# The databases without RETURNING on multi-row inserts (MySQL) insert the rows one by one when their primary keys
+# are needed. Errors are raised.
+async def insert_rows(table: Table, records: List[Dict[str, any]], batch_size: int = BULK_INSERT_BATCH_SIZE,
+                      statements: List[Tuple] = None,
+                      child_statements: Callable[[List], List[Tuple]] = None) -> int:
+    if not records:
+        return 0
+    total_inserted = 0
+    inserted_ids = []
+    insert_statement = insert(table)
+    returning = get_engine().dialect.insert_executemany_returning_sort_by_parameter_order
+    if child_statements is not None and returning:
+        insert_statement = insert_statement.returning(*table.primary_key.columns, sort_by_parameter_order=True)
+    session = get_session()
+    async with session.begin():
+        for i in range(0, len(records), batch_size):
+            batch = records[i : i + batch_size]
+            if child_statements is not None and not returning:
+                for record in batch:
+                    result = await session.execute(insert_statement, record)
+                    inserted_ids.append(result.inserted_primary_key[0])
+            else:
+                result = await session.execute(insert_statement, batch)
+                if child_statements is not None:
+                    inserted_ids.extend(row[0] for row in result.all())
+            total_inserted += len(batch)
+        if child_statements is not None:
+            statements = child_statements(inserted_ids) + (statements or [])
+        for statement, params in statements or []:
+            await session.execute(statement, params)
+    return total_inserted
+
 # Bulk insert data into a table
 async def bulk_insert_into_table(table_name: str, records: List[Dict[str, any]]):
-    BATCH_SIZE = 400
     if not records:
         return "No records provided for insertion"
 
@@ -119,13 +170,7 @@ async def bulk_insert_into_table(table_name: str, records: List[Dict[str, any]])
         if table is None:
             return f"Error: Table '{table_name}' does not exist"
 
-        total_inserted = 0
-        session = get_session()
-        async with session.begin():
-            for i in range(0, len(records), BATCH_SIZE):
-                batch = records[i : i + BATCH_SIZE]
-                await session.execute(insert(table), batch)
-                total_inserted += len(batch)
+        total_inserted = await insert_rows(table, records)
 
         return f"{total_inserted} rows inserted successfully"
 
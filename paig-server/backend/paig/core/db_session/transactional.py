@@ -1,8 +1,14 @@
 from enum import Enum
 from functools import wraps
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 
 from . import session
 
+AFTER_COMMIT_CALLBACKS = "after_commit_callbacks"
+
 
 class Propagation(Enum):
     REQUIRED = "required"
@@ -52,4 +58,30 @@ class Transactional:
         session.begin()
         result = await function(*args, **kwargs)
         await session.commit()
-        return result
\ No newline at end of file
+        return result
+
+def run_after_commit(callback: Callable[[], None]):
+    """
+    Run a callback once the transaction of the current session is committed, to keep in-memory state in line
+    with the database. The callback is dropped if the transaction is rolled back, and is run at once if no
+    transaction is in progress, the changes being already committed.
+
+    Args:
+        callback (Callable): The function to call after the commit.
+    """
+    current_session = session()
+    if not current_session.in_transaction():
+        callback()
+        return
+    current_session.sync_session.info.setdefault(AFTER_COMMIT_CALLBACKS, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit_callbacks(sync_session: Session):
+    for callback in sync_session.info.pop(AFTER_COMMIT_CALLBACKS, []):
+        callback()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_after_commit_callbacks(sync_session: Session, previous_transaction):
+    sync_session.info.pop(AFTER_COMMIT_CALLBACKS, None)
@@ -8,6 +8,7 @@ from core.utils import detect_environment
 
 URL_MAPPING = [
     (r"^/shield/authorize/vectordb", "vectordb_authorize_requests"),
+    (r"^/shield/authorize/batch", "batch_authorize_requests"),
     (r"^/shield/authorize", "authorize_requests"),
     (r"^/governance-service/api/", "governance_requests"),
     (r"^/account-service/api/data-protect/decrypt", "audit_details_requests"),
@@ -4,6 +4,7 @@ from fastapi import Depends, Request
 from core.security.jwt import JWTHandler
 from core import constants
 from core.utils import SingletonDepends
+from core.security.principal_cache import principal_cache, get_token_fingerprint
 
 jwt_handler = JWTHandler()
 
@@ -14,15 +15,24 @@ async def get_auth_user(
     user_controller: UserController = user_controller_instance,
 ):
     token_user_info = await get_auth_token_user_info(request)
-    user_obj = await user_controller.get_user_info(**token_user_info)
-    if user_obj is None:
-        raise UnauthorizedException("Unauthorized session")
-    return {
-        "id": user_obj.id,
-        "username": user_obj.username,
-        "roles": ["OWNER"] if user_obj.is_tenant_owner else ["USER"],
-        "email": user_obj.email
-    }
+
+    async def load_auth_user():
+        user_obj = await user_controller.get_user_info(**token_user_info)
+        if user_obj is None:
+            raise UnauthorizedException("Unauthorized session")
+        return {
+            "id": user_obj.id,
+            "username": user_obj.username,
+            "roles": ["OWNER"] if user_obj.is_tenant_owner else ["USER"],
+            "email": user_obj.email
+        }
+
+    session = request.cookies.get("PRIVACERAPAIGSESSION")
+    if constants.SINGLE_USER_MODE or session is None:
+        principal_key = ("user", token_user_info["id"])
+    else:
+        principal_key = get_token_fingerprint(session)
+    return await principal_cache.get_principal(principal_key, load_auth_user)
 
 async def get_auth_token_user_info(request: Request):
     if constants.SINGLE_USER_MODE:
@@ -34,7 +44,7 @@ async def get_auth_token_user_info(request: Request):
     session = cookies.get("PRIVACERAPAIGSESSION")
     if session is None:
         raise UnauthorizedException("Unauthorized session")
-    session_user = jwt_handler.decode(session)
+    session_user = await principal_cache.get_token_claims(session, jwt_handler.decode)
     if session_user is None:
         raise UnauthorizedException("Unauthorized session")
     user = {
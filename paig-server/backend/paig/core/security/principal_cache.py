@@ -0,0 +1,139 @@
+import copy
+import hashlib
+import time
+from typing import Any, Awaitable, Callable
+
+from opentelemetry import metrics
+from opentelemetry.metrics import Observation
+
+from api.authz.utils.cache_decorator import AsyncTTLCache, register_cache
+from core.config import load_config_file
+
+meter = metrics.get_meter(__name__)
+
+DEFAULT_PRINCIPAL_CACHE_EXPIRY = 30
+DEFAULT_PRINCIPAL_CACHE_MAX_SIZE = 10000
+
+
+def get_token_fingerprint(token: str) -> str:
+    """
+    Get the key of a session token in the caches, so the tokens themselves are not kept in memory.
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class PrincipalCache:
+    """
+    Caches the authenticated principals of the requests, so the session token is not decoded and the user is not
+    read from the database on every request.
+
+    The decoded session tokens are cached by token fingerprint, and are still rejected once they expire. The
+    principals are cached by token fingerprint, or by user ID when no session token is used. Both caches are
+    registered, so invalidate_user_cache removes the principals when a user, its roles or its groups change.
+
+    Args:
+        max_size (int): The maximum number of tokens and principals in the caches.
+        expiration (int): The time (in seconds) a token or a principal is served from the caches.
+
+    Attributes:
+        token_cache (AsyncTTLCache): The decoded session tokens, by token fingerprint.
+        principal_cache (AsyncTTLCache): The principals, by token fingerprint or user ID.
+        loads (int): The number of principals read from the database.
+        load_time_ms (float): The total time spent reading the principals from the database, in milliseconds.
+    """
+
+    def __init__(self, max_size: int, expiration: int):
+        self.token_cache = register_cache(AsyncTTLCache("get_auth_token_user_info", max_size, expiration))
+        self.principal_cache = register_cache(AsyncTTLCache("get_auth_user", max_size, expiration))
+        self.loads = 0
+        self.load_time_ms = 0.0
+
+    async def get_token_claims(self, token: str, decode: Callable[[str], dict]) -> dict:
+        """
+        Get the claims of a session token, decoding it on a miss.
+
+        Args:
+            token (str): The session token.
+            decode (Callable): Decodes the token, raising an exception if it is invalid or expired.
+
+        Returns:
+            dict: The claims of the token.
+        """
+        fingerprint = get_token_fingerprint(token)
+
+        async def load_claims():
+            return decode(token)
+
+        claims = await self.token_cache.get_or_load(fingerprint, load_claims)
+        expiry = claims.get("exp") if claims else None
+        if expiry is not None and expiry <= time.time():
+            # The token expired while cached, decode it again to raise the expiry error
+            self.token_cache.invalidate(lambda key: key == fingerprint)
+            return decode(token)
+        return claims
+
+    async def get_principal(self, key: Any, load: Callable[[], Awaitable[dict]]) -> dict:
+        """
+        Get the principal of a request, loading it on a miss.
+
+        Args:
+            key (Any): The token fingerprint or the user ID of the request.
+            load (Callable): A coroutine function reading the principal from the database.
+
+        Returns:
+            dict: A copy of the principal, the callers can update it.
+        """
+        async def timed_load():
+            start_time = time.perf_counter()
+            principal = await load()
+            self.loads += 1
+            self.load_time_ms += (time.perf_counter() - start_time) * 1000
+            return principal
+
+        return copy.deepcopy(await self.principal_cache.get_or_load(key, timed_load))
+
+    def invalidate_token(self, token: str):
+        """
+        Remove a session token and its principal from the caches, called when the session ends.
+
+        Args:
+            token (str): The session token.
+        """
+        fingerprint = get_token_fingerprint(token)
+        self.token_cache.invalidate(lambda key: key == fingerprint)
+        self.principal_cache.invalidate(lambda key: key == fingerprint)
+
+    def get_saved_db_time_ms(self) -> float:
+        """
+        Estimate the database time saved by the principal cache, from the average time of the database reads.
+
+        Returns:
+            float: The saved time in milliseconds.
+        """
+        if not self.loads:
+            return 0.0
+        cached_lookups = self.principal_cache.hits + self.principal_cache.coalesced
+        return cached_lookups * self.load_time_ms / self.loads
+
+
+def create_principal_cache() -> PrincipalCache:
+    security_conf = load_config_file().get("security") or {}
+    return PrincipalCache(
+        max_size=int(security_conf.get("principal_cache_max_size", DEFAULT_PRINCIPAL_CACHE_MAX_SIZE)),
+        expiration=int(security_conf.get("principal_cache_expiry", DEFAULT_PRINCIPAL_CACHE_EXPIRY))
+    )
+
+
+principal_cache = create_principal_cache()
+
+
+def get_saved_db_time(options):
+    return [Observation(value=principal_cache.get_saved_db_time_ms())]
+
+
+meter.create_observable_gauge(
+    name="auth_principal_cache_saved_db_time",
+    callbacks=[get_saved_db_time],
+    unit="ms",
+    description="The estimated database time saved by the authenticated principal cache"
+)
@@ -21,6 +21,7 @@ from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse, FileResponse
 from core import config, constants
 import os
+import time
 import webbrowser
 import logging
 from fastapi.exceptions import RequestValidationError
@@ -61,6 +62,10 @@ def init_ui_render(app_: FastAPI) -> None:
     async def user_logout(
             request: Request,
     ):
+        from core.security.principal_cache import principal_cache
+        session = request.cookies.get("PRIVACERAPAIGSESSION")
+        if session:
+            principal_cache.invalidate_token(session)
         response = responses.RedirectResponse(url="/login", status_code=303)
         response.delete_cookie("PRIVACERAPAIGSESSION")
         return response
@@ -123,6 +128,26 @@ def init_cache() -> None:
     pass
 
 
+def init_shield_scanners() -> None:
+    """
+    Build the shared presidio analyzers of the configured scanners when the server starts, so the first requests do not
+    pay for loading the recognizers.
+    """
+    from api.shield.utils import config_utils
+    if not config_utils.get_property_value_boolean("shield_scanner_prewarm_enabled", True):
+        return
+    from api.shield.scanners.scanner_util import parse_properties
+    from api.shield.presidio.presidio_analyzer_registry import PresidioAnalyzerRegistry
+    start_time = time.perf_counter()
+    try:
+        scanners = parse_properties(application_key=None)
+    except Exception as e:
+        logger.error(f"Unable to prewarm the shield scanners: {e}")
+        return
+    logger.info(f"Prewarmed {len(scanners)} shield scanners with {len(PresidioAnalyzerRegistry())} presidio analyzers "
+                f"in {((time.perf_counter() - start_time) * 1000):.3f} ms")
+
+
 def init_settings() -> None:
     cnf = config.load_config_file()
     config.Config = cnf
@@ -160,6 +185,7 @@ def create_app() -> FastAPI:
     init_routers(app_=app_)
     init_listeners(app_=app_)
     init_cache()
+    init_shield_scanners()
     print(f"Paig is running on http://{constants.HOST}:{constants.PORT}")
     if constants.MODE == "standalone":
         init_ui_render(app_=app_)
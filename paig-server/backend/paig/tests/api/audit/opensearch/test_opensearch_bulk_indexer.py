@@ -0,0 +1,139 @@
+import asyncio
+import json
+
+import pytest
+from opensearchpy import AsyncOpenSearch, AsyncTransport
+from opensearchpy.exceptions import TransportError
+
+from api.audit.opensearch_service.opensearch_bulk_indexer import OpenSearchBulkIndexer
+
+
+def parse_bulk_body(body):
+    lines = [json.loads(line) for line in body.splitlines()]
+    return [(action["index"]["_index"], document) for action, document in zip(lines[::2], lines[1::2])]
+
+
+def item_result(status=201, error=None):
+    result = {"status": status}
+    if error:
+        result["error"] = error
+    return {"index": result}
+
+
+class FakeBulkClient:
+    """
+    Records the bulk requests and answers them with the given item statuses, one list per request.
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    async def bulk(self, body, refresh):
+        documents = parse_bulk_body(body)
+        self.requests.append({"documents": documents, "refresh": refresh})
+        statuses = self.responses.pop(0) if self.responses else [201] * len(documents)
+        items = [item_result(status, None if status < 300 else {"type": f"error_{status}"}) for status in statuses]
+        return {"errors": any(status >= 300 for status in statuses), "items": items}
+
+
+@pytest.mark.asyncio
+async def test_flush_at_max_actions():
+    client = FakeBulkClient()
+    indexer = OpenSearchBulkIndexer(client, max_actions=2, linger_ms=60000)
+
+    results = await asyncio.gather(indexer.index("audits", {"eventId": "1"}), indexer.index("audits", {"eventId": "2"}))
+
+    assert [result["status"] for result in results] == [201, 201]
+    assert client.requests[0]["documents"] == [("audits", {"eventId": "1"}), ("audits", {"eventId": "2"})]
+    assert indexer.bulk_request_count == 1
+    assert indexer.indexed_count == 2
+
+
+@pytest.mark.asyncio
+async def test_flush_after_linger():
+    client = FakeBulkClient()
+    indexer = OpenSearchBulkIndexer(client, max_actions=100, linger_ms=10)
+
+    await indexer.index_many("audits", [{"eventId": "1"}, {"eventId": "2"}, {"eventId": "3"}])
+
+    assert len(client.requests) == 1
+    assert len(client.requests[0]["documents"]) == 3
+    assert indexer.linger_task is None
+
+
+@pytest.mark.asyncio
+async def test_rejected_items_retried():
+    client = FakeBulkClient([201, 429], [201])
+    indexer = OpenSearchBulkIndexer(client, max_actions=100, linger_ms=0, retry_backoff_ms=0)
+
+    assert await indexer.index_many("audits", [{"eventId": "1"}, {"eventId": "2"}]) == 2
+
+    # Only the rejected document is sent again
+    assert client.requests[1]["documents"] == [("audits", {"eventId": "2"})]
+    assert indexer.retried_count == 1
+    assert indexer.failed_count == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_item_reported_to_its_caller_only():
+    client = FakeBulkClient([201, 400])
+    indexer = OpenSearchBulkIndexer(client, max_actions=2, linger_ms=60000)
+
+    results = await asyncio.gather(indexer.index("audits", {"eventId": "1"}), indexer.index("audits", {"eventId": "2"}),
+                                   return_exceptions=True)
+
+    assert results[0]["status"] == 201
+    assert isinstance(results[1], TransportError)
+    assert results[1].status_code == 400
+    assert len(client.requests) == 1
+    assert indexer.failed_count == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_exhausted():
+    client = FakeBulkClient([503], [503], [503])
+    indexer = OpenSearchBulkIndexer(client, linger_ms=0, max_retries=2, retry_backoff_ms=0)
+
+    with pytest.raises(TransportError):
+        await indexer.index_many("audits", [{"eventId": "1"}])
+
+    assert len(client.requests) == 3
+    assert indexer.failed_count == 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_mode_passed_to_bulk_request():
+    client = FakeBulkClient()
+    indexer = OpenSearchBulkIndexer(client, linger_ms=0, refresh="wait_for")
+
+    await indexer.index("audits", {"eventId": "1"})
+
+    assert client.requests[0]["refresh"] == "wait_for"
+
+
+class MockTransport(AsyncTransport):
+    """
+    Transport of the async client answering the bulk requests without a cluster.
+    """
+    requests = []
+
+    async def perform_request(self, method, url, params=None, body=None, headers=None):
+        documents = parse_bulk_body(body.decode("utf-8") if isinstance(body, bytes) else body)
+        MockTransport.requests.append({"method": method, "url": url, "params": params, "documents": documents})
+        return {"errors": False, "items": [item_result() for _ in documents]}
+
+
+@pytest.mark.asyncio
+async def test_bulk_indexer_with_async_client():
+    MockTransport.requests = []
+    client = AsyncOpenSearch(hosts=["localhost:9200"], transport_class=MockTransport)
+    indexer = OpenSearchBulkIndexer(client, linger_ms=0)
+
+    assert await indexer.index_many("audits", [{"eventId": "1"}, {"eventId": "2"}]) == 2
+
+    request = MockTransport.requests[0]
+    assert (request["method"], request["url"]) == ("POST", "/_bulk")
+    assert request["params"]["refresh"] in ("false", b"false")
+    assert request["documents"] == [("audits", {"eventId": "1"}), ("audits", {"eventId": "2"})]
+    await client.close()
@@ -103,4 +103,28 @@ def test_check_and_create_template_when_template_exists(modify_global_variable,
     client.check_and_create_template('access_template', 'test_template.json', 'test_access_audit')
 
     # Verify that create_template was not called
-    mock_opensearch_client.indices.put_index_template.assert_not_called()
\ No newline at end of file
+    mock_opensearch_client.indices.put_index_template.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_get_bulk_indexer_linger_capped_by_refresh_interval(modify_global_variable, mock_opensearch_client):
+    opensearch_client.Config['opensearch']['bulk_linger_ms'] = 5000
+    opensearch_client.Config['opensearch']['bulk_refresh'] = 'wait_for'
+    mock_opensearch_client.indices.get_settings.return_value = {
+        'test_access_audit': {'settings': {'index': {'refresh_interval': '500ms'}}}
+    }
+    with patch('api.audit.opensearch_service.opensearch_client.AsyncOpenSearch'):
+        client = OpenSearchClient()
+        indexer = client.get_bulk_indexer()
+
+    assert client.refresh_interval_ms == 500
+    assert indexer.linger_sec == 0.5
+    assert indexer.refresh == 'wait_for'
+    assert indexer.client is client.get_async_client()
+    # The indexer is reused within the event loop
+    assert client.get_bulk_indexer() is indexer
+
+
+def test_parse_refresh_interval_ms():
+    assert opensearch_client.parse_refresh_interval_ms("1s") == 1000
+    assert opensearch_client.parse_refresh_interval_ms("250ms") == 250
+    assert opensearch_client.parse_refresh_interval_ms("-1") == -1
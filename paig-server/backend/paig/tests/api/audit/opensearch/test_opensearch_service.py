@@ -2,12 +2,15 @@ import pytest
 from unittest.mock import AsyncMock, patch
 from fastapi import HTTPException
 from api.audit.api_schemas.access_audit_schema import IncludeQueryParams
-from opensearchpy.exceptions import NotFoundError
+from opensearchpy.exceptions import NotFoundError, TransportError
 
 @pytest.fixture
 def mock_opensearch_client():
     with patch('api.audit.opensearch_service.opensearch_client.OpenSearchClient') as mock_client:
         mock_instance = mock_client.return_value
+        mock_instance.get_async_client().search = AsyncMock()
+        mock_instance.get_bulk_indexer().index = AsyncMock()
+        mock_instance.get_bulk_indexer().index_many = AsyncMock()
         yield mock_instance
 
 
@@ -20,13 +23,32 @@ def opensearch_service(mock_opensearch_client):
 @pytest.mark.asyncio
 async def test_create_access_audit(opensearch_service, mock_opensearch_client):
     access_audit_params = {"param1": "value1"}  # Replace with actual parameters
-    with patch('api.audit.opensearch_service.opensearch_client.OpenSearchClient') as mock_client:
-        mock_instance = mock_client.return_value
-        mock_instance.get_client().index.return_value = {"result": "created"}
-        mock_instance.get_client().get_index_name = 'your_index_name'
-        await opensearch_service.create_access_audit(access_audit_params)
+    mock_opensearch_client.get_index_name.return_value = 'your_index_name'
+    mock_opensearch_client.get_bulk_indexer().index.return_value = {"result": "created"}
+
+    await opensearch_service.create_access_audit(access_audit_params)
+
+    mock_opensearch_client.get_bulk_indexer().index.assert_awaited_once_with('your_index_name', access_audit_params)
+
+
+@pytest.mark.asyncio
+async def test_create_access_audits(opensearch_service, mock_opensearch_client):
+    mock_opensearch_client.get_index_name.return_value = 'access_audits'
+    mock_opensearch_client.get_bulk_indexer().index_many.return_value = 2
+
+    assert await opensearch_service.create_access_audits([{"eventId": "1"}, {"eventId": "2"}]) == 2
+
+    mock_opensearch_client.get_bulk_indexer().index_many.assert_awaited_once_with(
+        'access_audits', [{"eventId": "1"}, {"eventId": "2"}])
 
-        mock_opensearch_client.get_client().index.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_create_access_audits_with_errors(opensearch_service, mock_opensearch_client):
+    mock_opensearch_client.get_bulk_indexer().index_many.side_effect = TransportError(
+        400, "bulk_item_failed", {"type": "mapper_parsing_exception"})
+
+    with pytest.raises(HTTPException):
+        await opensearch_service.create_access_audits([{"eventId": "1"}])
 
 
 @pytest.mark.asyncio
@@ -39,7 +61,7 @@ async def test_get_access_audits(opensearch_service, mock_opensearch_client):
     from_time = None
     to_time = None
 
-    mock_opensearch_client.get_client().search.return_value={
+    mock_opensearch_client.get_async_client().search.return_value={
         'hits': {
             'hits': [{'_source': {'param1': 'value1'}}],
             'total': {'value': 1}
@@ -57,11 +79,11 @@ async def test_get_access_audits(opensearch_service, mock_opensearch_client):
 @pytest.mark.asyncio
 async def test_insert_access_audit(opensearch_service, mock_opensearch_client):
     access_audit_params = {"param1": "value1"}  # Replace with actual parameters
-    mock_opensearch_client.get_client().index.return_value={"result": "created"}
+    mock_opensearch_client.get_bulk_indexer().index.return_value={"result": "created"}
 
     await opensearch_service.create_access_audit(access_audit_params)
 
-    mock_opensearch_client.get_client().index.assert_called_once()
+    mock_opensearch_client.get_bulk_indexer().index.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -74,14 +96,14 @@ async def test_get_counts(opensearch_service, mock_opensearch_client):
     size = None
     cardinality = None
 
-    mock_opensearch_client.get_client().search.return_value={
+    mock_opensearch_client.get_async_client().search.return_value={
         'aggregations': {
             'count': {'value': 5}
         }
     }
 
-    result = opensearch_service.get_counts(group_by, include_query, from_time, to_time, interval, size,
-                                                 cardinality, False)
+    result = await opensearch_service.get_counts(group_by, include_query, from_time, to_time, interval, size,
+                                             cardinality, False)
     assert result['count']['count'] == 5
 
 
@@ -95,8 +117,38 @@ async def test_get_audits_raises_not_found(opensearch_service, mock_opensearch_c
     from_time = None
     to_time = None
 
-    mock_opensearch_client.get_client().search.side_effect=NotFoundError()
+    mock_opensearch_client.get_async_client().search.side_effect=NotFoundError()
 
-    resp = opensearch_service.get_audits(include_query, exclude_query, page, size, sort, from_time, to_time, None)
+    resp = await opensearch_service.get_audits(include_query, exclude_query, page, size, sort, from_time, to_time, None)
 
     assert resp.model_dump()['content'] == []
+
+
+@pytest.mark.asyncio
+async def test_get_access_audits_with_cursor(opensearch_service, mock_opensearch_client):
+    mock_opensearch_client.get_async_client().search.return_value = {
+        'hits': {
+            'hits': [{'_source': {'eventId': str(index)}, 'sort': [1717223581000 - index, str(index)]}
+                     for index in range(3)],
+        }
+    }
+
+    response = await opensearch_service.get_access_audits(IncludeQueryParams(), IncludeQueryParams(), 0, 2,
+                                                          ["eventTime,desc"], None, None, None, "none")
+
+    query_body = mock_opensearch_client.get_async_client().search.call_args.kwargs['body']
+    assert query_body['sort'] == [{"eventTime": {"order": "desc"}},
+                                  {"eventId": {"order": "desc", "unmapped_type": "keyword"}}]
+    assert query_body['size'] == 3
+    assert query_body['track_total_hits'] is False
+    assert [audit['eventId'] for audit in response.content] == ['0', '1']
+    assert response.last is False
+
+    await opensearch_service.get_access_audits(IncludeQueryParams(), IncludeQueryParams(), 1, 2, ["eventTime,desc"],
+                                               None, None, response.nextCursor, "capped")
+
+    query_body = mock_opensearch_client.get_async_client().search.call_args.kwargs['body']
+    assert query_body['search_after'] == [1717223581000 - 1, '1']
+    assert 'from' not in query_body
+    from api.audit.opensearch_service.opensearch_service import count_cap
+    assert query_body['track_total_hits'] == count_cap
@@ -0,0 +1,75 @@
+import pytest
+import pytest_asyncio
+
+from api.audit.RDS_service.db_operations.access_audit_repository import AccessAuditRepository
+from api.audit.RDS_service.db_operations.admin_audit_repository import AdminAuditRepository
+from api.audit.RDS_service.rds_service import RdsService
+from api.audit.api_schemas.access_audit_schema import IncludeQueryParams, QueryParamsBase
+from core.exceptions import BadRequestException
+
+EVENT_TIME = 1717200000000
+
+
+class TestAccessAuditPagination:
+
+    @pytest_asyncio.fixture
+    async def rds_service(self, db_session, set_context_session):
+        rds_service = RdsService(AccessAuditRepository(), AdminAuditRepository())
+        # Two audits share each event time, so the pages are ordered by id within an event time
+        await rds_service.create_access_audits([
+            {"event_time": EVENT_TIME + index // 2, "event_id": f"event-{index}", "app_name": "App1",
+             "user_id": "Sally", "result": "allowed", "traits": []}
+            for index in range(7)
+        ])
+        return rds_service
+
+    async def get_page(self, rds_service, page=0, cursor=None, count_mode="exact", sort="eventTime,desc"):
+        return await rds_service.get_access_audits(IncludeQueryParams(), QueryParamsBase(), page, 3, [sort],
+                                                   EVENT_TIME, EVENT_TIME + 10, cursor, count_mode)
+
+    @pytest.mark.asyncio
+    async def test_pages_by_cursor(self, rds_service):
+        event_ids = []
+        page, cursor = 0, None
+        while True:
+            response = await self.get_page(rds_service, page, cursor)
+            event_ids.extend(audit.event_id for audit in response.content)
+            assert response.totalElements == 7
+            if response.last:
+                assert response.nextCursor is None
+                break
+            page, cursor = page + 1, response.nextCursor
+
+        assert event_ids == [f"event-{index}" for index in reversed(range(7))]
+
+    @pytest.mark.asyncio
+    async def test_pages_by_cursor_match_pages_by_number(self, rds_service):
+        first_page = await self.get_page(rds_service, sort="eventTime,asc")
+        second_page = await self.get_page(rds_service, page=1, sort="eventTime,asc")
+        second_page_by_cursor = await self.get_page(rds_service, page=1, cursor=first_page.nextCursor,
+                                                    sort="eventTime,asc")
+
+        assert [audit.event_id for audit in second_page_by_cursor.content] == \
+               [audit.event_id for audit in second_page.content] == ["event-3", "event-4", "event-5"]
+
+    @pytest.mark.asyncio
+    async def test_count_modes(self, rds_service):
+        rds_service.access_audit_repository.count_cap = 4
+
+        capped = await self.get_page(rds_service, count_mode="capped")
+        assert (capped.totalElements, capped.totalElementsExact, capped.last) == (4, False, False)
+
+        not_counted = await self.get_page(rds_service, count_mode="none")
+        assert (not_counted.totalElements, not_counted.totalElementsExact, not_counted.last) == (4, False, False)
+
+        last_page = await self.get_page(rds_service, page=2, count_mode="none")
+        assert (last_page.totalElements, last_page.totalElementsExact, last_page.last) == (7, True, True)
+
+    @pytest.mark.asyncio
+    async def test_cursor_requires_event_time_sort(self, rds_service):
+        cursor = (await self.get_page(rds_service)).nextCursor
+
+        with pytest.raises(BadRequestException):
+            await self.get_page(rds_service, cursor=cursor, sort="userId,desc")
+        with pytest.raises(BadRequestException):
+            await self.get_page(rds_service, cursor="not-a-cursor")
@@ -0,0 +1,171 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, select, func
+from sqlalchemy.dialects import mysql, postgresql
+
+from api.audit.RDS_service.db_models.access_audit_model import AccessAuditModel, AccessAuditRollupModel, \
+    AccessAuditTraitRollupModel
+from api.audit.RDS_service.db_operations.access_audit_repository import AccessAuditRepository
+from api.audit.RDS_service.db_operations.access_audit_rollup_repository import get_rollup_ranges, HOUR_MS, DAY_MS, \
+    get_upsert_statement
+from api.audit.api_schemas.access_audit_schema import IncludeQueryParams
+from core.db_session import session
+
+# 2024-06-01 00:00:00 UTC
+DAY_START = 1717200000000
+
+
+def access_audit(event_time, user_id="Sally", app_name="App1", result="allowed", request_type="prompt",
+                 traits=None):
+    return {"event_time": event_time, "user_id": user_id, "app_name": app_name, "result": result,
+            "request_type": request_type, "traits": traits or [], "tenant_id": "1", "event_id": str(event_time)}
+
+
+ACCESS_AUDITS = [
+    access_audit(DAY_START + 30 * 60000, traits=["PERSON"]),
+    access_audit(DAY_START + 5 * HOUR_MS + 10, user_id="Bob", result="denied", traits=["PERSON", "EMAIL"]),
+    access_audit(DAY_START + 5 * HOUR_MS + 20, user_id="Bob", request_type="reply"),
+    access_audit(DAY_START + DAY_MS + 10 * HOUR_MS, app_name="App2", result="masked", traits=["EMAIL"]),
+    access_audit(DAY_START + 2 * DAY_MS + 23 * HOUR_MS + 59 * 60000, app_name="App2"),
+    access_audit(DAY_START + 3 * DAY_MS + 15 * 60000, user_id="Bob", result="denied", traits=["PERSON"]),
+]
+
+# A time range starting and ending within an hour, so the audits, the hour buckets and the day buckets are all read
+MIN_TIME = DAY_START + 20 * 60000
+MAX_TIME = DAY_START + 3 * DAY_MS + 20 * 60000
+
+
+def test_get_rollup_ranges():
+    assert get_rollup_ranges(DAY_START + 1, DAY_START + HOUR_MS) == (None, None)
+    assert get_rollup_ranges(DAY_START, DAY_START + 2 * HOUR_MS - 1) == ((DAY_START, DAY_START + 2 * HOUR_MS), None)
+    assert get_rollup_ranges(DAY_START + 1, DAY_START + 2 * DAY_MS + HOUR_MS + 5) == (
+        (DAY_START + HOUR_MS, DAY_START + 2 * DAY_MS + HOUR_MS), (DAY_START + DAY_MS, DAY_START + 2 * DAY_MS))
+    assert get_rollup_ranges(DAY_START + 1, DAY_START + 2 * DAY_MS, use_day_buckets=False) == (
+        (DAY_START + HOUR_MS, DAY_START + 2 * DAY_MS), None)
+    assert get_rollup_ranges(None, None) == ((None, None), (None, None))
+
+
+def test_upsert_statement_by_dialect():
+    mysql_statement = str(get_upsert_statement(AccessAuditRollupModel, "mysql").compile(dialect=mysql.dialect()))
+    assert "ON DUPLICATE KEY UPDATE count = (access_audit_rollups.count + VALUES(count))" in mysql_statement
+    postgresql_statement = str(get_upsert_statement(AccessAuditTraitRollupModel, "postgresql").compile(
+        dialect=postgresql.dialect()))
+    assert "ON CONFLICT (granularity, bucket_time, app_name, user_id, result, request_type, trait) DO UPDATE SET " \
+           "count = (access_audit_trait_rollups.count + excluded.count)" in postgresql_statement
+
+
+class TestAccessAuditRollups:
+
+    @pytest_asyncio.fixture
+    async def repository(self, db_session, set_context_session):
+        repository = AccessAuditRepository()
+        await repository.create_access_audits(ACCESS_AUDITS[:-1])
+        await repository.create_access_audit(ACCESS_AUDITS[-1])
+        return repository
+
+    async def get_counts(self, repository, rollups_enabled):
+        repository.rollups_enabled = rollups_enabled
+        filters = IncludeQueryParams()
+        return [
+            sorted(await repository.get_access_audits_counts_group_by_result(filters, MIN_TIME, MAX_TIME)),
+            sorted(await repository.get_access_audits_counts_group_by_traits_and_application(
+                filters.model_dump(), MIN_TIME, MAX_TIME)),
+            sorted(await repository.get_access_audits_counts_group_by_result_interval(
+                filters.model_dump(), MIN_TIME, MAX_TIME, 'day'), key=str),
+            sorted(await repository.get_access_audits_counts_group_by_result_interval(
+                filters.model_dump(), MIN_TIME, MAX_TIME, 'hour'), key=str),
+            sorted(await repository.get_access_audits_counts_group_by_user_id(10)),
+            sorted(await repository.get_access_audits_counts_group_by_app_name(10)),
+            sorted(await repository.get_access_audits_counts_group_by_app_name_and_user_id(filters, MIN_TIME, MAX_TIME)),
+            sorted(await repository.get_access_audits_top_users_count_group_by_id(filters, 10, MIN_TIME, MAX_TIME)),
+            sorted(await repository.get_audits_counts_unique_trait_count(filters, MIN_TIME, MAX_TIME)),
+            sorted(await repository.get_activity_trend_counts(filters.model_dump(), MIN_TIME, MAX_TIME, 'week'),
+                   key=str),
+            sorted(await repository.get_access_audits_counts_group_by_result(
+                IncludeQueryParams(userId="Bob", exactMatch=True), MIN_TIME, MAX_TIME)),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_rollup_counts_match_access_audit_counts(self, repository):
+        rollup_counts = await self.get_counts(repository, True)
+        access_audit_counts = await self.get_counts(repository, False)
+
+        assert rollup_counts == access_audit_counts
+        assert dict(rollup_counts[0]) == {"allowed": 3, "denied": 2, "masked": 1}
+        assert dict(rollup_counts[4]) == {"Bob": 3, "Sally": 3}
+        assert dict(rollup_counts[-1]) == {"allowed": 1, "denied": 2}
+
+    @pytest.mark.asyncio
+    async def test_rollups_maintained_on_insert(self, repository):
+        hour_counts = (await session.execute(
+            select(AccessAuditRollupModel.bucket_time, func.sum(AccessAuditRollupModel.count))
+            .where(AccessAuditRollupModel.granularity == "hour")
+            .group_by(AccessAuditRollupModel.bucket_time))).all()
+        day_counts = (await session.execute(
+            select(AccessAuditRollupModel.bucket_time, func.sum(AccessAuditRollupModel.count))
+            .where(AccessAuditRollupModel.granularity == "day")
+            .group_by(AccessAuditRollupModel.bucket_time))).all()
+        trait_counts = (await session.execute(
+            select(AccessAuditTraitRollupModel.trait, func.sum(AccessAuditTraitRollupModel.count))
+            .where(AccessAuditTraitRollupModel.granularity == "day")
+            .group_by(AccessAuditTraitRollupModel.trait))).all()
+
+        assert dict(hour_counts)[DAY_START + 5 * HOUR_MS] == 2
+        assert dict(day_counts) == {DAY_START: 3, DAY_START + DAY_MS: 1, DAY_START + 2 * DAY_MS: 1,
+                                    DAY_START + 3 * DAY_MS: 1}
+        assert dict(trait_counts) == {"EMAIL": 2, "PERSON": 3}
+
+        # The audits with the same bucket and dimensions are counted in the same row
+        rows = (await session.execute(
+            select(AccessAuditRollupModel.count).where(AccessAuditRollupModel.granularity == "hour",
+                                                       AccessAuditRollupModel.bucket_time == DAY_START))).all()
+        assert [row.count for row in rows] == [1]
+        await repository.create_access_audits([access_audit(DAY_START + 10, traits=["PERSON"])])
+        rows = (await session.execute(
+            select(AccessAuditRollupModel.count).where(AccessAuditRollupModel.granularity == "hour",
+                                                       AccessAuditRollupModel.bucket_time == DAY_START))).all()
+        assert [row.count for row in rows] == [2]
+
+    @pytest.mark.asyncio
+    async def test_rollups_not_used_with_other_filters(self, repository):
+        filters = IncludeQueryParams(threadId="thread1").model_dump()
+        assert not repository.can_use_rollups(filters)
+        assert repository.can_use_rollups(IncludeQueryParams(userId="Bob", result="denied").model_dump())
+        assert not repository.can_use_rollups(IncludeQueryParams(traits="PERSON").model_dump())
+
+    @pytest.mark.asyncio
+    async def test_whole_buckets_read_from_rollups(self, repository):
+        await session.execute(delete(AccessAuditModel))
+        await session.commit()
+
+        # The counts without time range are all read from the day buckets
+        assert dict(await repository.get_access_audits_counts_group_by_user_id(10)) == {"Bob": 3, "Sally": 3}
+        # The audits of the partial first and last hours are read from the deleted access audits
+        counts = await repository.get_access_audits_counts_group_by_result(IncludeQueryParams(), MIN_TIME, MAX_TIME)
+        assert dict(counts) == {"allowed": 2, "denied": 1, "masked": 1}
+
+    @pytest.mark.asyncio
+    async def test_audits_without_user_share_rollup_rows(self, repository):
+        bucket_time = DAY_START + 2 * HOUR_MS
+        await repository.create_access_audits([access_audit(bucket_time + 10, user_id=None)])
+        await repository.create_access_audits([access_audit(bucket_time + 20, user_id=None)])
+
+        rows = (await session.execute(
+            select(AccessAuditRollupModel.granularity, AccessAuditRollupModel.count)
+            .where(AccessAuditRollupModel.user_id == "",
+                   AccessAuditRollupModel.bucket_time.in_([bucket_time, DAY_START])))).all()
+        assert sorted(rows) == [("day", 2), ("hour", 2)]
+
+        # The missing users are read back as NULL, and match no user filter like in the access audits
+        counts = []
+        for filters in (IncludeQueryParams(), IncludeQueryParams(userId="Bob", exactMatch=True, excludeMatch=True)):
+            repository.rollups_enabled = True
+            rollup_counts = await repository.get_access_audits_counts_group_by_app_name_and_user_id(
+                filters, MIN_TIME, MAX_TIME)
+            repository.rollups_enabled = False
+            access_audit_counts = await repository.get_access_audits_counts_group_by_app_name_and_user_id(
+                filters, MIN_TIME, MAX_TIME)
+            assert sorted(rollup_counts, key=str) == sorted(access_audit_counts, key=str)
+            counts.append([tuple(row[:3]) for row in rollup_counts])
+        assert ("App1", None, 2) in counts[0]
+        assert [row for row in counts[1] if row[1] is None] == []
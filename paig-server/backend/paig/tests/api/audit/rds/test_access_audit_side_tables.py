@@ -0,0 +1,98 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from api.audit.RDS_service.db_models.access_audit_model import AccessAuditTraitModel, AccessAuditPolicyModel
+from api.audit.RDS_service.db_operations.access_audit_repository import AccessAuditRepository
+from api.audit.RDS_service.db_operations.access_audit_side_tables import get_audit_traits, get_audit_policy_ids
+from api.audit.api_schemas.access_audit_schema import IncludeQueryParams, QueryParamsBase
+from core.db_session import session
+from core.db_session.standalone_session import get_engine
+
+EVENT_TIME = 1717200000000
+
+
+def access_audit(event_id, traits, masked_traits=None, paig_policy_ids=None, user_id="Sally"):
+    return {"event_id": event_id, "event_time": EVENT_TIME + int(event_id), "app_name": "App1", "user_id": user_id,
+            "result": "allowed", "request_type": "prompt", "traits": traits, "masked_traits": masked_traits or {},
+            "paig_policy_ids": paig_policy_ids or []}
+
+
+def test_get_audit_traits_and_policy_ids():
+    audit = access_audit("1", ["PERSON", "EMAIL", "PERSON"], {"EMAIL": "<<EMAIL>>"}, ["9910", 2090, "9910", "x"])
+
+    assert get_audit_traits(audit) == {"PERSON": False, "EMAIL": True}
+    assert get_audit_policy_ids(audit) == [9910, 2090]
+
+
+class TestAccessAuditSideTables:
+
+    @pytest_asyncio.fixture
+    async def repository(self, db_session, set_context_session):
+        repository = AccessAuditRepository()
+        await repository.create_access_audits([
+            access_audit("1", ["PERSON", "EMAIL"], {"EMAIL": "<<EMAIL>>"}, [9910, 2090]),
+            access_audit("2", [], paig_policy_ids=[9910]),
+            access_audit("3", ["EMAIL_ADDRESS"], user_id="Bob"),
+        ])
+        await repository.create_access_audit(access_audit("4", ["PERSON"], paig_policy_ids=[2090]))
+        return repository
+
+    @pytest.mark.asyncio
+    async def test_side_tables_populated_on_insert(self, repository):
+        traits = (await session.execute(
+            select(AccessAuditTraitModel.audit_id, AccessAuditTraitModel.trait, AccessAuditTraitModel.masked)
+            .order_by(AccessAuditTraitModel.audit_id, AccessAuditTraitModel.trait))).all()
+        policies = (await session.execute(
+            select(AccessAuditPolicyModel.audit_id, AccessAuditPolicyModel.policy_id)
+            .order_by(AccessAuditPolicyModel.audit_id, AccessAuditPolicyModel.policy_id))).all()
+
+        assert [tuple(row) for row in traits] == [(1, "EMAIL", True), (1, "PERSON", False), (3, "EMAIL_ADDRESS", False),
+                                                  (4, "PERSON", False)]
+        assert [tuple(row) for row in policies] == [(1, 2090), (1, 9910), (2, 9910), (4, 2090)]
+
+    @pytest.mark.asyncio
+    async def test_side_tables_populated_without_returning(self, repository, monkeypatch):
+        monkeypatch.setattr(get_engine().dialect, "insert_executemany_returning_sort_by_parameter_order", False)
+
+        await repository.create_access_audits([
+            access_audit("5", ["PHONE"], paig_policy_ids=[3]),
+            access_audit("6", ["PERSON", "PHONE"], {"PHONE": "<<PHONE>>"}),
+        ])
+
+        traits = (await session.execute(
+            select(AccessAuditTraitModel.audit_id, AccessAuditTraitModel.trait, AccessAuditTraitModel.masked)
+            .where(AccessAuditTraitModel.audit_id > 4)
+            .order_by(AccessAuditTraitModel.audit_id, AccessAuditTraitModel.trait))).all()
+        policies = (await session.execute(
+            select(AccessAuditPolicyModel.audit_id, AccessAuditPolicyModel.policy_id)
+            .where(AccessAuditPolicyModel.audit_id > 4))).all()
+
+        assert [tuple(row) for row in traits] == [(5, "PHONE", False), (6, "PERSON", False), (6, "PHONE", True)]
+        assert [tuple(row) for row in policies] == [(5, 3)]
+
+    async def get_event_ids(self, repository, include_filters, exclude_filters=None):
+        results, _, _, _ = await repository.get_access_audits_with_filters(
+            include_filters, exclude_filters or QueryParamsBase(), 0, 10, ["eventTime,asc"], EVENT_TIME,
+            EVENT_TIME + 10)
+        return [result.event_id for result in results]
+
+    @pytest.mark.asyncio
+    async def test_listing_filtered_by_trait(self, repository):
+        assert await self.get_event_ids(repository, IncludeQueryParams(traits="PERSON")) == ["1", "4"]
+        # Without exact match the traits containing the value match too
+        assert await self.get_event_ids(repository, IncludeQueryParams(traits="EMAIL")) == ["1", "3"]
+        assert await self.get_event_ids(repository, IncludeQueryParams(traits="EMAIL", exactMatch=True)) == ["1"]
+        assert await self.get_event_ids(repository, IncludeQueryParams(traits="PERSON,EMAIL_ADDRESS")) == \
+               ["1", "3", "4"]
+        assert await self.get_event_ids(repository, IncludeQueryParams(), QueryParamsBase(traits="PERSON")) == \
+               ["2", "3"]
+
+    @pytest.mark.asyncio
+    async def test_trait_counts_from_side_table(self, repository):
+        repository.rollups_enabled = False
+
+        counts = await repository.get_audits_counts_unique_trait_count(IncludeQueryParams(), EVENT_TIME,
+                                                                       EVENT_TIME + 10)
+
+        assert dict(counts) == {"EMAIL": 1, "EMAIL_ADDRESS": 1, "PERSON": 2}
@@ -166,3 +166,52 @@ async def test_get_vector_db_policies(authorizer, vector_db_policy_service):
     result = await authorizer.get_vector_db_policies(1, "user", ["group"])
     expected_policies = [policy.to_vector_db_policy_data() for policy in policy_views]
     assert result == expected_policies
+
+
+@pytest.mark.asyncio
+async def test_run_fetch_uses_own_session(authorizer):
+    from core.db_session.session import get_session_context, set_session_context, reset_session_context
+    context = set_session_context(session_id="request_session")
+
+    async def fetch():
+        return get_session_context()
+
+    try:
+        fetch_session_id = await authorizer.run_fetch(fetch())
+
+        assert fetch_session_id != "request_session"
+        assert get_session_context() == "request_session"
+    finally:
+        reset_session_context(context)
+
+
+@pytest.mark.asyncio
+async def test_get_vector_db_filter_expression_cached(authorizer, mocker):
+    from datetime import datetime
+    from paig_authorizer_core.async_base_paig_authorizer import AsyncBasePAIGAuthorizer
+    from paig_authorizer_core.constants import VectorDBType
+    from paig_authorizer_core.models.data_models import VectorDBData, VectorDBPolicyData
+    from api.authz.utils.cache_invalidation import invalidate_vector_db_policy_cache
+
+    invalidate_vector_db_policy_cache()
+    compile_filter = mocker.spy(AsyncBasePAIGAuthorizer, "get_vector_db_filter_expression")
+    vector_db = VectorDBData(id=1, name="TestDB", type=VectorDBType.MILVUS, status=1, user_enforcement=1)
+    policy = VectorDBPolicyData(id=1, metadata_key="dept", metadata_value="sales", operator="eq",
+                                allowed_groups=["sales"], vector_db_id=1, update_time=datetime(2024, 1, 1))
+
+    expression = await authorizer.get_vector_db_filter_expression(vector_db, [policy], "user1", ["sales", "public"])
+    # Same policies, user and groups in another order
+    assert await authorizer.get_vector_db_filter_expression(vector_db, [policy], "user1",
+                                                            ["public", "sales"]) == expression
+    assert compile_filter.call_count == 1
+
+    # A new version of the policy is compiled again
+    updated_policy = policy.model_copy(update={"update_time": datetime(2024, 1, 2)})
+    await authorizer.get_vector_db_filter_expression(vector_db, [updated_policy], "user1", ["sales", "public"])
+    assert compile_filter.call_count == 2
+
+    # The policy changes invalidate the compiled filters
+    invalidate_vector_db_policy_cache()
+    await authorizer.get_vector_db_filter_expression(vector_db, [policy], "user1", ["sales", "public"])
+    assert compile_filter.call_count == 3
+    assert "user1" in expression
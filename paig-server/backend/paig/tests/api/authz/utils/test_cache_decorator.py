@@ -0,0 +1,171 @@
+import asyncio
+
+import pytest
+
+from api.authz.utils.cache_decorator import AsyncTTLCache, cache_with_expiration, invalidate_cache, caches, \
+    make_hashable
+from api.authz.utils.cache_invalidation import invalidate_application_config_cache
+
+
+class CountingLoader:
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+
+    async def load(self, value):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return value
+
+
+class CachedService:
+    def __init__(self):
+        self.calls = 0
+
+    @cache_with_expiration(60, 2)
+    async def get_application_config(self, application_key):
+        self.calls += 1
+        return [application_key, self.calls]
+
+
+def test_make_hashable():
+    assert make_hashable({"b": [1, 2], "a": "x"}) == (("a", "x"), ("b", (1, 2)))
+    with pytest.raises(TypeError):
+        make_hashable(object())
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_caches_value():
+    cache = AsyncTTLCache("test", 10, 60)
+    loader = CountingLoader()
+
+    assert await cache.get_or_load("key", lambda: loader.load("value")) == "value"
+    assert await cache.get_or_load("key", lambda: loader.load("value")) == "value"
+
+    assert loader.calls == 1
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_caches_none():
+    cache = AsyncTTLCache("test", 10, 60)
+    loader = CountingLoader()
+
+    assert await cache.get_or_load("key", lambda: loader.load(None)) is None
+    assert await cache.get_or_load("key", lambda: loader.load(None)) is None
+
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_entry_is_reloaded():
+    cache = AsyncTTLCache("test", 10, 0)
+    loader = CountingLoader()
+
+    await cache.get_or_load("key", lambda: loader.load("value"))
+    await asyncio.sleep(0.01)
+    await cache.get_or_load("key", lambda: loader.load("value"))
+
+    assert loader.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction():
+    cache = AsyncTTLCache("test", 2, 60)
+    loader = CountingLoader()
+
+    await cache.get_or_load("key1", lambda: loader.load(1))
+    await cache.get_or_load("key2", lambda: loader.load(2))
+    await cache.get_or_load("key1", lambda: loader.load(1))
+    await cache.get_or_load("key3", lambda: loader.load(3))
+
+    assert list(cache.cache.keys()) == ["key1", "key3"]
+    assert cache.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_are_coalesced():
+    cache = AsyncTTLCache("test", 10, 60)
+    loader = CountingLoader(delay=0.05)
+
+    results = await asyncio.gather(*[cache.get_or_load("key", lambda: loader.load("value")) for _ in range(5)])
+
+    assert results == ["value"] * 5
+    assert loader.calls == 1
+    assert cache.coalesced == 4
+    assert cache.in_flight == {}
+
+
+@pytest.mark.asyncio
+async def test_failed_load_is_shared_and_not_cached():
+    cache = AsyncTTLCache("test", 10, 60)
+
+    async def failing_loader():
+        await asyncio.sleep(0.05)
+        raise ValueError("load failed")
+
+    results = await asyncio.gather(*[cache.get_or_load("key", failing_loader) for _ in range(3)],
+                                   return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert "key" not in cache.cache
+    assert cache.in_flight == {}
+
+
+@pytest.mark.asyncio
+async def test_invalidation_during_load_is_not_undone():
+    cache = AsyncTTLCache("test", 10, 60)
+    loader = CountingLoader(delay=0.05)
+
+    task = asyncio.create_task(cache.get_or_load("key", lambda: loader.load("stale")))
+    await asyncio.sleep(0.01)
+    cache.invalidate()
+
+    assert await task == "stale"
+    assert "key" not in cache.cache
+    assert await cache.get_or_load("key", lambda: loader.load("fresh")) == "fresh"
+
+
+def test_invalidate_with_predicate():
+    cache = AsyncTTLCache("test", 10, 60)
+    cache.put(("app1",), 1)
+    cache.put(("app2",), 2)
+
+    assert cache.invalidate(lambda key: key[0] == "app1") == 1
+    assert list(cache.cache.keys()) == [("app2",)]
+
+
+@pytest.mark.asyncio
+async def test_cache_with_expiration_and_invalidation_hooks():
+    service = CachedService()
+
+    assert await service.get_application_config("app1") == ["app1", 1]
+    assert await service.get_application_config("app1") == ["app1", 1]
+    assert service.calls == 1
+    assert CachedService.get_application_config.cache in caches["get_application_config"]
+
+    invalidate_application_config_cache()
+    assert await service.get_application_config("app1") == ["app1", 2]
+
+    assert invalidate_cache() >= 1
+    assert await service.get_application_config("app1") == ["app1", 3]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_load_is_retried_by_waiter():
+    cache = AsyncTTLCache("test", 10, 60)
+    loader = CountingLoader(delay=0.05)
+
+    first = asyncio.create_task(cache.get_or_load("key", lambda: loader.load("first")))
+    await asyncio.sleep(0.01)
+    second = asyncio.create_task(cache.get_or_load("key", lambda: loader.load("second")))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert await second == "second"
+    assert loader.calls == 2
+    assert cache.get("key") == "second"
+    assert cache.in_flight == {}
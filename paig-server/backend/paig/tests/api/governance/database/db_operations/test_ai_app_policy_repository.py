@@ -45,3 +45,14 @@ async def test_list_policies_for_authorization_no_policies(ai_app_policy_reposit
         result = await ai_app_policy_repository.list_policies_for_authorization(application_id, tags, user, groups)
 
         assert result == []
+
+
+@pytest.mark.asyncio
+async def test_list_enabled_policies(ai_app_policy_repository):
+    policy = AIApplicationPolicyModel(application_id=1, status=1, tags="tag1", users="user1")
+
+    with patch("api.governance.database.db_operations.ai_app_policy_repository.AIAppPolicyRepository._all",
+               new_callable=AsyncMock, return_value=[policy]):
+        result = await ai_app_policy_repository.list_enabled_policies(1)
+
+        assert result == [policy]
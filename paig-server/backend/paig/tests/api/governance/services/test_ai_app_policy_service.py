@@ -0,0 +1,141 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import text
+
+from api.governance.api_schemas.ai_app_policy import AIApplicationPolicyView
+from api.governance.database.db_models.ai_app_policy_model import AIApplicationPolicyModel, PermissionType
+from api.governance.services.ai_app_policy_service import AIAppPolicyService
+from api.governance.utils.ai_app_policy_index import AIAppPolicyIndex
+from core.db_session import session
+
+
+def get_policy_view(id, tags, users=None, groups=None, status=1, prompt=PermissionType.ALLOW):
+    return AIApplicationPolicyView(id=id, status=status, description="test policy", users=users or [],
+                                   groups=groups or [], roles=[], tags=tags, prompt=prompt,
+                                   reply=PermissionType.ALLOW, enriched_prompt=PermissionType.ALLOW,
+                                   application_id=1)
+
+
+def get_policy_model(id, tags, users=None, groups=None):
+    return AIApplicationPolicyModel(id=id, status=1, description="test policy", users=users or [],
+                                    groups=groups or [], roles=[], tags=tags, prompt=PermissionType.DENY,
+                                    reply=PermissionType.ALLOW, enriched_prompt=PermissionType.ALLOW,
+                                    application_id=1)
+
+
+def test_policy_index_matches_traits_and_principals_exactly():
+    index = AIAppPolicyIndex(1, [
+        get_policy_view(1, ["PERSON"], users=["user1"]),
+        get_policy_view(2, ["PERSON", "EMAIL"], groups=["group1"]),
+        get_policy_view(3, ["EMAIL_ADDRESS"], groups=["public"]),
+        get_policy_view(4, ["EMAIL"], users=["user10"]),
+    ])
+
+    assert [p.id for p in index.find_policies(["PERSON"], "user1", [])] == [1]
+    assert [p.id for p in index.find_policies(["EMAIL", "PERSON"], "user1", ["group1"])] == [1, 2]
+    # No substring matches on traits or users
+    assert [p.id for p in index.find_policies(["EMAIL"], "user1", ["public"])] == []
+    assert index.find_policies([], "user1", ["group1"]) == []
+
+
+def test_policy_index_add_update_and_remove():
+    index = AIAppPolicyIndex(1, [get_policy_view(1, ["PERSON"], users=["user1"])])
+
+    index.add_policy(get_policy_view(1, ["EMAIL"], users=["user1"]))
+    assert index.find_policies(["PERSON"], "user1", []) == []
+    assert [p.id for p in index.find_policies(["EMAIL"], "user1", [])] == [1]
+
+    index.add_policy(get_policy_view(1, ["EMAIL"], users=["user1"], status=0))
+    assert index.find_policies(["EMAIL"], "user1", []) == []
+
+    index.add_policy(get_policy_view(2, ["EMAIL"], groups=["group1"]))
+    index.remove_policy(2)
+    assert index.policies == {}
+    assert not index.trait_index and not index.user_index and not index.group_index
+
+
+def get_service():
+    repository = MagicMock()
+    repository.list_enabled_policies = AsyncMock(return_value=[
+        get_policy_model(1, ["PERSON"], users=["user1"]),
+        get_policy_model(2, ["EMAIL"], groups=["group1"]),
+    ])
+    return AIAppPolicyService(ai_app_policy_repository=repository, policy_request_validator=AsyncMock()), repository
+
+
+@pytest.mark.asyncio
+async def test_list_authorization_policies_builds_index_once():
+    service, repository = get_service()
+
+    policies = await service.list_ai_application_authorization_policies(1, ["PERSON", "EMAIL"], "user1", ["group1"])
+    assert [p.id for p in policies] == [1, 2]
+    assert policies[0].prompt == PermissionType.DENY
+
+    await service.list_ai_application_authorization_policies(1, ["PERSON"], "user2", ["group1"])
+    repository.list_enabled_policies.assert_called_once_with(1)
+
+
+@pytest.mark.asyncio
+async def test_list_authorization_policies_rebuilds_expired_index():
+    service, repository = get_service()
+    service.policy_index_refresh_interval = -1
+
+    await service.list_ai_application_authorization_policies(1, ["PERSON"], "user1", [])
+    await service.list_ai_application_authorization_policies(1, ["PERSON"], "user1", [])
+
+    assert repository.list_enabled_policies.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_policy_crud_updates_index_after_commit(set_context_session):
+    service, repository = get_service()
+    await service.get_policy_index(1)
+    service.create_record = AsyncMock(return_value=get_policy_view(3, ["PHONE"], users=["user1"]))
+    service.update_record = AsyncMock(return_value=get_policy_view(1, ["SSN"], users=["user1"]))
+    service.delete_record = AsyncMock()
+    service.get_policy_by_id_and_application_id = AsyncMock()
+    await session.execute(text("SELECT 1"))
+
+    await service.create_ai_application_policy(1, get_policy_view(None, ["PHONE"], users=["user1"]))
+    assert await service.list_ai_application_authorization_policies(1, ["PHONE"], "user1", []) == []
+    await session.commit()
+    assert [p.id for p in await service.list_ai_application_authorization_policies(1, ["PHONE"], "user1", [])] == [3]
+
+    await service.update_ai_application_policy(1, 1, get_policy_view(None, ["SSN"], users=["user1"]))
+    await session.commit()
+    assert await service.list_ai_application_authorization_policies(1, ["PERSON"], "user1", []) == []
+
+    service.policy_request_validator.validate_delete_request = MagicMock()
+    await service.delete_ai_application_policy(1, 3)
+    await session.commit()
+    assert await service.list_ai_application_authorization_policies(1, ["PHONE"], "user1", []) == []
+
+    repository.list_enabled_policies.assert_called_once_with(1)
+    await session.remove()
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_policy_change_not_indexed(set_context_session):
+    service, repository = get_service()
+    await service.get_policy_index(1)
+    service.create_record = AsyncMock(return_value=get_policy_view(3, ["PHONE"], users=["user1"]))
+    await session.execute(text("SELECT 1"))
+
+    await service.create_ai_application_policy(1, get_policy_view(None, ["PHONE"], users=["user1"]))
+    await session.rollback()
+    await session.commit()
+
+    assert await service.list_ai_application_authorization_policies(1, ["PHONE"], "user1", []) == []
+    await session.remove()
+
+
+@pytest.mark.asyncio
+async def test_evict_policy_index():
+    service, repository = get_service()
+    await service.get_policy_index(1)
+
+    service.evict_policy_index(1)
+    await service.get_policy_index(1)
+
+    assert repository.list_enabled_policies.call_count == 2
@@ -0,0 +1,70 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import text
+
+from api.authz.utils.cache_decorator import cache_with_expiration, invalidate_cache
+from api.governance.services.vector_db_policy_service import VectorDBPolicyService
+from core.db_session import session
+
+
+class CachedVectorDBPolicies:
+    def __init__(self):
+        invalidate_cache("get_vector_db_policies")
+        self.policies = ["policy1"]
+        self.released = asyncio.Event()
+        self.released.set()
+        self.calls = 0
+
+    @cache_with_expiration(60)
+    async def get_vector_db_policies(self, vector_db_id):
+        self.calls += 1
+        policies = list(self.policies)
+        await self.released.wait()
+        return policies
+
+
+@pytest.mark.asyncio
+async def test_load_racing_uncommitted_delete_not_cached(set_context_session):
+    cached_policies = CachedVectorDBPolicies()
+    service = VectorDBPolicyService(vector_db_policy_repository=MagicMock(),
+                                    vector_db_policy_request_validator=MagicMock())
+    service.get_vector_db_policy_by_id_and_vector_db_id = AsyncMock()
+    service.delete_record = AsyncMock()
+    await session.execute(text("SELECT 1"))
+
+    await service.delete_vector_db_policy(1, 1)
+    # Authorize requests read the policies before the delete is committed, one of them until after the commit
+    assert await cached_policies.get_vector_db_policies(1) == ["policy1"]
+    cached_policies.released.clear()
+    load = asyncio.create_task(cached_policies.get_vector_db_policies(2))
+    await asyncio.sleep(0)
+    await session.commit()
+    cached_policies.policies = []
+    cached_policies.released.set()
+
+    assert await load == ["policy1"]
+    assert await cached_policies.get_vector_db_policies(1) == []
+    assert await cached_policies.get_vector_db_policies(2) == []
+    assert cached_policies.calls == 4
+    await session.remove()
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_delete_keeps_cache(set_context_session):
+    cached_policies = CachedVectorDBPolicies()
+    service = VectorDBPolicyService(vector_db_policy_repository=MagicMock(),
+                                    vector_db_policy_request_validator=MagicMock())
+    service.get_vector_db_policy_by_id_and_vector_db_id = AsyncMock()
+    service.delete_record = AsyncMock()
+    await session.execute(text("SELECT 1"))
+
+    await service.delete_vector_db_policy(1, 1)
+    assert await cached_policies.get_vector_db_policies(1) == ["policy1"]
+    await session.rollback()
+    await session.commit()
+
+    assert await cached_policies.get_vector_db_policies(1) == ["policy1"]
+    assert cached_policies.calls == 1
+    await session.remove()
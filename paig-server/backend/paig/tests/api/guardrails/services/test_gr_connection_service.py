@@ -67,7 +67,8 @@ def mock_encryption_key_service():
 
 
 @pytest.fixture
-def guardrail_connection_service(mock_guardrail_connection_repository, mock_encryption_key_service, guardrail_connection_request_validator):
+def guardrail_connection_service(mock_guardrail_connection_repository, mock_encryption_key_service, guardrail_connection_request_validator,
+                                 set_context_session):
     return GRConnectionService(
         gr_connection_repository=mock_guardrail_connection_repository,
         encryption_key_service=mock_encryption_key_service,
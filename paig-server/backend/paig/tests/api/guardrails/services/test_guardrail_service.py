@@ -172,7 +172,8 @@ def mock_data_service():
 
 @pytest.fixture
 def guardrail_service(mock_guardrail_repository, mock_guardrail_version_history_repository,
-                      guardrail_request_validator, mock_guardrail_connection_service, mock_ai_app_gov_service, mock_data_service):
+                      guardrail_request_validator, mock_guardrail_connection_service, mock_ai_app_gov_service, mock_data_service,
+                      set_context_session):
     return GuardrailService(
         guardrail_repository=mock_guardrail_repository,
         gr_version_history_repository=mock_guardrail_version_history_repository,
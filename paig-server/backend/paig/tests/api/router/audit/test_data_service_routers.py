@@ -6,6 +6,7 @@ from api.audit.RDS_service.db_operations.admin_audit_repository import AdminAudi
 from core.security.authentication import get_auth_user
 from api.audit.RDS_service.db_operations.access_audit_repository import AccessAuditRepository
 from api.audit.RDS_service.rds_service import RdsService
+from api.audit.api_schemas.access_audit_schema import IncludeQueryParams
 
 
 
@@ -74,6 +75,17 @@ class TestDataServiceRouters:
         admin_audit_repo_mock = AdminAuditRepository()
         return RdsService(access_audit_repo_mock, admin_audit_repo_mock)
 
+    @pytest.mark.asyncio
+    async def test_create_access_audits_in_bulk(self, rds_service, access_audits_data):
+        access_audits = [dict(access_audits_data, event_id=f"event-{index}", number_of_tokens=1)
+                         for index in range(3)]
+
+        assert await rds_service.create_access_audits(access_audits) == 3
+
+        response = await rds_service.get_access_audits(IncludeQueryParams(), IncludeQueryParams(), 0, 10, [],
+                                                       1717223581000, 1717223589999)
+        assert sorted(audit.event_id for audit in response.content) == ["event-0", "event-1", "event-2"]
+
     @pytest.mark.asyncio
     async def test_get_access_audits(self, client: AsyncClient, app: FastAPI, rds_service, access_audits_data):
         app.dependency_overrides[get_auth_user] = self.auth_user
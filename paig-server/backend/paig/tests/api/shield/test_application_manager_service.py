@@ -3,10 +3,13 @@ import pytest
 import json
 from pathlib import Path
 
+from api.shield.model.scan_plan import ScanOptions
 from api.shield.model.scanner_result import ScannerResult
 from api.shield.model.authorize_request import AuthorizeRequest
+from api.shield.scanners.AWSBedrockGuardrailScanner import AWSBedrockGuardrailScanner
 from api.shield.scanners.BaseScanner import Scanner
-from api.shield.services.application_manager_service import ApplicationManager, scan_with_scanner
+from api.shield.services.application_manager_service import ApplicationManager
+from api.shield.services.scanner_execution_service import scan_with_scanner
 from api.shield.utils.custom_exceptions import ShieldException
 
 def authorize_req_data():
@@ -22,15 +25,28 @@ class TestScanner1(Scanner):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def scan(self, message: str) -> ScannerResult:
+    def scan(self, message: str, options: ScanOptions = None) -> ScannerResult:
         return ScannerResult(["trait1"], analyzer_result=["result1"])
 
 
+class CacheableScanner(Scanner):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.scanned_messages = []
+
+    def scan(self, message: str, options: ScanOptions = None) -> ScannerResult:
+        self.scanned_messages.append(message)
+        return ScannerResult([message.upper()])
+
+    def get_scan_cache_key(self, options: ScanOptions = None) -> str | None:
+        return ""
+
+
 class TestScanner2(Scanner):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def scan(self, message: str) -> ScannerResult:
+    def scan(self, message: str, options: ScanOptions = None) -> ScannerResult:
         return ScannerResult(["trait2"])
 
 
@@ -59,7 +75,7 @@ class TestApplicationManager:
     def test_get_scanners_with_cache_hit(self, mock_load_scanners):
         manager = ApplicationManager()
         manager.application_key_scanners.put('app_key', ['scanner1', 'scanner2'])
-        manager.get_scanners('app_key', 'prompt', True, auth_req)
+        manager.get_scanners('app_key', 'prompt', True)
         mock_load_scanners.assert_not_called()
 
     @patch('api.shield.services.application_manager_service.parse_properties')
@@ -67,11 +83,39 @@ class TestApplicationManager:
         mock_parse_properties.return_value = mock_scanners
         manager = ApplicationManager()
         manager.load_scanners('app_key')
-        assert manager.get_scanners('app_key', 'prompt', True, auth_req)[0] == mock_scanners[0]
-        assert manager.get_scanners('app_key', 'prompt', False, auth_req)[0] == mock_scanners[1]
+        assert manager.get_scanners('app_key', 'prompt', True)[0] == mock_scanners[0]
+        assert manager.get_scanners('app_key', 'prompt', False)[0] == mock_scanners[1]
+
+    @patch('api.shield.services.application_manager_service.parse_properties')
+    def test_get_scan_plan_does_not_modify_scanners(self, mock_parse_properties):
+        scanner = AWSBedrockGuardrailScanner(name='AWSBedrockGuardrailScanner', request_types=['prompt'],
+                                             enforce_access_control=False)
+        mock_parse_properties.return_value = [scanner]
+        manager = ApplicationManager()
+        manager.load_scanners('app_key')
 
+        plans = []
+        for guardrail_id in ['guardrail1', 'guardrail2']:
+            req = authorize_req_data()
+            req.context['guardrail_info'] = {
+                'guardrail_provider': 'AWS',
+                'guardrail_connection_details': {'region': 'us-west-2'},
+                'guardrail_provider_response': {'AWS': {'response': {'guardrailId': guardrail_id, 'version': '1'}}}
+            }
+            plans.append(manager.get_scan_plan('app_key', 'prompt', False, req))
+
+        assert plans[0].scanners == plans[1].scanners == (scanner,)
+        assert plans[0].options.guardrail_id == 'guardrail1'
+        assert plans[1].options.guardrail_id == 'guardrail2'
+        assert plans[0].options.scan_for_req_type == 'prompt'
+        assert plans[1].options.region == 'us-west-2'
+        assert scanner.get_property('guardrail_id') is None
+        assert scanner.get_property('scan_for_req_type') is None
+        assert scanner.get_scan_cache_key(plans[0].options) != scanner.get_scan_cache_key(plans[1].options)
+
+    @pytest.mark.asyncio
     @patch('api.shield.services.application_manager_service.parse_properties')
-    def test_scan_messages(self, mock_parse_properties):
+    async def test_scan_messages(self, mock_parse_properties):
         scanner1 = MagicMock(name='scanner1', request_types=['prompt'], enforce_access_control=True)
         scanner1.scan.return_value = {'traits': ['trait1', 'trait2']}
         scanner2 = MagicMock(name='scanner2', request_types=['prompt', 'reply'], enforce_access_control=False)
@@ -79,11 +123,44 @@ class TestApplicationManager:
         mock_parse_properties.return_value = [scanner1, scanner2]
         manager = ApplicationManager()
         manager.load_scanners('app_key')
-        scan_results, scan_timing = manager.scan_messages('message', auth_req, True)
+        scan_results, scan_timing = await manager.scan_messages('message', auth_req, True)
         assert len(scan_results) == 1
         for key, value in scan_results.items():
             assert value == {'traits': ['trait1', 'trait2']}
 
+    @pytest.mark.asyncio
+    @patch('api.shield.services.application_manager_service.parse_properties')
+    async def test_scan_messages_batch(self, mock_parse_properties, mock_scanners):
+        mock_parse_properties.return_value = mock_scanners
+        manager = ApplicationManager()
+        manager.load_scanners(auth_req.application_key)
+        results = await manager.scan_messages_batch(['message1', 'message2'], auth_req, True)
+        assert len(results) == 2
+        for scan_results, scan_timings in results:
+            assert list(scan_results.keys()) == ['scanner1']
+            assert scan_results['scanner1'].get_traits() == ['trait1']
+
+    @pytest.mark.asyncio
+    @patch('api.shield.services.application_manager_service.parse_properties')
+    async def test_scan_messages_batch_uses_scan_result_cache(self, mock_parse_properties):
+        scanner = CacheableScanner(name='cacheable_scanner', request_types=['prompt'], enforce_access_control=True)
+        mock_parse_properties.return_value = [scanner]
+        manager = ApplicationManager()
+        manager.load_scanners(auth_req.application_key)
+
+        await manager.scan_messages_batch(['message1', 'message2'], auth_req, True)
+        results = await manager.scan_messages_batch(['message2', 'message3'], auth_req, True)
+
+        # message2 is served from the cache
+        assert scanner.scanned_messages == ['message1', 'message2', 'message3']
+        assert [scan_results['cacheable_scanner'].get_traits() for scan_results, _ in results] == [['MESSAGE2'],
+                                                                                                 ['MESSAGE3']]
+
+        # reloading the scanners invalidates the cached results
+        manager.load_scanners(auth_req.application_key)
+        await manager.scan_messages_batch(['message2'], auth_req, True)
+        assert scanner.scanned_messages == ['message1', 'message2', 'message3', 'message2']
+
     def test_scan_with_scanner(self):
         scanner = TestScanner1(name='scanner1', request_types=['prompt'], enforce_access_control=True,
                                model_path='model_path', model_score_threshold=0.5, entity_type='entity_type',
@@ -99,7 +176,8 @@ class TestApplicationManager:
             assert result == {"traits": ["trait1"], "analyzer_result": ["result1"]}
 
 
-def test_scan_messages_success(app_manager, mock_scanners):
+@pytest.mark.asyncio
+async def test_scan_messages_success(app_manager, mock_scanners):
     message = "test message"
     application_key = "test_app_key"
 
@@ -111,7 +189,7 @@ def test_scan_messages_success(app_manager, mock_scanners):
         traits=[],
         analyzer_result=["result2"]
     )):
-        scan_results, scan_timings = app_manager.scan_messages(message, auth_req, True)
+        scan_results, scan_timings = await app_manager.scan_messages(message, auth_req, True)
 
     # Verify the results
     assert len(scan_results) == 2
@@ -121,7 +199,8 @@ def test_scan_messages_success(app_manager, mock_scanners):
     assert scan_results["scanner1"].get('analyzer_result') == ["result1"]
 
 
-def test_scan_messages_with_exception(app_manager, mock_scanners):
+@pytest.mark.asyncio
+async def test_scan_messages_with_exception(app_manager, mock_scanners):
     message = "test message"
     application_key = "test_app_key"
 
@@ -129,7 +208,7 @@ def test_scan_messages_with_exception(app_manager, mock_scanners):
         with patch.object(mock_scanners[1], 'scan',
                           return_value=ScannerResult(traits=["trait1"], analyzer_result=["result1"])):
             with pytest.raises(ShieldException) as e:
-                scan_results, access_control_traits = app_manager.scan_messages(message, auth_req, True)
+                scan_results, access_control_traits = await app_manager.scan_messages(message, auth_req, True)
 
                 # Verify the results
                 assert len(scan_results) == 1  # scanner1 failed, so only one result
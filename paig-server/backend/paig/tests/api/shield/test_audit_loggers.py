@@ -59,3 +59,71 @@ def test_local_audit_logger(mock_log_message_in_local):
     shield_audit = get_shield_audit_obj()
     local_audit_logger.push_audit_event_to_server(shield_audit)
     mock_log_message_in_local.write_log_to_local_file.assert_called_once()
+
+
+@patch('api.shield.client.http_fluentd_client.FluentdRestHttpClient')
+def test_fluentd_audit_logger_push_batch(mock_fluentd_http_client):
+    fluentd_audit_logger = FluentdAuditLogger(mock_fluentd_http_client, format_to_root_path('tests/api/shield/audit_spool_dir'), 0, 5)
+    shield_audits = [get_shield_audit_obj(), get_shield_audit_obj()]
+    fluentd_audit_logger.push_audit_events_to_server(shield_audits)
+    mock_fluentd_http_client.log_messages.assert_called_once_with([audit.to_payload_dict() for audit in shield_audits])
+    mock_fluentd_http_client.log_message.assert_not_called()
+
+
+@patch('api.shield.logfile.log_message_in_s3.LogMessageInS3File')
+def test_s3_audit_logger_push_batch(mock_log_message_in_s3):
+    s3_audit_logger = S3AuditLogger(mock_log_message_in_s3, format_to_root_path('tests/api/shield/audit_spool_dir'), 0, 0)
+    mock_log_message_in_s3.create_folder_structure.side_effect = lambda audit: f"tenant_id={audit.tenantId}"
+    mock_log_message_in_s3.create_batch_file_structure.side_effect = \
+        lambda audit, batch_id: f"tenant_id={audit.tenantId}/{batch_id}.json"
+    mock_log_message_in_s3.bucket_prefix = 'test_bucket_prefix'
+    shield_audits = [get_shield_audit_obj(), get_shield_audit_obj(), get_shield_audit_obj()]
+    shield_audits[2].tenantId = 'other_tenant'
+
+    s3_audit_logger.push_audit_events_to_server(shield_audits)
+
+    # One multi-record object per tenant
+    assert mock_log_message_in_s3.write_logs_to_s3.call_count == 2
+    first_call, second_call = mock_log_message_in_s3.write_logs_to_s3.call_args_list
+    assert first_call.args[0].startswith('test_bucket_prefix/tenant_id=test_tenant/')
+    assert first_call.args[1] == shield_audits[:2]
+    assert second_call.args[1] == shield_audits[2:]
+
+
+@patch('api.shield.logfile.log_message_in_local.LogMessageInLocal')
+def test_local_audit_logger_push_batch(mock_log_message_in_local):
+    mock_log_message_in_local.directory_path = 'tests/api/shield/test_directory_path'
+    mock_log_message_in_local.create_window_file_structure.return_value = 'tenant_id=test_tenant/window.json'
+    local_audit_logger = LocalAuditLogger(mock_log_message_in_local, format_to_root_path('tests/api/shield/audit_spool_dir'), 0, 0)
+    shield_audits = [get_shield_audit_obj(), get_shield_audit_obj()]
+
+    local_audit_logger.push_audit_events_to_server(shield_audits)
+
+    mock_log_message_in_local.append_logs_to_local_file.assert_called_once_with(
+        'tests/api/shield/test_directory_path/tenant_id=test_tenant/window.json', shield_audits)
+
+
+@patch('api.shield.logfile.audit_rollup_writer.AuditRollupWriter')
+@patch('api.shield.logfile.log_message_in_s3.LogMessageInS3File')
+def test_s3_audit_logger_push_batch_to_rollup(mock_log_message_in_s3, mock_rollup_writer):
+    s3_audit_logger = S3AuditLogger(mock_log_message_in_s3, format_to_root_path('tests/api/shield/audit_spool_dir'), 0, 0)
+    s3_audit_logger.rollup_writer = mock_rollup_writer
+    shield_audits = [get_shield_audit_obj(), get_shield_audit_obj()]
+
+    s3_audit_logger.push_audit_events_to_server(shield_audits)
+
+    mock_rollup_writer.append.assert_called_once_with(shield_audits)
+    mock_log_message_in_s3.write_logs_to_s3.assert_not_called()
+
+
+@patch('api.shield.logfile.audit_rollup_writer.AuditRollupWriter')
+@patch('api.shield.logfile.log_message_in_local.LogMessageInLocal')
+def test_local_audit_logger_push_batch_to_rollup(mock_log_message_in_local, mock_rollup_writer):
+    local_audit_logger = LocalAuditLogger(mock_log_message_in_local, format_to_root_path('tests/api/shield/audit_spool_dir'), 0, 0)
+    local_audit_logger.rollup_writer = mock_rollup_writer
+    shield_audits = [get_shield_audit_obj(), get_shield_audit_obj()]
+
+    local_audit_logger.push_audit_events_to_server(shield_audits)
+
+    mock_rollup_writer.append.assert_called_once_with(shield_audits)
+    mock_log_message_in_local.append_logs_to_local_file.assert_not_called()
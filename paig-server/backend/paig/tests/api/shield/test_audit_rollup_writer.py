@@ -0,0 +1,215 @@
+import gzip
+import json
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from api.shield.logfile import audit_rollup_writer
+from api.shield.logfile.audit_rollup_writer import AuditRollupWriter
+from api.shield.logfile.log_message_in_local import LogMessageInLocal
+from api.shield.model.authorize_request import AuthorizeRequest
+from api.shield.model.authz_service_response import AuthzServiceResponse
+from api.shield.model.shield_audit import ShieldAudit
+from api.shield.utils.custom_exceptions import ShieldException
+
+
+def get_shield_audit_obj(tenant_id='test_tenant', thread_id='thread1'):
+    with open(f"{Path(__file__).parent}/json_data/authorize_request.json", 'r') as json_file:
+        req_json = json.load(json_file)
+    req_json["threadId"] = thread_id
+    with open(f"{Path(__file__).parent}/json_data/authz_response.json", 'r') as json_file:
+        res_json = json.load(json_file)
+    auth_req = AuthorizeRequest(tenant_id=tenant_id, req_data=req_json, user_role='OWNER')
+    return ShieldAudit(auth_req, AuthzServiceResponse(res_data=res_json), ['PERSON'],
+                       [{"originalMessage": "Hello", "maskedMessage": "Hello"}])
+
+
+@pytest.fixture
+def local_sink(mocker, tmp_path):
+    configs = {"local_directory_path": str(tmp_path / "audit_logs"),
+               "audit_spool_dir": str(tmp_path / "audit-spool")}
+    mocker.patch('api.shield.utils.config_utils.get_property_value',
+                 side_effect=lambda prop, default=None: configs.get(prop, default))
+    return LogMessageInLocal()
+
+
+@pytest.fixture
+def rollup_writer(local_sink):
+    writer = AuditRollupWriter(local_sink, local_sink.audit_rollup_staging_dir)
+    yield writer
+    writer.close()
+
+
+def read_part(local_sink, part_key):
+    with gzip.open(os.path.join(local_sink.directory_path, part_key), 'rt') as part_file:
+        return [json.loads(line) for line in part_file]
+
+
+def read_manifest(local_sink, writer, audit_event):
+    manifest_key = f"{local_sink.create_folder_structure(audit_event)}/_manifest/{writer.writer_id}.json"
+    return local_sink.read_rollup_manifest(manifest_key)
+
+
+class TestAuditRollupWriter:
+
+    def test_events_rolled_up_into_one_part_per_window(self, local_sink, rollup_writer):
+        audit_events = [get_shield_audit_obj(thread_id=f"thread{index}") for index in range(3)]
+
+        rollup_writer.append(audit_events[:2])
+        rollup_writer.append(audit_events[2:])
+        # Nothing is published before the part is sealed
+        assert read_manifest(local_sink, rollup_writer, audit_events[0]) is None
+
+        rollup_writer.close()
+
+        manifest = read_manifest(local_sink, rollup_writer, audit_events[0])
+        assert len(manifest["parts"]) == 1
+        part_entry = manifest["parts"][0]
+        assert part_entry["key"].endswith(".ndjson.gz")
+        assert part_entry["records"] == 3
+        assert part_entry["min_event_time"] == audit_events[0].eventTime
+        assert [record["threadId"] for record in read_part(local_sink, part_entry["key"])] == \
+               ["thread0", "thread1", "thread2"]
+        assert not os.path.exists(rollup_writer.writer_dir)
+
+    def test_events_of_each_tenant_in_own_part(self, local_sink, rollup_writer):
+        audit_events = [get_shield_audit_obj(), get_shield_audit_obj(tenant_id='other_tenant')]
+
+        rollup_writer.append(audit_events)
+        rollup_writer.close()
+
+        for audit_event in audit_events:
+            part_keys = [part["key"] for part in read_manifest(local_sink, rollup_writer, audit_event)["parts"]]
+            assert len(part_keys) == 1
+            assert part_keys[0].startswith(f"tenant_id={audit_event.tenantId}/")
+
+    def test_part_sealed_at_max_size(self, local_sink, rollup_writer):
+        rollup_writer.max_part_size_bytes = 1
+        audit_event = get_shield_audit_obj()
+
+        rollup_writer.append([audit_event])
+        rollup_writer.append([get_shield_audit_obj()])
+
+        assert rollup_writer.open_parts == {}
+        assert len(read_manifest(local_sink, rollup_writer, audit_event)["parts"]) == 2
+
+    def test_part_sealed_at_max_age(self, local_sink, rollup_writer):
+        audit_event = get_shield_audit_obj()
+        rollup_writer.append([audit_event])
+
+        rollup_writer.rotate_expired_parts()
+        assert len(rollup_writer.open_parts) == 1
+
+        rollup_writer.max_part_age_sec = 0
+        rollup_writer.rotate_expired_parts()
+        assert rollup_writer.open_parts == {}
+        assert len(read_manifest(local_sink, rollup_writer, audit_event)["parts"]) == 1
+
+    def test_part_kept_staged_when_publish_fails(self, mocker, local_sink, rollup_writer):
+        audit_event = get_shield_audit_obj()
+        rollup_writer.append([audit_event])
+        mocker.patch.object(local_sink, 'publish_rollup_part', side_effect=ShieldException("disk error"))
+
+        rollup_writer.max_part_age_sec = 0
+        rollup_writer.rotate_expired_parts()
+        assert rollup_writer.open_parts == {}
+        assert len(rollup_writer.sealed_parts) == 1
+        assert os.path.exists(rollup_writer.sealed_parts[0].staged_path)
+
+        mocker.stopall()
+        rollup_writer.rotate_expired_parts()
+        assert rollup_writer.sealed_parts == []
+        assert read_manifest(local_sink, rollup_writer, audit_event)["parts"][0]["records"] == 1
+
+    def test_append_not_blocked_by_publish(self, mocker, local_sink, rollup_writer):
+        publishing, uploaded, published = threading.Event(), threading.Event(), threading.Event()
+        publish_rollup_part = local_sink.publish_rollup_part
+
+        def slow_publish_rollup_part(staged_path, part_key):
+            publishing.set()
+            uploaded.wait(5)
+            publish_rollup_part(staged_path, part_key)
+            published.set()
+
+        mocker.patch.object(local_sink, 'publish_rollup_part', side_effect=slow_publish_rollup_part)
+        audit_event = get_shield_audit_obj()
+        rollup_writer.append([audit_event])
+        rollup_writer.max_part_age_sec = 0
+        rotate_thread = threading.Thread(target=rollup_writer.rotate_expired_parts)
+        rotate_thread.start()
+        assert publishing.wait(5)
+
+        # The part being published is sealed, the next audit events go to a new part
+        rollup_writer.append([get_shield_audit_obj()])
+        assert not published.is_set()
+        assert len(rollup_writer.open_parts) == 1
+        uploaded.set()
+        rotate_thread.join(5)
+
+        rollup_writer.close()
+        assert [part["records"] for part in read_manifest(local_sink, rollup_writer, audit_event)["parts"]] == [1, 1]
+
+    def test_parts_of_dead_writer_recovered(self, local_sink):
+        audit_event = get_shield_audit_obj()
+        dead_writer = AuditRollupWriter(local_sink, local_sink.audit_rollup_staging_dir)
+        dead_writer.append([audit_event, get_shield_audit_obj()])
+        # Simulate a writer which exited without closing
+        dead_writer.closed = True
+        dead_writer.writer_lock.release()
+        audit_rollup_writer._live_writer_ids.discard(dead_writer.writer_id)
+
+        writer = AuditRollupWriter(local_sink, local_sink.audit_rollup_staging_dir)
+        writer.close()
+
+        part_entry = read_manifest(local_sink, writer, audit_event)["parts"][0]
+        assert dead_writer.writer_id in part_entry["key"]
+        assert part_entry["records"] == 2
+        assert len(read_part(local_sink, part_entry["key"])) == 2
+        assert not os.path.exists(dead_writer.writer_dir)
+
+    def test_truncated_part_of_dead_writer_recovered(self, local_sink):
+        audit_event = get_shield_audit_obj()
+        dead_writer = AuditRollupWriter(local_sink, local_sink.audit_rollup_staging_dir)
+        dead_writer.append([audit_event, get_shield_audit_obj()])
+        dead_writer.append([get_shield_audit_obj(thread_id="thread2")])
+        staged_path = next(iter(dead_writer.open_parts.values())).staged_path
+        # Simulate a writer which crashed while appending the audit events
+        with open(staged_path, 'ab') as part_file:
+            part_file.write(gzip.compress(b'{"threadId": "thread3"}\n')[:-10])
+        dead_writer.closed = True
+        dead_writer.writer_lock.release()
+        audit_rollup_writer._live_writer_ids.discard(dead_writer.writer_id)
+
+        writer = AuditRollupWriter(local_sink, local_sink.audit_rollup_staging_dir)
+        writer.close()
+
+        part_entry = read_manifest(local_sink, writer, audit_event)["parts"][0]
+        assert part_entry["records"] == 3
+        assert part_entry["size_bytes"] == next(iter(dead_writer.open_parts.values())).size_bytes
+        assert [record["threadId"] for record in read_part(local_sink, part_entry["key"])] == \
+               ["thread1", "thread1", "thread2"]
+        assert not os.path.exists(dead_writer.writer_dir)
+
+    def test_parts_of_live_writer_not_recovered(self, local_sink, rollup_writer):
+        rollup_writer.append([get_shield_audit_obj()])
+
+        writer = AuditRollupWriter(local_sink, local_sink.audit_rollup_staging_dir)
+        writer.close()
+
+        assert len(rollup_writer.open_parts) == 1
+        assert os.path.exists(next(iter(rollup_writer.open_parts.values())).staged_path)
+
+    def test_append_after_close_fails(self, rollup_writer):
+        rollup_writer.close()
+
+        with pytest.raises(ShieldException):
+            rollup_writer.append([get_shield_audit_obj()])
+
+    def test_invalid_format(self, mocker, local_sink):
+        mocker.patch('api.shield.utils.config_utils.get_property_value',
+                     side_effect=lambda prop, default=None: "csv" if prop == "audit_rollup_format" else default)
+
+        with pytest.raises(ShieldException):
+            AuditRollupWriter(local_sink, local_sink.audit_rollup_staging_dir)
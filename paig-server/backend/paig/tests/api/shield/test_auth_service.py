@@ -6,6 +6,7 @@ import pytest
 
 from pathlib import Path
 
+from api.authz.utils.cache_invalidation import invalidate_guardrail_cache
 from api.shield.enum.ShieldEnums import Guardrail
 from api.shield.model.shield_audit import ShieldAudit, ShieldAuditViaApi
 from api.shield.model.vectordb_authz_request import AuthorizeVectorDBRequest
@@ -121,7 +122,8 @@ class TestAuthService:
         auth_service.tenant_data_encryptor_service = mock_tenant_data_encryptor_service
         mocker.patch.object(auth_service.authz_service_client, 'post_authorize', new_callable=AsyncMock,
                             return_value=authz_res_data_no_masking())
-        mocker.patch.object(auth_service.application_manager, 'scan_messages', return_value=({}, {}))
+        mocker.patch.object(auth_service.application_manager, 'scan_messages_batch', new_callable=AsyncMock,
+                            side_effect=lambda messages, *args: [({}, {}) for _ in messages])
         mocker.patch('api.shield.services.auth_service.AuthService.audit', return_value=(0, 0))
 
         mocker.patch.object(auth_service.governance_service_client, 'get_application_guardrail_name', new_callable=AsyncMock, return_value={})
@@ -153,7 +155,8 @@ class TestAuthService:
         auth_service.tenant_data_encryptor_service = mock_tenant_data_encryptor_service
         mocker.patch.object(auth_service.authz_service_client, 'post_authorize', new_callable=AsyncMock,
                             return_value=authz_res_data_no_masking())
-        mocker.patch.object(auth_service.application_manager, 'scan_messages', return_value=({}, {}))
+        mocker.patch.object(auth_service.application_manager, 'scan_messages_batch', new_callable=AsyncMock,
+                            side_effect=lambda messages, *args: [({}, {}) for _ in messages])
         mocker.patch('api.shield.services.auth_service.AuthService.audit', return_value=(0, 0))
 
         mocker.patch.object(auth_service.governance_service_client, 'get_application_guardrail_name', new_callable=AsyncMock, return_value={})
@@ -165,7 +168,8 @@ class TestAuthService:
         await auth_service.authorize(mock_auth_req)
 
         # Assertions
-        assert auth_service.application_manager.scan_messages.call_count == mock_auth_req.messages.__len__()
+        auth_service.application_manager.scan_messages_batch.assert_called_once()
+        assert auth_service.application_manager.scan_messages_batch.call_args[0][0] == mock_auth_req.messages
 
     def test_init_log_message_in_file(self, mocker):
         # Mock dependencies
@@ -334,7 +338,8 @@ class TestAuthService:
         mocker.patch.object(auth_service, 'do_authz_authorize', new_callable=AsyncMock, return_value=authz_res)
         # mocker.patch.object(auth_service, 'log_audit_fluentd')
         mocker.patch.object(auth_service, 'log_audit_message', new_callable=AsyncMock)
-        mocker.patch.object(auth_service.application_manager, 'scan_messages', return_value=({}, {}))
+        mocker.patch.object(auth_service.application_manager, 'scan_messages_batch', new_callable=AsyncMock,
+                            side_effect=lambda messages, *args: [({}, {}) for _ in messages])
         mocker.patch('api.shield.services.auth_service.AuthService.audit', return_value=(0, 0))
 
         mocker.patch.object(auth_service.governance_service_client, 'get_application_guardrail_name', new_callable=AsyncMock, return_value={})
@@ -614,7 +619,8 @@ class TestAuthService:
         mocker.patch.object(auth_service.authz_service_client, 'post_authorize', new_callable=AsyncMock, return_value=authz_res_data())
 
         # Mock the analysis method
-        mocker.patch.object(auth_service.application_manager, 'scan_messages', return_value=({}, {}))
+        mocker.patch.object(auth_service.application_manager, 'scan_messages_batch', new_callable=AsyncMock,
+                            side_effect=lambda messages, *args: [({}, {}) for _ in messages])
         mocker.patch('api.shield.services.auth_service.AuthService.audit', return_value=(0, 0))
 
         mocker.patch.object(auth_service.governance_service_client, 'get_application_guardrail_name', new_callable=AsyncMock, return_value={})
@@ -627,6 +633,48 @@ class TestAuthService:
 
         assert auth_response is not None
 
+    @pytest.mark.asyncio
+    async def test_authorize_batch(self, mocker):
+        # mock dependencies
+        mocker.patch('api.shield.services.auth_service.FluentdRestHttpClient')
+        mocker.patch('api.shield.services.auth_service.TenantDataEncryptorService')
+        mocker.patch('api.shield.services.auth_service.AuthzServiceClientFactory')
+        mocker.patch('api.shield.services.auth_service.AccountServiceFactory')
+
+        auth_service = self.get_auth_service()
+        auth_reqs = [authorize_req_data(), authorize_req_data(), authorize_req_data()]
+        auth_reqs[1].request_id = "second_request"
+        auth_reqs[2].request_id = "undecryptable_request"
+
+        async def decrypt_authorize_request(auth_req):
+            if auth_req.request_id == "undecryptable_request":
+                raise ShieldException("decryption failed")
+
+        mocker.patch.object(auth_service.tenant_data_encryptor_service, 'decrypt_authorize_request',
+                            new_callable=AsyncMock, side_effect=decrypt_authorize_request)
+        mocker.patch.object(auth_service.tenant_data_encryptor_service, 'encrypt_shield_audit', new_callable=AsyncMock)
+        mocker.patch.object(auth_service.tenant_data_encryptor_service, 'encrypt_authorize_response',
+                            new_callable=AsyncMock)
+        post_authorize = mocker.patch.object(auth_service.authz_service_client, 'post_authorize',
+                                             new_callable=AsyncMock, return_value=authz_res_data_no_masking())
+        scan_messages_batch = mocker.patch.object(auth_service.application_manager, 'scan_messages_batch',
+                                                  new_callable=AsyncMock,
+                                                  side_effect=lambda messages, *args: [({}, {}) for _ in messages])
+        mocker.patch('api.shield.services.auth_service.AuthService.audit', return_value=(0, 0))
+        mocker.patch.object(auth_service.governance_service_client, 'get_application_guardrail_name',
+                            new_callable=AsyncMock, return_value={})
+
+        results = dict([result async for result in auth_service.authorize_batch(auth_reqs)])
+
+        assert set(results.keys()) == {0, 1, 2}
+        assert results[0].isAllowed and results[1].isAllowed
+        assert results[1].requestId == "second_request"
+        assert isinstance(results[2], ShieldException)
+        # the messages of the decrypted requests are scanned together and authz is resolved once
+        scan_messages_batch.assert_awaited_once()
+        assert len(scan_messages_batch.call_args[0][0]) == 2 * len(auth_reqs[0].messages)
+        post_authorize.assert_awaited_once()
+
     def test_get_or_create_fluentd_audit_logger(self, mocker):
         # Mock dependencies
         mocker.patch('api.shield.services.auth_service.FluentdRestHttpClient')
@@ -891,6 +939,35 @@ class TestAuthService:
         context_mock.update.assert_any_call({'guardrail_name': 'test_guardrail'})
         assert auth_req.context.get("guardrail_name") == "test_guardrail"
 
+    @pytest.mark.asyncio
+    async def test_get_application_guardrail_info_cached_until_invalidated(self, mocker):
+        mocker.patch('api.shield.services.auth_service.FluentdRestHttpClient')
+        mocker.patch('api.shield.services.auth_service.TenantDataEncryptorService')
+        mocker.patch('api.shield.services.auth_service.AuthzServiceClientFactory')
+        mocker.patch('api.shield.services.auth_service.AccountServiceFactory')
+        mocker.patch('api.shield.services.auth_service.GovernanceServiceFactory')
+        mocker.patch('api.shield.services.auth_service.GuardrailServiceFactory')
+
+        auth_service = AuthService()
+        get_guardrail_name = mocker.patch.object(auth_service.governance_service_client,
+                                                 'get_application_guardrail_name',
+                                                 new_callable=AsyncMock, return_value='test_guardrail')
+        guardrail_info = {"guardrail_connection_details": {}}
+        get_guardrail_info = mocker.patch.object(auth_service.guardrail_service_client, 'get_guardrail_info_by_name',
+                                                 new_callable=AsyncMock, return_value=guardrail_info)
+        decrypt = mocker.patch.object(auth_service.tenant_data_encryptor_service,
+                                      'decrypt_guardrail_connection_details', new_callable=AsyncMock)
+
+        assert await auth_service.get_application_guardrail_info('tenant1', 'app1') == ('test_guardrail', guardrail_info)
+        assert await auth_service.get_application_guardrail_info('tenant1', 'app1') == ('test_guardrail', guardrail_info)
+        get_guardrail_name.assert_awaited_once()
+        get_guardrail_info.assert_awaited_once()
+        decrypt.assert_awaited_once()
+
+        invalidate_guardrail_cache()
+        await auth_service.get_application_guardrail_info('tenant1', 'app1')
+        assert get_guardrail_info.await_count == 2
+
     @pytest.fixture
     def scanner(self):
         return AWSBedrockGuardrailScanner(
@@ -1,8 +1,19 @@
 import os
+
+import pytest
+
+from api.shield.client.bedrock_runtime_client_pool import BedrockRuntimeClientPool
 from api.shield.enum.ShieldEnums import Guardrail
 from api.shield.scanners.AWSBedrockGuardrailScanner import AWSBedrockGuardrailScanner
 
 
+@pytest.fixture(autouse=True)
+def clear_bedrock_client_pool():
+    BedrockRuntimeClientPool().clear()
+    yield
+    BedrockRuntimeClientPool().clear()
+
+
 class TestAWSBedrockGuardrailScanner:
 
     # Initialize AWSBedrockGuardrailScanner with valid parameters and verify attributes are set correctly
@@ -194,4 +205,14 @@ class TestAWSBedrockGuardrailScanner:
         analyzer_result = result.analyzer_result[0]
         assert analyzer_result.start == 6
         assert analyzer_result.end == 10
-        assert analyzer_result.entity_type == 'NAME_DETECTION'
\ No newline at end of file
+        assert analyzer_result.entity_type == 'NAME_DETECTION'
+    # Cache the scan results of published guardrail versions only, the DRAFT version changes when edited
+    def test_scan_cache_key_skips_draft_version(self, mocker):
+        mocker.patch('boto3.client')
+        scanner = AWSBedrockGuardrailScanner(guardrail_id='guardrail_id', guardrail_version='1', region='us-west-2',
+                                             scan_for_req_type='prompt')
+        assert scanner.get_scan_cache_key() == "us-west-2:guardrail_id:1:prompt"
+
+        draft_scanner = AWSBedrockGuardrailScanner(guardrail_id='guardrail_id', guardrail_version='DRAFT',
+                                                   region='us-west-2', scan_for_req_type='prompt')
+        assert draft_scanner.get_scan_cache_key() is None
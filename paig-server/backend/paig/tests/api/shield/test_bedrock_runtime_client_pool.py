@@ -0,0 +1,69 @@
+import pytest
+
+from api.shield.client.bedrock_runtime_client_pool import BedrockRuntimeClientPool, get_client_key
+
+
+@pytest.fixture
+def client_pool():
+    pool = BedrockRuntimeClientPool()
+    pool.clear()
+    yield pool
+    pool.clear()
+
+
+class TestBedrockRuntimeClientPool:
+
+    def test_client_reused_for_same_connection(self, mocker, client_pool):
+        mock_client = mocker.patch('boto3.client', side_effect=lambda *args, **kwargs: object())
+        connection_details = {'region': 'us-west-2', 'access_key': 'key', 'secret_key': 'secret'}
+
+        client = client_pool.get_client(connection_details, 'connection1')
+
+        assert client_pool.get_client(dict(connection_details), 'connection1') is client
+        assert mock_client.call_count == 1
+        assert mock_client.call_args.args[0] == 'bedrock-runtime'
+        assert mock_client.call_args.kwargs['config'].max_pool_connections == client_pool.max_pool_connections
+
+    def test_new_client_for_changed_credentials(self, mocker, client_pool):
+        mocker.patch('boto3.client', side_effect=lambda *args, **kwargs: object())
+
+        client = client_pool.get_client({'region': 'us-west-2', 'access_key': 'key', 'secret_key': 'secret'})
+        rotated_client = client_pool.get_client({'region': 'us-west-2', 'access_key': 'key', 'secret_key': 'rotated'})
+
+        assert rotated_client is not client
+
+    def test_client_recreated_after_ttl(self, mocker, client_pool):
+        mocker.patch('boto3.client', side_effect=lambda *args, **kwargs: object())
+        mocker.patch.object(client_pool, 'ttl_sec', 0)
+
+        client = client_pool.get_client({'region': 'us-west-2'})
+
+        assert client_pool.get_client({'region': 'us-west-2'}) is not client
+        assert client_pool.misses >= 2
+
+    def test_least_recently_used_client_dropped(self, mocker, client_pool):
+        mocker.patch('boto3.client', side_effect=lambda *args, **kwargs: object())
+        mocker.patch.object(client_pool, 'max_size', 2)
+
+        client_pool.get_client({'region': 'us-east-1'})
+        client_pool.get_client({'region': 'us-west-2'})
+        client_pool.get_client({'region': 'us-east-1'})
+        client_pool.get_client({'region': 'eu-west-1'})
+
+        assert list(client_pool.clients) == [get_client_key({'region': 'us-east-1'}),
+                                             get_client_key({'region': 'eu-west-1'})]
+        assert client_pool.get_pool_size(None)[0].value == 2
+
+    def test_endpoint_url_passed_to_client(self, mocker, client_pool):
+        mock_client = mocker.patch('boto3.client')
+        mocker.patch.object(client_pool, 'endpoint_url', 'http://localhost:4566')
+
+        client_pool.get_client({'region': 'us-west-2'})
+
+        assert mock_client.call_args.kwargs['endpoint_url'] == 'http://localhost:4566'
+
+    def test_client_key_does_not_contain_credentials(self):
+        key = get_client_key({'region': 'us-west-2', 'secret_key': 'secret'}, 'connection1')
+
+        assert key[:2] == ('us-west-2', 'connection1')
+        assert 'secret' not in key[2]
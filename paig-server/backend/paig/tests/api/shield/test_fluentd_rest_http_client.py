@@ -114,3 +114,41 @@ class TestFluentdRestHttpClient:
             fluentd_client.log_message(message)
 
 
+
+    #  Able to log a batch of messages in a single NDJSON request
+    def test_able_to_log_messages_in_batch(self, mocker):
+        # Arrange
+        messages = [{"id": 1}, {"id": 2}]
+        response_mock = mocker.Mock()
+        response_mock.status_code = 200
+
+        side_effect = lambda prop, default=None: {
+            'fluentd_base_url': 'http://localhost:9880',
+            'fluentd_tag': 'audit_tag',
+        }.get(prop, default)
+
+        mocker.patch('api.shield.utils.config_utils.get_property_value', side_effect=side_effect)
+
+        fluentd_client = FluentdRestHttpClient()
+        fluentd_client.post = mocker.Mock(return_value=response_mock)
+
+        # Act
+        fluentd_client.log_messages(messages)
+
+        # Assert
+        fluentd_client.post.assert_called_once_with(url="/audit_tag",
+                                                    headers={"Content-Type": "application/x-ndjson"},
+                                                    body='{"id": 1}\n{"id": 2}\n')
+
+    #  Unable to log a batch of messages due to server error
+    def test_unable_to_log_messages_due_to_server_error(self, mocker):
+        # Arrange
+        response_mock = mocker.Mock()
+        response_mock.status_code = 500
+
+        fluentd_client = FluentdRestHttpClient()
+        fluentd_client.post = mocker.Mock(return_value=response_mock)
+
+        # Act
+        with pytest.raises(ShieldException):
+            fluentd_client.log_messages([{"id": 1}])
@@ -0,0 +1,87 @@
+import os
+import pickle
+
+import pytest
+
+from api.shield.presidio.keyword_recognizer import KeywordAutomaton, KeywordRecognizer, load_keyword_automaton
+
+KEYWORDS = ["heart", "Heart attack", "flu", "she", "hers", "C++", ""]
+
+
+def get_matched_words(automaton, text):
+    return [text[start:end] for start, end in automaton.find_matches(text)]
+
+
+class TestKeywordAutomaton:
+
+    def test_find_matches(self):
+        automaton = KeywordAutomaton.build(KEYWORDS)
+        text = "The HEART attack and Flu, not influenza; ushers she. hers C++"
+
+        assert get_matched_words(automaton, text) == ["HEART attack", "Flu", "she", "hers", "C++"]
+
+    def test_find_matches_at_word_boundaries_only(self):
+        automaton = KeywordAutomaton.build(KEYWORDS)
+
+        assert get_matched_words(automaton, "influenza flu_shot fluffy") == []
+        assert get_matched_words(automaton, "flu\nheart") == ["flu", "heart"]
+
+    def test_find_matches_without_keywords(self):
+        assert KeywordAutomaton.build([]).find_matches("any text") == []
+
+    def test_serialized_automaton(self):
+        automaton = KeywordAutomaton.build(KEYWORDS)
+        text = "heart attack and flu"
+
+        loaded_automaton = KeywordAutomaton.from_buffer(automaton.to_bytes())
+        unpickled_automaton = pickle.loads(pickle.dumps(loaded_automaton))
+
+        assert loaded_automaton.find_matches(text) == automaton.find_matches(text)
+        assert unpickled_automaton.find_matches(text) == automaton.find_matches(text)
+
+    def test_invalid_serialized_automaton(self):
+        with pytest.raises(ValueError):
+            KeywordAutomaton.from_buffer(b"not an automaton")
+        with pytest.raises(ValueError):
+            KeywordAutomaton.from_buffer(KeywordAutomaton.build(KEYWORDS).to_bytes()[:-4])
+
+
+class TestLoadKeywordAutomaton:
+
+    def test_load_keyword_automaton_from_cache_file(self, tmp_path):
+        automaton = load_keyword_automaton(["flu"], cache_dir=str(tmp_path), cache_name="Recognizer")
+        cache_files = os.listdir(tmp_path)
+
+        assert len(cache_files) == 1
+        assert cache_files[0].startswith(".Recognizer.")
+        assert isinstance(automaton.edge_chars, memoryview)
+        assert get_matched_words(load_keyword_automaton(["flu"], cache_dir=str(tmp_path), cache_name="Recognizer"),
+                                 "flu") == ["flu"]
+        assert os.listdir(tmp_path) == cache_files
+
+    def test_load_keyword_automaton_replaces_outdated_cache_file(self, tmp_path):
+        load_keyword_automaton(["flu"], cache_dir=str(tmp_path), cache_name="Recognizer")
+        old_cache_files = os.listdir(tmp_path)
+
+        automaton = load_keyword_automaton(["fever"], cache_dir=str(tmp_path), cache_name="Recognizer")
+
+        assert get_matched_words(automaton, "flu and fever") == ["fever"]
+        assert len(os.listdir(tmp_path)) == 1
+        assert os.listdir(tmp_path) != old_cache_files
+
+    def test_load_keyword_automaton_without_cache_dir(self):
+        automaton = load_keyword_automaton(["flu"])
+        assert get_matched_words(automaton, "flu") == ["flu"]
+
+
+class TestKeywordRecognizer:
+
+    def test_analyze(self):
+        recognizer = KeywordRecognizer(supported_entity="DISEASE", name="DiseaseRecognizer",
+                                       automaton=KeywordAutomaton.build(KEYWORDS), score=0.8)
+
+        results = recognizer.analyze("I had the flu", entities=["DISEASE"])
+
+        assert len(results) == 1
+        assert (results[0].entity_type, results[0].start, results[0].end, results[0].score) == ("DISEASE", 10, 13, 0.8)
+        assert results[0].recognition_metadata["recognizer_name"] == "DiseaseRecognizer"
@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 from unittest.mock import MagicMock, AsyncMock
 
@@ -39,9 +41,53 @@ async def test_log_message_in_data_service():
     log_data = ShieldAudit.from_payload_dict(log_data)
     from api.shield.logfile.log_message_in_data_service import LogMessageInDataService
     service = LogMessageInDataService(mock_data_store_controller)
+    service.bulk_insert_enabled = False
 
     # Act
     await service.log(log_data)
 
     # Assert
     mock_data_service.create_access_audit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_log_message_in_data_service_bulk_insert(mocker):
+    mock_data_store_controller = MagicMock()
+    mock_data_service = MagicMock()
+    mock_data_store_controller.get_service.return_value = mock_data_service
+    mock_data_service.create_access_audit = AsyncMock()
+    mock_data_service.create_access_audits = AsyncMock()
+    mock_audit_logger = mocker.patch('api.shield.logfile.log_message_in_data_service.DataServiceAuditLogger')
+
+    log_data = [ShieldAudit.from_payload_dict({"eventId": f"event-{index}", "tenantId": "test_tenant_id",
+                                               "eventTime": 1111111111}) for index in range(2)]
+    from api.shield.logfile.log_message_in_data_service import LogMessageInDataService
+    service = LogMessageInDataService(mock_data_store_controller)
+    service.bulk_insert_enabled = True
+
+    # The audits are spooled by the audit logger instead of being inserted one by one
+    await service.log(log_data[0])
+    mock_audit_logger.return_value.log.assert_called_once_with(log_data[0])
+    mock_audit_logger.return_value.start.assert_called_once()
+    mock_data_service.create_access_audit.assert_not_awaited()
+
+    # The audit logger writes the batches with a single bulk insert
+    await service.write_audits(log_data)
+    access_audits = mock_data_service.create_access_audits.await_args.args[0]
+    assert [access_audit.event_id for access_audit in access_audits] == ["event-0", "event-1"]
+
+
+def test_data_service_audit_logger_push_batch(tmp_path):
+    from api.shield.logfile.audit_loggers import DataServiceAuditLogger
+    mock_log_message_in_data_service = MagicMock()
+    pushed_on_loops = []
+
+    async def write_audits(audit_events):
+        pushed_on_loops.append(asyncio.get_running_loop())
+
+    mock_log_message_in_data_service.write_audits = write_audits
+    audit_logger = DataServiceAuditLogger(mock_log_message_in_data_service, str(tmp_path / "audit-spool"), 0, 0)
+
+    audit_logger.push_audit_events_to_server([ShieldAudit.from_payload_dict({"eventId": "event-0"})])
+
+    assert pushed_on_loops == [audit_logger.event_loop]
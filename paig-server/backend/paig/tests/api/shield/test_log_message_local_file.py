@@ -77,15 +77,19 @@ class TestLogMessageInLocal:
         # When
         log_message_in_local = LogMessageInLocal()
         await log_message_in_local.log_audit_event(log_data)
-        # Since the thread is running hence added the sleep to wait for the thread to complete
-        sleep(10 / 1000)
+        # The audit events are appended to one file per time window
+        log_file_path = f"{local_log_path}/{log_message_in_local.create_window_file_structure(log_data)}"
+        # Since the thread is running hence added the sleep to wait for the batch to be pushed
+        for _ in range(50):
+            if os.path.exists(log_file_path):
+                break
+            sleep(20 / 1000)
 
         # Then
-        assert os.path.exists(f"{local_log_path}/tenant_id=123/year=2022/month=01/day=01/123_2022_01_01_12345_1.json")
-        assert os.path.isfile(f"{local_log_path}/tenant_id=123/year=2022/month=01/day=01/123_2022_01_01_12345_1.json")
+        assert log_file_path.startswith(f"{local_log_path}/tenant_id=123/year=2022/month=01/day=01/123_2022_01_01_")
+        assert os.path.isfile(log_file_path)
         assert os.path.exists(f"{audit_spool_dir}")
-        assert os.path.getsize(
-            f"{local_log_path}/tenant_id=123/year=2022/month=01/day=01/123_2022_01_01_12345_1.json") > 0
+        assert os.path.getsize(log_file_path) > 0
 
     #  The log file is successfully written to the local directory path even if the directory already exists
     @pytest.mark.asyncio
@@ -104,16 +108,19 @@ class TestLogMessageInLocal:
         # When
         log_data.threadId = '12346'
         log_message_in_local = LogMessageInLocal()
+        log_file_path = f"{local_log_path}/{log_message_in_local.create_window_file_structure(log_data)}"
+        log_file_size = os.path.getsize(log_file_path)
         await log_message_in_local.log_audit_event(log_data)
-        # Since the thread is running hence added the sleep to wait for the thread to complete
-        sleep(10 / 1000)
+        # Since the thread is running hence added the sleep to wait for the batch to be appended
+        for _ in range(50):
+            if os.path.getsize(log_file_path) > log_file_size:
+                break
+            sleep(20 / 1000)
 
         # Then
-        assert os.path.exists(f"{local_log_path}/tenant_id=123/year=2022/month=01/day=01/123_2022_01_01_12346_1.json")
-        assert os.path.isfile(f"{local_log_path}/tenant_id=123/year=2022/month=01/day=01/123_2022_01_01_12346_1.json")
+        assert os.path.isfile(log_file_path)
         assert os.path.exists(f"{audit_spool_dir}")
-        assert os.path.getsize(
-            f"{local_log_path}/tenant_id=123/year=2022/month=01/day=01/123_2022_01_01_12346_1.json") > 0
+        assert os.path.getsize(log_file_path) > log_file_size
 
     #  The local directory path specified in the configuration file is invalid or does not exist
     @pytest.mark.asyncio
@@ -3,6 +3,7 @@ from pathlib import Path
 from unittest.mock import MagicMock
 
 import pytest
+from botocore.exceptions import ClientError
 
 from api.shield.model.authz_service_response import AuthzServiceResponse
 from api.shield.model.authorize_request import AuthorizeRequest
@@ -218,6 +219,28 @@ class TestLogMessageInS3File:
         assert log_message.bucket_prefix == "folder"
 
     #  s3_connection_mode is not set to default, keys or iam_role
+    def test_publish_rollup_part_and_manifest(self, mocker):
+        mocker.patch('boto3.client')
+        side_effect = lambda prop, default: {
+            "s3_connection_mode": "default",
+            "boto3_log_level": "INFO",
+            "s3_bucket_name": "your_bucket_name/folder"
+        }.get(prop)
+        mocker.patch('api.shield.utils.config_utils.get_property_value', side_effect=side_effect)
+
+        log_message = LogMessageInS3File()
+        log_message.s3_client.get_object.side_effect = ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+
+        log_message.publish_rollup_part("/staging/part.ndjson.gz", "tenant_id=1/part.ndjson.gz")
+        assert log_message.read_rollup_manifest("tenant_id=1/_manifest/writer.json") is None
+        log_message.publish_rollup_manifest("tenant_id=1/_manifest/writer.json", {"parts": []})
+
+        log_message.s3_client.upload_file.assert_called_once_with("/staging/part.ndjson.gz", "your_bucket_name",
+                                                                  "folder/tenant_id=1/part.ndjson.gz")
+        put_object_kwargs = log_message.s3_client.put_object.call_args.kwargs
+        assert put_object_kwargs["Key"] == "folder/tenant_id=1/_manifest/writer.json"
+        assert json.loads(put_object_kwargs["Body"]) == {"parts": []}
+
     def test_s3_connection_mode_invalid(self, mocker):
         # Mock the dependencies
         mocker.patch('boto3.client')
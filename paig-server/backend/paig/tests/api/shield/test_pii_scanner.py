@@ -3,12 +3,21 @@ import pytest
 from unittest.mock import patch, MagicMock
 
 from core.utils import format_to_root_path
+from api.shield.presidio.keyword_recognizer import KeywordRecognizer
+from api.shield.presidio.presidio_analyzer_registry import PresidioAnalyzerRegistry
 from api.shield.scanners.PIIScanner import PIIScanner
 from api.shield.scanners.scanner_util import Recognizer
 from presidio_analyzer import RecognizerResult
 from api.shield.utils.custom_exceptions import ShieldException, UnsupportedFileTypeException
 
 
+@pytest.fixture(autouse=True)
+def clear_presidio_analyzer_registry():
+    PresidioAnalyzerRegistry().clear()
+    yield
+    PresidioAnalyzerRegistry().clear()
+
+
 class TestPIIScanner:
 
     # note: the mock here is not used directly, but it is used inside the PIIScanner class
@@ -21,6 +30,27 @@ class TestPIIScanner:
                                                          detect_list_score=0.77)}
         scanner.init_recognizers()
         assert scanner.presidio_analyzer.analyzer.registry.add_recognizer.called
+        keyword_recognizer = scanner.presidio_analyzer.analyzer.registry.add_recognizer.call_args[0][0]
+        assert isinstance(keyword_recognizer, KeywordRecognizer)
+        assert keyword_recognizer.automaton.find_matches('detect1 and detect2') == [(0, 7), (12, 19)]
+
+    @patch('api.shield.scanners.PIIScanner.PresidioAnalyzerEngine')
+    def test_scanners_share_presidio_analyzer(self, mock_presidio_analyzer_engine):
+        mock_presidio_analyzer_engine.side_effect = lambda: MagicMock()
+        scanners = []
+        for detect_list in [['detect1'], ['detect1'], ['detect2']]:
+            scanner = PIIScanner(name='name', request_types=['request_types'], enforce_access_control=True,
+                                 model_path='model_path', model_threshold=0.5, entity_type='entity_type', enable=True)
+            scanner.recognizers = {0: Recognizer(name='recognizer1', enable=True, entity_type='entity_type',
+                                                 ignore_list=[], detect_list=detect_list, detect_regex=r'',
+                                                 detect_list_score=0.77)}
+            scanner.init_recognizers()
+            scanners.append(scanner)
+
+        assert scanners[0].presidio_analyzer is scanners[1].presidio_analyzer
+        assert scanners[0].presidio_analyzer is not scanners[2].presidio_analyzer
+        assert mock_presidio_analyzer_engine.call_count == 2
+        assert len(PresidioAnalyzerRegistry()) == 2
 
     def test_scan(self, mocker):
         recognizer_result_1 = RecognizerResult("PERSON", 3, 7, 0.85)
@@ -37,6 +67,18 @@ class TestPIIScanner:
         assert result.get('traits') == ['EMAIL_ADDRESS', 'PERSON']
         assert result.get('analyzer_result') == analyzer_result_list
 
+    @patch('api.shield.scanners.PIIScanner.PresidioAnalyzerEngine')
+    def test_scan_batch(self, mock_presidio_analyzer_engine):
+        scanner = PIIScanner(name='name', request_types=['request_types'], enforce_access_control=True, model_path='model_path', model_threshold=0.6, entity_type='entity_type', enable=True)
+        scanner.presidio_analyzer.analyze_batch.return_value = [[RecognizerResult("PERSON", 3, 7, 0.85)], []]
+
+        results = scanner.scan_batch(['Hi John', 'Hello there'])
+
+        scanner.presidio_analyzer.analyze_batch.assert_called_once_with(['Hi John', 'Hello there'])
+        scanner.presidio_analyzer.analyze.assert_not_called()
+        assert [result.get('traits') for result in results] == [['PERSON'], []]
+        assert results[0].get('analyzer_result')[0].scanner_name == 'name'
+
     def test_load_recognizer_ignore_list(self):
         scanner = PIIScanner(name='name', request_types=['request_types'], enforce_access_control=True, model_path='model_path', model_threshold=0.5, entity_type='entity_type', enable=True)
         scanner.recognizers = {'recognizer1': Recognizer(name='recognizer1', enable=True, entity_type='entity_type',
@@ -44,7 +86,7 @@ class TestPIIScanner:
                                                          detect_list=['detect1', 'detect2'], detect_regex=r'',
                                                          detect_list_score=0.77)}
         result = scanner._load_recognizer_ignore_list()
-        assert result == {'recognizer1': ['ignore1', 'ignore2']}
+        assert result == {'recognizer1': frozenset(['ignore1', 'ignore2'])}
 
     def test_remove_ignore_list_keywords(self):
         scanner = PIIScanner(name='name', request_types=['request_types'], enforce_access_control=True, model_path='model_path', model_threshold=0.5, entity_type='entity_type', enable=True)
@@ -0,0 +1,48 @@
+from unittest.mock import MagicMock
+
+from api.shield.presidio.presidio_analyzer_registry import PresidioAnalyzerRegistry, get_recognizers_fingerprint
+from api.shield.scanners.scanner_util import Recognizer
+
+
+def get_recognizer(detect_list, ignore_list=None):
+    return Recognizer(name='recognizer1', enable=True, entity_type='entity_type', ignore_list=ignore_list or [],
+                      detect_list=detect_list, detect_regex=r'', detect_list_score=0.77)
+
+
+class TestPresidioAnalyzerRegistry:
+
+    def setup_method(self):
+        PresidioAnalyzerRegistry().clear()
+
+    def teardown_method(self):
+        PresidioAnalyzerRegistry().clear()
+
+    def test_get_analyzer_creates_analyzer_once(self):
+        registry = PresidioAnalyzerRegistry()
+        create_analyzer = MagicMock(return_value="analyzer")
+
+        assert registry.get_analyzer("fingerprint", create_analyzer) == "analyzer"
+        assert registry.get_analyzer("fingerprint", create_analyzer) == "analyzer"
+
+        create_analyzer.assert_called_once()
+        assert len(registry) == 1
+        assert "fingerprint" in registry.build_timings
+
+    def test_get_analyzer_does_not_keep_failed_builds(self):
+        registry = PresidioAnalyzerRegistry()
+        create_analyzer = MagicMock(side_effect=[ValueError("failed"), "analyzer"])
+
+        try:
+            registry.get_analyzer("fingerprint", create_analyzer)
+        except ValueError:
+            pass
+
+        assert len(registry) == 0
+        assert registry.get_analyzer("fingerprint", create_analyzer) == "analyzer"
+
+    def test_recognizers_fingerprint(self):
+        fingerprint = get_recognizers_fingerprint({0: get_recognizer(['detect1'])})
+
+        assert fingerprint == get_recognizers_fingerprint({0: get_recognizer(['detect1'], ignore_list=['ignore1'])})
+        assert fingerprint != get_recognizers_fingerprint({0: get_recognizer(['detect2'])})
+        assert fingerprint != get_recognizers_fingerprint({})
@@ -0,0 +1,108 @@
+import copy
+import time
+
+import pytest
+from presidio_analyzer import RecognizerResult
+
+from api.shield.cache.scan_result_cache import ScanResultCache, estimate_size
+from api.shield.model.scanner_result import ScannerResult
+
+
+@pytest.fixture
+def cache():
+    return ScanResultCache("test-scan-results", 10000, 5)
+
+
+def test_build_key_is_content_addressed():
+    key1 = ScanResultCache.build_key("same message", "app_key", 1, "prompt")
+    key2 = ScanResultCache.build_key("same message", "app_key", 1, "prompt")
+    key3 = ScanResultCache.build_key("other message", "app_key", 1, "prompt")
+    key4 = ScanResultCache.build_key("same message", "app_key", 2, "prompt")
+
+    assert key1 == key2
+    assert key1 != key3
+    assert key1 != key4
+    assert "same message" not in key1
+
+
+def test_put_and_get(cache):
+    result = ScannerResult(traits=["PERSON"])
+    cache.put(("key1",), result)
+
+    assert cache.get(("key1",)).get_traits() == ["PERSON"]
+    assert cache.get(("key2",)) is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_cached_results_not_shared_between_requests(cache):
+    result = ScannerResult(traits=["PERSON"], analyzer_result=[RecognizerResult("PERSON", 6, 11, 0.85)])
+    cache.put(("key1",), result)
+    # The masking of the request which scanned the message updates its results in place
+    result.analyzer_result[0].start = 5
+
+    first = cache.get(("key1",))
+    first.analyzer_result[0].start = 5
+    second = cache.get(("key1",))
+
+    assert first is not second
+    assert second.analyzer_result[0].start == 6
+
+
+def test_size_based_eviction():
+    value = ScannerResult(traits=["PERSON"], analyzer_result=["x" * 100])
+    # The cache stores a copy of the value
+    value_size = estimate_size(copy.deepcopy(value))
+    cache = ScanResultCache("test-scan-results-eviction", value_size * 2, 5)
+
+    cache.put(("key1",), value)
+    cache.put(("key2",), ScannerResult(traits=["PERSON"], analyzer_result=["x" * 100]))
+    # access key1 so key2 becomes the least recently used entry
+    cache.get(("key1",))
+    cache.put(("key3",), ScannerResult(traits=["PERSON"], analyzer_result=["x" * 100]))
+
+    assert cache.get(("key2",)) is None
+    assert cache.get(("key1",)) is not None
+    assert cache.get(("key3",)) is not None
+    assert cache.evictions == 1
+    assert cache.size_bytes <= value_size * 2
+
+
+def test_value_larger_than_cache_is_not_cached():
+    cache = ScanResultCache("test-scan-results-large", 10, 5)
+    cache.put(("key1",), ScannerResult(traits=["PERSON"]))
+
+    assert cache.get(("key1",)) is None
+    assert cache.size_bytes == 0
+
+
+def test_expired_entry_is_not_served():
+    cache = ScanResultCache("test-scan-results-ttl", 10000, 0)
+    cache.put(("key1",), ScannerResult(traits=["PERSON"]))
+    time.sleep(0.01)
+
+    assert cache.get(("key1",)) is None
+    assert cache.size_bytes == 0
+
+
+def test_invalidate(cache):
+    cache.put(("app1", "key1"), ScannerResult(traits=[]))
+    cache.put(("app2", "key2"), ScannerResult(traits=[]))
+
+    assert cache.invalidate(lambda key: key[0] == "app1") == 1
+    assert cache.get(("app1", "key1")) is None
+    assert cache.get(("app2", "key2")) is not None
+
+    assert cache.invalidate() == 1
+    assert cache.size_bytes == 0
+
+
+def test_metrics_callbacks(cache):
+    cache.put(("key1",), ScannerResult(traits=[]))
+    cache.get(("key1",))
+    cache.get(("key2",))
+
+    assert cache.get_cache_size(None)[0].value == 1
+    assert cache.get_cache_size_bytes(None)[0].value == cache.size_bytes
+    assert cache.get_cache_hit_ratio(None)[0].value == 0.5
+    assert cache.get_cache_eviction_rate(None)[0].value == 0.0
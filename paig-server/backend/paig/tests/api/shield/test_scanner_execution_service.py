@@ -0,0 +1,153 @@
+import threading
+
+import pytest
+
+from api.shield.model.scan_plan import ScanOptions
+from api.shield.model.scanner_result import ScannerResult
+from api.shield.scanners.BaseScanner import Scanner
+from api.shield.services.scanner_execution_service import ScannerExecutionEngine, scan_with_scanner, \
+    scan_batch_with_scanner
+from api.shield.utils.custom_exceptions import ShieldException
+
+
+class ThreadNameScanner(Scanner):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+    def scan(self, message: str, options: ScanOptions = None) -> ScannerResult:
+        return ScannerResult([self.name], thread_name=threading.current_thread().name)
+
+
+class BatchCountingScanner(Scanner):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batch_calls = 0
+
+    def scan(self, message: str, options: ScanOptions = None) -> ScannerResult:
+        return ScannerResult([message.upper()])
+
+    def scan_batch(self, messages: list[str], options: ScanOptions = None) -> list[ScannerResult]:
+        self.batch_calls += 1
+        return super().scan_batch(messages, options)
+
+
+class FailingScanner(Scanner):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+    def scan(self, message: str, options: ScanOptions = None) -> ScannerResult:
+        raise ValueError("scan failed")
+
+
+def get_scanner(scanner_class, name):
+    return scanner_class(name=name, request_types=['prompt'], enforce_access_control=True, enable=True)
+
+
+class TestScannerExecutionEngine:
+
+    def test_engine_is_singleton(self):
+        assert ScannerExecutionEngine() is ScannerExecutionEngine()
+
+    @pytest.mark.asyncio
+    async def test_scan_messages_runs_on_scanner_pool(self):
+        engine = ScannerExecutionEngine()
+        scanners = [get_scanner(ThreadNameScanner, 'scanner1'), get_scanner(ThreadNameScanner, 'scanner2')]
+
+        scan_results, scan_timings = await engine.scan_messages(scanners, "test message", "tenant_id")
+
+        assert set(scan_results.keys()) == {'scanner1', 'scanner2'}
+        assert set(scan_timings.keys()) == {'scanner1', 'scanner2'}
+        for result in scan_results.values():
+            assert result.get('thread_name').startswith("shield-scanner")
+        assert engine.pending_tasks == 0
+
+    @pytest.mark.asyncio
+    async def test_scan_messages_without_scanners(self):
+        engine = ScannerExecutionEngine()
+        assert await engine.scan_messages([], "test message", "tenant_id") == ({}, {})
+
+    @pytest.mark.asyncio
+    async def test_scan_messages_with_exception(self):
+        engine = ScannerExecutionEngine()
+        scanners = [get_scanner(ThreadNameScanner, 'scanner1'), get_scanner(FailingScanner, 'scanner2')]
+
+        with pytest.raises(ShieldException) as e:
+            await engine.scan_messages(scanners, "test message", "tenant_id")
+
+        assert "Scanner scanner2 failed" in str(e.value)
+        assert engine.pending_tasks == 0
+
+    @pytest.mark.asyncio
+    async def test_scan_messages_queue_full(self, monkeypatch):
+        engine = ScannerExecutionEngine()
+        monkeypatch.setattr(engine, 'max_queue_size', 1)
+        scanners = [get_scanner(ThreadNameScanner, 'scanner1'), get_scanner(ThreadNameScanner, 'scanner2')]
+
+        with pytest.raises(ShieldException) as e:
+            await engine.scan_messages(scanners, "test message", "tenant_id")
+
+        assert "Scanner queue is full" in str(e.value)
+        assert engine.pending_tasks == 0
+
+    @pytest.mark.asyncio
+    async def test_scan_messages_batch(self):
+        engine = ScannerExecutionEngine()
+        scanner1 = get_scanner(BatchCountingScanner, 'scanner1')
+        scanner2 = get_scanner(BatchCountingScanner, 'scanner2')
+
+        results = await engine.scan_messages_batch([scanner1, scanner2], ["msg1", "msg2", "msg3"], "tenant_id")
+
+        assert scanner1.batch_calls == 1
+        assert scanner2.batch_calls == 1
+        assert len(results) == 3
+        for message, (scan_results, scan_timings) in zip(["msg1", "msg2", "msg3"], results):
+            assert scan_results['scanner1'].get_traits() == [message.upper()]
+            assert scan_results['scanner2'].get_traits() == [message.upper()]
+            assert set(scan_timings.keys()) == {'scanner1', 'scanner2'}
+        assert engine.pending_tasks == 0
+
+    @pytest.mark.asyncio
+    async def test_scan_messages_batch_without_scanners(self):
+        engine = ScannerExecutionEngine()
+        assert await engine.scan_messages_batch([], ["msg1", "msg2"], "tenant_id") == [({}, {}), ({}, {})]
+
+    @pytest.mark.asyncio
+    async def test_scan_messages_batch_with_exception(self):
+        engine = ScannerExecutionEngine()
+
+        with pytest.raises(ShieldException) as e:
+            await engine.scan_messages_batch([get_scanner(FailingScanner, 'scanner1')], ["msg1"], "tenant_id")
+
+        assert "Scanner scanner1 failed" in str(e.value)
+
+    def test_get_executor_defaults_to_thread_pool(self):
+        engine = ScannerExecutionEngine()
+        scanner = get_scanner(ThreadNameScanner, 'scanner1')
+        scanner.execution_mode = 'process'
+
+        # process pool is disabled by default
+        assert engine._get_executor(scanner) is engine.thread_pool
+
+    def test_metric_callbacks(self):
+        engine = ScannerExecutionEngine()
+
+        assert engine.get_pool_size(None)[0].value == engine.max_thread_workers
+        assert engine.get_queue_depth(None)[0].value == 0
+
+    def test_scan_with_scanner(self):
+        scanner = get_scanner(ThreadNameScanner, 'scanner1')
+
+        scanner_name, result, scan_time = scan_with_scanner(scanner, "test message", "tenant_id", 0.0)
+
+        assert scanner_name == 'scanner1'
+        assert result.get_traits() == ['scanner1']
+        assert float(scan_time) >= 0
+
+    def test_scan_batch_with_scanner(self):
+        scanner = get_scanner(BatchCountingScanner, 'scanner1')
+
+        scanner_name, results, scan_time = scan_batch_with_scanner(scanner, ["msg1", "msg2"], "tenant_id", 0.0)
+
+        assert scanner_name == 'scanner1'
+        assert [result.get_traits() for result in results] == [["MSG1"], ["MSG2"]]
+        assert float(scan_time) >= 0
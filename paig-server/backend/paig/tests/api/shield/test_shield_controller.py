@@ -49,6 +49,29 @@ class TestShieldController:
         assert response.status_code == 200
         assert response.body.decode() == "Initialization completed successfully for tenant test_tenant"
 
+    @pytest.mark.asyncio
+    async def test_init_app_negotiates_encryption_mode(self, controller, mock_shield_service):
+        # Arrange
+        mock_request = MagicMock(spec=Request)
+        mock_request.headers = {"x-tenant-id": "test_tenant", "x-user-role": "test_role"}
+        mock_request.json = AsyncMock(return_value={
+            "shieldServerKeyId": "test_server_key",
+            "shieldPluginKeyId": "test_plugin_key",
+            "applicationKey": "test_application_key",
+            "encryptionModes": ["envelope", "chunked"]
+        })
+        mock_shield_service.initialize_tenant = AsyncMock()
+
+        # Act
+        response = await controller.init_app(mock_request)
+
+        # Assert
+        assert response.status_code == 200
+        assert json.loads(response.body.decode()) == {
+            "message": "Initialization completed successfully for tenant test_tenant",
+            "encryptionMode": "envelope"
+        }
+
     @pytest.mark.asyncio
     async def test_authorize(self, controller, mock_shield_service):
         # Arrange
@@ -66,6 +89,35 @@ class TestShieldController:
         mock_shield_service.authorize.assert_awaited_once()
         assert response.status_code == 200
 
+    @pytest.mark.asyncio
+    async def test_authorize_batch(self, controller, mock_shield_service):
+        # Arrange
+        mock_auth_response = MagicMock(spec=AuthorizeResponse)
+        mock_auth_response.__dict__ = {"key": "value"}
+
+        async def authorize_batch(auth_requests):
+            assert len(auth_requests) == 2
+            yield 1, BadRequestException("invalid message")
+            yield 0, mock_auth_response
+
+        mock_shield_service.authorize_batch = authorize_batch
+        batch_request = {"requests": [authorize_req_data(), {"messages": ["missing fields"]}, authorize_req_data()]}
+
+        # Act
+        response = await controller.authorize_batch(batch_request, "test_tenant", "test_role")
+        lines = [json.loads(line) async for line in response.body_iterator]
+
+        # Assert
+        assert response.media_type == "application/x-ndjson"
+        assert lines[0]["index"] == 1 and lines[0]["error_code"] == 400
+        assert lines[1] == {"index": 2, "error_code": 400, "success": False, "message": "invalid message"}
+        assert lines[2] == {"index": 0, "response": {"key": "value"}}
+
+    @pytest.mark.asyncio
+    async def test_authorize_batch_without_requests(self, controller):
+        with pytest.raises(BadRequestException):
+            await controller.authorize_batch({"requests": []}, "test_tenant", "test_role")
+
     @pytest.mark.asyncio
     async def test_authorize_vectordb(self, controller, mock_shield_service):
         # Arrange
@@ -83,6 +135,30 @@ class TestShieldController:
         mock_shield_service.authorize_vectordb.assert_awaited_once()
         assert response.status_code == 200
 
+    @pytest.mark.asyncio
+    async def test_authorize_vectordb_revalidation(self, controller, mock_shield_service):
+        # Arrange
+        mock_request = {"userId": "test_user", "applicationKey": "test_key"}
+        vectordb_response = AuthorizeVectorDBResponse({"filterExpression": "users == 'test_user'"})
+        mock_shield_service.authorize_vectordb = AsyncMock(return_value=vectordb_response)
+
+        # Act
+        response = await controller.authorize_vectordb(mock_request, "test_tenant", "test_role")
+        etag = response.headers["ETag"]
+        not_modified_response = await controller.authorize_vectordb(mock_request, "test_tenant", "test_role",
+                                                                     f'"other", W/{etag}')
+        vectordb_response.filterExpression = "users == 'other_user'"
+        modified_response = await controller.authorize_vectordb(mock_request, "test_tenant", "test_role", etag)
+
+        # Assert
+        assert response.status_code == 200
+        assert not_modified_response.status_code == 304
+        assert not_modified_response.body == b""
+        assert not_modified_response.headers["ETag"] == etag
+        assert modified_response.status_code == 200
+        assert modified_response.headers["ETag"] != etag
+        assert json.loads(modified_response.body)["filterExpression"] == "users == 'other_user'"
+
     @pytest.mark.asyncio
     async def test_audit(self, controller, mock_shield_service):
         # Arrange
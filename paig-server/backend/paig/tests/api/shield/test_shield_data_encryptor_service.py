@@ -1,6 +1,6 @@
 from api.shield.model.shield_audit import ShieldAuditViaApi
 from api.shield.services.tenant_data_encryptor_service import ShieldDataEncryptor, EncryptionKeyRefresher,TenantDataEncryptorService
-from paig_common.encryption import DataEncryptor, RSAKeyUtil
+from paig_common.encryption import DataEncryptor, RSAKeyUtil, ENCRYPTION_MODE_ENVELOPE, ENVELOPE_PREFIX
 from api.shield.utils.custom_exceptions import ShieldException
 import pytest
 
@@ -110,6 +110,19 @@ class TestShieldDataEncryptor:
         DataEncryptor.decrypt_data.assert_called_once_with(data_to_decrypt)
         assert decrypted_data == "decrypted_data"
 
+    #  encrypt method seals the given data in the envelope mode, and decrypt detects the envelope format
+    def test_encrypt_decrypt_envelope_mode(self):
+        rsa_key_info = RSAKeyUtil.generate_key_pair()
+        shield_data_encryptor = ShieldDataEncryptor("example_tenant", False)
+        shield_data_encryptor.data_encryptor = DataEncryptor(rsa_key_info.public_key_encoded_str,
+                                                             rsa_key_info.private_key_encoded_str)
+
+        encrypted_data = shield_data_encryptor.encrypt("Hello, World!", ENCRYPTION_MODE_ENVELOPE)
+
+        assert encrypted_data.startswith(ENVELOPE_PREFIX)
+        assert shield_data_encryptor.decrypt(encrypted_data) == "Hello, World!"
+        assert not shield_data_encryptor.encrypt("Hello, World!").startswith(ENVELOPE_PREFIX)
+
     # Decrypts all non-null values in the 'messages' list of the given 'shield_audit' object using the 'decrypt'
     # method of the 'TenantDataEncryptorService' class, and updates the corresponding values in the 'message_object'
     # dictionary.
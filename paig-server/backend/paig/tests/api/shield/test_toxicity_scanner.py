@@ -30,3 +30,20 @@ class TestToxicContentScanner:
         assert result is not None
         assert result.get('traits') == ["TOXIC"]
         assert result.get('score') > 0.5
+
+    def test_scan_batch(self):
+        toxic_scanner = ToxicContentScanner(name="toxic_content_scanner",
+                                            request_types=['prompt', 'reply'],
+                                            enforce_access_control=True,
+                                            model_score_threshold=0.5,
+                                            entity_type="TOXIC",
+                                            enable=True)
+
+        messages = ["What is LLM Guard library?", "You are a stupid person"]
+        results = toxic_scanner.scan_batch(messages)
+
+        assert len(results) == 2
+        assert results[0].get('traits') == []
+        assert results[1].get('traits') == ["TOXIC"]
+        assert results[1].get('score') > 0.5
+        assert results[1].get('analyzer_result')[0].end == len(messages[1])
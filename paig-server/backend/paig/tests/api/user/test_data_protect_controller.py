@@ -0,0 +1,30 @@
+import base64
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from api.user.api_schemas.data_protect_schema import DecryptListMessagesByID
+from api.user.controllers.data_protect_controller import DataProtectController
+from paig_common.encryption import DataEncryptor, RSAKeyUtil, ENCRYPTION_MODE_CHUNKED, ENCRYPTION_MODE_ENVELOPE, \
+    ENVELOPE_PREFIX
+
+
+@pytest.mark.asyncio
+async def test_decrypt_list_messages_envelope_and_chunked():
+    key_pair = RSAKeyUtil().generate_key_pair()
+    encryptor = DataEncryptor(public_key=key_pair.public_key_encoded_str,
+                              private_key=key_pair.private_key_encoded_str)
+    envelope_message = encryptor.encrypt("audit prompt", ENCRYPTION_MODE_ENVELOPE)
+    chunked_message = encryptor.encrypt("audit reply", ENCRYPTION_MODE_CHUNKED)
+    assert envelope_message.startswith(ENVELOPE_PREFIX)
+
+    encryption_service = MagicMock()
+    encryption_service.get_encryption_key_by_id = AsyncMock(return_value=MagicMock(
+        public_key=key_pair.public_key_encoded_str, private_key=key_pair.private_key_encoded_str))
+    params = DecryptListMessagesByID(encryptionKeyId=1, encryptedDataList=[envelope_message, chunked_message])
+
+    response = await DataProtectController().decrypt_list_messages(encryption_service, params)
+
+    assert response["status"] == 0
+    assert [base64.b64decode(data).decode("utf-8") for data in response["decryptedDataList"]] == \
+           ["audit prompt", "audit reply"]
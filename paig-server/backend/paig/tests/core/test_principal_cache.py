@@ -0,0 +1,150 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import text
+
+from api.authz.utils.cache_invalidation import invalidate_user_cache
+from api.user.services.user_service import UserService
+from core.db_session import session as db_session
+from core.exceptions import UnauthorizedException
+from core.security import authentication
+from core.security.authentication import get_auth_user, get_auth_token_user_info
+from core.security.jwt import JWTHandler, JWTExpiredError
+from core.security.principal_cache import PrincipalCache, get_token_fingerprint
+
+
+def make_request(session=None):
+    request = MagicMock()
+    request.cookies = {"PRIVACERAPAIGSESSION": session} if session else {}
+    return request
+
+
+def make_user_controller(is_tenant_owner=True):
+    user_controller = MagicMock()
+    user_controller.get_user_info = AsyncMock(return_value=MagicMock(
+        id=1, username="admin", is_tenant_owner=is_tenant_owner, email="admin@example.com"))
+    return user_controller
+
+
+@pytest.fixture
+def principal_cache(monkeypatch):
+    cache = PrincipalCache(max_size=100, expiration=60)
+    monkeypatch.setattr(authentication, "principal_cache", cache)
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_auth_user_cached_by_token(principal_cache):
+    session = JWTHandler.encode({"id": 1, "username": "admin"})
+    user_controller = make_user_controller()
+
+    first = await get_auth_user(make_request(session), user_controller)
+    first["roles"].append("USER")
+    second = await get_auth_user(make_request(session), user_controller)
+
+    assert second == {"id": 1, "username": "admin", "roles": ["OWNER"], "email": "admin@example.com"}
+    assert user_controller.get_user_info.await_count == 1
+    assert principal_cache.principal_cache.hits == 1
+    assert principal_cache.token_cache.hits == 1
+    assert principal_cache.get_saved_db_time_ms() >= 0.0
+
+
+@pytest.mark.asyncio
+async def test_auth_user_reloaded_after_user_change(principal_cache, monkeypatch):
+    monkeypatch.setattr("api.authz.utils.cache_decorator.caches",
+                        {"get_auth_user": [principal_cache.principal_cache]})
+    session = JWTHandler.encode({"id": 1, "username": "admin"})
+    user_controller = make_user_controller()
+
+    await get_auth_user(make_request(session), user_controller)
+    user_controller.get_user_info.return_value.is_tenant_owner = False
+    invalidate_user_cache()
+
+    assert (await get_auth_user(make_request(session), user_controller))["roles"] == ["USER"]
+    assert user_controller.get_user_info.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_auth_user_reloaded_after_logout(principal_cache):
+    session = JWTHandler.encode({"id": 1, "username": "admin"})
+    other_session = JWTHandler.encode({"id": 2, "username": "user"})
+    user_controller = make_user_controller()
+
+    await get_auth_user(make_request(session), user_controller)
+    await get_auth_user(make_request(other_session), user_controller)
+    principal_cache.invalidate_token(session)
+
+    assert get_token_fingerprint(session) not in principal_cache.principal_cache.cache
+    assert get_token_fingerprint(other_session) in principal_cache.principal_cache.cache
+    await get_auth_user(make_request(session), user_controller)
+    assert user_controller.get_user_info.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_unknown_user_not_cached(principal_cache):
+    session = JWTHandler.encode({"id": 1, "username": "admin"})
+    user_controller = make_user_controller()
+    user_controller.get_user_info.return_value = None
+
+    for _ in range(2):
+        with pytest.raises(UnauthorizedException):
+            await get_auth_user(make_request(session), user_controller)
+
+    assert user_controller.get_user_info.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_token_rejected_when_cached(principal_cache):
+    session = JWTHandler.encode({"id": 1, "username": "admin"})
+    assert await get_auth_token_user_info(make_request(session)) == {"id": 1, "username": "admin"}
+
+    fingerprint = get_token_fingerprint(session)
+    claims, expiry = principal_cache.token_cache.cache[fingerprint]
+    principal_cache.token_cache.cache[fingerprint] = (dict(claims, exp=int(time.time()) - 1), expiry)
+
+    decode = MagicMock(side_effect=JWTExpiredError())
+    with pytest.raises(JWTExpiredError):
+        await principal_cache.get_token_claims(session, decode)
+    assert fingerprint not in principal_cache.token_cache.cache
+
+
+@pytest.mark.asyncio
+async def test_auth_user_racing_uncommitted_user_update_not_cached(principal_cache, monkeypatch, set_context_session):
+    monkeypatch.setattr("api.authz.utils.cache_decorator.caches",
+                        {"get_auth_user": [principal_cache.principal_cache]})
+    session = JWTHandler.encode({"id": 1, "username": "admin"})
+    other_session = JWTHandler.encode({"id": 1, "username": "admin", "sid": 2})
+    stored_user = {"is_tenant_owner": True}
+    released = asyncio.Event()
+    released.set()
+
+    async def get_user_info(**kwargs):
+        is_tenant_owner = stored_user["is_tenant_owner"]
+        await released.wait()
+        return MagicMock(id=1, username="admin", is_tenant_owner=is_tenant_owner, email="admin@example.com")
+
+    user_controller = MagicMock(get_user_info=get_user_info)
+    user_model = MagicMock()
+    user_service = UserService(
+        user_repository=MagicMock(get_user_with_related_data=AsyncMock(return_value=user_model),
+                                  update_user=AsyncMock(return_value=user_model)),
+        group_repository=MagicMock(get_groups_by_in_list=AsyncMock(return_value=[])),
+        gov_service_validation_util=MagicMock())
+    await db_session.execute(text("SELECT 1"))
+
+    # The owner is demoted, requests authenticate before the commit and until after it
+    await user_service.update_user(1, {"id": 1, "roles": ["OWNER"]}, {"roles": ["USER"], "password": "secret"})
+    assert (await get_auth_user(make_request(session), user_controller))["roles"] == ["OWNER"]
+    released.clear()
+    load = asyncio.create_task(get_auth_user(make_request(other_session), user_controller))
+    await asyncio.sleep(0)
+    await db_session.commit()
+    stored_user["is_tenant_owner"] = False
+    released.set()
+
+    assert (await load)["roles"] == ["OWNER"]
+    assert (await get_auth_user(make_request(session), user_controller))["roles"] == ["USER"]
+    assert (await get_auth_user(make_request(other_session), user_controller))["roles"] == ["USER"]
+    await db_session.remove()